@@ -260,6 +260,7 @@ User: "статус заказа 234"
 6. Естественные даты: "сегодня", "завтра", "послезавтра" → передавай как есть в create_order
 7. Поддерживай самовывоз: delivery_type="pickup"
 8. **КРИТИЧНО**: При создании заказа ВСЕГДА устанавливай payment_method="kaspi"
+9. Предлагай только товары с in_stock=true из list_products; max_quantity — сколько штук можно собрать сейчас
 </core_rules>
 
 <personalization>
@@ -363,7 +363,7 @@ async def update_client(
                 update(Order)
                 .where(Order.phone == old_phone)
                 .where(Order.shop_id == shop_id)
-                .values(phone=normalized_phone)
+                .values(phone=normalized_phone, phone_normalized=normalized_phone)
             )
             await session.execute(orders_update_stmt)
 
@@ -8,6 +8,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select
 
 from database import get_session
+from core.http_cache import conditional_get
+from models.catalog import SCOPE_FAQS
 from models import (
     FAQ, FAQCreate, FAQUpdate, FAQRead,
     StaticPage, StaticPageCreate, StaticPageUpdate, StaticPageRead,
@@ -22,7 +24,7 @@ router = APIRouter()
 # FAQ Endpoints
 # ===============================
 
-@router.get("/faqs")
+@router.get("/faqs", dependencies=[Depends(conditional_get(SCOPE_FAQS, max_age=300, s_maxage=600))])
 async def get_faqs(
     *,
     session: AsyncSession = Depends(get_session),
@@ -7,7 +7,7 @@ Provides clean interfaces for loading inventory data with relations.
 
 from typing import List, Tuple, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlmodel import select, desc
+from sqlmodel import select, desc, func
 from fastapi import HTTPException
 
 from models import (
@@ -94,6 +94,28 @@ async def load_inventory_check_items(
     return list(result.scalars().all())
 
 
+async def count_inventory_check_differences(
+    session: AsyncSession,
+    check_id: int
+) -> int:
+    """
+    Count items of an inventory check that differ from the system quantity.
+
+    Args:
+        session: Database session
+        check_id: Inventory check ID
+
+    Returns:
+        Number of items an apply reconciles
+    """
+    query = select(func.count(InventoryCheckItem.id)).where(
+        InventoryCheckItem.inventory_check_id == check_id,
+        InventoryCheckItem.difference != 0
+    )
+    result = await session.execute(query)
+    return result.scalar()
+
+
 async def load_inventory_check_with_items(
     session: AsyncSession,
     check_id: int
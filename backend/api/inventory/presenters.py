@@ -8,7 +8,7 @@ Handles mapping between backend models and frontend expectations.
 from typing import List, Dict, Any
 from models import (
     InventoryCheck, InventoryCheckItem, WarehouseItem,
-    InventoryCheckRead, InventoryCheckItemRead
+    InventoryCheckRead, InventoryCheckItemRead, ProductMaxQuantity
 )
 
 
@@ -54,11 +54,35 @@ def build_inventory_check_read(
         comment=check.comment,
         status=check.status,
         applied_at=check.applied_at,
+        items_applied=check.items_applied,
+        apply_error=check.apply_error,
+        shop_id=check.shop_id,
         created_at=check.created_at,
         items=[build_inventory_check_item_read(item) for item in items]
     )
 
 
+def build_inventory_check_progress(check: InventoryCheck, items_total: int) -> Dict[str, Any]:
+    """
+    Build progress response for an inventory check apply.
+
+    Args:
+        check: InventoryCheck instance
+        items_total: Number of items with a difference to reconcile
+
+    Returns:
+        Dictionary with status and reconciled/total item counts
+    """
+    return {
+        "check_id": check.id,
+        "status": check.status,
+        "items_applied": check.items_applied,
+        "items_total": items_total,
+        "applied_at": check.applied_at,
+        "error": check.apply_error
+    }
+
+
 def build_warehouse_item_for_inventory(item: WarehouseItem) -> Dict[str, Any]:
     """
     Build warehouse item dictionary for inventory preparation.
@@ -121,3 +145,20 @@ def build_inventory_summary(
         "overview": overview,
         "items": items
     }
+
+
+def build_max_quantities(product_ids: List[int], max_quantities: Dict[int, int]) -> List[ProductMaxQuantity]:
+    """
+    Build the bulk max-quantity response.
+
+    Args:
+        product_ids: Requested product IDs (order is kept, duplicates dropped)
+        max_quantities: product_id -> max_quantity (unknown ids absent)
+
+    Returns:
+        List of ProductMaxQuantity, 0 for unknown products
+    """
+    return [
+        ProductMaxQuantity(product_id=product_id, max_quantity=max_quantities.get(product_id, 0))
+        for product_id in dict.fromkeys(product_ids)
+    ]
@@ -10,17 +10,18 @@ All route handlers follow the pattern:
 """
 
 from typing import List, Optional
-from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from database import get_session
 from models import (
     InventoryCheck, InventoryCheckCreate, InventoryCheckRead,
-    InventoryCheckItem, WarehouseItem, WarehouseOperation, WarehouseOperationType,
-    OrderItemRequest
+    InventoryCheckItem, WarehouseItem,
+    OrderItemRequest, MaxQuantityRequest, ProductMaxQuantity
 )
-from services.inventory_service import InventoryService, InsufficientStockError, ReservationError
+from services.availability_engine import AvailabilityEngine
+from services.inventory_service import InventoryService, InventoryError, InsufficientStockError, ReservationError
 from auth_utils import get_current_user_shop_id
 
 from . import helpers
@@ -175,6 +176,23 @@ async def cleanup_expired_reservations(
         raise HTTPException(status_code=500, detail=f"Failed to cleanup reservations: {str(e)}")
 
 
+@router.post("/audit-reserved-quantities", response_model=dict)
+async def audit_reserved_quantities(
+    *,
+    session: AsyncSession = Depends(get_session),
+    repair: bool = False
+):
+    """
+    Compare warehouse reserved_quantity counters with open reservations.
+
+    Reports drifted items; with repair=true the counters are recomputed.
+    """
+    try:
+        return await InventoryService.audit_reserved_quantities(session, repair)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to audit reserved quantities: {str(e)}")
+
+
 @router.post("/validate-order-items", response_model=dict)
 async def validate_order_items_stock(
     *,
@@ -195,6 +213,21 @@ async def validate_order_items_stock(
     }
 
 
+@router.post("/max-quantities", response_model=List[ProductMaxQuantity])
+async def get_max_quantities(
+    *,
+    session: AsyncSession = Depends(get_session),
+    request: MaxQuantityRequest
+):
+    """
+    How many of each product can be assembled right now (storefront quantity pickers).
+
+    Answered from the precomputed per-shop figures, in the order of product_ids.
+    """
+    max_quantities = await AvailabilityEngine.get_product_max_quantities(session, request.product_ids)
+    return presenters.build_max_quantities(request.product_ids, max_quantities)
+
+
 # ===== Dynamic Routes (must come AFTER specific routes) =====
 
 @router.get("/{check_id}", response_model=InventoryCheckRead)
@@ -208,61 +241,58 @@ async def get_inventory_check(
     return presenters.build_inventory_check_read(check, items)
 
 
+@router.get("/{check_id}/progress", response_model=dict)
+async def get_inventory_check_progress(
+    *,
+    session: AsyncSession = Depends(get_session),
+    check_id: int
+):
+    """Progress of applying an inventory check (for background applies)"""
+    check = await helpers.get_inventory_check_by_id(session, check_id, raise_if_not_found=True)
+    items_total = await helpers.count_inventory_check_differences(session, check_id)
+    return presenters.build_inventory_check_progress(check, items_total)
+
+
 @router.post("/{check_id}/apply")
 async def apply_inventory_check(
     *,
     session: AsyncSession = Depends(get_session),
-    check_id: int
+    background_tasks: BackgroundTasks,
+    check_id: int,
+    background: bool = Query(
+        False,
+        description="Apply in the background and return 202 at once; poll /{check_id}/progress"
+    )
 ):
-    """Apply inventory check - update warehouse quantities"""
-    # Get inventory check
+    """
+    Apply inventory check - update warehouse quantities.
+
+    Differences are written with one bulk UPDATE and one bulk ledger insert.
+    With background=true the check is applied in committed chunks after the
+    response is sent; a failed background apply resumes where it stopped.
+    So does one whose worker died: an apply without a heartbeat for
+    INVENTORY_APPLY_STALE_SECONDS no longer blocks a new one.
+    """
     check = await helpers.get_inventory_check_by_id(session, check_id, raise_if_not_found=True)
 
     if check.status == "applied":
         raise HTTPException(status_code=400, detail="Inventory check already applied")
+    if not await InventoryService.claim_inventory_check(session, check_id):
+        await session.rollback()
+        raise HTTPException(status_code=409, detail="Inventory check is already being applied")
+
+    if background:
+        await session.commit()
+        background_tasks.add_task(InventoryService.apply_inventory_check_job, check_id)
+        return JSONResponse(
+            status_code=202,
+            content={"message": "Inventory check is being applied", "check_id": check_id, "status": "applying"}
+        )
 
-    # Get all items for this check
-    check_items = await helpers.load_inventory_check_items(session, check_id)
-
-    # Apply changes to warehouse
-    for check_item in check_items:
-        if check_item.difference != 0:
-            # Get warehouse item
-            warehouse_item = await helpers.get_warehouse_item_by_id(
-                session, check_item.warehouse_item_id, raise_if_not_found=False
-            )
-            if not warehouse_item:
-                continue
-
-            # Update quantity
-            old_quantity = warehouse_item.quantity
-            warehouse_item.quantity = check_item.actual_quantity
-
-            # Create operation record
-            description = f"Инвентаризация: было {old_quantity} шт, стало {check_item.actual_quantity} шт"
-            if check_item.difference > 0:
-                description += f" (излишки: +{check_item.difference} шт)"
-            else:
-                description += f" (недостача: {check_item.difference} шт)"
-
-            if check.comment:
-                description += f". Комментарий: {check.comment}"
-
-            description += f". Проводил: {check.conducted_by}"
-
-            operation = WarehouseOperation(
-                warehouse_item_id=warehouse_item.id,
-                operation_type=WarehouseOperationType.INVENTORY,
-                quantity_change=check_item.difference,
-                balance_after=warehouse_item.quantity,
-                description=description
-            )
-            session.add(operation)
-
-    # Update inventory check status
-    check.status = "applied"
-    check.applied_at = datetime.now()
-
-    await session.commit()
+    try:
+        await InventoryService.apply_inventory_check(session, check_id)
+    except InventoryError as e:
+        await session.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
 
     return {"message": "Inventory check applied successfully", "check_id": check_id}
@@ -8,6 +8,7 @@ This module provides order-related API endpoints organized by functionality:
 - availability: Availability checks and public marketplace
 - photos: Photo upload and management
 - assignments: Team member assignments
+- events: Server-Sent Events stream of order changes
 
 All routers are combined and exported as a single APIRouter for backward compatibility.
 """
@@ -15,12 +16,14 @@ All routers are combined and exported as a single APIRouter for backward compati
 from fastapi import APIRouter
 
 # Import all sub-routers
-from . import crud, status, tracking, availability, photos, assignments, admin
+from . import crud, status, tracking, availability, photos, assignments, admin, events
 
 # Create main router
 router = APIRouter()
 
 # Include all sub-routers with their endpoints
+# (events first: /events must not be taken for /{order_id})
+router.include_router(events.router, tags=["Orders - Events"])
 router.include_router(crud.router, tags=["Orders - CRUD"])
 router.include_router(status.router, tags=["Orders - Status"])
 router.include_router(tracking.router, tags=["Orders - Tracking"])
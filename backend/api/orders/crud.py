@@ -6,11 +6,10 @@ order items management, and dashboard statistics.
 """
 
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, Path
+from fastapi import APIRouter, Depends, HTTPException, Query, Path, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
-from sqlalchemy import func
-from sqlmodel import select, col
+from sqlmodel import select
 
 from database import get_session
 from models import (
@@ -19,11 +18,14 @@ from models import (
     OrderHistory, OrderPhoto, Product, User
 )
 from services.order_service import OrderService
+from services.order_search_service import OrderSearchService
+from services.order_stats_service import OrderStatsService
 from services.client_service import client_service
 from services.inventory_service import InventoryService
 from services.profile_builder_service import profile_builder_service
 from auth_utils import get_current_user_shop_id, get_current_user
 from utils import normalize_phone_number
+from core.pagination import apply_keyset, set_next_cursor
 from .presenters import build_order_read
 
 router = APIRouter()
@@ -73,10 +75,12 @@ async def get_orders(
     limit: int = Query(50, ge=1, le=100, description="Number of orders to return"),
     status: Optional[OrderStatus] = Depends(parse_order_status),
     customer_phone: Optional[str] = Query(None, description="Filter by customer phone"),
-    search: Optional[str] = Query(None, description="Search in customer name or order number"),
+    search: Optional[str] = Query(None, description="Search by phone, customer name or order number"),
     assigned_to_me: bool = Query(False, description="Filter orders assigned to current user (as responsible or courier)"),
     assigned_to_id: Optional[int] = Query(None, description="Filter by assigned responsible person ID"),
     courier_id: Optional[int] = Query(None, description="Filter by assigned courier ID"),
+    cursor: Optional[str] = Query(None, description="Keyset cursor from X-Next-Cursor (empty value starts cursor mode; skip is ignored)"),
+    response: Response
 ):
     """
     Get list of orders with filtering (status filter is case-insensitive).
@@ -85,6 +89,8 @@ async def get_orders(
     - assigned_to_me: Show orders where I'm either responsible or courier
     - assigned_to_id: Filter by specific responsible person
     - courier_id: Filter by specific courier
+
+    Cursor mode sets X-Next-Cursor while more pages remain.
     """
 
     # Build query with eager loading of items
@@ -98,13 +104,10 @@ async def get_orders(
         query = query.where(Order.status == status)
 
     if customer_phone:
-        query = query.where(Order.phone == customer_phone)
+        query = OrderSearchService.apply_phone(query, customer_phone)
 
     if search:
-        query = query.where(
-            col(Order.customerName).ilike(f"%{search}%") |
-            col(Order.orderNumber).ilike(f"%{search}%")
-        )
+        query = OrderSearchService.apply_search(query, search)
 
     # Assignment filters
     if assigned_to_me:
@@ -120,16 +123,20 @@ async def get_orders(
     if courier_id:
         query = query.where(Order.courier_id == courier_id)
 
-    # Order by creation date (newest first)
-    query = query.order_by(Order.created_at.desc())
-
-    # Apply pagination
-    query = query.offset(skip).limit(limit)
+    # Order by creation date (newest first) and paginate
+    if cursor is not None:
+        query = apply_keyset(query, Order.created_at, Order.id, cursor, session.get_bind().dialect.name)
+    else:
+        query = query.order_by(Order.created_at.desc()).offset(skip)
+    query = query.limit(limit)
 
     # Execute query - items will be loaded automatically
     result = await session.execute(query)
     orders = result.scalars().all()
 
+    if cursor is not None:
+        set_next_cursor(response, orders, limit)
+
     # Create response models using pre-loaded items
     return [
         build_order_read(order, order.items, [])
@@ -137,6 +144,42 @@ async def get_orders(
     ]
 
 
+@router.get("/search", response_model=List[OrderRead])
+async def search_orders(
+    *,
+    session: AsyncSession = Depends(get_session),
+    shop_id: int = Depends(get_current_user_shop_id),
+    q: str = Query(..., min_length=1, max_length=100, description="Phone number, part of a customer name, order number or phone"),
+    status: Optional[OrderStatus] = Depends(parse_order_status),
+    limit: int = Query(20, ge=1, le=100, description="Number of orders to return"),
+    cursor: Optional[str] = Query(None, description="Keyset cursor from X-Next-Cursor (empty value starts cursor mode)"),
+    response: Response
+):
+    """
+    Search orders by phone, customer name or order number, newest first.
+
+    A full phone number in any format (8 701 521 15 45, +77015211545) matches
+    the customer's orders exactly; other queries match substrings.
+    Cursor mode sets X-Next-Cursor while more pages remain.
+    """
+    query = select(Order).options(selectinload(Order.items)).where(Order.shop_id == shop_id)
+    query = OrderSearchService.apply_search(query, q)
+    if status:
+        query = query.where(Order.status == status)
+
+    if cursor is not None:
+        query = apply_keyset(query, Order.created_at, Order.id, cursor, session.get_bind().dialect.name)
+    else:
+        query = query.order_by(Order.created_at.desc(), Order.id.desc())
+    result = await session.execute(query.limit(limit))
+    orders = result.scalars().all()
+
+    if cursor is not None:
+        set_next_cursor(response, orders, limit)
+
+    return [build_order_read(order, order.items, []) for order in orders]
+
+
 @router.get("/{order_id}", response_model=OrderRead)
 async def get_order(
     *,
@@ -389,34 +432,8 @@ async def get_order_dashboard_stats(
     session: AsyncSession = Depends(get_session),
     shop_id: int = Depends(get_current_user_shop_id)
 ):
-    """Get order statistics for admin dashboard"""
-
-    # Count orders by status for this shop
-    status_stats = {}
-    for status in OrderStatus:
-        status_query = select(Order.id).where(Order.status == status).where(Order.shop_id == shop_id)
-        status_result = await session.execute(status_query)
-        status_stats[status.value] = len(status_result.all())
-
-    # Count today's orders for this shop
-    today = datetime.now().date()
-    today_query = select(Order.id).where(func.date(Order.created_at) == today).where(Order.shop_id == shop_id)
-    today_result = await session.execute(today_query)
-    today_count = len(today_result.all())
-
-    # Calculate today's revenue for this shop
-    today_revenue_query = select(Order.total).where(
-        func.date(Order.created_at) == today
-    ).where(Order.status.in_([OrderStatus.PAID, OrderStatus.DELIVERED])).where(Order.shop_id == shop_id)
-    today_revenue_result = await session.execute(today_revenue_query)
-    today_revenue = sum(today_revenue_result.scalars().all())
-
-    return {
-        "orders_by_status": status_stats,
-        "orders_today": today_count,
-        "revenue_today": today_revenue,
-        "total_orders": sum(status_stats.values())
-    }
+    """Get order statistics for admin dashboard (served from a per-shop rollup)"""
+    return await OrderStatsService.get_dashboard_stats(session, shop_id)
 
 
 # ===============================
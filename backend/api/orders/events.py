@@ -0,0 +1,98 @@
+"""
+Orders Events Router - Server-Sent Events stream of order changes
+
+Admin clients keep one idle connection open instead of polling GET /orders/
+and the dashboard stats. Events come from OrderEventBroker.
+"""
+
+import asyncio
+import json
+from typing import AsyncIterator
+
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_session
+from services.order_event_broker import OrderEventBroker
+from models import User
+from auth_utils import (
+    STREAM_TOKEN_EXPIRE_SECONDS, create_stream_token, get_current_active_user, get_stream_user_shop_id
+)
+
+router = APIRouter()
+
+# Comment line sent when idle so proxies keep the connection open
+KEEPALIVE_SECONDS = 15
+
+# Client reconnect delay after a dropped stream (EventSource "retry")
+RECONNECT_MILLISECONDS = 3000
+
+
+async def _event_stream(request: Request, shop_id: int, queue: asyncio.Queue) -> AsyncIterator[str]:
+    try:
+        yield f"retry: {RECONNECT_MILLISECONDS}\n\n"
+        while not await request.is_disconnected():
+            try:
+                order_event = await asyncio.wait_for(queue.get(), timeout=KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if order_event is None:
+                # Fell behind and was dropped: the client reconnects and refetches
+                return
+            yield f"event: {order_event['type']}\ndata: {json.dumps(order_event)}\n\n"
+    finally:
+        OrderEventBroker.unsubscribe(shop_id, queue)
+
+
+@router.post("/events/token")
+async def create_order_events_token(
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Issue a short-lived token for ?access_token= on GET /orders/events.
+
+    The token is only accepted by the events stream and expires after
+    STREAM_TOKEN_EXPIRE_SECONDS; it is checked when the stream opens, so an
+    open stream outlives it. Request a new one before every (re)connect.
+    """
+    return {
+        "access_token": create_stream_token(current_user),
+        "token_type": "bearer",
+        "expires_in": STREAM_TOKEN_EXPIRE_SECONDS
+    }
+
+
+@router.get("/events")
+async def stream_order_events(
+    *,
+    request: Request,
+    session: AsyncSession = Depends(get_session),
+    shop_id: int = Depends(get_stream_user_shop_id)
+):
+    """
+    Stream the shop's order events (text/event-stream).
+
+    Events: order.created, order.status_changed, order.payment_confirmed,
+    order.assigned; data is the JSON event (order_id, order_number, status, ...).
+    Events missed while disconnected are not replayed: refetch on reconnect.
+
+    Authentication: Authorization: Bearer <jwt>, or for browser EventSource,
+    which cannot send headers, a stream token from POST /orders/events/token:
+
+        new EventSource(`/api/v1/orders/events?access_token=${streamToken}`)
+
+    Regular access tokens are rejected in the query string (it ends up in
+    proxy access logs). EventSource's automatic reconnect reuses the URL and
+    fails once the stream token expired: on error, fetch a new token and
+    open a new EventSource.
+    """
+    queue = OrderEventBroker.subscribe(shop_id)
+    # Authentication is done: don't hold a pooled connection for the stream's lifetime
+    await session.close()
+    return StreamingResponse(
+        _event_stream(request, shop_id, queue),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
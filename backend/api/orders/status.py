@@ -17,6 +17,7 @@ from models import (
 )
 from services.order_service import OrderService
 from services.inventory_service import InventoryService
+from services.product_sales_service import ProductSalesService
 from auth_utils import get_current_user_shop_id
 
 router = APIRouter()
@@ -63,6 +64,7 @@ async def update_order_status(
         order.status = status
         if notes:
             order.notes = notes
+        await ProductSalesService.on_status_change(session, order)
 
         # Commit changes (now includes both inventory operations and status update)
         await session.commit()
@@ -124,6 +126,7 @@ async def cancel_order(
         order.status = OrderStatus.CANCELLED
         if cancel_data.reason:
             order.notes = f"Cancelled: {cancel_data.reason}"
+        await ProductSalesService.on_status_change(session, order)
 
         # Create history entry
         history = OrderHistory(
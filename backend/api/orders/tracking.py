@@ -41,11 +41,11 @@ async def get_orders_by_phone(
     from services.client_service import client_service
     normalized_phone = normalize_phone_number(phone)
 
-    # Query orders for this phone and shop
+    # Query orders for this phone and shop (idx_order_shop_phone_created)
     query = select(Order).options(
         selectinload(Order.items)
     ).where(
-        Order.phone == normalized_phone,
+        Order.phone_normalized == normalized_phone,
         Order.shop_id == shop_id
     ).order_by(Order.created_at.desc())
 
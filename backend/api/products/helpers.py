@@ -5,18 +5,23 @@ Consolidates database queries to eliminate duplication.
 Provides clean interfaces for loading products with relations.
 """
 
-from typing import List, Optional, Tuple, Dict, Any
+import asyncio
+from typing import List, Optional, Tuple, Dict, Any, Callable, Awaitable
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from sqlalchemy import func, case
-from sqlmodel import select, col
+from sqlmodel import select
 from fastapi import HTTPException
 
 from models import (
     Product, ProductType, ProductImage, ProductVariant, ProductAddon,
-    ProductBundle, ProductRecipe, ProductReview, CompanyReview, PickupLocation
+    ProductBundle, ProductRecipe, ProductReview, CompanyReview, PickupLocation,
+    ProductTag, ProductCity, ProductSalesStats
 )
+from models.products import normalize_filter_value
 from api.colors import get_color_details
+from services.product_search_service import ProductSearchService
+from core.pagination import apply_keyset
 
 
 async def get_products_filtered(
@@ -30,7 +35,8 @@ async def get_products_filtered(
     min_price: Optional[int] = None,
     max_price: Optional[int] = None,
     city: Optional[str] = None,
-    tags: Optional[List[str]] = None
+    tags: Optional[List[str]] = None,
+    cursor: Optional[str] = None
 ) -> List[Product]:
     """
     Get products with filtering, search, and pagination.
@@ -42,11 +48,13 @@ async def get_products_filtered(
         limit: Maximum number of products to return
         product_type: Filter by product type
         enabled_only: Only return enabled products
-        search: Search query for product names
+        search: Full-text query (name, tags, description); results are relevance-ranked
         min_price: Minimum price filter
         max_price: Maximum price filter
-        city: Filter by city (JSON array field)
-        tags: Filter by tags (JSON array field)
+        city: Filter by city (exact, case-insensitive)
+        tags: Filter by tags (product must carry all of them)
+        cursor: Keyset cursor (newest first, skip is ignored); None for offset mode.
+            Search still filters in cursor mode but results are not relevance-ranked.
 
     Returns:
         List of Product instances
@@ -65,54 +73,44 @@ async def get_products_filtered(
     if product_type:
         query = query.where(Product.type == product_type)
 
-    if search:
-        query = query.where(col(Product.name).ilike(f"%{search}%"))
-
     if min_price is not None:
         query = query.where(Product.price >= min_price)
 
     if max_price is not None:
         query = query.where(Product.price <= max_price)
 
-    # Filter by city if provided
+    # Filter by city via product_city link table (exact match, indexed)
     if city:
-        query = query.where(func.json_extract(Product.cities, '$').like(f'%{city.lower()}%'))
+        query = query.where(Product.id.in_(
+            select(ProductCity.product_id).where(ProductCity.city == normalize_filter_value(city))
+        ))
 
-    # Filter by tags if provided
+    # Filter by tags via product_tag link table: products having ALL requested tags
     if tags:
-        for tag in tags:
-            query = query.where(func.json_extract(Product.tags, '$').like(f'%{tag}%'))
+        tag_values = {normalize_filter_value(tag) for tag in tags}
+        query = query.where(Product.id.in_(
+            select(ProductTag.product_id)
+            .where(ProductTag.tag.in_(tag_values))
+            .group_by(ProductTag.product_id)
+            .having(func.count(ProductTag.tag) == len(tag_values))
+        ))
+
+    # Ranked full-text search (tsvector + pg_trgm on PostgreSQL, FTS5 on SQLite)
+    if search:
+        query = ProductSearchService.apply_search(query, search, session.get_bind().dialect.name)
 
     # Apply pagination
-    query = query.offset(skip).limit(limit)
+    if cursor is not None:
+        query = apply_keyset(query, Product.created_at, Product.id, cursor, session.get_bind().dialect.name)
+    else:
+        query = query.offset(skip)
+    query = query.limit(limit)
 
     # Execute query
     result = await session.execute(query)
     return list(result.scalars().all())
 
 
-async def get_all_enabled_products(session: AsyncSession, shop_id: Optional[int] = None) -> List[Product]:
-    """
-    Get all enabled products.
-    Used for extracting available tags, cities, and price ranges.
-
-    Args:
-        session: Database session
-        shop_id: Filter by shop_id for multi-tenancy
-
-    Returns:
-        List of all enabled Product instances
-    """
-    query = select(Product).where(Product.enabled == True)
-
-    # Filter by shop_id for multi-tenancy
-    if shop_id is not None:
-        query = query.where(Product.shop_id == shop_id)
-
-    result = await session.execute(query)
-    return list(result.scalars().all())
-
-
 async def get_product_by_id(
     session: AsyncSession,
     product_id: int,
@@ -268,6 +266,9 @@ async def load_product_bundles(
     """
     Load frequently bought together products.
 
+    Curated display_order comes first; products with equal display_order are
+    ranked by units sold in the last 30 days (product_sales_stats).
+
     Args:
         session: Database session
         product_id: Main product ID
@@ -279,10 +280,15 @@ async def load_product_bundles(
     result = await session.execute(
         select(ProductBundle, Product)
         .join(Product, ProductBundle.bundled_product_id == Product.id)
+        .outerjoin(ProductSalesStats, ProductSalesStats.product_id == Product.id)
         .where(ProductBundle.main_product_id == product_id)
         .where(ProductBundle.enabled == True)
         .where(Product.enabled == True)
-        .order_by(ProductBundle.display_order)
+        .order_by(
+            ProductBundle.display_order,
+            func.coalesce(ProductSalesStats.units_30d, 0).desc(),
+            ProductBundle.id
+        )
         .limit(limit)
     )
     return list(result.all())
@@ -373,6 +379,69 @@ async def load_company_reviews(
     return list(result.scalars().all())
 
 
+# Extra pooled connections one product detail load may hold at once; the
+# pool size (5 + 10 overflow by default) bounds all requests together
+DETAIL_LOAD_CONNECTIONS = 3
+
+
+async def _load_in_own_session(
+    session: AsyncSession,
+    loader: Callable[[AsyncSession], Awaitable[Any]],
+    slots: asyncio.Semaphore
+) -> Any:
+    """Run a loader on a separate pooled connection bound to the same engine"""
+    async with slots:
+        async with AsyncSession(bind=session.bind, expire_on_commit=False) as own_session:
+            return await loader(own_session)
+
+
+async def load_product_detail_data(
+    session: AsyncSession,
+    product_id: int
+) -> Optional[Dict[str, Any]]:
+    """
+    Load everything the product detail page needs.
+
+    On PostgreSQL the eight queries run concurrently on their own pooled
+    connections, at most DETAIL_LOAD_CONNECTIONS at a time per request so a
+    single load cannot take over the pool. SQLite (local dev,
+    tests) has no network round-trip and a single writer, so queries run
+    sequentially on the given session.
+
+    Args:
+        session: Database session
+        product_id: Product ID
+
+    Returns:
+        Dictionary with product (recipes loaded), images, variants, addons,
+        bundle_rows, pickup_locations, product_reviews and company_reviews,
+        or None if the product does not exist
+    """
+    loaders = {
+        "product": lambda s: load_product_with_recipes(s, product_id),
+        "images": lambda s: load_product_images(s, product_id),
+        "variants": lambda s: load_product_variants(s, product_id, enabled_only=True),
+        "addons": lambda s: load_product_addons(s, product_id, enabled_only=True),
+        "bundle_rows": lambda s: load_product_bundles(s, product_id, limit=5),
+        "pickup_locations": lambda s: load_pickup_locations(s, enabled_only=True),
+        "product_reviews": lambda s: load_product_reviews(s, product_id, limit=10),
+        "company_reviews": lambda s: load_company_reviews(s, limit=10),
+    }
+
+    if session.get_bind().dialect.name == "sqlite":
+        results = [await loader(session) for loader in loaders.values()]
+    else:
+        slots = asyncio.Semaphore(DETAIL_LOAD_CONNECTIONS)
+        results = await asyncio.gather(
+            *(_load_in_own_session(session, loader, slots) for loader in loaders.values())
+        )
+
+    data = dict(zip(loaders, results))
+    if data["product"] is None:
+        return None
+    return data
+
+
 async def search_product_suggestions(
     session: AsyncSession,
     search_query: str,
@@ -384,27 +453,14 @@ async def search_product_suggestions(
 
     Args:
         session: Database session
-        search_query: Search query string
+        search_query: Search query string (last term is prefix-matched)
         shop_id: Filter by shop_id for multi-tenancy
         limit: Maximum number of suggestions
 
     Returns:
-        List of product names matching the query
+        List of product names, most relevant first
     """
-    query = (
-        select(Product.name)
-        .where(col(Product.name).ilike(f"%{search_query}%"))
-        .where(Product.enabled == True)
-    )
-
-    # Filter by shop_id for multi-tenancy
-    if shop_id is not None:
-        query = query.where(Product.shop_id == shop_id)
-
-    query = query.limit(limit)
-
-    result = await session.execute(query)
-    return list(result.scalars().all())
+    return await ProductSearchService.suggest_names(session, search_query, shop_id=shop_id, limit=limit)
 
 
 async def get_product_statistics(
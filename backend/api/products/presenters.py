@@ -5,7 +5,7 @@ Consolidates response building logic to eliminate duplication.
 Handles mapping between backend models and frontend expectations.
 """
 
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Optional
 from models import (
     Product, ProductType, ProductImage, ProductVariant, ProductAddon,
     ProductRecipe, ProductReview, CompanyReview, PickupLocation,
@@ -13,51 +13,18 @@ from models import (
 )
 
 
-def extract_unique_tags(products: List[Product]) -> List[str]:
+def build_price_range(min_price: Optional[int], max_price: Optional[int]) -> Dict[str, int]:
     """
-    Extract unique tags from a list of products.
+    Build price range from catalog price bounds.
 
     Args:
-        products: List of Product instances
-
-    Returns:
-        Sorted list of unique tags
-    """
-    tags = set()
-    for product in products:
-        if product.tags:
-            tags.update(product.tags)
-    return sorted(list(tags))
-
-
-def extract_unique_cities(products: List[Product]) -> List[str]:
-    """
-    Extract unique cities from a list of products.
-
-    Args:
-        products: List of Product instances
-
-    Returns:
-        Sorted list of unique cities
-    """
-    cities = set()
-    for product in products:
-        if product.cities:
-            cities.update(product.cities)
-    return sorted(list(cities))
-
-
-def calculate_price_range(products: List[Product]) -> Dict[str, int]:
-    """
-    Calculate price range from a list of products.
-
-    Args:
-        products: List of Product instances
+        min_price: Lowest price in kopecks (None for an empty catalog)
+        max_price: Highest price in kopecks (None for an empty catalog)
 
     Returns:
         Dictionary with min/max prices in kopecks and tenge
     """
-    if not products:
+    if min_price is None or max_price is None:
         return {
             "min": 0,
             "max": 0,
@@ -65,10 +32,6 @@ def calculate_price_range(products: List[Product]) -> Dict[str, int]:
             "max_tenge": 0
         }
 
-    prices = [p.price for p in products]
-    min_price = min(prices)
-    max_price = max(prices)
-
     return {
         "min": min_price,
         "max": max_price,
@@ -98,26 +61,22 @@ def build_home_response(
     }
 
 
-def build_filters_response(
-    tags: List[str],
-    cities: List[str],
-    price_range: Dict[str, int]
-) -> Dict[str, Any]:
+def build_filters_response(facets: Dict[str, Any]) -> Dict[str, Any]:
     """
     Build response for filters endpoint.
 
     Args:
-        tags: List of unique tags
-        cities: List of unique cities
-        price_range: Price range dictionary
+        facets: Facet index data from CatalogFacetService.get_facets
 
     Returns:
         Dictionary with filter options
     """
     return {
-        "tags": tags,
-        "cities": cities,
-        "price_range": price_range,
+        "tags": list(facets["tag_counts"]),
+        "cities": list(facets["city_counts"]),
+        "tag_counts": facets["tag_counts"],
+        "city_counts": facets["city_counts"],
+        "price_range": build_price_range(facets["min_price"], facets["max_price"]),
         "product_types": [t.value for t in ProductType]
     }
 
@@ -11,20 +11,30 @@ All route handlers follow the pattern:
 No business logic or DB queries directly in routes.
 """
 
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Literal, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from database import get_session
 from models import (
     Product, ProductCreate, ProductRead, ProductUpdate, ProductType,
+    ProductBulkUpsert, ProductBulkUpsertResult,
     ProductAvailability, ProductDetailRead, ProductImageCreate, ProductImageRead
 )
 from services.inventory_service import InventoryService
+from services.availability_engine import AvailabilityEngine
 from services.product_service import ProductService
+from services.catalog_facet_service import CatalogFacetService
+from services.product_sales_service import ProductSalesService
 from services.bitrix_sync_service import get_bitrix_sync_service
 from auth_utils import get_current_user_shop_id
 from core.logging import get_logger
+from core.pagination import set_next_cursor
+from core.cache import product_detail_cache
+from core.http_cache import conditional_get
+from core.serialization import RawJSONResponse, dumps
+from services.product_snapshot_service import ProductSnapshotService
+from models.catalog import SCOPE_CATALOG, SCOPE_SHOPS, SCOPE_STOCK
 
 logger = get_logger(__name__)
 
@@ -37,7 +47,11 @@ router = APIRouter()
 
 # ===== Public Read Endpoints =====
 
-@router.get("/", response_model=List[ProductRead])
+@router.get(
+    "/",
+    response_model=List[ProductRead],
+    dependencies=[Depends(conditional_get(SCOPE_CATALOG, SCOPE_STOCK))]
+)
 async def get_products(
     *,
     session: AsyncSession = Depends(get_session),
@@ -45,16 +59,24 @@ async def get_products(
     limit: int = Query(100, ge=1, le=100, description="Number of products to return"),
     type: Optional[ProductType] = Query(None, description="Filter by product type"),
     enabled_only: bool = Query(True, description="Show only enabled products"),
-    search: Optional[str] = Query(None, description="Search in product names"),
+    search: Optional[str] = Query(None, description="Full-text search in name, tags and description"),
     min_price: Optional[int] = Query(None, description="Minimum price in tenge"),
     max_price: Optional[int] = Query(None, description="Maximum price in tenge"),
-    shop_id: Optional[int] = Query(None, description="Filter by shop_id for multi-tenancy")
+    shop_id: Optional[int] = Query(None, description="Filter by shop_id for multi-tenancy"),
+    cursor: Optional[str] = Query(None, description="Keyset cursor from X-Next-Cursor (empty value starts cursor mode; skip is ignored)"),
+    response: Response
 ):
     """
     Get list of products with filtering and search.
 
     For customer website: pass shop_id query parameter
     For admin panel: use authenticated endpoint /admin/products
+
+    Cursor mode returns newest products first and sets X-Next-Cursor
+    while more pages remain.
+
+    Products are serialized from cached per-version JSON snapshots, with
+    live in_stock / max_quantity from the availability engine.
     """
     products = await helpers.get_products_filtered(
         session=session,
@@ -65,17 +87,26 @@ async def get_products(
         enabled_only=enabled_only,
         search=search,
         min_price=min_price,
-        max_price=max_price
+        max_price=max_price,
+        cursor=cursor
     )
-    return products
+    if cursor is not None:
+        set_next_cursor(response, products, limit)
+    stock = await AvailabilityEngine.get_max_quantities(session, products)
+    return ProductSnapshotService.list_response(products, response, stock=stock)
 
 
-@router.get("/public/featured", response_model=List[ProductRead])
+@router.get(
+    "/public/featured",
+    response_model=List[ProductRead],
+    dependencies=[Depends(conditional_get(SCOPE_CATALOG, SCOPE_SHOPS, SCOPE_STOCK))]
+)
 async def get_featured_products(
     *,
     session: AsyncSession = Depends(get_session),
     skip: int = Query(0, ge=0),
-    limit: int = Query(20, le=100, description="Number of featured products to return")
+    limit: int = Query(20, le=100, description="Number of featured products to return"),
+    response: Response
 ):
     """
     Get featured products across all shops for marketplace homepage.
@@ -84,10 +115,11 @@ async def get_featured_products(
     Returns products marked as is_featured=True from all active shops.
     """
     from sqlmodel import select, and_
+    from sqlalchemy.orm import selectinload
     from models import Shop
 
     # Query for featured products from active shops
-    query = select(Product).join(
+    query = select(Product).options(selectinload(Product.images)).join(
         Shop, Product.shop_id == Shop.id
     ).where(
         and_(
@@ -102,47 +134,26 @@ async def get_featured_products(
     result = await session.execute(query)
     products = result.scalars().all()
 
-    return [ProductRead.model_validate(product) for product in products]
+    return ProductSnapshotService.list_response(products, response)
 
 
 @router.get("/public/bestsellers", response_model=List[ProductRead])
 async def get_bestseller_products(
     *,
     session: AsyncSession = Depends(get_session),
-    limit: int = Query(20, le=100, description="Number of bestsellers to return")
+    limit: int = Query(20, le=100, description="Number of bestsellers to return"),
+    shop_id: Optional[int] = Query(None, description="Limit to one shop (default: whole marketplace)"),
+    period: Literal["all", "30d", "7d"] = Query("all", description="Sales period: all, 30d or 7d")
 ):
     """
     Get bestselling products across all shops for marketplace.
     Public endpoint - no authentication required.
 
-    Returns products sorted by order count (most ordered first).
+    Returns products sorted by units sold (best first), read from the
+    product_sales_stats rollup. Products without sales fill remaining slots.
     """
-    from sqlmodel import select, func, and_
-    from models import Shop, OrderItem
-
-    # Query for products with highest order counts
-    # Join with OrderItem to count orders, then filter by active shops
-    query = select(
-        Product,
-        func.count(OrderItem.id).label('order_count')
-    ).join(
-        OrderItem, Product.id == OrderItem.product_id, isouter=True
-    ).join(
-        Shop, Product.shop_id == Shop.id
-    ).where(
-        and_(
-            Product.enabled == True,
-            Shop.is_active == True
-        )
-    ).group_by(Product.id).order_by(
-        func.count(OrderItem.id).desc()
-    ).limit(limit)
-
-    result = await session.execute(query)
-    # Extract just the Product objects from tuples
-    products = [row[0] for row in result.all()]
-
-    return [ProductRead.model_validate(product) for product in products]
+    products = await ProductSalesService.get_bestsellers(session, shop_id=shop_id, period=period, limit=limit)
+    return ProductSnapshotService.list_response(products)
 
 
 # ===== Admin Authenticated Endpoints =====
@@ -156,13 +167,16 @@ async def get_admin_products(
     limit: int = Query(100, ge=1, le=100, description="Number of products to return"),
     type: Optional[ProductType] = Query(None, description="Filter by product type"),
     enabled_only: bool = Query(False, description="Show only enabled products"),
-    search: Optional[str] = Query(None, description="Search in product names"),
+    search: Optional[str] = Query(None, description="Full-text search in name, tags and description"),
     min_price: Optional[int] = Query(None, description="Minimum price in tenge"),
     max_price: Optional[int] = Query(None, description="Maximum price in tenge"),
+    cursor: Optional[str] = Query(None, description="Keyset cursor from X-Next-Cursor (empty value starts cursor mode; skip is ignored)"),
+    response: Response
 ):
     """
     Get products for authenticated admin users.
     Automatically filters by the user's shop_id for complete data isolation.
+    Includes live in_stock / max_quantity like the public listing.
     """
     products = await helpers.get_products_filtered(
         session=session,
@@ -173,12 +187,16 @@ async def get_admin_products(
         enabled_only=enabled_only,
         search=search,
         min_price=min_price,
-        max_price=max_price
+        max_price=max_price,
+        cursor=cursor
     )
-    return products
+    if cursor is not None:
+        set_next_cursor(response, products, limit)
+    stock = await AvailabilityEngine.get_max_quantities(session, products)
+    return ProductSnapshotService.list_response(products, response, stock=stock)
 
 
-@router.get("/home")
+@router.get("/home", dependencies=[Depends(conditional_get(SCOPE_CATALOG))])
 async def get_home_products(
     *,
     session: AsyncSession = Depends(get_session),
@@ -206,9 +224,9 @@ async def get_home_products(
         tags=tag_list
     )
 
-    # Get all enabled products to extract available tags
-    all_products = await helpers.get_all_enabled_products(session)
-    available_tags = presenters.extract_unique_tags(all_products)
+    # Available tags come from the maintained facet index (no catalog scan)
+    facets = await CatalogFacetService.get_facets(session)
+    available_tags = list(facets["tag_counts"])
 
     return presenters.build_home_response(featured_products, available_tags)
 
@@ -216,22 +234,17 @@ async def get_home_products(
 @router.get("/filters")
 async def get_product_filters(
     *,
-    session: AsyncSession = Depends(get_session)
+    session: AsyncSession = Depends(get_session),
+    shop_id: Optional[int] = Query(None, description="Limit filters to one shop (default: whole marketplace)")
 ):
     """
     Get available filter options for products.
 
-    Returns all unique tags, price range, and available cities.
+    Returns all unique tags, price range, and available cities,
+    served from the incrementally maintained facet index.
     """
-    # Get all enabled products
-    products = await helpers.get_all_enabled_products(session)
-
-    # Extract filter data
-    tags = presenters.extract_unique_tags(products)
-    cities = presenters.extract_unique_cities(products)
-    price_range = presenters.calculate_price_range(products)
-
-    return presenters.build_filters_response(tags, cities, price_range)
+    facets = await CatalogFacetService.get_facets(session, shop_id=shop_id)
+    return presenters.build_filters_response(facets)
 
 
 @router.get("/{product_id}/detail", response_model=ProductDetailRead)
@@ -245,49 +258,46 @@ async def get_product_detail(
     - Images, variants, composition, addons, bundles
     - Product and company reviews with aggregates
     - Pickup locations
+
+    Relationships are loaded concurrently; the serialized response is cached
+    briefly per product and dropped on product, image, recipe and review writes.
     """
-    # Load product with recipes
-    product = await helpers.load_product_with_recipes(session, product_id)
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
+    cached = product_detail_cache.get(product_id)
+    if cached is not None:
+        return RawJSONResponse(cached)
+    generation = product_detail_cache.generation
 
-    # Load all relationships in parallel (conceptually - async will handle)
-    images = await helpers.load_product_images(session, product_id)
-    variants = await helpers.load_product_variants(session, product_id, enabled_only=True)
-    addons = await helpers.load_product_addons(session, product_id, enabled_only=True)
-    bundle_rows = await helpers.load_product_bundles(session, product_id, limit=5)
-    pickup_locations_data = await helpers.load_pickup_locations(session, enabled_only=True)
-    product_reviews = await helpers.load_product_reviews(session, product_id, limit=10)
-    company_reviews = await helpers.load_company_reviews(session, limit=10)
-
-    # Format data using presenters
-    composition = presenters.format_composition(product.recipes)
-    frequently_bought = presenters.format_bundles(bundle_rows)
-    pickup_locations = presenters.format_pickup_locations(pickup_locations_data)
+    data = await helpers.load_product_detail_data(session, product_id)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Product not found")
 
     # Build complete response
-    return presenters.build_product_detail_read(
-        product=product,
-        images=images,
-        variants=variants,
-        addons=addons,
-        composition=composition,
-        frequently_bought=frequently_bought,
-        pickup_locations=pickup_locations,
-        product_reviews=product_reviews,
-        company_reviews=company_reviews
+    detail = presenters.build_product_detail_read(
+        product=data["product"],
+        images=data["images"],
+        variants=data["variants"],
+        addons=data["addons"],
+        composition=presenters.format_composition(data["product"].recipes),
+        frequently_bought=presenters.format_bundles(data["bundle_rows"]),
+        pickup_locations=presenters.format_pickup_locations(data["pickup_locations"]),
+        product_reviews=data["product_reviews"],
+        company_reviews=data["company_reviews"]
     )
+    body = dumps(detail.model_dump(mode="json", by_alias=True))
+    product_detail_cache.set(product_id, body, generation=generation)
+    return RawJSONResponse(body)
 
 
-@router.get("/{product_id}", response_model=ProductRead)
+@router.get("/{product_id}", response_model=ProductRead, dependencies=[Depends(conditional_get(SCOPE_CATALOG))])
 async def get_product(
     *,
     session: AsyncSession = Depends(get_session),
-    product_id: int
+    product_id: int,
+    response: Response
 ):
     """Get single product by ID"""
     product = await helpers.get_product_by_id(session, product_id, raise_if_not_found=True)
-    return product
+    return ProductSnapshotService.item_response(product, response=response)
 
 
 @router.get("/{product_id}/availability", response_model=ProductAvailability)
@@ -308,10 +318,11 @@ async def get_search_suggestions(
     *,
     session: AsyncSession = Depends(get_session),
     q: str = Query(..., description="Search query"),
-    limit: int = Query(5, ge=1, le=10, description="Number of suggestions")
+    limit: int = Query(5, ge=1, le=10, description="Number of suggestions"),
+    shop_id: Optional[int] = Query(None, description="Filter by shop_id for multi-tenancy")
 ):
-    """Get search suggestions for autocomplete"""
-    suggestions = await helpers.search_product_suggestions(session, q, limit)
+    """Get relevance-ranked search suggestions for autocomplete"""
+    suggestions = await helpers.search_product_suggestions(session, q, shop_id=shop_id, limit=limit)
     return {"suggestions": suggestions}
 
 
@@ -382,30 +393,37 @@ async def create_product(
         logger = get_logger(__name__)
         logger.error("product_notification_failed", error=str(e))
 
-    # Manually construct ProductRead to avoid lazy-loading images relationship
-    # Convert product to dict, excluding ORM-only fields, then add empty images list
-    product_dict = {
-        "id": product.id,
-        "name": product.name,
-        "price": product.price,
-        "type": product.type,
-        "description": product.description,
-        "manufacturingTime": product.manufacturingTime,
-        "width": product.width,
-        "height": product.height,
-        "shelfLife": product.shelfLife,
-        "enabled": product.enabled,
-        "is_featured": product.is_featured,
-        "colors": product.colors,
-        "occasions": product.occasions,
-        "cities": product.cities,
-        "tags": product.tags,
-        "image": product.image,
-        "created_at": product.created_at,
-        "updated_at": product.updated_at,
-        "images": []  # Empty list for newly created product
-    }
-    return ProductRead(**product_dict)
+    # Newly created product has no images yet (avoids lazy-loading the relationship)
+    return ProductSnapshotService.item_response(product, images=[])
+
+
+@router.post("/bulk-upsert", response_model=ProductBulkUpsertResult)
+async def bulk_upsert_products(
+    *,
+    session: AsyncSession = Depends(get_session),
+    payload: ProductBulkUpsert,
+    background_tasks: BackgroundTasks,
+    shop_id: int = Depends(get_current_user_shop_id)
+):
+    """
+    Create or update up to 1000 products in one request.
+
+    Items with an id update that product, items without one are created.
+    Unchanged products are skipped (content hash), and embeddings / visual
+    search reindexing are queued only for products whose main image changed.
+    """
+    result = await ProductService.bulk_upsert_products(
+        session=session,
+        items=payload.products,
+        shop_id=shop_id,
+        commit=True
+    )
+
+    if result.image_changed:
+        from api.webhooks import reindex_changed_images
+        background_tasks.add_task(reindex_changed_images, result.image_changed)
+
+    return result
 
 
 @router.put("/{product_id}", response_model=ProductRead)
@@ -424,8 +442,7 @@ async def update_product(
         shop_id=shop_id,
         commit=True
     )
-    # Manually construct ProductRead to avoid lazy-loading images relationship
-    # Load images separately with eager loading
+    # Load images separately to avoid lazy-loading the relationship
     images = await helpers.load_product_images(session, product_id)
 
     # Sync to Production Bitrix if this is production shop
@@ -446,28 +463,7 @@ async def update_product(
             logger.error(f"⚠️ Failed to sync product {product_id} to Bitrix: {e}")
             # Don't fail the request if sync fails - log and continue
 
-    product_dict = {
-        "id": product.id,
-        "name": product.name,
-        "price": product.price,
-        "type": product.type,
-        "description": product.description,
-        "manufacturingTime": product.manufacturingTime,
-        "width": product.width,
-        "height": product.height,
-        "shelfLife": product.shelfLife,
-        "enabled": product.enabled,
-        "is_featured": product.is_featured,
-        "colors": product.colors,
-        "occasions": product.occasions,
-        "cities": product.cities,
-        "tags": product.tags,
-        "image": product.image,
-        "created_at": product.created_at,
-        "updated_at": product.updated_at,
-        "images": images
-    }
-    return ProductRead(**product_dict)
+    return ProductSnapshotService.item_response(product, images=images)
 
 
 @router.patch("/{product_id}/status", response_model=ProductRead)
@@ -486,7 +482,7 @@ async def toggle_product_status(
         shop_id=shop_id,
         commit=True
     )
-    # Manually construct ProductRead to avoid lazy-loading images relationship
+    # Load images separately to avoid lazy-loading the relationship
     images = await helpers.load_product_images(session, product_id)
 
     # Sync to Production Bitrix if this is production shop
@@ -506,28 +502,7 @@ async def toggle_product_status(
             logger.error(f"⚠️ Failed to sync product {product_id} to Bitrix: {e}")
             # Don't fail the request if sync fails - log and continue
 
-    product_dict = {
-        "id": product.id,
-        "name": product.name,
-        "price": product.price,
-        "type": product.type,
-        "description": product.description,
-        "manufacturingTime": product.manufacturingTime,
-        "width": product.width,
-        "height": product.height,
-        "shelfLife": product.shelfLife,
-        "enabled": product.enabled,
-        "is_featured": product.is_featured,
-        "colors": product.colors,
-        "occasions": product.occasions,
-        "cities": product.cities,
-        "tags": product.tags,
-        "image": product.image,
-        "created_at": product.created_at,
-        "updated_at": product.updated_at,
-        "images": images
-    }
-    return ProductRead(**product_dict)
+    return ProductSnapshotService.item_response(product, images=images)
 
 
 @router.delete("/{product_id}")
@@ -3,6 +3,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select, col
 from database import get_session
+from core.cache import product_detail_cache
 from models import (
     Product, ProductRecipe, ProductRecipeCreate, ProductRecipeRead, ProductRecipeUpdate,
     ProductWithRecipe, WarehouseItem, WarehouseItemRead
@@ -124,6 +125,7 @@ async def add_recipe_component(
     )
     session.add(db_recipe)
     await session.commit()
+    product_detail_cache.invalidate(product_id)
     await session.refresh(db_recipe)
 
     # Return with warehouse item details
@@ -160,6 +162,7 @@ async def update_recipe_component(
         setattr(db_recipe, key, value)
 
     await session.commit()
+    product_detail_cache.invalidate(product_id)
     await session.refresh(db_recipe)
 
     # Get warehouse item for response
@@ -196,6 +199,7 @@ async def delete_recipe_component(
 
     await session.delete(db_recipe)
     await session.commit()
+    product_detail_cache.invalidate(product_id)
 
     return {"detail": "Recipe component deleted"}
 
@@ -253,6 +257,7 @@ async def set_product_recipe(
         ))
 
     await session.commit()
+    product_detail_cache.invalidate(product_id)
     return created_recipes
 
 
@@ -9,6 +9,8 @@ from sqlalchemy import select, func
 from sqlmodel import and_
 
 from database import get_session
+from core.cache import product_detail_cache
+from services.shop_rating_service import ShopRatingService
 from models import (
     CompanyReview, CompanyReviewCreate, CompanyReviewRead,
     ProductReview, ProductReviewCreate, ProductReviewRead,
@@ -158,8 +160,10 @@ async def create_company_review(
     """
     review = CompanyReview.model_validate(review_in)
     session.add(review)
+    await ShopRatingService.record_review(session, review.shop_id, review.rating)
     await session.commit()
     await session.refresh(review)
+    product_detail_cache.clear()
 
     return review
 
@@ -260,6 +264,7 @@ async def create_product_review(
     session.add(review)
     await session.commit()
     await session.refresh(review)
+    product_detail_cache.invalidate(product_id)
 
     return review
 
@@ -292,5 +297,6 @@ async def add_review_photo(
     session.add(photo)
     await session.commit()
     await session.refresh(photo)
+    product_detail_cache.invalidate(product_id)
 
     return photo
\ No newline at end of file
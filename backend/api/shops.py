@@ -7,13 +7,17 @@ from typing import List, Optional
 from datetime import datetime, time as dt_time
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlmodel import select, func
+from sqlalchemy.orm import selectinload
+from sqlmodel import select
 
 from database import get_session
+from core.http_cache import conditional_get
+from services.product_snapshot_service import ProductSnapshotService
+from services.shop_rating_service import ShopRatingService, ShopSort
+from models.catalog import SCOPE_SHOPS
 from models import (
     Shop, ShopPublicListItem, ShopPublicDetail,
-    Product, ProductRead, City,
-    CompanyReview
+    Product, ProductRead, City
 )
 
 router = APIRouter()
@@ -53,41 +57,19 @@ def is_shop_open_now(shop: Shop) -> bool:
             return False
 
 
-async def get_shop_rating_and_reviews(session: AsyncSession, shop_id: int) -> tuple[Optional[float], int]:
-    """
-    Calculate shop rating and review count.
-
-    Args:
-        session: Database session
-        shop_id: Shop ID
-
-    Returns:
-        tuple: (average_rating, review_count)
-    """
-    # Get company reviews for this shop
-    rating_query = select(
-        func.avg(CompanyReview.rating).label('avg_rating'),
-        func.count(CompanyReview.id).label('review_count')
-    ).where(
-        CompanyReview.shop_id == shop_id
-    )
-
-    result = await session.execute(rating_query)
-    row = result.first()
-
-    avg_rating = float(row.avg_rating) if row.avg_rating else None
-    review_count = int(row.review_count) if row.review_count else 0
-
-    return avg_rating, review_count
-
-
-@router.get("/", response_model=List[ShopPublicListItem])
+@router.get(
+    "/",
+    response_model=List[ShopPublicListItem],
+    # Open/closed status depends on the clock: roll the ETag every minute
+    dependencies=[Depends(conditional_get(SCOPE_SHOPS, time_bucket_seconds=60))]
+)
 async def list_public_shops(
     *,
     session: AsyncSession = Depends(get_session),
     city: Optional[City] = Query(None, description="Filter by city"),
     skip: int = Query(0, ge=0, description="Number of shops to skip"),
-    limit: int = Query(20, le=100, description="Maximum number of shops to return")
+    limit: int = Query(20, le=100, description="Maximum number of shops to return"),
+    sort: ShopSort = Query("newest", description="newest, or rating (best rated first)")
 ):
     """
     Get list of active shops for marketplace.
@@ -96,34 +78,20 @@ async def list_public_shops(
     Returns shops with:
     - Basic info (name, city, phone, address)
     - Delivery settings
-    - Rating and review count
+    - Rating and review count (from the shop_rating_stats rollup)
     - Current open/closed status
     """
-    query = select(Shop).where(Shop.is_active == True)
-
-    if city:
-        query = query.where(Shop.city == city)
+    shops = await ShopRatingService.list_shops(session, city=city, skip=skip, limit=limit, sort=sort)
 
-    query = query.offset(skip).limit(limit).order_by(Shop.created_at.desc())
-
-    result = await session.execute(query)
-    shops = result.scalars().all()
-
-    # Build response with computed fields
-    shop_list = []
-    for shop in shops:
-        rating, review_count = await get_shop_rating_and_reviews(session, shop.id)
-        is_open = is_shop_open_now(shop)
-
-        shop_item = ShopPublicListItem.from_shop(
+    return [
+        ShopPublicListItem.from_shop(
             shop=shop,
             rating=rating,
             review_count=review_count,
-            is_open=is_open
+            is_open=is_shop_open_now(shop)
         )
-        shop_list.append(shop_item)
-
-    return shop_list
+        for shop, rating, review_count in shops
+    ]
 
 
 @router.get("/{shop_id}", response_model=ShopPublicDetail)
@@ -156,7 +124,7 @@ async def get_shop_detail(
             detail=f"Shop with id {shop_id} not found or inactive"
         )
 
-    rating, review_count = await get_shop_rating_and_reviews(session, shop_id)
+    rating, review_count = await ShopRatingService.get_rating(session, shop_id)
     is_open = is_shop_open_now(shop)
 
     return ShopPublicDetail.from_shop(
@@ -197,7 +165,7 @@ async def get_shop_products(
         )
 
     # Get products for this shop
-    query = select(Product).where(Product.shop_id == shop_id)
+    query = select(Product).options(selectinload(Product.images)).where(Product.shop_id == shop_id)
 
     # By default show only enabled products for public API
     if enabled is None:
@@ -211,4 +179,4 @@ async def get_shop_products(
     result = await session.execute(query)
     products = result.scalars().all()
 
-    return [ProductRead.model_validate(product) for product in products]
+    return ProductSnapshotService.list_response(products)
@@ -4,7 +4,7 @@ Provides superadmin-only access to manage all shops, users, and view cross-shop
 Only accessible by users with is_superadmin=True (phone 77015211545).
 """
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select, func
 from datetime import datetime
@@ -13,9 +13,12 @@ from database import get_session
 from models import (
     User, UserRead, UserResponse, UserRole,
     Shop, ShopRead,
-    Order, Product, WarehouseItem
+    Order, Product, ProductUpdate, WarehouseItem
 )
+from services.product_service import ProductService
+from services.product_sales_service import ProductSalesService
 from auth_utils import require_superadmin, get_password_hash
+from core.pagination import apply_keyset, set_next_cursor
 
 router = APIRouter()
 
@@ -360,11 +363,14 @@ async def list_all_products(
     enabled: Optional[bool] = Query(None, description="Filter by enabled status"),
     search: Optional[str] = Query(None, description="Search by product name"),
     skip: int = Query(0, ge=0),
-    limit: int = Query(100, le=1000)
+    limit: int = Query(100, le=1000),
+    cursor: Optional[str] = Query(None, description="Keyset cursor from X-Next-Cursor (empty value starts cursor mode; skip is ignored)"),
+    response: Response
 ):
     """
     Get list of all products across all shops.
     Supports filtering by shop_id, enabled status, and search.
+    Cursor mode sets X-Next-Cursor while more pages remain.
     Superadmin only endpoint.
     """
     query = select(Product, Shop.name.label("shop_name")).join(Shop, Product.shop_id == Shop.id)
@@ -379,11 +385,19 @@ async def list_all_products(
         search_pattern = f"%{search}%"
         query = query.where(Product.name.ilike(search_pattern))
 
-    query = query.offset(skip).limit(limit).order_by(Product.created_at.desc())
+    if cursor is not None:
+        query = apply_keyset(
+            query, Product.created_at, Product.id, cursor, session.get_bind().dialect.name
+        ).limit(limit)
+    else:
+        query = query.offset(skip).limit(limit).order_by(Product.created_at.desc())
 
     result = await session.execute(query)
     rows = result.all()
 
+    if cursor is not None:
+        set_next_cursor(response, [row[0] for row in rows], limit)
+
     # Format response with shop names
     products = []
     for product, shop_name in rows:
@@ -430,18 +444,21 @@ async def update_product(
             detail=f"Product with id {product_id} not found"
         )
 
-    # Update fields if provided
-    if name is not None:
-        product.name = name
-    if price is not None:
-        product.price = price
-    if description is not None:
-        product.description = description
-    if enabled is not None:
-        product.enabled = enabled
-
-    await session.commit()
-    await session.refresh(product)
+    # Update fields if provided (via ProductService to keep catalog indexes in sync)
+    product_in = ProductUpdate(
+        **{
+            field: value
+            for field, value in {"name": name, "price": price, "description": description, "enabled": enabled}.items()
+            if value is not None
+        }
+    )
+    product = await ProductService.update_product(
+        session=session,
+        product_id=product_id,
+        product_in=product_in,
+        shop_id=product.shop_id,
+        commit=True
+    )
 
     return {
         "message": f"Product '{product.name}' has been updated",
@@ -478,8 +495,12 @@ async def delete_product(
         )
 
     product_name = product.name
-    await session.delete(product)
-    await session.commit()
+    await ProductService.delete_product(
+        session=session,
+        product_id=product_id,
+        shop_id=product.shop_id,
+        commit=True
+    )
 
     return {
         "message": f"Product '{product_name}' has been deleted"
@@ -509,9 +530,13 @@ async def toggle_product(
         )
 
     # Toggle enabled status
-    product.enabled = not product.enabled
-    await session.commit()
-    await session.refresh(product)
+    product = await ProductService.toggle_product_status(
+        session=session,
+        product_id=product_id,
+        enabled=not product.enabled,
+        shop_id=product.shop_id,
+        commit=True
+    )
 
     status_text = "включен" if product.enabled else "выключен"
     return {
@@ -538,11 +563,14 @@ async def list_all_orders(
     date_from: Optional[str] = Query(None, description="Filter by date from (YYYY-MM-DD)"),
     date_to: Optional[str] = Query(None, description="Filter by date to (YYYY-MM-DD)"),
     skip: int = Query(0, ge=0),
-    limit: int = Query(100, le=1000)
+    limit: int = Query(100, le=1000),
+    cursor: Optional[str] = Query(None, description="Keyset cursor from X-Next-Cursor (empty value starts cursor mode; skip is ignored)"),
+    response: Response
 ):
     """
     Get list of all orders across all shops.
     Supports filtering by shop_id, status, and date range.
+    Cursor mode sets X-Next-Cursor while more pages remain.
     Superadmin only endpoint.
     """
     from models.enums import OrderStatus as OrderStatusEnum
@@ -574,11 +602,19 @@ async def list_all_orders(
         except ValueError:
             pass  # Invalid date format, ignore
 
-    query = query.offset(skip).limit(limit).order_by(Order.created_at.desc())
+    if cursor is not None:
+        query = apply_keyset(
+            query, Order.created_at, Order.id, cursor, session.get_bind().dialect.name
+        ).limit(limit)
+    else:
+        query = query.offset(skip).limit(limit).order_by(Order.created_at.desc())
 
     result = await session.execute(query)
     rows = result.all()
 
+    if cursor is not None:
+        set_next_cursor(response, [row[0] for row in rows], limit)
+
     # Format response with shop names
     orders = []
     for order, shop_name in rows:
@@ -706,6 +742,7 @@ async def update_order_status(
             detail=f"Invalid status: {new_status}. Must be one of: NEW, PAID, ACCEPTED, ASSEMBLED, IN_DELIVERY, DELIVERED, CANCELLED"
         )
 
+    await ProductSalesService.on_status_change(session, order)
     await session.commit()
     await session.refresh(order)
 
@@ -761,6 +798,7 @@ async def cancel_order(
     order.status = OrderStatusEnum.CANCELLED
     if reason:
         order.cancellation_reason = reason
+    await ProductSalesService.on_status_change(session, order)
 
     await session.commit()
     await session.refresh(order)
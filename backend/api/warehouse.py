@@ -1,6 +1,6 @@
 from typing import List, Optional
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, UploadFile, File
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select, col, desc
 import httpx
@@ -8,8 +8,11 @@ from database import get_session
 from models import (
     WarehouseItem, WarehouseItemCreate, WarehouseItemRead, WarehouseItemUpdate, WarehouseItemDetail,
     WarehouseOperation, WarehouseOperationCreate, WarehouseOperationRead, WarehouseOperationType,
-    User
+    WarehouseBatchOperation, WarehouseBatchResult, WarehouseStockReport, User
 )
+from core.pagination import apply_keyset, set_next_cursor
+from services.inventory_service import InventoryService, InsufficientStockError
+from services.warehouse_ledger_service import WarehouseLedgerService
 from utils import kopecks_to_tenge, tenge_to_kopecks, format_price_tenge
 from auth_utils import get_current_user_shop_id, get_current_active_user
 
@@ -261,6 +264,31 @@ async def delete_warehouse_item(
 
 # Operations endpoints
 
+@router.post("/batch", response_model=WarehouseBatchResult)
+async def apply_batch(
+    *,
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_active_user),
+    batch: WarehouseBatchOperation
+):
+    """
+    Apply a supplier delivery or a series of write-offs in one transaction.
+
+    Each line is (warehouse_item_id, quantity, optional cost_price_tenge):
+    positive quantities are deliveries, negative ones write-offs. Invalid
+    lines are reported in the results and skipped; the rest are applied.
+    """
+    shop_id = current_user.shop_id
+    if shop_id is None:
+        raise HTTPException(status_code=403, detail="User is not assigned to any shop")
+
+    try:
+        return await InventoryService.apply_warehouse_batch(session, shop_id, batch.lines, current_user.id)
+    except InsufficientStockError as e:
+        await session.rollback()
+        raise HTTPException(status_code=409, detail=str(e))
+
+
 @router.post("/{item_id}/writeoff", response_model=WarehouseOperationRead)
 async def writeoff_item(
     *,
@@ -418,9 +446,15 @@ async def get_item_operations(
     item_id: int,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    operation_type: Optional[WarehouseOperationType] = Query(None)
+    operation_type: Optional[WarehouseOperationType] = Query(None),
+    cursor: Optional[str] = Query(None, description="Keyset cursor from X-Next-Cursor (empty value starts cursor mode; skip is ignored)"),
+    response: Response
 ):
-    """Get operations history for a warehouse item"""
+    """
+    Get operations history for a warehouse item, newest first.
+
+    Cursor mode sets X-Next-Cursor while more pages remain.
+    """
 
     # Verify item ownership first
     item_result = await session.execute(
@@ -440,15 +474,47 @@ async def get_item_operations(
     if operation_type:
         query = query.where(WarehouseOperation.operation_type == operation_type)
 
-    query = query.order_by(desc(WarehouseOperation.created_at))
-    query = query.offset(skip).limit(limit)
+    if cursor is not None:
+        query = apply_keyset(
+            query, WarehouseOperation.created_at, WarehouseOperation.id, cursor, session.get_bind().dialect.name
+        )
+    else:
+        query = query.order_by(desc(WarehouseOperation.created_at)).offset(skip)
+    query = query.limit(limit)
 
     # Execute query
     result = await session.execute(query)
     operations = result.scalars().all()
+
+    if cursor is not None:
+        set_next_cursor(response, operations, limit)
     return operations
 
 
+@router.get("/{item_id}/stock-report", response_model=WarehouseStockReport)
+async def get_item_stock_report(
+    *,
+    session: AsyncSession = Depends(get_session),
+    shop_id: int = Depends(get_current_user_shop_id),
+    item_id: int,
+    date_from: Optional[datetime] = Query(None, description="Period start, UTC (omit for all history)"),
+    date_to: Optional[datetime] = Query(None, description="Period end, UTC, exclusive (defaults to now)")
+):
+    """
+    Stock at the start and end of a period and movement totals per
+    operation type, computed from daily snapshots plus the later ledger rows.
+    """
+    item = await session.get(WarehouseItem, item_id)
+    if not item:
+        raise HTTPException(status_code=404, detail="Warehouse item not found")
+    if item.shop_id != shop_id:
+        raise HTTPException(status_code=403, detail="Warehouse item does not belong to your shop")
+    if date_from and date_to and date_from >= date_to:
+        raise HTTPException(status_code=400, detail="date_from must be before date_to")
+
+    return await WarehouseLedgerService.stock_report(session, item_id, date_from, date_to)
+
+
 # Photo upload/delete endpoints
 
 IMAGE_WORKER_URL = "https://flower-shop-images.alekenov.workers.dev"
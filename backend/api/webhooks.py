@@ -4,7 +4,8 @@ Webhooks API for receiving events from Production Bitrix system.
 This module handles real-time synchronization of products from Production (cvety.kz)
 to Railway backend, triggering visual search reindexing when products change.
 """
-from typing import Any, Dict, Optional
+import asyncio
+from typing import Any, Dict, List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Header, BackgroundTasks
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import SQLModel, select, Field
@@ -15,9 +16,14 @@ import os
 from database import get_session
 from models import (
     Product, ProductImage, ProductCreate, ProductType, ProductEmbedding,
-    Order, OrderHistory, OrderStatus
+    ProductBulkUpsertItem, Order, OrderHistory, OrderStatus
 )
 from services.embedding_client import EmbeddingClient
+from services.catalog_facet_service import CatalogFacetService
+from services.product_search_service import ProductSearchService
+from services.product_sales_service import ProductSalesService
+from services.product_service import ProductService
+from core.cache import product_detail_cache
 from core.logging import get_logger
 
 logger = logging.getLogger(__name__)
@@ -28,6 +34,8 @@ WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "change-me-in-production")
 VISUAL_SEARCH_API = "https://visual-search.alekenov.workers.dev"
 PRODUCTION_SHOP_ID = 17008
 RAILWAY_SHOP_ID = 8
+# Products whose embeddings / visual search entries are refreshed in parallel
+REINDEX_CONCURRENCY = 4
 
 # Status mapping: Bitrix → Railway
 BX_TO_RAILWAY_STATUS = {
@@ -242,6 +250,34 @@ async def trigger_visual_search_reindex(product_id: int):
         logger.error(f"❌ Failed to trigger visual search reindex for product {product_id}: {e}")
 
 
+async def reindex_changed_images(product_ids: List[int]):
+    """
+    Refresh embeddings and the visual search index after a bulk upsert.
+
+    Only products whose main image changed are passed in; a few run at a
+    time so a full catalog resync does not flood the embedding service.
+
+    Args:
+        product_ids: Products whose main image changed
+    """
+    from database import async_session
+    async with async_session() as session:
+        result = await session.execute(
+            select(Product.id, Product.image).where(Product.id.in_(product_ids))
+        )
+        changes = [(product_id, image_url) for product_id, image_url in result.all() if image_url]
+
+    semaphore = asyncio.Semaphore(REINDEX_CONCURRENCY)
+
+    async def reindex(product_id: int, image_url: str):
+        async with semaphore:
+            await generate_and_save_embedding(product_id, image_url)
+            await trigger_visual_search_reindex(product_id)
+
+    await asyncio.gather(*(reindex(product_id, image_url) for product_id, image_url in changes))
+    logger.info(f"✅ Reindexed {len(changes)} products with changed images")
+
+
 class WebhookPayload(SQLModel):
     """Webhook payload from Production Bitrix"""
     event_type: str
@@ -315,6 +351,9 @@ async def product_sync_webhook(
                 # Create product
                 new_product = Product(**railway_data)
                 session.add(new_product)
+                await session.flush()
+                await CatalogFacetService.apply_change(session, None, CatalogFacetService.snapshot(new_product))
+                await ProductSearchService.index_product(session, new_product)
                 await session.commit()
                 await session.refresh(new_product)
 
@@ -344,15 +383,24 @@ async def product_sync_webhook(
                 railway_data = production_to_railway_product(product_data)
                 new_product = Product(**railway_data)
                 session.add(new_product)
+                await session.flush()
+                await CatalogFacetService.apply_change(session, None, CatalogFacetService.snapshot(new_product))
+                await ProductSearchService.index_product(session, new_product)
                 await session.commit()
                 action = "created"
             else:
                 # Update fields
+                facets_before = CatalogFacetService.snapshot(existing_product)
                 railway_data = production_to_railway_product(product_data)
                 for key, value in railway_data.items():
                     if key != "id" and key != "shop_id":  # Don't update ID or shop_id
                         setattr(existing_product, key, value)
 
+                await session.flush()
+                await CatalogFacetService.apply_change(
+                    session, facets_before, CatalogFacetService.snapshot(existing_product)
+                )
+                await ProductSearchService.index_product(session, existing_product)
                 await session.commit()
 
                 # Update images (delete old, create new)
@@ -375,6 +423,7 @@ async def product_sync_webhook(
                     session.add(product_image)
 
                 await session.commit()
+                product_detail_cache.clear()
                 logger.info(f"✅ Updated product {product_id} with {len(images)} images")
                 action = "updated"
 
@@ -391,8 +440,12 @@ async def product_sync_webhook(
                     "message": "Product not found"
                 }
 
+            facets_before = CatalogFacetService.snapshot(existing_product)
             existing_product.enabled = False
+            await session.flush()
+            await CatalogFacetService.apply_change(session, facets_before, None)
             await session.commit()
+            product_detail_cache.clear()
             logger.info(f"✅ Soft deleted product {product_id} (enabled=False)")
             action = "deleted"
 
@@ -427,6 +480,92 @@ async def product_sync_webhook(
         raise HTTPException(status_code=500, detail=f"Failed to process webhook: {str(e)}")
 
 
+class BatchWebhookPayload(SQLModel):
+    """Batch of created/updated products from Production Bitrix"""
+    products: List[Dict[str, Any]] = Field(max_length=1000, description="Products in Production format")
+
+
+@router.post("/product-sync/batch")
+async def product_sync_batch_webhook(
+    payload: BatchWebhookPayload,
+    background_tasks: BackgroundTasks,
+    session: AsyncSession = Depends(get_session),
+    x_webhook_secret: Optional[str] = Header(None)
+):
+    """
+    Receive many created/updated products from Production Bitrix at once.
+
+    Used for full catalog resyncs (sync_production_products.py). Products are
+    written with one bulk upsert; unchanged products (same content hash) are
+    skipped, and embeddings / visual search reindexing are queued only for
+    products whose main image changed. A malformed product is reported in
+    "errors" and does not stop the rest of the batch.
+
+    Request body:
+    {
+        "products": [
+            {"id": 668826, "title": "Эустомы", "price": "4 950 ₸", "image": "...", "images": ["..."]}
+        ]
+    }
+
+    Returns:
+    {
+        "status": "success",
+        "created": 3,
+        "updated": 10,
+        "unchanged": 187,
+        "reindex_queued": 4,
+        "failed": 1,
+        "errors": [{"product_id": 668827, "error": "..."}]
+    }
+    """
+    if x_webhook_secret != WEBHOOK_SECRET:
+        logger.warning(f"❌ Webhook authentication failed: invalid secret")
+        raise HTTPException(status_code=401, detail="Invalid webhook secret")
+
+    items = []
+    errors = []
+    for product_data in payload.products:
+        product_id = product_data.get("id")
+        if not product_id:
+            errors.append({"product_id": None, "error": "Missing product_id in webhook data"})
+            continue
+        try:
+            railway_data = production_to_railway_product(product_data)
+            railway_data.pop("shop_id")
+            items.append(ProductBulkUpsertItem(**railway_data, images=product_data.get("images", [])))
+        except Exception as e:
+            logger.warning(f"⚠️ Skipping malformed product {product_id} in batch webhook: {e}")
+            errors.append({"product_id": product_id, "error": str(e)})
+
+    logger.info(f"📨 Received batch webhook: {len(items)} products, {len(errors)} malformed")
+
+    try:
+        result = await ProductService.bulk_upsert_products(
+            session, items, RAILWAY_SHOP_ID, create_missing_ids=True, commit=True
+        )
+    except HTTPException:
+        await session.rollback()
+        raise
+    except Exception as e:
+        logger.error(f"❌ Batch webhook processing failed: {e}")
+        await session.rollback()
+        raise HTTPException(status_code=500, detail=f"Failed to process webhook: {str(e)}")
+
+    if result.image_changed:
+        background_tasks.add_task(reindex_changed_images, result.image_changed)
+
+    return {
+        "status": "success",
+        "created": len(result.created),
+        "updated": len(result.updated),
+        "unchanged": len(result.unchanged),
+        "reindex_queued": len(result.image_changed),
+        "failed": len(errors),
+        "errors": errors
+    }
+
+
 # ===============================================
 # Order Status Sync Webhook (Bitrix → Railway)
 # ===============================================
@@ -526,6 +665,7 @@ async def order_status_sync_webhook(
         # Update order status
         order.status = railway_status
         session.add(order)
+        await ProductSalesService.on_status_change(session, order)
 
         # Create history record
         history = OrderHistory(
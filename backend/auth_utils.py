@@ -3,8 +3,8 @@ Authentication utilities for JWT token handling and password hashing
 """
 from datetime import datetime, timedelta
 from typing import Optional, Union
-from fastapi import Depends, HTTPException, status
-from fastapi.security import HTTPBearer
+from fastapi import Depends, HTTPException, Query, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -30,9 +30,14 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 # JWT settings
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7 days
+# Scoped, short-lived token for the order events stream (?access_token=)
+STREAM_TOKEN_SCOPE = "order_events"
+STREAM_TOKEN_EXPIRE_SECONDS = 60
 
 # Security scheme
 security = HTTPBearer()
+# Same, but leaves a missing header to the endpoint (query-token fallback)
+optional_security = HTTPBearer(auto_error=False)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -58,11 +63,28 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
-def verify_token(token: str) -> TokenData:
-    """Verify JWT token and extract user data."""
+def create_stream_token(user: User) -> str:
+    """Create a short-lived JWT that only opens the order events stream."""
+    return create_access_token(
+        {"sub": str(user.id), "scope": STREAM_TOKEN_SCOPE},
+        expires_delta=timedelta(seconds=STREAM_TOKEN_EXPIRE_SECONDS)
+    )
+
+
+def verify_token(token: str, scope: Optional[str] = None) -> TokenData:
+    """
+    Verify JWT token and extract user data.
+
+    The token's scope claim must equal scope: regular access tokens carry
+    none, so scoped tokens are rejected everywhere except where asked for.
+    """
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=[ALGORITHM])
 
+        if payload.get("scope") != scope:
+            logger.warning("jwt_scope_mismatch", token_scope=payload.get("scope"), expected_scope=scope)
+            raise JWTError("Invalid token: wrong scope")
+
         # JWT payload values are always strings - sub claim is now string
         user_id_str = payload.get("sub")
         phone: str = payload.get("phone")
@@ -224,4 +246,36 @@ async def get_current_user_shop_id(current_user: User = Depends(get_current_acti
             status_code=status.HTTP_403_FORBIDDEN,
             detail="User is not assigned to any shop"
         )
-    return current_user.shop_id
\ No newline at end of file
+    return current_user.shop_id
+
+
+async def get_stream_user_shop_id(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+    access_token: Optional[str] = Query(None, description="JWT for clients that cannot send headers (EventSource)"),
+    session: AsyncSession = Depends(get_session)
+) -> int:
+    """
+    get_current_user_shop_id for streaming endpoints.
+
+    Browser EventSource cannot send an Authorization header, so a stream
+    token (create_stream_token) may come as the access_token query parameter
+    instead. Regular access tokens are accepted in the header only: query
+    strings end up in proxy logs. The header wins when both are present.
+    """
+    if credentials is not None:
+        user = await get_current_user(credentials, session)
+        return await get_current_user_shop_id(await get_current_active_user(user))
+
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Not authenticated" if not access_token else "Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    if not access_token:
+        raise credentials_exception
+
+    token_data = verify_token(access_token, scope=STREAM_TOKEN_SCOPE)
+    user = await session.get(User, token_data.user_id)
+    if user is None or not user.is_active:
+        raise credentials_exception
+    return await get_current_user_shop_id(user)
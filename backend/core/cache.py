@@ -0,0 +1,101 @@
+"""
+In-process TTL caches for hot read endpoints.
+
+Entries live for a short time and are dropped explicitly by write paths,
+so a stale read is bounded by the TTL even when a write happens in another
+worker process.
+
+Write paths drop entries with invalidate_on_commit / clear_on_commit, which
+act once the transaction commits: dropping earlier would let a concurrent
+read re-cache the pre-commit data. Readers pass the generation they started
+at to set(), so a value loaded before a drop is not stored after it.
+"""
+import time
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.metrics import cache_requests_total
+from core.session_hooks import TransactionState
+
+
+class TTLCache:
+    """Bounded key/value cache with per-entry expiry"""
+
+    def __init__(self, name: str, ttl_seconds: float, max_entries: int = 1000):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        # Bumped by every drop, see set()
+        self.generation = 0
+        self._hits = cache_requests_total.labels(cache=name, result="hit")
+        self._misses = cache_requests_total.labels(cache=name, result="miss")
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self._misses.inc()
+            return None
+        self._hits.inc()
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None) -> None:
+        """
+        Store a value, evicting the oldest entry when full.
+
+        Args:
+            key: Cache key
+            value: Value to store
+            generation: self.generation read before loading the value; the
+                value is not stored if entries were dropped since
+        """
+        if generation is not None and generation != self.generation:
+            return
+        if key not in self._entries and len(self._entries) >= self.max_entries:
+            del self._entries[next(iter(self._entries))]
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop one entry"""
+        self.generation += 1
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop all entries"""
+        self.generation += 1
+        self._entries.clear()
+
+    def invalidate_on_commit(self, session: AsyncSession, key: Hashable) -> None:
+        """Drop one entry once the session's transaction commits"""
+        _pending_drops.get(session.sync_session).append((self, key, False))
+
+    def clear_on_commit(self, session: AsyncSession) -> None:
+        """Drop all entries once the session's transaction commits"""
+        _pending_drops.get(session.sync_session).append((self, None, True))
+
+
+def _apply_drops(drops: List[Tuple[TTLCache, Hashable, bool]]) -> None:
+    for cache, key, clear in drops:
+        if clear:
+            cache.clear()
+        else:
+            cache.invalidate(key)
+
+
+_pending_drops = TransactionState("ttl_cache_drops_pending", _apply_drops, factory=list)
+
+
+# Serialized ProductDetailRead JSON per product id (GET /products/{id}/detail).
+# Image, recipe and product review writes drop the product's entry; product
+# field writes (shown in other products' bundles) and company reviews (shown
+# on every page) clear the whole cache.
+product_detail_cache = TTLCache("product_detail", ttl_seconds=60, max_entries=2000)
+
+# Pre-serialized ProductRead JSON per product id, stored with the version key
+# it was built from (services.product_snapshot_service). Entries are checked
+# against the current row on every read, so no write path has to drop them.
+product_snapshot_cache = TTLCache("product_snapshot", ttl_seconds=3600, max_entries=20000)
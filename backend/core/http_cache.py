@@ -0,0 +1,99 @@
+"""
+Conditional GET support (ETag / If-None-Match / 304) for public endpoints.
+
+Instead of hashing response bodies, the ETag is derived from the request URL
+and cheap change tokens (ResourceVersion counters), so a matching request is
+answered with 304 before the endpoint runs any catalog query.
+
+Usage:
+    @router.get("/", dependencies=[Depends(conditional_get(SCOPE_CATALOG))])
+
+Cache-Control lets the Cloudflare edge (s-maxage) and browsers (max-age)
+reuse responses briefly and revalidate cheaply afterwards.
+"""
+import hashlib
+import time
+from typing import Callable, Optional
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_session
+from services.resource_version_service import ResourceVersionService
+
+
+def make_etag(request: Request, *tokens: str) -> str:
+    """
+    Build a weak ETag from the request path, query string and change tokens.
+
+    Args:
+        request: Incoming request
+        tokens: Change tokens the response depends on
+
+    Returns:
+        Weak ETag header value, e.g. W/"3f2a..."
+    """
+    query = "&".join(sorted(f"{key}={value}" for key, value in request.query_params.multi_items()))
+    source = "|".join([request.url.path, query, *tokens])
+    return f'W/"{hashlib.sha1(source.encode()).hexdigest()[:20]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+
+def cache_control_header(max_age: int, s_maxage: int) -> str:
+    """Public Cache-Control value with edge revalidation in the background"""
+    return f"public, max-age={max_age}, s-maxage={s_maxage}, stale-while-revalidate={s_maxage}"
+
+
+def conditional_get(
+    *scopes: str,
+    max_age: int = 30,
+    s_maxage: int = 60,
+    time_bucket_seconds: Optional[int] = None
+) -> Callable:
+    """
+    Dependency factory: set ETag/Cache-Control, or short-circuit with 304.
+
+    A ``shop_id`` query parameter narrows per-shop scopes to that shop.
+
+    Args:
+        scopes: ResourceVersion scopes the response depends on
+        max_age: Browser cache lifetime in seconds
+        s_maxage: Shared (edge) cache lifetime in seconds
+        time_bucket_seconds: Also roll the ETag over at this interval, for
+            responses with time-dependent fields (e.g. shop open/closed)
+
+    Returns:
+        FastAPI dependency
+    """
+    cache_control = cache_control_header(max_age, s_maxage)
+
+    async def dependency(
+        request: Request,
+        response: Response,
+        session: AsyncSession = Depends(get_session)
+    ) -> None:
+        shop_id = request.query_params.get("shop_id")
+        shop_id = int(shop_id) if shop_id and shop_id.isdigit() else None
+
+        tokens = [await ResourceVersionService.get_token(session, scope, shop_id) for scope in scopes]
+        if time_bucket_seconds:
+            tokens.append(str(int(time.time() // time_bucket_seconds)))
+
+        etag = make_etag(request, *tokens)
+        headers = {"ETag": etag, "Cache-Control": cache_control}
+
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            raise HTTPException(status_code=304, headers=headers)
+
+        response.headers.update(headers)
+
+    return dependency
@@ -5,6 +5,8 @@ Provides application-level metrics:
 - HTTP request counts by method, endpoint, status
 - HTTP request durations (histogram)
 - HTTP error counts by type
+- In-process cache hits/misses
+- Reservation expiry (reservations and units released)
 - Request ID tracking
 """
 from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
@@ -40,6 +42,23 @@ http_errors_total = Counter(
     ['method', 'endpoint', 'error_type']
 )
 
+# Cache lookups: tracks hits and misses of in-process caches (core.cache)
+cache_requests_total = Counter(
+    'cache_requests_total',
+    'In-process cache lookups',
+    ['cache', 'result']
+)
+
+# Reservation expiry: reservations released by the expiry job and the stock they held
+reservations_expired_total = Counter(
+    'reservations_expired_total',
+    'Order reservations released after expiring'
+)
+reserved_units_released_total = Counter(
+    'reserved_units_released_total',
+    'Reserved warehouse units returned to stock by reservation expiry'
+)
+
 
 # ============================================================================
 # Metrics Middleware
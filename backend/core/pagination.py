@@ -0,0 +1,122 @@
+"""
+Keyset (cursor) pagination helpers.
+
+Listings sorted newest-first can page by the (created_at, id) of the last row
+instead of OFFSET, so every page costs one index range scan no matter how
+deep it is, and rows inserted while paging do not shift later pages.
+
+Cursor mode is opt-in per request: pass ``cursor`` (an empty value starts at
+the first page) and read the next cursor from the ``X-Next-Cursor`` response
+header. The header is absent on the last page. Response bodies are unchanged.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response
+from sqlalchemy import and_, func, or_
+from sqlalchemy.sql import Select
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """
+    Build an opaque cursor pointing just past a row.
+
+    Args:
+        created_at: Row creation timestamp
+        row_id: Row primary key (tie-breaker for equal timestamps)
+
+    Returns:
+        URL-safe cursor string
+    """
+    payload = json.dumps([created_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Parse a cursor produced by encode_cursor().
+
+    Args:
+        cursor: Cursor string from the X-Next-Cursor header
+
+    Returns:
+        (created_at, id) of the last row of the previous page
+
+    Raises:
+        HTTPException: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+
+def apply_keyset(query: Select, created_at_column: Any, id_column: Any, cursor: str, dialect: str) -> Select:
+    """
+    Restrict a select to the page after a cursor, newest first.
+
+    Replaces any existing ordering with (created_at DESC, id DESC), which is
+    served by the (shop_id, created_at, id) / (created_at, id) indexes.
+
+    SQLite stores timestamps as text in two formats: server defaults as
+    'YYYY-MM-DD HH:MM:SS', values set from Python with microseconds. Text
+    comparison of the two puts a row below a cursor in its own second, so
+    on SQLite both sides are compared in one format (millisecond precision).
+
+    Args:
+        query: Select statement with filters applied
+        created_at_column: Model created_at column
+        id_column: Model primary key column
+        cursor: Cursor string; empty for the first page
+        dialect: Database dialect name
+
+    Returns:
+        Ordered statement restricted to rows after the cursor (no LIMIT)
+    """
+    sort_key = _sqlite_time(created_at_column) if dialect == "sqlite" else created_at_column
+    query = query.order_by(None).order_by(sort_key.desc(), id_column.desc())
+    if not cursor:
+        return query
+
+    created_at, row_id = decode_cursor(cursor)
+    cursor_key = _sqlite_time(created_at.isoformat(sep=" ")) if dialect == "sqlite" else created_at
+    return query.where(or_(
+        sort_key < cursor_key,
+        and_(sort_key == cursor_key, id_column < row_id)
+    ))
+
+
+def _sqlite_time(value: Any) -> Any:
+    """Timestamp text normalized to 'YYYY-MM-DD HH:MM:SS.SSS'"""
+    return func.strftime("%Y-%m-%d %H:%M:%f", value)
+
+
+def set_next_cursor(response: Response, rows: Sequence[Any], limit: int) -> Optional[str]:
+    """
+    Publish the cursor for the page after ``rows`` in the X-Next-Cursor header.
+
+    A short page means the listing is exhausted, so no header is set.
+
+    Args:
+        response: Response to attach the header to
+        rows: Current page (objects with created_at and id attributes)
+        limit: Requested page size
+
+    Returns:
+        The next cursor, or None on the last page
+    """
+    if len(rows) < limit or not rows:
+        return None
+    last = rows[-1]
+    if last.created_at is None:
+        return None
+    next_cursor = encode_cursor(last.created_at, last.id)
+    response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return next_cursor
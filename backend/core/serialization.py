@@ -0,0 +1,44 @@
+"""
+Fast JSON serialization for API responses.
+
+- ORJSONResponse is the application's default response class (main.py)
+- RawJSONResponse sends bytes that are already JSON, so pre-serialized
+  fragments (see services.product_snapshot_service) can be spliced into a
+  response without another pydantic validation pass
+"""
+from typing import Any, Iterable, Optional
+
+import orjson
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+
+__all__ = ["ORJSONResponse", "RawJSONResponse", "dumps", "json_array"]
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize plain JSON-compatible content with orjson"""
+    return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def json_array(fragments: Iterable[bytes]) -> bytes:
+    """Join pre-serialized JSON values into a JSON array"""
+    return b"[" + b",".join(fragments) + b"]"
+
+
+class RawJSONResponse(Response):
+    """Response whose content is already serialized JSON bytes"""
+
+    media_type = "application/json"
+
+    def __init__(self, content: bytes, status_code: int = 200, sub_response: Optional[Response] = None):
+        """
+        Args:
+            content: JSON document as bytes
+            status_code: HTTP status code
+            sub_response: The endpoint's injected Response; headers set on it by
+                the endpoint or its dependencies (ETag, X-Next-Cursor, ...)
+                are carried over, as FastAPI does for returned models
+        """
+        super().__init__(content=content, status_code=status_code)
+        if sub_response is not None:
+            self.headers.raw.extend(sub_response.headers.raw)
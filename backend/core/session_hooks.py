@@ -0,0 +1,63 @@
+"""
+Per-transaction state handed to in-process caches on commit.
+
+Several services keep process-local state (availability matrices, order
+number blocks, dashboard rollups, ...) that must only see committed writes.
+A TransactionState keeps what a transaction produced in session.info and
+hands it over once the outermost transaction commits:
+
+- after_commit also fires when a savepoint is released; the enclosing
+  transaction may still roll back, so the state is kept until it commits
+- after_rollback drops the state (savepoint rollbacks included) and passes
+  it to on_rollback, for owners that must invalidate what it touched
+"""
+from typing import Callable, Generic, Optional, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+T = TypeVar("T")
+
+
+class TransactionState(Generic[T]):
+    """State of one session transaction, stored under session.info[key]"""
+
+    def __init__(
+        self,
+        key: str,
+        on_commit: Callable[[T], None],
+        on_rollback: Optional[Callable[[T], None]] = None,
+        factory: Optional[Callable[[], T]] = None
+    ):
+        self.key = key
+        self.on_commit = on_commit
+        self.on_rollback = on_rollback
+        self.factory = factory
+        event.listen(Session, "after_commit", self._after_commit)
+        event.listen(Session, "after_rollback", self._after_rollback)
+
+    def get(self, session: Session) -> T:
+        """State of the session's transaction, created by factory on first use"""
+        if self.key not in session.info:
+            session.info[self.key] = self.factory()
+        return session.info[self.key]
+
+    def peek(self, session: Session) -> Optional[T]:
+        """State of the session's transaction, or None if it has none yet"""
+        return session.info.get(self.key)
+
+    def set(self, session: Session, value: T) -> None:
+        session.info[self.key] = value
+
+    def _after_commit(self, session: Session) -> None:
+        if session.in_nested_transaction():
+            # A released savepoint: the enclosing transaction may still roll back
+            return
+        value = session.info.pop(self.key, None)
+        if value is not None:
+            self.on_commit(value)
+
+    def _after_rollback(self, session: Session) -> None:
+        value = session.info.pop(self.key, None)
+        if value is not None and self.on_rollback is not None:
+            self.on_rollback(value)
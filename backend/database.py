@@ -231,6 +231,44 @@ async def run_migrations():
             print(f"⚠️  Client profile migration warning: {e}")
 
 
+async def create_catalog_indexes():
+    """
+    Create indexes added to existing tables after their initial creation.
+
+    create_all() only builds indexes for new tables, so indexes declared on
+    long-lived tables are created here. Works on both PostgreSQL and SQLite.
+    """
+    from sqlalchemy import text
+
+    async with engine.begin() as conn:
+        try:
+            for statement in (
+                "CREATE INDEX IF NOT EXISTS idx_product_shop_enabled_price ON product (shop_id, enabled, price)",
+                "CREATE INDEX IF NOT EXISTS idx_product_shop_created_id ON product (shop_id, created_at, id)",
+                "CREATE INDEX IF NOT EXISTS idx_product_created_id ON product (created_at, id)",
+                'CREATE INDEX IF NOT EXISTS idx_order_shop_created_id ON "order" (shop_id, created_at, id)',
+                'CREATE INDEX IF NOT EXISTS idx_order_created_id ON "order" (created_at, id)',
+                "CREATE INDEX IF NOT EXISTS idx_warehouseoperation_item_created_id "
+                "ON warehouseoperation (warehouse_item_id, created_at, id)",
+            ):
+                await conn.execute(text(statement))
+            print("✅ Migration: catalog indexes created")
+        except Exception as e:
+            print(f"⚠️  Catalog index migration warning: {e}")
+
+    # Full-text search structures + backfill (separate transaction: pg_trgm may be unavailable)
+    from services.product_search_service import ProductSearchService
+
+    try:
+        await ProductSearchService.ensure_schema(engine)
+        print(
+            "✅ Migration: product search index ready "
+            f"(search_vector: {ProductSearchService.has_vector}, pg_trgm: {ProductSearchService.has_trigram})"
+        )
+    except Exception as e:
+        print(f"⚠️  Product search index migration warning: {e}")
+
+
 async def get_session() -> AsyncSession:
     """Dependency to get database session"""
     async with async_session() as session:
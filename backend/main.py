@@ -1,3 +1,4 @@
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -12,9 +13,9 @@ logger = get_logger(__name__)
 # Import unified config (auto-detects PostgreSQL/SQLite based on DATABASE_URL)
 from config import settings
 
-from database import create_db_and_tables, get_session, run_migrations
+from database import create_db_and_tables, create_catalog_indexes, engine, get_session, run_migrations
 from models import OrderCounter, WarehouseItem, ProductRecipe, ShopMilestone, ClientProfile  # Import to register models for table creation
-from migrate import migrate_phase1_columns, migrate_phase3_order_columns, migrate_tracking_id, migrate_kaspi_payment_fields
+from migrate import migrate_phase1_columns, migrate_phase3_order_columns, migrate_tracking_id, migrate_kaspi_payment_fields, migrate_product_links, migrate_order_sales_columns, migrate_product_content_hash, migrate_shop_rating_stats, migrate_catalog_facets, migrate_warehouse_item_version, migrate_warehouse_reserved_quantity, migrate_order_reservation_expiry, migrate_inventory_check_progress, migrate_order_phone_normalized
 from migrations.add_bitrix_order_id import migrate_add_bitrix_order_id
 from api.products import router as products_router  # Now imports from modular package
 from api.orders import router as orders_router
@@ -41,9 +42,14 @@ from api.visual_search import router as visual_search_router
 # Import middleware
 from core.middleware import RequestIDMiddleware
 from core.metrics import PrometheusMiddleware, metrics_handler
+from core.serialization import ORJSONResponse
 
 # Import Kaspi polling service
 from services.kaspi_polling_service import KaspiPollingService
+from services.product_sales_service import ProductSalesService
+from services.inventory_service import InventoryService
+from services.warehouse_ledger_service import WarehouseLedgerService
+from services.order_event_broker import OrderEventBroker
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
 
@@ -62,6 +68,9 @@ async def lifespan(app: FastAPI):
     await create_db_and_tables()
     logger.info("database_tables_created")
 
+    # Indexes on pre-existing tables (create_all skips them)
+    await create_catalog_indexes()
+
     # Run data migrations
     async for session in get_session():
         await migrate_phase1_columns(session)
@@ -69,6 +78,16 @@ async def lifespan(app: FastAPI):
         await migrate_tracking_id(session)
         await migrate_kaspi_payment_fields(session)
         await migrate_add_bitrix_order_id(session)
+        await migrate_product_links(session)
+        await migrate_order_sales_columns(session)
+        await migrate_product_content_hash(session)
+        await migrate_shop_rating_stats(session)
+        await migrate_catalog_facets(session)
+        await migrate_warehouse_item_version(session)
+        await migrate_warehouse_reserved_quantity(session)
+        await migrate_order_reservation_expiry(session)
+        await migrate_inventory_check_progress(session)
+        await migrate_order_phone_normalized(session)
 
         # Run seeds in local development or if RUN_SEEDS flag is set
         if not os.getenv("DATABASE_URL") or os.getenv("RUN_SEEDS") == "true":
@@ -90,14 +109,52 @@ async def lifespan(app: FastAPI):
         coalesce=True,    # Merge missed runs into one
         misfire_grace_time=60  # Allow 60 seconds grace period
     )
+    # Age sales out of the 7/30-day bestseller windows
+    scheduler.add_job(
+        ProductSalesService.refresh_windows_job,
+        'interval',
+        hours=1,
+        id='product_sales_windows',
+        name='Product Sales Window Refresh',
+        max_instances=1,
+        coalesce=True
+    )
+    # Return stock held by unpaid orders whose reservations expired
+    scheduler.add_job(
+        InventoryService.release_expired_reservations_job,
+        'interval',
+        minutes=5,
+        id='reservation_expiry',
+        name='Reservation Expiry',
+        max_instances=1,
+        coalesce=True
+    )
+    # Roll completed days of the warehouse ledger into stock snapshots
+    scheduler.add_job(
+        WarehouseLedgerService.snapshot_job,
+        'interval',
+        hours=6,
+        id='warehouse_stock_snapshots',
+        name='Warehouse Stock Snapshots',
+        max_instances=1,
+        coalesce=True
+    )
     scheduler.start()
     logger.info("kaspi_polling_scheduler_started", interval_minutes=2)
 
+    # Relay order events between replicas (PostgreSQL LISTEN/NOTIFY)
+    order_event_listener = None
+    if engine.dialect.name == "postgresql":
+        order_event_listener = asyncio.create_task(OrderEventBroker.listen(engine))
+
     logger.info("backend_started_successfully")
     yield
     # Shutdown
     logger.info("backend_shutting_down")
 
+    if order_event_listener is not None:
+        order_event_listener.cancel()
+
     # Shutdown scheduler gracefully
     if scheduler.running:
         scheduler.shutdown(wait=True)
@@ -110,6 +167,7 @@ app = FastAPI(
     description="Backend API for Kazakhstan flower shop catalog",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     docs_url="/docs",
     redoc_url="/redoc"
 )
@@ -129,6 +187,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allow all methods including OPTIONS
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # Keyset pagination cursor (core.pagination)
 )
 
 
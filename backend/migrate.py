@@ -238,4 +238,354 @@ async def migrate_kaspi_payment_fields(session: AsyncSession):
     except Exception as e:
         print(f"⚠️  Kaspi Pay migration warning: {e}")
         # Don't fail startup if migration has issues
-        await session.rollback()
\ No newline at end of file
+        await session.rollback()
+
+async def migrate_product_links(session: AsyncSession):
+    """
+    Backfill product_tag / product_city link tables from the JSON columns.
+
+    Runs only while both link tables are empty (first deploy); afterwards the
+    Product mapper events keep them in sync. Safe to run multiple times.
+    """
+    from sqlalchemy import select, func, insert
+    from models import Product, ProductTag, ProductCity
+    from models.products import normalize_filter_values
+
+    try:
+        tag_rows = (await session.execute(select(func.count()).select_from(ProductTag))).scalar()
+        city_rows = (await session.execute(select(func.count()).select_from(ProductCity))).scalar()
+        if tag_rows or city_rows:
+            print("✅ Product link tables up to date")
+            return
+
+        result = await session.execute(select(Product.id, Product.tags, Product.cities))
+        products = result.all()
+
+        tag_links = [
+            {"product_id": product_id, "tag": tag}
+            for product_id, tags, _ in products
+            for tag in normalize_filter_values(tags)
+        ]
+        city_links = [
+            {"product_id": product_id, "city": city}
+            for product_id, _, cities in products
+            for city in normalize_filter_values(cities)
+        ]
+
+        if tag_links:
+            await session.execute(insert(ProductTag), tag_links)
+        if city_links:
+            await session.execute(insert(ProductCity), city_links)
+
+        await session.commit()
+        print(f"✅ Backfilled product links: {len(tag_links)} tags, {len(city_links)} cities")
+
+    except Exception as e:
+        print(f"⚠️  Product links migration warning: {e}")
+        # Don't fail startup if migration has issues
+        await session.rollback()
+
+
+async def migrate_order_sales_columns(session: AsyncSession):
+    """
+    Add order.sales_recorded_at (product sales rollup) and build the rollup
+    on first deploy. Safe to run multiple times.
+    """
+    from sqlalchemy import select
+    from models import ProductSalesStats
+    from services.product_sales_service import ProductSalesService
+
+    try:
+        result = await session.execute(text("""
+            SELECT column_name
+            FROM information_schema.columns
+            WHERE table_name = 'order'
+            AND column_name = 'sales_recorded_at';
+        """))
+        if result.first() is None:
+            await session.execute(text('ALTER TABLE "order" ADD COLUMN sales_recorded_at TIMESTAMP'))
+            await session.execute(text(
+                'CREATE INDEX IF NOT EXISTS idx_order_sales_recorded_at ON "order" (sales_recorded_at)'
+            ))
+            await session.commit()
+            print("✅ Applied order sales migration: sales_recorded_at")
+        else:
+            print("✅ Order sales schema up to date")
+    except Exception as e:
+        print(f"⚠️  Order sales migration warning: {e}")
+        await session.rollback()
+
+    try:
+        existing = await session.execute(select(ProductSalesStats.id).limit(1))
+        if existing.first() is None:
+            products = await ProductSalesService.rebuild_all(session)
+            print(f"✅ Backfilled product sales rollup: {products} products")
+    except Exception as e:
+        print(f"⚠️  Product sales backfill warning: {e}")
+        await session.rollback()
+
+
+async def migrate_product_content_hash(session: AsyncSession):
+    """
+    Add product.content_hash (change detection for bulk upserts / catalog
+    syncs). Safe to run multiple times.
+    """
+    try:
+        result = await session.execute(text("""
+            SELECT column_name
+            FROM information_schema.columns
+            WHERE table_name = 'product'
+            AND column_name = 'content_hash';
+        """))
+        if result.first() is None:
+            await session.execute(text("ALTER TABLE product ADD COLUMN content_hash VARCHAR(64)"))
+            await session.commit()
+            print("✅ Applied product content hash migration: content_hash")
+        else:
+            print("✅ Product content hash schema up to date")
+    except Exception as e:
+        print(f"⚠️  Product content hash migration warning: {e}")
+        await session.rollback()
+
+
+async def migrate_warehouse_item_version(session: AsyncSession):
+    """
+    Add warehouseitem.version (row version bumped by reservation writes,
+    which serializes concurrent reservations). Safe to run multiple times.
+    """
+    try:
+        result = await session.execute(text("""
+            SELECT column_name
+            FROM information_schema.columns
+            WHERE table_name = 'warehouseitem'
+            AND column_name = 'version';
+        """))
+        if result.first() is None:
+            await session.execute(text("ALTER TABLE warehouseitem ADD COLUMN version INTEGER NOT NULL DEFAULT 0"))
+            await session.commit()
+            print("✅ Applied warehouse item version migration: version")
+        else:
+            print("✅ Warehouse item version schema up to date")
+    except Exception as e:
+        print(f"⚠️  Warehouse item version migration warning: {e}")
+        await session.rollback()
+
+
+async def migrate_warehouse_reserved_quantity(session: AsyncSession):
+    """
+    Add warehouseitem.reserved_quantity (maintained sum of open reservations)
+    and backfill it from orderreservation. Safe to run multiple times.
+    """
+    try:
+        result = await session.execute(text("""
+            SELECT column_name
+            FROM information_schema.columns
+            WHERE table_name = 'warehouseitem'
+            AND column_name = 'reserved_quantity';
+        """))
+        if result.first() is None:
+            await session.execute(text(
+                "ALTER TABLE warehouseitem ADD COLUMN reserved_quantity INTEGER NOT NULL DEFAULT 0"
+            ))
+            await session.execute(text("""
+                UPDATE warehouseitem SET reserved_quantity = COALESCE((
+                    SELECT SUM(orderreservation.reserved_quantity)
+                    FROM orderreservation
+                    WHERE orderreservation.warehouse_item_id = warehouseitem.id
+                ), 0)
+            """))
+            await session.commit()
+            print("✅ Applied warehouse reserved quantity migration: reserved_quantity (backfilled)")
+        else:
+            print("✅ Warehouse reserved quantity schema up to date")
+    except Exception as e:
+        print(f"⚠️  Warehouse reserved quantity migration warning: {e}")
+        await session.rollback()
+
+
+async def migrate_order_reservation_expiry(session: AsyncSession):
+    """
+    Add orderreservation.expires_at with its partial index, and give open
+    reservations of NEW orders the default TTL. Safe to run multiple times.
+    """
+    from datetime import timedelta
+    from sqlalchemy import select, update
+    from models import Order, OrderReservation, OrderStatus
+    from services.inventory_service import RESERVATION_TTL_HOURS
+
+    try:
+        result = await session.execute(text("""
+            SELECT column_name
+            FROM information_schema.columns
+            WHERE table_name = 'orderreservation'
+            AND column_name = 'expires_at';
+        """))
+        if result.first() is None:
+            await session.execute(text("ALTER TABLE orderreservation ADD COLUMN expires_at TIMESTAMP"))
+            await session.execute(
+                update(OrderReservation)
+                .where(OrderReservation.order_id.in_(select(Order.id).where(Order.status == OrderStatus.NEW)))
+                .values(expires_at=OrderReservation.created_at + timedelta(hours=RESERVATION_TTL_HOURS))
+                .execution_options(synchronize_session=False)
+            )
+            await session.execute(text(
+                "CREATE INDEX IF NOT EXISTS idx_orderreservation_expires_at "
+                "ON orderreservation (expires_at) WHERE expires_at IS NOT NULL"
+            ))
+            await session.commit()
+            print("✅ Applied reservation expiry migration: expires_at (backfilled, indexed)")
+        else:
+            print("✅ Reservation expiry schema up to date")
+    except Exception as e:
+        print(f"⚠️  Reservation expiry migration warning: {e}")
+        await session.rollback()
+
+
+async def migrate_inventory_check_progress(session: AsyncSession):
+    """
+    Add inventorycheck.items_applied, apply_error and apply_heartbeat_at
+    (progress of background applies). Safe to run multiple times.
+    """
+    try:
+        result = await session.execute(text("""
+            SELECT column_name
+            FROM information_schema.columns
+            WHERE table_name = 'inventorycheck'
+            AND column_name IN ('items_applied', 'apply_error', 'apply_heartbeat_at');
+        """))
+        existing_columns = {row[0] for row in result.fetchall()}
+
+        migrations = [
+            ("items_applied", "INTEGER NOT NULL DEFAULT 0"),
+            ("apply_error", "VARCHAR(500)"),
+            ("apply_heartbeat_at", "TIMESTAMP"),
+        ]
+        applied = []
+        for column_name, column_type in migrations:
+            if column_name not in existing_columns:
+                await session.execute(text(f"ALTER TABLE inventorycheck ADD COLUMN {column_name} {column_type}"))
+                applied.append(column_name)
+
+        if applied:
+            await session.commit()
+            print(f"✅ Applied inventory check progress migration: {', '.join(applied)}")
+        else:
+            print("✅ Inventory check progress schema up to date")
+    except Exception as e:
+        print(f"⚠️  Inventory check progress migration warning: {e}")
+        await session.rollback()
+
+
+async def migrate_shop_rating_stats(session: AsyncSession):
+    """
+    Build the shop_rating_stats rollup on first deploy (the table itself is
+    created by create_all). Safe to run multiple times.
+    """
+    from sqlalchemy import select
+    from models import ShopRatingStats
+    from services.shop_rating_service import ShopRatingService
+
+    try:
+        existing = await session.execute(select(ShopRatingStats.id).limit(1))
+        if existing.first() is None:
+            shops = await ShopRatingService.rebuild_all(session)
+            await session.commit()
+            print(f"✅ Backfilled shop rating rollup: {shops} shops")
+        else:
+            print("✅ Shop rating rollup up to date")
+    except Exception as e:
+        print(f"⚠️  Shop rating rollup backfill warning: {e}")
+        await session.rollback()
+
+
+async def migrate_catalog_facets(session: AsyncSession):
+    """
+    Build the catalog facet index for every shop that has none yet (the
+    tables themselves are created by create_all). Safe to run multiple times.
+    """
+    from services.catalog_facet_service import CatalogFacetService
+
+    try:
+        shops = await CatalogFacetService.build_missing(session)
+        if shops:
+            await session.commit()
+            print(f"✅ Backfilled catalog facet index: {shops} shops")
+        else:
+            print("✅ Catalog facet index up to date")
+    except Exception as e:
+        print(f"⚠️  Catalog facet index backfill warning: {e}")
+        await session.rollback()
+
+
+async def migrate_order_phone_normalized(session: AsyncSession):
+    """
+    Add order.phone_normalized with its search indexes (order search) and
+    backfill it in batches. Safe to run multiple times.
+    """
+    from sqlalchemy import bindparam, select, update
+    from models import Order
+    from models.orders import ORDER_SEARCH_POSTGRES_DDL
+    from utils import phone_search_key
+
+    try:
+        result = await session.execute(text("""
+            SELECT column_name
+            FROM information_schema.columns
+            WHERE table_name = 'order'
+            AND column_name = 'phone_normalized';
+        """))
+        if result.first() is None:
+            await session.execute(text('ALTER TABLE "order" ADD COLUMN phone_normalized VARCHAR(20)'))
+            await session.execute(text(
+                'CREATE INDEX IF NOT EXISTS idx_order_shop_phone_created '
+                'ON "order" (shop_id, phone_normalized, created_at)'
+            ))
+            await session.commit()
+            print("✅ Applied order search migration: phone_normalized (indexed)")
+        else:
+            print("✅ Order search schema up to date")
+    except Exception as e:
+        print(f"⚠️  Order search migration warning: {e}")
+        await session.rollback()
+
+    # Trigram indexes on every start (idempotent): a fresh database gets the
+    # column from create_all but the indexes only from here
+    if session.get_bind().dialect.name == "postgresql":
+        try:
+            for statement in ORDER_SEARCH_POSTGRES_DDL:
+                await session.execute(text(statement))
+            await session.commit()
+            print("✅ Order search trigram indexes ready")
+        except Exception as e:
+            print(f"⚠️  Order search trigram index warning: {e}")
+            await session.rollback()
+
+    try:
+        # normalize_phone_number has no SQL equivalent: normalize in Python, batch by batch
+        backfill = (
+            update(Order.__table__)
+            .where(Order.__table__.c.id == bindparam("order_id"))
+            .values(phone_normalized=bindparam("phone_key"))
+        )
+        last_id = 0
+        backfilled = 0
+        while True:
+            rows = (await session.execute(
+                select(Order.id, Order.phone)
+                .where(Order.phone_normalized.is_(None), Order.phone != "", Order.id > last_id)
+                .order_by(Order.id)
+                .limit(1000)
+            )).all()
+            if not rows:
+                break
+            await session.execute(backfill, [
+                {"order_id": order_id, "phone_key": phone_search_key(phone)} for order_id, phone in rows
+            ])
+            await session.commit()
+            last_id = rows[-1][0]
+            backfilled += len(rows)
+        if backfilled:
+            print(f"✅ Backfilled order phone_normalized: {backfilled} orders")
+    except Exception as e:
+        print(f"⚠️  Order phone backfill warning: {e}")
+        await session.rollback()
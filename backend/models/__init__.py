@@ -21,6 +21,9 @@ from .products import (
     Product,
     ProductCreate,
     ProductUpdate,
+    ProductBulkUpsertItem,
+    ProductBulkUpsert,
+    ProductBulkUpsertResult,
     ProductRead,
     ProductVariantBase,
     ProductVariant,
@@ -37,7 +40,9 @@ from .products import (
     ProductBundleBase,
     ProductBundle,
     ProductBundleCreate,
-    ProductBundleRead
+    ProductBundleRead,
+    ProductTag,
+    ProductCity
 )
 
 # Product Embeddings (pgvector)
@@ -78,6 +83,12 @@ from .warehouse import (
     WarehouseOperation,
     WarehouseOperationCreate,
     WarehouseOperationRead,
+    WarehouseStockSnapshot,
+    WarehouseStockReport,
+    WarehouseBatchLine,
+    WarehouseBatchOperation,
+    WarehouseBatchLineResult,
+    WarehouseBatchResult,
     WarehouseItemDetail,
     ProductRecipeBase,
     ProductRecipe,
@@ -92,6 +103,8 @@ from .warehouse import (
     IngredientAvailability,
     ProductAvailability,
     AvailabilityResponse,
+    MaxQuantityRequest,
+    ProductMaxQuantity,
     InventoryCheckBase,
     InventoryCheck,
     InventoryCheckItemBase,
@@ -154,6 +167,8 @@ from .shop import (
     PickupLocationUpdate,
     PickupLocationRead,
     OrderCounter,
+    ShopOrderCounter,
+    TrackingIdSequence,
     ShopPublicListItem,
     ShopPublicDetail
 )
@@ -212,6 +227,15 @@ from .analytics import (
     ShopMilestone
 )
 
+# Catalog index models
+from .catalog import (
+    ProductFacet,
+    ShopCatalogStats,
+    ProductSalesStats,
+    ShopRatingStats,
+    ResourceVersion
+)
+
 # Kaspi Pay models
 from .kaspi import (
     KaspiPayConfig,
@@ -236,6 +260,9 @@ __all__ = [
     "Product",
     "ProductCreate",
     "ProductUpdate",
+    "ProductBulkUpsertItem",
+    "ProductBulkUpsert",
+    "ProductBulkUpsertResult",
     "ProductRead",
     "ProductVariantBase",
     "ProductVariant",
@@ -253,6 +280,8 @@ __all__ = [
     "ProductBundle",
     "ProductBundleCreate",
     "ProductBundleRead",
+    "ProductTag",
+    "ProductCity",
     # Orders
     "OrderBase",
     "Order",
@@ -282,6 +311,12 @@ __all__ = [
     "WarehouseOperation",
     "WarehouseOperationCreate",
     "WarehouseOperationRead",
+    "WarehouseStockSnapshot",
+    "WarehouseStockReport",
+    "WarehouseBatchLine",
+    "WarehouseBatchOperation",
+    "WarehouseBatchLineResult",
+    "WarehouseBatchResult",
     "WarehouseItemDetail",
     "ProductRecipeBase",
     "ProductRecipe",
@@ -296,6 +331,8 @@ __all__ = [
     "IngredientAvailability",
     "ProductAvailability",
     "AvailabilityResponse",
+    "MaxQuantityRequest",
+    "ProductMaxQuantity",
     "InventoryCheckBase",
     "InventoryCheck",
     "InventoryCheckItemBase",
@@ -349,6 +386,8 @@ __all__ = [
     "PickupLocationUpdate",
     "PickupLocationRead",
     "OrderCounter",
+    "ShopOrderCounter",
+    "TrackingIdSequence",
     # Reviews
     "ProductReviewBase",
     "ProductReview",
@@ -391,6 +430,12 @@ __all__ = [
     "ChatStatsRead",
     # Analytics
     "ShopMilestone",
+    # Catalog index
+    "ProductFacet",
+    "ShopCatalogStats",
+    "ProductSalesStats",
+    "ShopRatingStats",
+    "ResourceVersion",
     # Kaspi Pay
     "KaspiPayConfig",
     "KaspiPayLog",
@@ -0,0 +1,213 @@
+"""
+Catalog index models for storefront facets, sales rankings, shop ratings and
+HTTP caching.
+
+Maintained incrementally (facets by ProductService, sales by
+ProductSalesService, ratings by ShopRatingService, resource versions by
+mapper events) so that filter, homepage, bestseller and shop directory
+endpoints never need to scan the full product, order item or review tables,
+and public GETs can answer 304 Not Modified.
+"""
+from datetime import datetime
+from typing import Optional
+from sqlmodel import SQLModel, Field
+from sqlalchemy import DateTime, func, Column, Index, UniqueConstraint, event, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from .products import Product, ProductImage
+from .shop import Shop
+from .reviews import CompanyReview, FAQ
+from .warehouse import ProductRecipe
+
+
+# ===============================
+# Catalog Facet Models
+# ===============================
+
+class ProductFacet(SQLModel, table=True):
+    """
+    Number of enabled products per shop carrying a given tag or city.
+
+    Rows are removed when their count drops to zero, so the set of rows for a
+    shop is exactly the set of filter values shown on the storefront.
+    """
+    __tablename__ = "product_facet"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    shop_id: int = Field(foreign_key="shop.id", description="Shop for multi-tenancy")
+    facet: str = Field(max_length=20, description="Facet kind: 'tag' or 'city'")
+    value: str = Field(max_length=100, description="Tag or city value")
+    product_count: int = Field(default=0, description="Enabled products with this value")
+
+    __table_args__ = (
+        UniqueConstraint('shop_id', 'facet', 'value', name='uq_product_facet_shop_facet_value'),
+        Index('idx_product_facet_facet_value', 'facet', 'value'),  # Global (cross-shop) facet lookups
+    )
+
+
+class ShopCatalogStats(SQLModel, table=True):
+    """
+    Per-shop catalog summary: enabled product count and price bounds.
+
+    Presence of a row means the shop's facet index has been built.
+    """
+    __tablename__ = "shop_catalog_stats"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    shop_id: int = Field(unique=True, foreign_key="shop.id", description="Shop ID")
+    enabled_count: int = Field(default=0, description="Number of enabled products")
+    min_price: Optional[int] = Field(default=None, description="Lowest enabled product price in kopecks")
+    max_price: Optional[int] = Field(default=None, description="Highest enabled product price in kopecks")
+    updated_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(DateTime, server_default=func.now(), onupdate=func.now())
+    )
+
+
+# ===============================
+# Sales Rollup Models
+# ===============================
+
+class ProductSalesStats(SQLModel, table=True):
+    """
+    Units sold and revenue per product, all-time and over rolling windows.
+
+    Orders are counted once, when they first reach PAID or DELIVERED, and
+    subtracted again if cancelled afterwards. The 7/30-day windows are
+    incremented on sale and periodically recomputed as sales age out.
+    """
+    __tablename__ = "product_sales_stats"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    product_id: int = Field(unique=True, foreign_key="product.id", description="Product ID")
+    shop_id: int = Field(foreign_key="shop.id", description="Shop for multi-tenancy")
+    units_total: int = Field(default=0, description="Units sold, all time")
+    revenue_total: int = Field(default=0, description="Revenue in kopecks, all time")
+    units_7d: int = Field(default=0, description="Units sold in the last 7 days")
+    revenue_7d: int = Field(default=0, description="Revenue in kopecks in the last 7 days")
+    units_30d: int = Field(default=0, description="Units sold in the last 30 days")
+    revenue_30d: int = Field(default=0, description="Revenue in kopecks in the last 30 days")
+    last_sold_at: Optional[datetime] = Field(default=None, description="When the latest counted order was recorded")
+    updated_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(DateTime, server_default=func.now(), onupdate=func.now())
+    )
+
+    __table_args__ = (
+        # Bestseller rankings per shop and marketplace-wide
+        Index('idx_product_sales_shop_units_total', 'shop_id', 'units_total'),
+        Index('idx_product_sales_shop_units_30d', 'shop_id', 'units_30d'),
+        Index('idx_product_sales_shop_units_7d', 'shop_id', 'units_7d'),
+        Index('idx_product_sales_units_total', 'units_total'),
+    )
+
+
+# ===============================
+# Review Rollup Models
+# ===============================
+
+class ShopRatingStats(SQLModel, table=True):
+    """
+    Company review aggregate per shop: review count and average rating.
+
+    Rows exist only for shops with at least one review, so the rating
+    index orders exactly the rated shops.
+    """
+    __tablename__ = "shop_rating_stats"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    shop_id: int = Field(unique=True, foreign_key="shop.id", description="Shop ID")
+    review_count: int = Field(default=0, description="Number of company reviews")
+    rating_sum: int = Field(default=0, description="Sum of review ratings")
+    rating_avg: float = Field(default=0, description="Average rating (rating_sum / review_count)")
+    updated_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(DateTime, server_default=func.now(), onupdate=func.now())
+    )
+
+    __table_args__ = (
+        # Shop directory sorted by rating, best first
+        Index('idx_shop_rating_stats_rating', 'rating_avg', 'review_count'),
+    )
+
+
+# ===============================
+# Resource Version Models
+# ===============================
+
+# Version scopes. Only the catalog is versioned per shop; other scopes use shop_id 0.
+SCOPE_CATALOG = "catalog"
+SCOPE_SHOPS = "shops"
+SCOPE_FAQS = "faqs"
+# Live stock (in_stock / max_quantity): no row here, the token comes from the
+# in-process AvailabilityEngine (see ResourceVersionService.get_token)
+SCOPE_STOCK = "stock"
+
+
+class ResourceVersion(SQLModel, table=True):
+    """
+    Monotonic change counter per cached resource (see core.http_cache).
+
+    Bumped in the writing transaction by mapper events below, so every ORM
+    write path is covered and an ETag changes as soon as the write commits.
+    """
+    __tablename__ = "resource_version"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    scope: str = Field(max_length=30, description="Resource scope: catalog, shops or faqs")
+    shop_id: int = Field(default=0, description="Shop for per-shop scopes, 0 for marketplace-wide")
+    version: int = Field(default=0, description="Incremented on every write in the scope")
+    updated_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(DateTime, server_default=func.now(), onupdate=func.now())
+    )
+
+    __table_args__ = (
+        UniqueConstraint('scope', 'shop_id', name='uq_resource_version_scope_shop'),
+    )
+
+
+def bump_resource_version(connection, scope: str, shop_id: Optional[int] = 0) -> None:
+    """Atomically increment (or create) a version row on the flushing connection"""
+    if shop_id is None:
+        return
+    table = ResourceVersion.__table__
+    dialect_insert = postgresql.insert if connection.dialect.name == "postgresql" else sqlite.insert
+    statement = dialect_insert(table).values(scope=scope, shop_id=shop_id, version=1)
+    connection.execute(statement.on_conflict_do_update(
+        index_elements=[table.c.scope, table.c.shop_id],
+        set_={"version": table.c.version + 1, "updated_at": func.now()}
+    ))
+
+
+def _bump_catalog(mapper, connection, target):
+    bump_resource_version(connection, SCOPE_CATALOG, target.shop_id)
+
+
+def _bump_catalog_for_product_child(mapper, connection, target):
+    shop_id = connection.execute(
+        select(Product.shop_id).where(Product.id == target.product_id)
+    ).scalar()
+    bump_resource_version(connection, SCOPE_CATALOG, shop_id)
+
+
+def _bump_shops(mapper, connection, target):
+    bump_resource_version(connection, SCOPE_SHOPS)
+
+
+def _bump_faqs(mapper, connection, target):
+    bump_resource_version(connection, SCOPE_FAQS)
+
+
+for _model, _listener in (
+    (Product, _bump_catalog),
+    (ProductImage, _bump_catalog_for_product_child),
+    # Stock writes are versioned by SCOPE_STOCK: a per-shop row bumped by
+    # every reservation would serialize checkouts
+    (ProductRecipe, _bump_catalog_for_product_child),
+    (Shop, _bump_shops),
+    (CompanyReview, _bump_shops),  # Shop ratings on /shops
+    (FAQ, _bump_faqs),
+):
+    for _event_name in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event_name, _listener)
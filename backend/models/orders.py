@@ -6,11 +6,11 @@ Includes Order, OrderItem, OrderPhoto, and OrderHistory models with their schema
 from datetime import datetime
 from typing import Optional, List
 from sqlmodel import SQLModel, Field, Relationship
-from sqlalchemy import DateTime, func, Column
+from sqlalchemy import DateTime, func, Column, Index, event, inspect
 from pydantic import field_validator
 
 from .enums import OrderStatus
-from utils import normalize_phone_number
+from utils import normalize_phone_number, phone_search_key
 
 
 # ===============================
@@ -78,6 +78,12 @@ class Order(OrderBase, table=True):
     assigned_by_id: Optional[int] = Field(default=None, foreign_key="user.id", description="Who made the assignment")
     assigned_at: Optional[datetime] = Field(default=None, description="When assignment was made")
 
+    # Order search (OrderSearchService): phone as normalized by phone_search_key, kept in sync on flush
+    phone_normalized: Optional[str] = Field(default=None, max_length=20, description="Normalized customer phone")
+
+    # Sales rollup (ProductSalesService): set while the order is counted in product_sales_stats
+    sales_recorded_at: Optional[datetime] = Field(default=None, description="When the order was counted as a sale")
+
     created_at: Optional[datetime] = Field(
         default=None,
         sa_column=Column(DateTime, server_default=func.now())
@@ -92,6 +98,37 @@ class Order(OrderBase, table=True):
     reservations: List["OrderReservation"] = Relationship(back_populates="order")
     photos: List["OrderPhoto"] = Relationship()
 
+    __table_args__ = (
+        # Keyset pagination: newest-first listings per shop and across shops
+        Index('idx_order_shop_created_id', 'shop_id', 'created_at', 'id'),
+        Index('idx_order_created_id', 'created_at', 'id'),
+        # Rolling sales window recomputation
+        Index('idx_order_sales_recorded_at', 'sales_recorded_at'),
+        # Order search by phone: a customer's orders per shop, newest first
+        Index('idx_order_shop_phone_created', 'shop_id', 'phone_normalized', 'created_at'),
+    )
+
+
+# Trigram indexes for substring search (ILIKE '%...%') on PostgreSQL; SQLite scans.
+# Created only by migrate_order_phone_normalized, which tolerates a role that
+# cannot CREATE EXTENSION; create_all must not depend on pg_trgm.
+ORDER_SEARCH_POSTGRES_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    'CREATE INDEX IF NOT EXISTS idx_order_customer_name_trgm ON "order" USING GIN ("customerName" gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS idx_order_number_trgm ON "order" USING GIN ("orderNumber" gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS idx_order_phone_normalized_trgm ON "order" USING GIN (phone_normalized gin_trgm_ops)',
+]
+
+
+@event.listens_for(Order, "before_insert")
+@event.listens_for(Order, "before_update")
+def _sync_phone_normalized(mapper, connection, target: Order) -> None:
+    """Keep phone_normalized in step with phone (ORM writes; set-based updates set both)"""
+    state = inspect(target)
+    if state.has_identity and not state.attrs.phone.history.has_changes():
+        return
+    target.phone_normalized = phone_search_key(target.phone)
+
 
 class OrderCreate(SQLModel):
     """Schema for creating orders"""
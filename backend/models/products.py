@@ -6,7 +6,7 @@ Includes Product, ProductVariant, and ProductImage models with their schemas.
 from datetime import datetime
 from typing import Optional, List
 from sqlmodel import SQLModel, Field, Relationship, JSON, Column
-from sqlalchemy import DateTime, func
+from sqlalchemy import DateTime, func, Index, DDL, event, delete, insert, inspect
 from pydantic import model_validator
 
 from .enums import ProductType
@@ -47,6 +47,11 @@ class Product(ProductBase, table=True):
         default=None,
         sa_column=Column(DateTime, server_default=func.now(), onupdate=func.now())
     )
+    content_hash: Optional[str] = Field(
+        default=None,
+        max_length=64,
+        description="Hash of the last bulk-upserted content (change detection for catalog syncs)"
+    )
 
     # Relationships
     order_items: List["OrderItem"] = Relationship(back_populates="product")
@@ -55,6 +60,123 @@ class Product(ProductBase, table=True):
     images: List["ProductImage"] = Relationship(back_populates="product")
     # embeddings relationship removed - ProductEmbedding uses application-level joins
 
+    __table_args__ = (
+        # Price bounds recomputation in CatalogFacetService (index-only MIN/MAX per shop)
+        Index('idx_product_shop_enabled_price', 'shop_id', 'enabled', 'price'),
+        # Keyset pagination: newest-first listings per shop and across shops
+        Index('idx_product_shop_created_id', 'shop_id', 'created_at', 'id'),
+        Index('idx_product_created_id', 'created_at', 'id'),
+    )
+
+
+# Full-text search structures (maintained by services.product_search_service).
+# Not mapped on the model: tsvector / FTS5 have no portable column type.
+# The PostgreSQL ones are created only by ProductSearchService.ensure_schema at
+# startup, which tolerates a role that cannot CREATE EXTENSION; create_all
+# must not depend on pg_trgm. The vector and trigram parts run in separate
+# transactions so a failed CREATE EXTENSION keeps full-text search.
+POSTGRES_VECTOR_DDL = [
+    "ALTER TABLE product ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    "CREATE INDEX IF NOT EXISTS idx_product_search_vector ON product USING GIN (search_vector)",
+]
+
+POSTGRES_TRIGRAM_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS idx_product_name_trgm ON product USING GIN (lower(name) gin_trgm_ops)",
+]
+
+SQLITE_SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS product_fts USING fts5("
+    "name, tags, description, tokenize='unicode61 remove_diacritics 2')",
+]
+
+for _statement in SQLITE_SEARCH_DDL:
+    event.listen(Product.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+
+
+# ===============================
+# Product Tag / City Link Tables (indexed filtering)
+# ===============================
+
+class ProductTag(SQLModel, table=True):
+    """Normalized product tag - one row per (product, tag) for indexed tag filters"""
+    __tablename__ = "product_tag"
+
+    product_id: int = Field(foreign_key="product.id", primary_key=True)
+    tag: str = Field(max_length=100, primary_key=True, description="Lowercased tag")
+
+    __table_args__ = (
+        Index('idx_product_tag_tag_product', 'tag', 'product_id'),  # Tag -> products lookup
+    )
+
+
+class ProductCity(SQLModel, table=True):
+    """Normalized product city - one row per (product, city) for indexed city filters"""
+    __tablename__ = "product_city"
+
+    product_id: int = Field(foreign_key="product.id", primary_key=True)
+    city: str = Field(max_length=100, primary_key=True, description="Lowercased city")
+
+    __table_args__ = (
+        Index('idx_product_city_city_product', 'city', 'product_id'),  # City -> products lookup
+    )
+
+
+def normalize_filter_value(value: str) -> str:
+    """Normalize a tag or city for storage in / lookup against the link tables"""
+    return value.strip().lower()
+
+
+def normalize_filter_values(values: Optional[List[str]]) -> List[str]:
+    """Distinct, sorted, normalized non-empty values of a tags/cities list"""
+    return sorted({normalize_filter_value(v) for v in values or [] if v and v.strip()})
+
+
+def _replace_product_links(connection, product_id: int, tags: Optional[List[str]], cities: Optional[List[str]]) -> None:
+    """Rewrite link rows of one product on the flush connection"""
+    connection.execute(delete(ProductTag.__table__).where(ProductTag.__table__.c.product_id == product_id))
+    connection.execute(delete(ProductCity.__table__).where(ProductCity.__table__.c.product_id == product_id))
+
+    tag_values = normalize_filter_values(tags)
+    city_values = normalize_filter_values(cities)
+    if tag_values:
+        connection.execute(
+            insert(ProductTag.__table__),
+            [{"product_id": product_id, "tag": t} for t in tag_values]
+        )
+    if city_values:
+        connection.execute(
+            insert(ProductCity.__table__),
+            [{"product_id": product_id, "city": c} for c in city_values]
+        )
+
+
+@event.listens_for(Product, "after_insert")
+def _product_links_after_insert(mapper, connection, target: Product) -> None:
+    """Keep link tables in sync for every insert path (services, webhooks, scripts)"""
+    _replace_product_links(connection, target.id, target.tags, target.cities)
+
+
+@event.listens_for(Product, "after_update")
+def _product_links_after_update(mapper, connection, target: Product) -> None:
+    """Rewrite links only when tags or cities were reassigned"""
+    state = inspect(target)
+    if state.attrs.tags.history.has_changes() or state.attrs.cities.history.has_changes():
+        _replace_product_links(connection, target.id, target.tags, target.cities)
+
+
+@event.listens_for(Product, "before_update")
+def _product_content_hash_before_update(mapper, connection, target: Product) -> None:
+    """Forget the sync hash on ORM edits so the next bulk upsert rewrites the row"""
+    if not inspect(target).attrs.content_hash.history.has_changes():
+        target.content_hash = None
+
+
+@event.listens_for(Product, "before_delete")
+def _product_links_before_delete(mapper, connection, target: Product) -> None:
+    """Remove links before the product row (FK order)"""
+    _replace_product_links(connection, target.id, None, None)
+
 
 class ProductCreate(ProductBase):
     """Schema for creating products"""
@@ -79,6 +201,31 @@ class ProductUpdate(SQLModel):
     image: Optional[str] = None
 
 
+class ProductBulkUpsertItem(ProductBase):
+    """One product in a bulk upsert"""
+    id: Optional[int] = Field(default=None, description="Existing product ID (omit to create)")
+    images: Optional[List[str]] = Field(
+        default=None,
+        description="Gallery image URLs in display order (omit to keep current images)"
+    )
+
+
+class ProductBulkUpsert(SQLModel):
+    """Schema for bulk product upserts"""
+    products: List[ProductBulkUpsertItem] = Field(max_length=1000)
+
+
+class ProductBulkUpsertResult(SQLModel):
+    """Outcome of a bulk upsert, as product IDs"""
+    created: List[int] = Field(default_factory=list)
+    updated: List[int] = Field(default_factory=list)
+    unchanged: List[int] = Field(default_factory=list)
+    image_changed: List[int] = Field(
+        default_factory=list,
+        description="Created/updated products whose main image changed (need embeddings)"
+    )
+
+
 # ===============================
 # Product Image Models (moved here to resolve forward reference)
 # ===============================
@@ -124,6 +271,14 @@ class ProductRead(ProductBase):
         default=None,
         description="Detailed color information with hex codes and descriptions for AI/MCP"
     )
+    in_stock: Optional[bool] = Field(
+        default=None,
+        description="Whether at least one can be assembled from current stock (catalog listings only)"
+    )
+    max_quantity: Optional[int] = Field(
+        default=None,
+        description="How many can be assembled from current stock (catalog listings only)"
+    )
 
     @model_validator(mode='after')
     def enrich_colors(self) -> 'ProductRead':
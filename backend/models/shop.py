@@ -338,6 +338,31 @@ class OrderCounter(SQLModel, table=True):
     )
 
 
+class TrackingIdSequence(SQLModel, table=True):
+    """Sequence behind public tracking IDs and the key of their permutation (single row)"""
+    __tablename__ = "tracking_id_sequence"
+
+    id: int = Field(default=1, primary_key=True)
+    counter: int = Field(default=0, description="Highest sequence value handed out to a worker")
+    key: str = Field(max_length=64, description="Hex permutation key; changing it breaks uniqueness")
+    last_updated: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(DateTime, server_default=func.now(), onupdate=func.now())
+    )
+
+
+class ShopOrderCounter(SQLModel, table=True):
+    """Per-shop counter for shop-scoped order numbers (#<shop_id>-00001)"""
+    __tablename__ = "shop_order_counter"
+
+    shop_id: int = Field(primary_key=True, foreign_key="shop.id")
+    counter: int = Field(default=0, description="Highest order number handed out to a worker")
+    last_updated: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(DateTime, server_default=func.now(), onupdate=func.now())
+    )
+
+
 # ===============================
 # Public Shop Schemas (Marketplace)
 # ===============================
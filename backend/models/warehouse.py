@@ -3,12 +3,13 @@ Warehouse models including items, operations, recipes, and reservations.
 
 Includes WarehouseItem, WarehouseOperation, ProductRecipe, and OrderReservation models with their schemas.
 """
-from datetime import datetime
-from typing import Optional, List
+from datetime import date, datetime
+from typing import Dict, Optional, List
 from sqlmodel import SQLModel, Field, Relationship
-from sqlalchemy import DateTime, func, Column
+from sqlalchemy import DateTime, func, Column, Index, UniqueConstraint, event, inspect, text, update
 
-from .enums import WarehouseOperationType
+from .enums import OrderStatus, WarehouseOperationType
+from .orders import Order
 from utils import kopecks_to_tenge, tenge_to_kopecks
 
 
@@ -31,6 +32,14 @@ class WarehouseItemBase(SQLModel):
 class WarehouseItem(WarehouseItemBase, table=True):
     """Warehouse item table model"""
     id: Optional[int] = Field(default=None, primary_key=True)
+    reserved_quantity: int = Field(
+        default=0,
+        description="Sum of open OrderReservation quantities, maintained by InventoryService"
+    )
+    version: int = Field(
+        default=0,
+        description="Row version, bumped by every reservation write against the item"
+    )
     created_at: Optional[datetime] = Field(
         default=None,
         sa_column=Column(DateTime, server_default=func.now())
@@ -141,6 +150,47 @@ class WarehouseOperation(WarehouseOperationBase, table=True):
     order: Optional["Order"] = Relationship()
     user: Optional["User"] = Relationship()
 
+    __table_args__ = (
+        # Per-item history newest first (keyset paging) and stock-at-time lookups
+        Index('idx_warehouseoperation_item_created_id', 'warehouse_item_id', 'created_at', 'id'),
+    )
+
+
+class WarehouseStockSnapshot(SQLModel, table=True):
+    """
+    Closing balance and movement totals of one warehouse item for one day.
+
+    Written by the nightly snapshot job for every item with operations that
+    day (days without movement have no row). Stock-at-time and movement
+    reports start from these rows and add only the operations after them.
+    """
+    __tablename__ = "warehouse_stock_snapshot"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    warehouse_item_id: int = Field(foreign_key="warehouseitem.id")
+    day: date = Field(description="Day covered (operation created_at date)")
+    closing_quantity: int = Field(description="Balance after the day's last operation")
+    last_operation_id: int = Field(description="Last ledger row included in this snapshot")
+    delivery: int = Field(default=0, description="Net DELIVERY change during the day")
+    sale: int = Field(default=0, description="Net SALE change during the day")
+    writeoff: int = Field(default=0, description="Net WRITEOFF change during the day")
+    inventory: int = Field(default=0, description="Net INVENTORY change during the day")
+
+    __table_args__ = (
+        UniqueConstraint('warehouse_item_id', 'day', name='uq_warehouse_stock_snapshot_item_day'),
+    )
+
+
+class WarehouseStockReport(SQLModel):
+    """Stock at the ends of a period and movement totals inside it"""
+    warehouse_item_id: int
+    date_from: Optional[datetime] = None
+    date_to: datetime
+    stock_at_start: Optional[int] = Field(default=None, description="Stock at date_from (when given)")
+    stock_at_end: int = Field(description="Stock at date_to")
+    movements: Dict[str, int] = Field(description="Net change per operation type within the period")
+    net_change: int
+
 
 class WarehouseOperationCreate(SQLModel):
     """Schema for creating warehouse operations"""
@@ -161,6 +211,35 @@ class WarehouseOperationRead(WarehouseOperationBase):
     user_name: Optional[str] = Field(default=None, description="Name of user who performed the operation")
 
 
+class WarehouseBatchLine(SQLModel):
+    """One line of a batch delivery / write-off"""
+    warehouse_item_id: int
+    quantity: int = Field(description="Units delivered (positive) or written off (negative)")
+    cost_price_tenge: Optional[int] = Field(default=None, ge=0, description="New cost price in tenge (deliveries only)")
+    description: Optional[str] = Field(default=None, max_length=500, description="Supplier note or writeoff reason")
+
+
+class WarehouseBatchOperation(SQLModel):
+    """Schema for applying many deliveries / write-offs in one transaction"""
+    lines: List[WarehouseBatchLine] = Field(min_length=1, max_length=500)
+
+
+class WarehouseBatchLineResult(SQLModel):
+    """Outcome of one batch line"""
+    warehouse_item_id: int
+    applied: bool
+    operation_id: Optional[int] = None
+    balance_after: Optional[int] = None
+    error: Optional[str] = None
+
+
+class WarehouseBatchResult(SQLModel):
+    """Outcome of a batch operation, in line order"""
+    applied: int
+    failed: int
+    results: List[WarehouseBatchLineResult] = []
+
+
 class WarehouseItemDetail(WarehouseItemRead):
     """Schema for reading warehouse item with operations - includes tenge values"""
     operations: List[WarehouseOperationRead] = []
@@ -242,11 +321,22 @@ class OrderReservation(OrderReservationBase, table=True):
         default=None,
         sa_column=Column(DateTime, server_default=func.now())
     )
+    # Released by the expiry job after this moment (UTC); NULL once the order is being fulfilled
+    expires_at: Optional[datetime] = Field(default=None)
 
     # Relationships
     order: Optional["Order"] = Relationship(back_populates="reservations")
     warehouse_item: Optional["WarehouseItem"] = Relationship(back_populates="reservations")
 
+    __table_args__ = (
+        # Only expiring reservations are indexed; the expiry job scans them oldest first
+        Index(
+            'idx_orderreservation_expires_at', 'expires_at',
+            postgresql_where=text('expires_at IS NOT NULL'),
+            sqlite_where=text('expires_at IS NOT NULL')
+        ),
+    )
+
 
 class OrderReservationCreate(OrderReservationBase):
     """Schema for creating order reservations"""
@@ -257,6 +347,7 @@ class OrderReservationRead(OrderReservationBase):
     """Schema for reading order reservations"""
     id: int
     created_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
     warehouse_item: Optional[WarehouseItemRead] = None
 
 
@@ -291,6 +382,17 @@ class AvailabilityResponse(SQLModel):
     warnings: List[str] = []
 
 
+class MaxQuantityRequest(SQLModel):
+    """Schema for a bulk max-quantity lookup"""
+    product_ids: List[int] = Field(min_length=1, max_length=500)
+
+
+class ProductMaxQuantity(SQLModel):
+    """How many of a product can be assembled right now"""
+    product_id: int
+    max_quantity: int = Field(description="0 for unknown, disabled or out-of-stock products")
+
+
 # ===============================
 # Inventory Models
 # ===============================
@@ -299,8 +401,11 @@ class InventoryCheckBase(SQLModel):
     """Shared inventory check fields"""
     conducted_by: str = Field(max_length=100, description="Person who conducted inventory")
     comment: Optional[str] = Field(default=None, max_length=500)
-    status: str = Field(default="pending", description="Status: pending, applied")
+    status: str = Field(default="pending", description="Status: pending, applying, applied, failed")
     applied_at: Optional[datetime] = Field(default=None)
+    items_applied: int = Field(default=0, description="Differences reconciled so far (progress of an apply)")
+    apply_error: Optional[str] = Field(default=None, max_length=500, description="Why the last apply failed")
+    apply_heartbeat_at: Optional[datetime] = Field(default=None, description="Last sign of life of a background apply")
     shop_id: int = Field(foreign_key="shop.id", description="Shop that owns this inventory check")
 
 
@@ -364,3 +469,24 @@ class InventoryCheckItemRead(InventoryCheckItemBase):
     """Schema for reading inventory check items"""
     id: int
     created_at: Optional[datetime] = None
+
+
+# ===============================
+# Reservation expiry
+# ===============================
+
+def _pin_reservations_of_processed_order(mapper, connection, target):
+    """Reservations stop expiring once an order moves past NEW (paid, accepted, ...)"""
+    if target.status in (OrderStatus.NEW, OrderStatus.CANCELLED):
+        return
+    if not inspect(target).attrs.status.history.has_changes():
+        return
+    table = OrderReservation.__table__
+    connection.execute(
+        update(table)
+        .where(table.c.order_id == target.id, table.c.expires_at.is_not(None))
+        .values(expires_at=None)
+    )
+
+
+event.listen(Order, "after_update", _pin_reservations_of_processed_order)
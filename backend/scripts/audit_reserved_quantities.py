@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Audit warehouse reserved_quantity counters against open reservations.
+
+Recomputes SUM(orderreservation.reserved_quantity) per warehouse item and
+reports items whose maintained counter drifted. With --repair the counters
+are overwritten with the recomputed sums.
+
+Usage:
+    cd backend
+    python3 scripts/audit_reserved_quantities.py [--repair]
+"""
+
+import asyncio
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import async_session
+from services.inventory_service import InventoryService
+
+
+async def audit_reserved_quantities(repair: bool = False):
+    """Report (and optionally repair) drifted reserved_quantity counters."""
+    print(f"🔍 Auditing reserved quantity counters (repair={repair})...")
+
+    async with async_session() as session:
+        report = await InventoryService.audit_reserved_quantities(session, repair=repair)
+
+    for row in report["drifted"]:
+        print(f"   ⚠️  Item #{row['warehouse_item_id']}: counter {row['counter']}, reservations {row['actual']}")
+
+    if not report["items_drifted"]:
+        print(f"✅ All {report['items_checked']} warehouse items consistent")
+    elif report["repaired"]:
+        print(f"✅ Repaired {report['items_drifted']} of {report['items_checked']} warehouse items")
+    else:
+        print(f"⚠️  {report['items_drifted']} of {report['items_checked']} warehouse items drifted; run with --repair")
+
+
+if __name__ == "__main__":
+    if "--help" in sys.argv or "-h" in sys.argv:
+        print("Usage: python3 scripts/audit_reserved_quantities.py [--repair]")
+        sys.exit(0)
+
+    asyncio.run(audit_reserved_quantities(repair="--repair" in sys.argv))
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Backfill the product_sales_stats rollup from order history.
+
+Marks PAID/DELIVERED orders that were never counted, then rebuilds every
+product's all-time and 7/30-day counters. Safe to re-run: the rollup is
+recomputed from scratch each time.
+
+Usage:
+    cd backend
+    python3 scripts/backfill_product_sales_stats.py
+"""
+
+import asyncio
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import async_session
+from services.product_sales_service import ProductSalesService
+
+
+async def backfill_product_sales_stats():
+    """Rebuild product_sales_stats and report the number of products with sales."""
+    print("📊 Rebuilding product sales rollup...")
+
+    async with async_session() as session:
+        products = await ProductSalesService.rebuild_all(session)
+
+    print(f"✅ Product sales rollup rebuilt: {products} products with sales")
+
+
+if __name__ == "__main__":
+    if "--help" in sys.argv or "-h" in sys.argv:
+        print("Usage: python3 scripts/backfill_product_sales_stats.py")
+        sys.exit(0)
+
+    asyncio.run(backfill_product_sales_stats())
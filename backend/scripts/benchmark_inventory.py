@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+"""
+Benchmark the inventory and reservation paths under concurrency.
+
+Seeds a throwaway database with one shop whose bouquets have realistic
+recipes (10-30 ingredients each), then fires concurrent requests per flow:
+
+- preview:  POST /api/v1/orders/public/preview (availability + totals)
+- create:   POST /api/v1/orders/public/create (order + reservations)
+- reserve:  InventoryService.create_reservation for an existing order
+- release:  InventoryService.release_reservations for the same order
+
+Each flow reports throughput, p50/p99 latency and outcome counts: accepted,
+rejected (insufficient stock), deadlocks / lock timeouts, other errors, and
+oversold items (quantity below zero or more reserved than in stock) found
+after the flow.
+
+Results can be saved as a baseline (one entry per database backend) and
+compared on later runs: a flow regresses when its throughput drops or its
+p99 or deadlock count grows by more than --tolerance, or when it oversells
+more than the baseline did. The exit code is 1 on regression.
+
+The schema is created from the models; a non-SQLite database is dropped
+and recreated, so it requires --reset and must not hold real data.
+
+Usage:
+    cd backend
+    python3 scripts/benchmark_inventory.py [--requests 200] [--concurrency 20]
+    python3 scripts/benchmark_inventory.py --database-url postgresql+asyncpg://localhost/bench --reset
+    python3 scripts/benchmark_inventory.py --save-baseline scripts/benchmarks/inventory_baseline.json
+    python3 scripts/benchmark_inventory.py --baseline scripts/benchmarks/inventory_baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Awaitable, Callable, Dict, List
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The app logs every order at INFO
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel, func, or_, select
+
+from models import (
+    Order, OrderItemRequest, OrderReservation, Product, ProductRecipe, ProductType,
+    Shop, ShopMilestone, User, UserRole, WarehouseItem
+)
+from core.cache import product_detail_cache
+from services.availability_engine import AvailabilityEngine
+from services.inventory_service import InsufficientStockError, InventoryService
+
+FLOWS = ("preview", "create", "reserve", "release")
+
+# Error texts of lock conflicts: Postgres deadlocks / serialization failures, SQLite busy timeouts
+DEADLOCK_MARKERS = ("deadlock", "could not serialize", "database is locked")
+
+# Outcome of one timed call
+OK, REJECTED, DEADLOCK, ERROR = "ok", "rejected", "deadlock", "error"
+
+
+def classify_error(error: BaseException) -> str:
+    if isinstance(error, InsufficientStockError):
+        return REJECTED
+    message = str(error).lower()
+    if any(marker in message for marker in DEADLOCK_MARKERS):
+        return DEADLOCK
+    return ERROR
+
+
+def classify_response(status_code: int, body: str) -> str:
+    if status_code < 300:
+        return OK
+    if status_code in (400, 409):
+        return REJECTED
+    return DEADLOCK if any(marker in body.lower() for marker in DEADLOCK_MARKERS) else ERROR
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+# ===== Database =====
+
+async def prepare_database(database_url: str, reset: bool, concurrency: int):
+    """Engine with an empty schema"""
+    import models  # noqa: F401
+
+    # A connection per request in flight (a public order opens a second session)
+    engine = create_async_engine(database_url, pool_size=concurrency, max_overflow=concurrency)
+
+    async with engine.begin() as conn:
+        if engine.dialect.name == "postgresql":
+            if not reset:
+                raise SystemExit("❌ Refusing to recreate tables in a non-SQLite database without --reset")
+            # Product embeddings need pgvector, as in database.run_migrations()
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+        await conn.run_sync(SQLModel.metadata.drop_all)
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    return engine, async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+async def seed(session_maker, products_count: int, ingredients_count: int, stock: int,
+               orders_count: int, rng: random.Random) -> Dict[str, object]:
+    """One shop with bouquets of 10-30 ingredients, plus orders for the reserve flow"""
+    async with session_maker() as session:
+        owner = User(name="Bench Owner", phone="+77000000001", role=UserRole.DIRECTOR, password_hash="x")
+        session.add(owner)
+        await session.flush()
+        shop = Shop(name="Bench Shop", owner_id=owner.id, phone="+77000000001", is_active=True)
+        session.add(shop)
+        await session.flush()
+        # Skip the one-time "first order" Telegram notification
+        session.add(ShopMilestone(shop_id=shop.id, first_order_received=True))
+
+        ingredients = [
+            WarehouseItem(
+                name=f"Ingredient {index}",
+                quantity=stock,
+                cost_price=10000,
+                retail_price=20000,
+                shop_id=shop.id
+            )
+            for index in range(ingredients_count)
+        ]
+        products = [
+            Product(name=f"Bouquet {index}", price=1500000, type=ProductType.FLOWERS, shop_id=shop.id, enabled=True)
+            for index in range(products_count)
+        ]
+        session.add_all(ingredients + products)
+        await session.flush()
+
+        for product in products:
+            recipe_size = rng.randint(10, min(30, ingredients_count))
+            for ingredient in rng.sample(ingredients, recipe_size):
+                session.add(ProductRecipe(
+                    product_id=product.id,
+                    warehouse_item_id=ingredient.id,
+                    quantity=rng.randint(1, 3)
+                ))
+
+        orders = [
+            Order(
+                tracking_id=f"{800000000 + number}",
+                orderNumber=f"#9{number:05d}",
+                customerName="Bench Client",
+                phone="+77001234567",
+                subtotal=0,
+                total=0,
+                shop_id=shop.id
+            )
+            for number in range(orders_count)
+        ]
+        session.add_all(orders)
+        await session.commit()
+
+        return {
+            "shop_id": shop.id,
+            "product_ids": [product.id for product in products],
+            "order_ids": [order.id for order in orders],
+        }
+
+
+async def count_oversold(session_maker) -> int:
+    """Items with negative stock or more reserved than in stock"""
+    async with session_maker() as session:
+        reserved = (
+            select(OrderReservation.warehouse_item_id, func.sum(OrderReservation.reserved_quantity).label("total"))
+            .group_by(OrderReservation.warehouse_item_id)
+            .subquery()
+        )
+        result = await session.execute(
+            select(func.count(WarehouseItem.id))
+            .select_from(WarehouseItem)
+            .outerjoin(reserved, reserved.c.warehouse_item_id == WarehouseItem.id)
+            .where(or_(
+                WarehouseItem.quantity < 0,
+                WarehouseItem.reserved_quantity > WarehouseItem.quantity,
+                func.coalesce(reserved.c.total, 0) > WarehouseItem.quantity
+            ))
+        )
+        return result.scalar() or 0
+
+
+# ===== Flows =====
+
+async def run_flow(calls: List[Callable[[], Awaitable[str]]], concurrency: int) -> Dict[str, float]:
+    """Run calls with bounded concurrency; latency percentiles and outcome counts"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    outcomes: Counter = Counter()
+
+    async def timed(call) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                outcome = await call()
+            except Exception as e:
+                outcome = classify_error(e)
+            latencies.append((time.perf_counter() - start) * 1000)
+            outcomes[outcome] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(timed(call) for call in calls))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(calls),
+        "throughput": round(len(calls) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "ok": outcomes[OK],
+        "rejected": outcomes[REJECTED],
+        "deadlocks": outcomes[DEADLOCK],
+        "errors": outcomes[ERROR],
+    }
+
+
+def random_cart(product_ids: List[int], rng: random.Random) -> List[Dict[str, int]]:
+    return [
+        {"product_id": product_id, "quantity": rng.randint(1, 2)}
+        for product_id in rng.sample(product_ids, rng.randint(1, min(3, len(product_ids))))
+    ]
+
+
+async def run_benchmark(args) -> Dict[str, Dict[str, float]]:
+    from database import get_session
+    from main import app
+
+    # Ids repeat across rounds on a recreated schema
+    product_detail_cache.clear()
+    AvailabilityEngine.clear()
+
+    rng = random.Random(args.seed)
+    engine, session_maker = await prepare_database(args.database_url, args.reset, args.concurrency)
+    seeded = await seed(session_maker, args.products, args.ingredients, args.stock, args.requests, rng)
+    shop_id, product_ids, order_ids = seeded["shop_id"], seeded["product_ids"], seeded["order_ids"]
+
+    async def bench_session():
+        async with session_maker() as session:
+            yield session
+
+    app.dependency_overrides[get_session] = bench_session
+    results: Dict[str, Dict[str, float]] = {}
+    carts = [random_cart(product_ids, rng) for _ in range(args.requests)]
+
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+
+            def preview(cart) -> Callable[[], Awaitable[str]]:
+                async def call() -> str:
+                    response = await client.post(
+                        "/api/v1/orders/public/preview", params={"shop_id": shop_id}, json=cart
+                    )
+                    return classify_response(response.status_code, response.text)
+                return call
+
+            def create(number: int, cart) -> Callable[[], Awaitable[str]]:
+                async def call() -> str:
+                    response = await client.post(
+                        "/api/v1/orders/public/create",
+                        params={"shop_id": shop_id},
+                        json={
+                            "customerName": f"Client {number}",
+                            "phone": f"+7701{number:07d}",
+                            "delivery_address": "Abaya 1",
+                            "items": cart,
+                        }
+                    )
+                    return classify_response(response.status_code, response.text)
+                return call
+
+            def reserve(order_id: int, cart) -> Callable[[], Awaitable[str]]:
+                async def call() -> str:
+                    async with session_maker() as session:
+                        await InventoryService.create_reservation(
+                            session, order_id, [OrderItemRequest(**item) for item in cart]
+                        )
+                    return OK
+                return call
+
+            def release(order_id: int) -> Callable[[], Awaitable[str]]:
+                async def call() -> str:
+                    async with session_maker() as session:
+                        await InventoryService.release_reservations(session, order_id)
+                    return OK
+                return call
+
+            # Preview and reserve/release run before create, which keeps its stock reserved
+            flows = {
+                "preview": [preview(cart) for cart in carts],
+                "reserve": [reserve(order_id, cart) for order_id, cart in zip(order_ids, carts)],
+                "release": [release(order_id) for order_id in order_ids],
+                "create": [create(number, cart) for number, cart in enumerate(carts)],
+            }
+            for name, calls in flows.items():
+                results[name] = await run_flow(calls, args.concurrency)
+                results[name]["oversold"] = await count_oversold(session_maker)
+    finally:
+        app.dependency_overrides.pop(get_session, None)
+        await engine.dispose()
+
+    return {name: results[name] for name in FLOWS}
+
+
+def median_results(rounds: List[Dict[str, Dict[str, float]]]) -> Dict[str, Dict[str, float]]:
+    """Per-flow median of every metric across rounds"""
+    return {
+        name: {
+            metric: statistics.median(result[name][metric] for result in rounds)
+            for metric in rounds[0][name]
+        }
+        for name in rounds[0]
+    }
+
+
+# ===== Baseline =====
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            tolerance: float) -> List[str]:
+    """Regressions of results against a baseline for the same backend"""
+    regressions = []
+    for name, old in baseline.items():
+        new = results.get(name)
+        if new is None:
+            continue
+        if new["throughput"] < old["throughput"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {old['throughput']} -> {new['throughput']} req/s")
+        if new["p99_ms"] > old["p99_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p99 {old['p99_ms']} -> {new['p99_ms']} ms")
+        # Lock timeouts vary between runs like latency does; any extra oversold item is a bug
+        if new["deadlocks"] > old["deadlocks"] * (1 + tolerance):
+            regressions.append(f"{name}: deadlocks {old['deadlocks']} -> {new['deadlocks']}")
+        if new["oversold"] > old["oversold"]:
+            regressions.append(f"{name}: oversold {old['oversold']} -> {new['oversold']}")
+    return regressions
+
+
+def load_baselines(path: str) -> Dict[str, Dict[str, Dict[str, float]]]:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def print_results(backend: str, results: Dict[str, Dict[str, float]], args) -> None:
+    print(
+        f"📦 {backend}: {args.products} bouquets of 10-30 ingredients, "
+        f"{args.requests} requests per flow, concurrency {args.concurrency}, median of {args.rounds} rounds"
+    )
+    print(f"  {'flow':<8} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'ok':>5} {'rej':>5} {'dlock':>5} {'err':>5} {'oversold':>8}")
+    for name, stats in results.items():
+        print(
+            f"  {name:<8} {stats['throughput']:8.1f} {stats['p50_ms']:8.2f} {stats['p99_ms']:8.2f} "
+            f"{stats['ok']:5g} {stats['rejected']:5g} {stats['deadlocks']:5g} {stats['errors']:5g} {stats['oversold']:8g}"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark inventory and reservation flows under concurrency")
+    parser.add_argument(
+        "--database-url",
+        default=os.getenv("BENCH_DATABASE_URL"),
+        help="Async database URL (default: BENCH_DATABASE_URL, else a temporary SQLite file)"
+    )
+    parser.add_argument("--reset", action="store_true", help="Allow dropping and recreating tables in a non-SQLite database")
+    parser.add_argument("--products", type=int, default=20, help="Bouquets in the shop")
+    parser.add_argument("--ingredients", type=int, default=60, help="Warehouse items in the shop (at least 10)")
+    parser.add_argument("--stock", type=int, default=500, help="Starting quantity of every warehouse item")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per flow")
+    parser.add_argument("--concurrency", type=int, default=20, help="Requests in flight per flow")
+    parser.add_argument("--rounds", type=int, default=3, help="Runs on a fresh database; the median is reported")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for recipes and carts")
+    parser.add_argument("--baseline", help="Compare against this baseline file")
+    parser.add_argument("--save-baseline", help="Store the results in this baseline file")
+    parser.add_argument("--tolerance", type=float, default=0.35, help="Allowed throughput / p99 change (fraction)")
+    args = parser.parse_args()
+
+    if args.ingredients < 10:
+        parser.error("--ingredients must be at least 10")
+
+    temporary_dir = None
+    if not args.database_url:
+        temporary_dir = tempfile.TemporaryDirectory()
+        args.database_url = f"sqlite+aiosqlite:///{os.path.join(temporary_dir.name, 'bench.db')}"
+    backend = args.database_url.split("+")[0].split(":")[0]
+
+    try:
+        results = median_results([asyncio.run(run_benchmark(args)) for _ in range(args.rounds)])
+    finally:
+        if temporary_dir:
+            temporary_dir.cleanup()
+
+    print_results(backend, results, args)
+
+    exit_code = 0
+    if args.baseline:
+        baseline = load_baselines(args.baseline).get(backend)
+        if baseline is None:
+            print(f"⚠️  No {backend} baseline in {args.baseline}")
+        else:
+            regressions = compare(results, baseline, args.tolerance)
+            for regression in regressions:
+                print(f"❌ {regression}")
+            if regressions:
+                exit_code = 1
+            else:
+                print(f"✅ Within {args.tolerance:.0%} of the {backend} baseline")
+
+    if args.save_baseline:
+        baselines = load_baselines(args.save_baseline)
+        baselines[backend] = results
+        os.makedirs(os.path.dirname(os.path.abspath(args.save_baseline)), exist_ok=True)
+        with open(args.save_baseline, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"💾 Saved {backend} baseline to {args.save_baseline}")
+
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Benchmark order creation throughput by order number allocator.
+
+Creates orders concurrently (OrderService.create_simple_order, one session
+per order) on a fresh database for each case:
+
+- legacy:   the previous per-order counter path (SELECT the counter row,
+            UPDATE + SELECT in a savepoint, commit)
+- block=1:  OrderNumberAllocator, one counter bump per order (gapless)
+- block=N:  OrderNumberAllocator handing out blocks of N numbers
+
+and reports orders/s, p50/p99 latency, failed orders and duplicate numbers.
+
+Usage:
+    cd backend
+    python3 scripts/benchmark_order_numbers.py [--orders 500] [--concurrency 20] [--block-size 20]
+    python3 scripts/benchmark_order_numbers.py --database-url postgresql+asyncpg://localhost/bench --reset
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from fastapi import HTTPException
+from sqlalchemy import Integer, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel
+
+from models import Order, OrderCounter, OrderCreate, Shop, User, UserRole
+from services import order_number_allocator
+from services.order_number_allocator import OrderNumberAllocator
+from services.order_service import OrderService
+
+
+async def legacy_order_number(session: AsyncSession, shop_id: Optional[int] = None) -> str:
+    """The per-order counter path OrderNumberAllocator replaced"""
+    try:
+        result = await session.execute(select(OrderCounter).where(OrderCounter.id == 1))
+        if not result.scalar_one_or_none():
+            max_order = await session.execute(
+                select(func.max(func.cast(func.substr(Order.orderNumber, 2), Integer))).select_from(Order)
+            )
+            session.add(OrderCounter(id=1, counter=max_order.scalar() or 0))
+            await session.commit()
+
+        await session.begin_nested()
+        await session.execute(
+            text("UPDATE ordercounter SET counter = counter + 1, last_updated = CURRENT_TIMESTAMP WHERE id = 1")
+        )
+        counter = (await session.execute(text("SELECT counter FROM ordercounter WHERE id = 1"))).scalar_one()
+        await session.commit()
+        return f"#{str(counter).zfill(5)}"
+    except Exception as e:
+        await session.rollback()
+        raise HTTPException(status_code=500, detail=f"Failed to generate order number: {str(e)}")
+
+
+async def prepare_database(database_url: str, reset: bool, concurrency: int):
+    """Engine with an empty schema and one shop"""
+    import models  # noqa: F401
+
+    engine = create_async_engine(database_url, pool_size=concurrency, max_overflow=concurrency)
+    async with engine.begin() as conn:
+        if engine.dialect.name == "postgresql":
+            if not reset:
+                raise SystemExit("❌ Refusing to recreate tables in a non-SQLite database without --reset")
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+        await conn.run_sync(SQLModel.metadata.drop_all)
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_maker() as session:
+        owner = User(name="Bench Owner", phone="+77000000001", role=UserRole.DIRECTOR, password_hash="x")
+        session.add(owner)
+        await session.flush()
+        shop = Shop(name="Bench Shop", owner_id=owner.id, phone="+77000000001", is_active=True)
+        session.add(shop)
+        await session.commit()
+        shop_id = shop.id
+
+    return engine, session_maker, shop_id
+
+
+async def run_case(
+    args,
+    generate: Callable[..., Awaitable[str]],
+    block_size: int
+) -> Dict[str, float]:
+    """Create args.orders orders concurrently; throughput, latency and duplicates"""
+    OrderNumberAllocator.clear()
+    order_number_allocator.ORDER_NUMBER_BLOCK_SIZE = block_size
+    OrderService.generate_order_number = staticmethod(generate)
+
+    engine, session_maker, shop_id = await prepare_database(args.database_url, args.reset, args.concurrency)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies: List[float] = []
+    failed = 0
+
+    async def create(number: int) -> None:
+        nonlocal failed
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                async with session_maker() as session:
+                    await OrderService.create_simple_order(
+                        session, OrderCreate(customerName=f"Client {number}", phone="+77001234567"), shop_id
+                    )
+            except Exception:
+                failed += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(create(number) for number in range(args.orders)))
+    elapsed = time.perf_counter() - started
+
+    async with session_maker() as session:
+        created, distinct = (await session.execute(
+            select(func.count(Order.id), func.count(func.distinct(Order.orderNumber)))
+        )).one()
+    await engine.dispose()
+
+    latencies.sort()
+    return {
+        "throughput": args.orders / elapsed,
+        "p50_ms": latencies[len(latencies) // 2],
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        "failed": failed,
+        "duplicates": created - distinct,
+    }
+
+
+async def run(args) -> None:
+    original = OrderService.generate_order_number
+    cases = [
+        ("legacy", legacy_order_number, 1),
+        ("block=1", original, 1),
+        (f"block={args.block_size}", original, args.block_size),
+    ]
+
+    backend = args.database_url.split("+")[0].split(":")[0]
+    print(f"📦 {backend}: {args.orders} orders, concurrency {args.concurrency}")
+    print(f"  {'allocator':<10} {'orders/s':>9} {'p50 ms':>8} {'p99 ms':>9} {'failed':>7} {'dupes':>6}")
+    baseline = None
+    for name, generate, block_size in cases:
+        stats = await run_case(args, generate, block_size)
+        baseline = baseline or stats["throughput"]
+        print(
+            f"  {name:<10} {stats['throughput']:9.1f} {stats['p50_ms']:8.2f} {stats['p99_ms']:9.2f} "
+            f"{stats['failed']:7d} {stats['duplicates']:6d}   {stats['throughput'] / baseline:5.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark order creation by order number allocator")
+    parser.add_argument(
+        "--database-url",
+        default=os.getenv("BENCH_DATABASE_URL"),
+        help="Async database URL (default: BENCH_DATABASE_URL, else a temporary SQLite file)"
+    )
+    parser.add_argument("--reset", action="store_true", help="Allow dropping and recreating tables in a non-SQLite database")
+    parser.add_argument("--orders", type=int, default=500, help="Orders per case")
+    parser.add_argument("--concurrency", type=int, default=20, help="Orders in flight")
+    parser.add_argument("--block-size", type=int, default=20, help="Block size of the block case")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        args.database_url = args.database_url or f"sqlite+aiosqlite:///{os.path.join(temporary_dir, 'bench.db')}"
+        asyncio.run(run(args))
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark serialization of a product list page.
+
+Builds an in-memory page of products (with images and colors, like the
+catalog) and times the ways GET /api/v1/products/ can turn it into bytes:
+
+- fastapi+json:     response_model validation + stdlib JSONResponse (old path)
+- fastapi+orjson:   response_model validation + ORJSONResponse (app default)
+- snapshots (cold): ProductRead JSON built once per product and cached
+- snapshots (warm): cached per-version snapshots spliced into an array
+
+No database is needed.
+
+Usage:
+    cd backend
+    python3 scripts/benchmark_product_serialization.py [--products 100] [--rounds 200]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from core.cache import product_snapshot_cache
+from models import Product, ProductImage, ProductRead, ProductType
+from services.product_snapshot_service import ProductSnapshotService
+
+
+def build_products(count: int) -> List[Product]:
+    """Transient products shaped like a real catalog page."""
+    now = datetime(2025, 1, 1, 12, 0)
+    products = []
+    for index in range(1, count + 1):
+        product = Product(
+            id=index,
+            shop_id=1,
+            name=f"Букет из роз №{index}",
+            price=1500000 + index * 100,
+            type=ProductType.FLOWERS,
+            description="Свежие розы, упаковка и открытка в подарок. " * 3,
+            manufacturingTime=60,
+            width=40,
+            height=60,
+            shelfLife=7,
+            enabled=True,
+            is_featured=index % 5 == 0,
+            colors=["красный", "белый"],
+            occasions=["день рождения", "8 марта"],
+            cities=["Алматы", "Астана"],
+            tags=["urgent", "discount"],
+            image=f"https://cdn.example.com/products/{index}/main.jpg",
+            created_at=now - timedelta(days=index),
+            updated_at=now
+        )
+        product.images = [
+            ProductImage(
+                id=index * 10 + order,
+                product_id=index,
+                url=f"https://cdn.example.com/products/{index}/{order}.jpg",
+                order=order,
+                is_primary=order == 0,
+                created_at=now
+            )
+            for order in range(3)
+        ]
+        products.append(product)
+    return products
+
+
+def measure(func: Callable[[], bytes], rounds: int) -> float:
+    """Median milliseconds per call."""
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def run(products_count: int, rounds: int) -> None:
+    products = build_products(products_count)
+    field = create_response_field(name="Response_get_products", type_=List[ProductRead], mode="serialization")
+    loop = asyncio.new_event_loop()
+
+    def fastapi_path(response_class) -> Callable[[], bytes]:
+        def render() -> bytes:
+            content = loop.run_until_complete(
+                serialize_response(field=field, response_content=products, is_coroutine=True)
+            )
+            return response_class(content).body
+        return render
+
+    def snapshots_cold() -> bytes:
+        product_snapshot_cache.clear()
+        return ProductSnapshotService.render_list(products)
+
+    def snapshots_warm() -> bytes:
+        return ProductSnapshotService.render_list(products)
+
+    cases = [
+        ("fastapi+json", fastapi_path(JSONResponse)),
+        ("fastapi+orjson", fastapi_path(ORJSONResponse)),
+        ("snapshots (cold)", snapshots_cold),
+        ("snapshots (warm)", snapshots_warm),
+    ]
+
+    print(f"📦 Serializing {products_count} products, median of {rounds} rounds")
+    baseline = None
+    for name, func in cases:
+        func()  # warm up
+        ms = measure(func, rounds)
+        baseline = baseline or ms
+        print(f"  {name:<18} {ms:8.3f} ms/page   {baseline / ms:6.1f}x")
+
+    loop.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark product list serialization")
+    parser.add_argument("--products", type=int, default=100, help="Products per page")
+    parser.add_argument("--rounds", type=int, default=200, help="Timed rounds per case")
+    args = parser.parse_args()
+
+    run(args.products, args.rounds)
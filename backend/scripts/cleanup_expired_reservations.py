@@ -6,10 +6,17 @@ for too long, preventing inventory from being locked indefinitely.
 """
 
 import asyncio
+import os
+import sys
 from datetime import datetime, timedelta
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlmodel import select
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import async_session
 from models import Order, OrderReservation, OrderStatus
+from services.inventory_service import InventoryService
 
 
 async def cleanup_expired_reservations(dry_run: bool = True, max_age_hours: int = 72):
@@ -25,9 +32,7 @@ async def cleanup_expired_reservations(dry_run: bool = True, max_age_hours: int
     print(f"   Max age: {max_age_hours} hours")
     print("=" * 50)
 
-    engine = create_async_engine("sqlite+aiosqlite:///figma_catalog.db")
-
-    async with AsyncSession(engine) as session:
+    async with async_session() as session:
         # Calculate cutoff time
         cutoff_time = datetime.now() - timedelta(hours=max_age_hours)
 
@@ -82,13 +87,11 @@ async def cleanup_expired_reservations(dry_run: bool = True, max_age_hours: int
         if not dry_run:
             print(f"\n🗑️  Cleaning up {total_reservations} reservations...")
 
-            deleted_count = 0
-            for order_id, data in orders_to_clean.items():
-                for reservation in data['reservations']:
-                    await session.delete(reservation)
-                    deleted_count += 1
-
-            await session.commit()
+            # The service keeps warehouse reserved_quantity counters in sync
+            stats = await InventoryService.cleanup_expired_reservations(
+                session, max_age_hours=max_age_hours, dry_run=False
+            )
+            deleted_count = stats["reservations_deleted"]
             print(f"✅ Successfully deleted {deleted_count} expired reservations")
 
             # Log the cleanup action
@@ -107,9 +110,7 @@ async def get_reservation_statistics():
     print("📊 Current Reservation Statistics")
     print("=" * 50)
 
-    engine = create_async_engine("sqlite+aiosqlite:///figma_catalog.db")
-
-    async with AsyncSession(engine) as session:
+    async with async_session() as session:
         # Total reservations
         total_query = select(OrderReservation)
         total_result = await session.execute(total_query)
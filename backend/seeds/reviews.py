@@ -5,6 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select
 
 from models import CompanyReview
+from services.shop_rating_service import ShopRatingService
 
 
 async def seed_reviews(session: AsyncSession):
@@ -79,5 +80,8 @@ async def seed_reviews(session: AsyncSession):
         review = CompanyReview(**review_data)
         session.add(review)
 
+    # Seeds run after startup migrations: keep the shop rating rollup in step
+    await session.flush()
+    await ShopRatingService.rebuild_all(session)
     await session.commit()
     print(f"  ✅ Seeded {len(reviews_data)} company reviews")
\ No newline at end of file
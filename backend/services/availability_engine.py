@@ -0,0 +1,398 @@
+"""
+Availability Engine - Catalog-wide max_quantity from a recipe matrix
+
+Each shop's recipes are held as a sparse product x warehouse-item matrix
+(CSR-style arrays: row starts, item columns, required quantities) next to a
+vector of effective stock (quantity minus reserved_quantity). max_quantity for
+every product of the shop is then one NumPy pass:
+
+    max_quantity = min over each row of (stock[columns] // quantities)
+
+Matrices are built lazily per shop and kept in process. Committed warehouse
+and reservation writes mark their items stale (session hooks below), and the
+next read re-queries only those items' stock and, through a reverse index
+(warehouse item -> recipe lines), recomputes only the products using them:
+a delivery of tulips touches the tulip bouquets, not the whole catalog.
+Recipe changes rebuild the shop's matrix. A matrix is also rebuilt after MATRIX_TTL_SECONDS, which bounds
+staleness from writes made in other worker processes.
+
+Responses carrying these values are ETagged with version_token(), a digest
+of the max_quantity values themselves, so replicas that agree on the data
+emit the same tag. Stock writes do not bump the catalog ResourceVersion row,
+which would serialize checkouts of a shop.
+
+Semantics match InventoryService.check_product_availability and
+create_reservation: optional recipe lines are never reserved or deducted, so
+they do not limit max_quantity, and products without a (required) recipe are
+always available (UNLIMITED_QUANTITY).
+"""
+
+import hashlib
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlmodel import select
+
+from models import OrderReservation, Product, ProductRecipe, WarehouseItem
+from core.logging import get_logger
+from core.session_hooks import TransactionState
+
+logger = get_logger(__name__)
+
+# max_quantity reported for products without a recipe
+UNLIMITED_QUANTITY = 9999
+
+MATRIX_TTL_SECONDS = 300
+
+
+class ShopStockMatrix:
+    """Recipe matrix and effective stock vector of one shop"""
+
+    def __init__(
+        self,
+        shop_id: int,
+        recipe_rows: List[Tuple[int, int, int]],
+        stock_rows: List[Tuple[int, int]]
+    ):
+        """
+        Args:
+            shop_id: Shop the matrix belongs to
+            recipe_rows: (product_id, warehouse_item_id, quantity) ordered by product_id
+            stock_rows: (warehouse_item_id, effective_stock) for the recipe items
+        """
+        self.shop_id = shop_id
+        self.expires_at = time.monotonic() + MATRIX_TTL_SECONDS
+
+        self.item_ids = np.array(sorted({item_id for _, item_id, _ in recipe_rows}), dtype=np.int64)
+        self.item_columns: Dict[int, int] = {int(item_id): column for column, item_id in enumerate(self.item_ids)}
+
+        row_products = np.array([product_id for product_id, _, _ in recipe_rows], dtype=np.int64)
+        self.columns = np.array([self.item_columns[item_id] for _, item_id, _ in recipe_rows], dtype=np.int64)
+        self.quantities = np.array([quantity for _, _, quantity in recipe_rows], dtype=np.int64)
+        self.product_ids, self.row_starts = np.unique(row_products, return_index=True)
+        self.product_rows: Dict[int, int] = {int(product_id): row for row, product_id in enumerate(self.product_ids)}
+        self.row_ends = np.append(self.row_starts[1:], len(self.columns)).astype(np.int64)
+
+        # Reverse index: recipe lines grouped by item column (CSR over columns)
+        self.line_rows = np.repeat(np.arange(len(self.product_ids), dtype=np.int64), self.row_ends - self.row_starts)
+        self.lines_by_column = np.argsort(self.columns, kind="stable")
+        self.column_starts = np.searchsorted(self.columns[self.lines_by_column], np.arange(len(self.item_ids) + 1))
+
+        self.stock = np.zeros(len(self.item_ids), dtype=np.int64)
+        self.max_quantity = np.zeros(len(self.product_ids), dtype=np.int64)
+        self._digest: Optional[bytes] = None
+        self.update_stock(stock_rows)
+
+    def update_stock(self, stock_rows: Iterable[Tuple[int, int]]) -> None:
+        """Overwrite effective stock of some items and recompute the products using them"""
+        columns = []
+        for item_id, effective_stock in stock_rows:
+            column = self.item_columns.get(item_id)
+            if column is not None:
+                self.stock[column] = effective_stock
+                columns.append(column)
+        if columns:
+            self.recompute(self.dependent_rows(columns))
+
+    def dependent_rows(self, columns: Iterable[int]) -> np.ndarray:
+        """Product rows with a recipe line on any of these item columns"""
+        columns = np.asarray(sorted(set(columns)), dtype=np.int64)
+        lines = self.lines_by_column[_ranges(self.column_starts[columns], self.column_starts[columns + 1])]
+        return np.unique(self.line_rows[lines])
+
+    def recompute(self, rows: Optional[np.ndarray] = None) -> None:
+        """
+        One vectorized pass: per-line floor division, per-product minimum.
+
+        Args:
+            rows: Product rows to recompute (all rows if None)
+        """
+        self._digest = None
+        if rows is None:
+            if not len(self.product_ids):
+                return
+            per_line = self.stock[self.columns] // self.quantities
+            self.max_quantity = np.maximum(np.minimum.reduceat(per_line, self.row_starts), 0)
+            return
+        if not len(rows):
+            return
+
+        starts, ends = self.row_starts[rows], self.row_ends[rows]
+        lines = _ranges(starts, ends)
+        per_line = self.stock[self.columns[lines]] // self.quantities[lines]
+        offsets = np.cumsum(ends - starts) - (ends - starts)
+        self.max_quantity[rows] = np.maximum(np.minimum.reduceat(per_line, offsets), 0)
+
+    def lookup(self, product_ids: Iterable[int]) -> Dict[int, int]:
+        """max_quantity per product id (UNLIMITED_QUANTITY without a recipe)"""
+        return {
+            product_id: int(self.max_quantity[row]) if (row := self.product_rows.get(product_id)) is not None
+            else UNLIMITED_QUANTITY
+            for product_id in product_ids
+        }
+
+    def as_dict(self) -> Dict[int, int]:
+        """max_quantity of every product with a recipe"""
+        return dict(zip(self.product_ids.tolist(), self.max_quantity.tolist()))
+
+    def digest(self) -> bytes:
+        """Hash of (product_id, max_quantity) pairs, cached until the next recompute"""
+        if self._digest is None:
+            self._digest = hashlib.sha1(self.product_ids.tobytes() + self.max_quantity.tobytes()).digest()
+        return self._digest
+
+
+def _ranges(starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Concatenation of arange(start, end) for each pair, without a Python loop"""
+    lengths = ends - starts
+    offsets = np.cumsum(lengths) - lengths
+    return np.arange(lengths.sum(), dtype=np.int64) + np.repeat(starts - offsets, lengths)
+
+
+# In-process engine state
+_matrices: Dict[int, ShopStockMatrix] = {}
+_stale_items: Set[int] = set()
+
+
+class AvailabilityEngine:
+    """
+    Catalog-wide availability reads.
+
+    Reads never write; invalidation happens through the session hooks below
+    or the explicit mark_* helpers for set-based statements that bypass the ORM.
+    """
+
+    # ===== Reads =====
+
+    @staticmethod
+    async def get_shop_max_quantities(session: AsyncSession, shop_id: int) -> Dict[int, int]:
+        """
+        max_quantity of every product with a recipe in a shop.
+
+        Args:
+            session: Database session
+            shop_id: Shop ID
+
+        Returns:
+            Dictionary mapping product_id -> max_quantity (products without a
+            recipe are absent and count as UNLIMITED_QUANTITY)
+        """
+        matrix = await AvailabilityEngine._get_matrix(session, shop_id)
+        return matrix.as_dict()
+
+    @staticmethod
+    async def get_max_quantities(session: AsyncSession, products: Iterable[Product]) -> Dict[int, int]:
+        """
+        max_quantity for a set of products, across any number of shops.
+
+        Disabled products report 0, as in InventoryService.
+
+        Args:
+            session: Database session
+            products: Product instances (id, shop_id and enabled are read)
+
+        Returns:
+            Dictionary mapping product_id -> max_quantity
+        """
+        by_shop: Dict[int, List[Product]] = {}
+        for product in products:
+            by_shop.setdefault(product.shop_id, []).append(product)
+
+        quantities: Dict[int, int] = {}
+        for shop_id, shop_products in by_shop.items():
+            matrix = await AvailabilityEngine._get_matrix(session, shop_id)
+            looked_up = matrix.lookup(product.id for product in shop_products)
+            for product in shop_products:
+                quantities[product.id] = looked_up[product.id] if product.enabled else 0
+        return quantities
+
+    @staticmethod
+    async def get_product_max_quantities(session: AsyncSession, product_ids: Iterable[int]) -> Dict[int, int]:
+        """
+        max_quantity for product ids, e.g. a storefront cart or quantity pickers.
+
+        Args:
+            session: Database session
+            product_ids: Product IDs (any shops)
+
+        Returns:
+            Dictionary mapping product_id -> max_quantity (unknown ids are absent)
+        """
+        product_ids = set(product_ids)
+        if not product_ids:
+            return {}
+        result = await session.execute(
+            select(Product.id, Product.shop_id, Product.enabled).where(Product.id.in_(product_ids))
+        )
+        return await AvailabilityEngine.get_max_quantities(session, result.all())
+
+    @staticmethod
+    async def version_token(session: AsyncSession, shop_id: Optional[int] = None) -> str:
+        """
+        Digest of the max_quantity values a read would return.
+
+        Derived from the values rather than from process-local state, so every
+        replica serving the same stock produces the same token.
+
+        Args:
+            session: Database session
+            shop_id: Shop the response is limited to; None covers every shop
+                with a recipe
+
+        Returns:
+            Opaque token that changes whenever a read may return different values
+        """
+        if shop_id is not None:
+            shop_ids = [shop_id]
+        else:
+            result = await session.execute(
+                select(Product.shop_id)
+                .join(ProductRecipe, ProductRecipe.product_id == Product.id)
+                .distinct()
+            )
+            shop_ids = sorted(row[0] for row in result.all())
+
+        digest = hashlib.sha1()
+        for token_shop_id in shop_ids:
+            matrix = await AvailabilityEngine._get_matrix(session, token_shop_id)
+            digest.update(f"{token_shop_id}:".encode())
+            digest.update(matrix.digest())
+        return digest.hexdigest()[:16]
+
+    # ===== Invalidation =====
+
+    @staticmethod
+    def mark_items_stale(warehouse_item_ids: Iterable[int]) -> None:
+        """Re-read these items' stock on the next read (stock or reservations changed)"""
+        _stale_items.update(warehouse_item_ids)
+
+    @staticmethod
+    def record_stock_change(session: AsyncSession, warehouse_item_ids: Iterable[int]) -> None:
+        """Mark items stale once the session commits (set-based writes the session hooks cannot see)"""
+        _pending.get(session.sync_session)[0].update(warehouse_item_ids)
+
+    @staticmethod
+    def mark_recipes_changed(product_ids: Iterable[int]) -> None:
+        """Rebuild the matrices holding these products (unknown products: rebuild all)"""
+        for product_id in product_ids:
+            shop_ids = [shop_id for shop_id, matrix in _matrices.items() if product_id in matrix.product_rows]
+            if not shop_ids:
+                # New recipe for a product no matrix has a row for yet
+                _matrices.clear()
+                return
+            for shop_id in shop_ids:
+                _matrices.pop(shop_id, None)
+
+    @staticmethod
+    def clear() -> None:
+        """Drop all matrices"""
+        _matrices.clear()
+        _stale_items.clear()
+
+    # ===== Internals =====
+
+    @staticmethod
+    def _stock_query(item_filter):
+        """(warehouse_item_id, quantity - reserved) for items matching item_filter"""
+        return (
+            select(WarehouseItem.id, WarehouseItem.quantity - WarehouseItem.reserved_quantity)
+            .where(item_filter(WarehouseItem.id))
+        )
+
+    @staticmethod
+    async def _get_matrix(session: AsyncSession, shop_id: int) -> ShopStockMatrix:
+        """Cached matrix of a shop, built or refreshed as needed"""
+        matrix = _matrices.get(shop_id)
+        if matrix is None or matrix.expires_at < time.monotonic():
+            matrix = await AvailabilityEngine._build_matrix(session, shop_id)
+            _matrices[shop_id] = matrix
+            return matrix
+
+        stale = [item_id for item_id in _stale_items if item_id in matrix.item_columns]
+        if stale:
+            # Forget before awaiting: commits during the query mark the items again
+            _stale_items.difference_update(stale)
+            result = await session.execute(AvailabilityEngine._stock_query(lambda column: column.in_(stale)))
+            stock_rows = dict(result.all())
+            # Deleted items count as out of stock
+            matrix.update_stock((item_id, stock_rows.get(item_id, 0)) for item_id in stale)
+        return matrix
+
+    @staticmethod
+    async def _build_matrix(session: AsyncSession, shop_id: int) -> ShopStockMatrix:
+        """Load a shop's recipe matrix and stock vector (two queries)"""
+        recipe_result = await session.execute(
+            select(ProductRecipe.product_id, ProductRecipe.warehouse_item_id, ProductRecipe.quantity)
+            .join(Product, Product.id == ProductRecipe.product_id)
+            .join(WarehouseItem, WarehouseItem.id == ProductRecipe.warehouse_item_id)
+            .where(Product.shop_id == shop_id, ProductRecipe.quantity > 0, ProductRecipe.is_optional == False)  # noqa: E712
+            .order_by(ProductRecipe.product_id)
+        )
+        recipe_rows = recipe_result.all()
+
+        recipe_items = (
+            select(ProductRecipe.warehouse_item_id)
+            .join(Product, Product.id == ProductRecipe.product_id)
+            .where(Product.shop_id == shop_id)
+        )
+        stock_result = await session.execute(
+            AvailabilityEngine._stock_query(lambda column: column.in_(recipe_items))
+        )
+        stock_rows = stock_result.all()
+
+        matrix = ShopStockMatrix(shop_id, recipe_rows, stock_rows)
+        # The fresh load already reflects these items
+        _stale_items.difference_update(matrix.item_columns)
+        logger.info(
+            "availability_matrix_built",
+            shop_id=shop_id,
+            products=len(matrix.product_ids),
+            items=len(matrix.item_ids),
+            lines=len(matrix.columns)
+        )
+        return matrix
+
+
+# ===============================
+# Session hooks
+# ===============================
+# Changes are collected per flush and applied to the engine only once the
+# transaction commits, so rolled-back writes never reach the matrices.
+
+
+def _apply_availability_changes(pending: Tuple[Set[int], Set[int]]) -> None:
+    """Hand committed changes to the engine"""
+    items, recipe_products = pending
+    if items:
+        AvailabilityEngine.mark_items_stale(items)
+    if recipe_products:
+        AvailabilityEngine.mark_recipes_changed(recipe_products)
+
+
+_pending = TransactionState("availability_engine_pending", _apply_availability_changes, factory=lambda: (set(), set()))
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_availability_changes(session: Session, flush_context) -> None:
+    """Remember warehouse items and recipe products touched by this flush"""
+    items: Set[int] = set()
+    recipe_products: Set[int] = set()
+    for state, instances in (("new", session.new), ("dirty", session.dirty), ("deleted", session.deleted)):
+        for instance in instances:
+            if isinstance(instance, WarehouseItem):
+                if state == "dirty" and not inspect(instance).attrs.quantity.history.has_changes():
+                    continue
+                items.add(instance.id)
+            elif isinstance(instance, OrderReservation):
+                items.add(instance.warehouse_item_id)
+            elif isinstance(instance, ProductRecipe):
+                recipe_products.add(instance.product_id)
+
+    if items or recipe_products:
+        pending_items, pending_products = _pending.get(session)
+        pending_items.update(items)
+        pending_products.update(recipe_products)
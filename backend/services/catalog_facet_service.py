@@ -0,0 +1,311 @@
+"""
+Catalog Facet Service - Incrementally maintained storefront facet index
+
+Keeps ProductFacet (tag/city counts) and ShopCatalogStats (enabled count,
+price bounds) in sync with product writes, so /products/filters and
+/products/home read a handful of index rows instead of every product.
+
+Write paths capture a snapshot before mutating a product and call
+apply_change() after flushing, inside the same transaction.
+"""
+
+from collections import Counter
+from typing import Optional, Dict, Any, NamedTuple, FrozenSet
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, delete
+from sqlmodel import select
+
+from models import Product, ProductFacet, ShopCatalogStats
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+FACET_TAG = "tag"
+FACET_CITY = "city"
+
+
+class FacetSnapshot(NamedTuple):
+    """Facet-relevant fields of an enabled product at a point in time"""
+    shop_id: int
+    price: int
+    tags: FrozenSet[str]
+    cities: FrozenSet[str]
+
+
+class CatalogFacetService:
+    """
+    Facet index maintenance and lookups.
+
+    Mutating methods never commit; callers own the transaction.
+    """
+
+    @staticmethod
+    def snapshot(product: Optional[Product]) -> Optional[FacetSnapshot]:
+        """
+        Capture the indexed fields of a product.
+
+        Args:
+            product: Product instance (or None)
+
+        Returns:
+            FacetSnapshot, or None if the product is missing or disabled
+            (disabled products do not contribute to facets)
+        """
+        if product is None or not product.enabled:
+            return None
+        return FacetSnapshot(
+            shop_id=product.shop_id,
+            price=product.price,
+            tags=frozenset(product.tags or []),
+            cities=frozenset(product.cities or []),
+        )
+
+    @staticmethod
+    async def apply_change(
+        session: AsyncSession,
+        before: Optional[FacetSnapshot],
+        after: Optional[FacetSnapshot]
+    ) -> None:
+        """
+        Apply the difference between two product snapshots to the index.
+
+        The product change must already be flushed, since price bounds may be
+        recomputed from the product table when an extreme price leaves.
+
+        Args:
+            session: Database session
+            before: Snapshot before the write (None for create / was disabled)
+            after: Snapshot after the write (None for delete / now disabled)
+        """
+        if before == after:
+            return
+
+        shop_ids = {s.shop_id for s in (before, after) if s is not None}
+        for shop_id in shop_ids:
+            old = before if before is not None and before.shop_id == shop_id else None
+            new = after if after is not None and after.shop_id == shop_id else None
+            await CatalogFacetService._apply_shop_change(session, shop_id, old, new)
+
+    @staticmethod
+    async def _apply_shop_change(
+        session: AsyncSession,
+        shop_id: int,
+        before: Optional[FacetSnapshot],
+        after: Optional[FacetSnapshot]
+    ) -> None:
+        """Apply a snapshot difference for a single shop"""
+        # Locked: concurrent writes in the shop apply their changes one after another
+        stats = await CatalogFacetService._get_stats(session, shop_id, for_update=True)
+        if stats is None:
+            # Index not built for this shop yet - build it from the (already flushed)
+            # product table, along with every other shop still missing, so the
+            # first write after a deploy does not leave the rest out of get_facets
+            await CatalogFacetService.rebuild_shop(session, shop_id)
+            await CatalogFacetService.build_missing(session)
+            return
+
+        # Tag/city counters
+        deltas: Counter = Counter()
+        if before is not None:
+            deltas.update({(FACET_TAG, t): -1 for t in before.tags})
+            deltas.update({(FACET_CITY, c): -1 for c in before.cities})
+        if after is not None:
+            deltas.update({(FACET_TAG, t): 1 for t in after.tags})
+            deltas.update({(FACET_CITY, c): 1 for c in after.cities})
+
+        rows = [
+            {"shop_id": shop_id, "facet": facet, "value": value, "product_count": delta}
+            for (facet, value), delta in deltas.items() if delta != 0
+        ]
+        if rows:
+            # One upsert: counters are incremented in SQL, new values inserted
+            table = ProductFacet.__table__
+            dialect_insert = postgresql.insert if session.get_bind().dialect.name == "postgresql" else sqlite.insert
+            statement = dialect_insert(table)
+            await session.execute(
+                statement.on_conflict_do_update(
+                    index_elements=[table.c.shop_id, table.c.facet, table.c.value],
+                    set_={"product_count": table.c.product_count + statement.excluded.product_count}
+                ),
+                rows
+            )
+
+        await session.execute(
+            delete(ProductFacet)
+            .where(ProductFacet.shop_id == shop_id)
+            .where(ProductFacet.product_count <= 0)
+        )
+
+        # Enabled count and price bounds
+        stats.enabled_count += (1 if after is not None else 0) - (1 if before is not None else 0)
+
+        if after is not None:
+            stats.min_price = after.price if stats.min_price is None else min(stats.min_price, after.price)
+            stats.max_price = after.price if stats.max_price is None else max(stats.max_price, after.price)
+
+        removed_price = before.price if before is not None else None
+        if removed_price is not None and (after is None or after.price != removed_price):
+            if removed_price in (stats.min_price, stats.max_price):
+                # An extreme left the catalog - one index-only MIN/MAX lookup
+                stats.min_price, stats.max_price = await CatalogFacetService._query_price_bounds(session, shop_id)
+
+        session.add(stats)
+        await session.flush()
+
+    @staticmethod
+    async def rebuild_shop(session: AsyncSession, shop_id: int) -> ShopCatalogStats:
+        """
+        Rebuild the facet index for one shop from the product table.
+
+        Args:
+            session: Database session
+            shop_id: Shop ID
+
+        Returns:
+            Refreshed ShopCatalogStats row
+        """
+        result = await session.execute(
+            select(Product.price, Product.tags, Product.cities)
+            .where(Product.shop_id == shop_id)
+            .where(Product.enabled == True)
+        )
+        rows = result.all()
+
+        counts: Counter = Counter()
+        for _, tags, cities in rows:
+            counts.update((FACET_TAG, t) for t in set(tags or []))
+            counts.update((FACET_CITY, c) for c in set(cities or []))
+
+        await session.execute(delete(ProductFacet).where(ProductFacet.shop_id == shop_id))
+        for (facet, value), count in counts.items():
+            session.add(ProductFacet(shop_id=shop_id, facet=facet, value=value, product_count=count))
+
+        prices = [price for price, _, _ in rows]
+        stats = await CatalogFacetService._get_stats(session, shop_id)
+        if stats is None:
+            stats = ShopCatalogStats(shop_id=shop_id)
+        stats.enabled_count = len(rows)
+        stats.min_price = min(prices) if prices else None
+        stats.max_price = max(prices) if prices else None
+        session.add(stats)
+        await session.flush()
+
+        logger.info("catalog_facets_rebuilt", shop_id=shop_id, enabled_count=len(rows), facet_count=len(counts))
+        return stats
+
+    @staticmethod
+    async def rebuild_all(session: AsyncSession) -> int:
+        """
+        Rebuild the facet index for every shop that has products.
+
+        Returns:
+            Number of shops rebuilt
+        """
+        result = await session.execute(select(Product.shop_id).distinct())
+        shop_ids = [row[0] for row in result.all()]
+        for shop_id in shop_ids:
+            await CatalogFacetService.rebuild_shop(session, shop_id)
+        return len(shop_ids)
+
+    @staticmethod
+    async def build_missing(session: AsyncSession) -> int:
+        """
+        Build the facet index for every shop that has products but no stats row.
+
+        Returns:
+            Number of shops built
+        """
+        result = await session.execute(
+            select(Product.shop_id)
+            .distinct()
+            .where(Product.shop_id.not_in(select(ShopCatalogStats.shop_id)))
+        )
+        shop_ids = [row[0] for row in result.all()]
+        for shop_id in shop_ids:
+            await CatalogFacetService.rebuild_shop(session, shop_id)
+        return len(shop_ids)
+
+    @staticmethod
+    async def ensure_built(session: AsyncSession) -> None:
+        """
+        Build the index on first use (fresh deployment or empty database).
+
+        Commits when a rebuild was necessary.
+        """
+        result = await session.execute(select(ShopCatalogStats.id).limit(1))
+        if result.first() is not None:
+            return
+        if await CatalogFacetService.rebuild_all(session):
+            await session.commit()
+
+    @staticmethod
+    async def get_facets(
+        session: AsyncSession,
+        shop_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Read facets for one shop, or across all shops when shop_id is None.
+
+        Args:
+            session: Database session
+            shop_id: Filter by shop_id for multi-tenancy
+
+        Returns:
+            Dictionary with tag_counts, city_counts (value -> product count),
+            min_price and max_price (kopecks, None for an empty catalog)
+        """
+        await CatalogFacetService.ensure_built(session)
+
+        facet_query = select(
+            ProductFacet.facet,
+            ProductFacet.value,
+            func.sum(ProductFacet.product_count)
+        ).group_by(ProductFacet.facet, ProductFacet.value)
+
+        price_query = select(
+            func.min(ShopCatalogStats.min_price),
+            func.max(ShopCatalogStats.max_price)
+        ).where(ShopCatalogStats.enabled_count > 0)
+
+        if shop_id is not None:
+            facet_query = facet_query.where(ProductFacet.shop_id == shop_id)
+            price_query = price_query.where(ShopCatalogStats.shop_id == shop_id)
+
+        tag_counts: Dict[str, int] = {}
+        city_counts: Dict[str, int] = {}
+        for facet, value, count in (await session.execute(facet_query)).all():
+            target = tag_counts if facet == FACET_TAG else city_counts
+            target[value] = int(count)
+
+        min_price, max_price = (await session.execute(price_query)).one()
+
+        return {
+            "tag_counts": dict(sorted(tag_counts.items())),
+            "city_counts": dict(sorted(city_counts.items())),
+            "min_price": min_price,
+            "max_price": max_price,
+        }
+
+    @staticmethod
+    async def _get_stats(
+        session: AsyncSession,
+        shop_id: int,
+        for_update: bool = False
+    ) -> Optional[ShopCatalogStats]:
+        """Load the stats row for a shop (locked and re-read with for_update)"""
+        query = select(ShopCatalogStats).where(ShopCatalogStats.shop_id == shop_id)
+        if for_update:
+            query = query.with_for_update().execution_options(populate_existing=True)
+        result = await session.execute(query)
+        return result.scalar_one_or_none()
+
+    @staticmethod
+    async def _query_price_bounds(session: AsyncSession, shop_id: int) -> tuple:
+        """MIN/MAX price of enabled products (served by idx_product_shop_enabled_price)"""
+        result = await session.execute(
+            select(func.min(Product.price), func.max(Product.price))
+            .where(Product.shop_id == shop_id)
+            .where(Product.enabled == True)
+        )
+        return tuple(result.one())
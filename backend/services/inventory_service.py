@@ -5,17 +5,42 @@ This service provides a clean interface for all inventory-related operations,
 consolidating logic from availability_service.py, orders.py, and other files.
 """
 
+import os
 from typing import List, Dict, Optional, Tuple
 from datetime import datetime, timedelta
 from collections import defaultdict
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
+from sqlalchemy import and_, bindparam, case, delete, insert, or_, update
 from sqlmodel import select, func
 from models import (
     Product, ProductRecipe, WarehouseItem, OrderReservation,
     OrderItemRequest, ProductAvailability, IngredientAvailability, AvailabilityResponse,
-    Order, OrderItem, OrderStatus, WarehouseOperation, WarehouseOperationType
+    Order, OrderItem, OrderStatus, WarehouseOperation, WarehouseOperationType,
+    WarehouseBatchLine, WarehouseBatchLineResult, WarehouseBatchResult,
+    InventoryCheck, InventoryCheckItem
 )
+from utils import kopecks_to_tenge, tenge_to_kopecks
+from services.availability_engine import UNLIMITED_QUANTITY, AvailabilityEngine
+from core.logging import get_logger
+from core.metrics import reservations_expired_total, reserved_units_released_total
+
+logger = get_logger(__name__)
+
+# How long reservations of unpaid (NEW) orders hold stock
+RESERVATION_TTL_HOURS = int(os.getenv("RESERVATION_TTL_HOURS", "72"))
+
+# Reservations released per statement by the expiry job
+EXPIRY_BATCH_SIZE = 500
+
+# Inventory check items reconciled per committed chunk in background applies
+INVENTORY_APPLY_CHUNK_SIZE = 200
+
+# A background apply without a heartbeat for this long is taken to have died
+# with its worker (deploy, OOM) and may be started again
+INVENTORY_APPLY_STALE_SECONDS = int(os.getenv("INVENTORY_APPLY_STALE_SECONDS", "600"))
 
 
 class InventoryError(Exception):
@@ -57,22 +82,24 @@ class InventoryService:
         """
         Get currently reserved quantities for warehouse items.
 
+        Reads the reserved_quantity counters maintained by the reservation
+        write paths (one row per item; see audit_reserved_quantities).
+
         Args:
             session: Database session
             warehouse_item_ids: List of warehouse item IDs to check
 
         Returns:
             Dictionary mapping warehouse_item_id -> total_reserved_quantity
+            (items without reservations are omitted)
         """
         if not warehouse_item_ids:
             return {}
 
-        query = select(
-            OrderReservation.warehouse_item_id,
-            func.sum(OrderReservation.reserved_quantity).label("total_reserved")
-        ).where(
-            OrderReservation.warehouse_item_id.in_(warehouse_item_ids)
-        ).group_by(OrderReservation.warehouse_item_id)
+        query = select(WarehouseItem.id, WarehouseItem.reserved_quantity).where(
+            WarehouseItem.id.in_(warehouse_item_ids),
+            WarehouseItem.reserved_quantity != 0
+        )
 
         result = await session.execute(query)
         return dict(result.all())
@@ -100,13 +127,8 @@ class InventoryService:
         if not warehouse_item:
             raise InventoryError(f"Warehouse item {warehouse_item_id} not found")
 
-        # Get reserved quantities
-        reserved_quantities = await InventoryService.get_reserved_quantities(
-            session, [warehouse_item_id]
-        )
-
         total_quantity = warehouse_item.quantity
-        reserved_quantity = reserved_quantities.get(warehouse_item_id, 0)
+        reserved_quantity = warehouse_item.reserved_quantity
         available_quantity = total_quantity - reserved_quantity
 
         return total_quantity, reserved_quantity, available_quantity
@@ -171,16 +193,10 @@ class InventoryService:
                 product_name=product.name,
                 quantity_requested=quantity_requested,
                 available=True,
-                max_quantity=9999,  # Arbitrary high number for products without recipes
+                max_quantity=UNLIMITED_QUANTITY,  # Products without recipes
                 ingredients=[]
             )
 
-        # Get warehouse item IDs for reservation lookup
-        warehouse_item_ids = [recipe.warehouse_item_id for recipe, _ in recipes_with_items]
-        reserved_quantities = await InventoryService.get_reserved_quantities(
-            session, warehouse_item_ids
-        )
-
         # Calculate availability for each ingredient
         ingredients = []
         max_quantity = float('inf')
@@ -190,11 +206,11 @@ class InventoryService:
             required_per_product = recipe.quantity
             total_required = required_per_product * quantity_requested
             available_quantity = warehouse_item.quantity
-            reserved_quantity = reserved_quantities.get(warehouse_item.id, 0)
+            reserved_quantity = warehouse_item.reserved_quantity
             effective_available = available_quantity - reserved_quantity
 
-            # Calculate maximum possible quantity for this ingredient
-            if required_per_product > 0:
+            # Optional lines are never reserved or deducted, so they do not limit it
+            if required_per_product > 0 and not recipe.is_optional:
                 max_for_ingredient = effective_available // required_per_product
                 max_quantity = min(max_quantity, max_for_ingredient)
 
@@ -213,9 +229,9 @@ class InventoryService:
                 sufficient=sufficient
             ))
 
-        # Handle infinite case
+        # Only optional or zero-quantity lines: unlimited, like a product without a recipe
         if max_quantity == float('inf'):
-            max_quantity = 0
+            max_quantity = UNLIMITED_QUANTITY
 
         return ProductAvailability(
             product_id=product_id,
@@ -274,19 +290,10 @@ class InventoryService:
             .where(ProductRecipe.product_id.in_(product_ids))
         )
 
-        # Group recipes by product_id
+        # Group recipes by product_id (reservations come with the item rows)
         recipes_cache = defaultdict(list)
-        all_warehouse_item_ids = set()
         for recipe, warehouse_item in recipes_result.all():
             recipes_cache[recipe.product_id].append((recipe, warehouse_item))
-            all_warehouse_item_ids.add(warehouse_item.id)
-
-        # Batch query 3: Get all reservations for all warehouse items at once
-        reservations_cache = {}
-        if all_warehouse_item_ids:
-            reservations_cache = await InventoryService.get_reserved_quantities(
-                session, list(all_warehouse_item_ids)
-            )
 
         # Process each product using cached data
         product_availabilities = []
@@ -325,7 +332,7 @@ class InventoryService:
                         product_name=product.name,
                         quantity_requested=total_quantity,
                         available=True,
-                        max_quantity=9999,
+                        max_quantity=UNLIMITED_QUANTITY,
                         ingredients=[]
                     )
                 else:
@@ -338,11 +345,11 @@ class InventoryService:
                         required_per_product = recipe.quantity
                         total_required = required_per_product * total_quantity
                         available_quantity = warehouse_item.quantity
-                        reserved_quantity = reservations_cache.get(warehouse_item.id, 0)
+                        reserved_quantity = warehouse_item.reserved_quantity
                         effective_available = available_quantity - reserved_quantity
 
-                        # Calculate maximum possible quantity for this ingredient
-                        if required_per_product > 0:
+                        # Optional lines are never reserved or deducted, so they do not limit it
+                        if required_per_product > 0 and not recipe.is_optional:
                             max_for_ingredient = effective_available // required_per_product
                             max_quantity = min(max_quantity, max_for_ingredient)
 
@@ -361,9 +368,9 @@ class InventoryService:
                             sufficient=sufficient
                         ))
 
-                    # Handle infinite case
+                    # Only optional or zero-quantity lines: unlimited, like a product without a recipe
                     if max_quantity == float('inf'):
-                        max_quantity = 0
+                        max_quantity = UNLIMITED_QUANTITY
 
                     availability = ProductAvailability(
                         product_id=product_id,
@@ -401,19 +408,32 @@ class InventoryService:
         session: AsyncSession,
         order_id: int,
         order_items: List[OrderItemRequest],
-        validate_availability: bool = True
+        validate_availability: bool = True,
+        commit: bool = True
     ) -> bool:
         """
-        Create reservations for an order.
+        Create reservations for an order, safe against concurrent checkouts.
+
+        Ingredient needs come from one recipe query. The affected warehouse
+        rows are then locked in id order (SELECT ... FOR UPDATE on PostgreSQL;
+        on SQLite the version bump takes the database write lock), stock is
+        re-checked against existing reservations under that lock, and all
+        reservations are inserted in one multi-row statement. Two orders for
+        the last stems can therefore never both succeed.
+
+        Reservations of NEW orders expire after RESERVATION_TTL_HOURS unless
+        the order moves on first (see release_expired_reservations).
 
         Args:
             session: Database session
             order_id: Order ID to create reservations for
             order_items: List of order items to reserve
-            validate_availability: Whether to validate availability before creating reservations
+            validate_availability: Whether to reject the reservation when stock is insufficient
+            commit: Whether to commit the transaction (False lets the caller
+                reserve in the same transaction that creates the order)
 
         Returns:
-            True if successful, False if insufficient stock
+            True if successful
 
         Raises:
             ReservationError: If reservation creation fails
@@ -425,57 +445,104 @@ class InventoryService:
             if not order:
                 raise ReservationError(f"Order {order_id} not found")
 
-            # Check availability first if requested
-            if validate_availability:
-                availability = await InventoryService.check_batch_availability(session, order_items)
-                if not availability.available:
-                    warnings_str = "; ".join(availability.warnings)
-                    raise InsufficientStockError(f"Insufficient stock: {warnings_str}")
-
             # Group items by product to handle duplicates
-            product_quantities = {}
+            product_quantities: Dict[int, int] = defaultdict(int)
             for item in order_items:
-                if item.product_id in product_quantities:
-                    product_quantities[item.product_id] += item.quantity
-                else:
-                    product_quantities[item.product_id] = item.quantity
-
-            # Create reservations for each ingredient
-            reservations_created = []
+                product_quantities[item.product_id] += item.quantity
 
-            for product_id, total_quantity in product_quantities.items():
-                # Get product recipes
-                recipes_result = await session.execute(
-                    select(ProductRecipe, WarehouseItem)
-                    .join(WarehouseItem, ProductRecipe.warehouse_item_id == WarehouseItem.id)
-                    .where(ProductRecipe.product_id == product_id)
+            # One query for all products and their recipe lines
+            recipe_result = await session.execute(
+                select(
+                    Product.id, Product.name, Product.enabled,
+                    ProductRecipe.warehouse_item_id, ProductRecipe.quantity, ProductRecipe.is_optional
                 )
+                .outerjoin(ProductRecipe, ProductRecipe.product_id == Product.id)
+                .where(Product.id.in_(list(product_quantities)))
+            )
 
-                recipes_with_items = recipes_result.all()
-
-                for recipe, warehouse_item in recipes_with_items:
-                    if recipe.is_optional:
-                        continue  # Skip optional ingredients
+            needs: Dict[int, int] = defaultdict(int)
+            found_products = set()
+            problems = []
+            for product_id, name, enabled, warehouse_item_id, recipe_quantity, is_optional in recipe_result.all():
+                if product_id not in found_products:
+                    found_products.add(product_id)
+                    if not enabled:
+                        problems.append(f"Product '{name}' is disabled")
+                if warehouse_item_id is None or is_optional or recipe_quantity <= 0:
+                    continue  # No recipe, or optional ingredient
+                needs[warehouse_item_id] += recipe_quantity * product_quantities[product_id]
+            problems.extend(
+                f"Product {product_id} not found"
+                for product_id in product_quantities if product_id not in found_products
+            )
 
-                    required_quantity = recipe.quantity * total_quantity
+            if validate_availability and problems:
+                raise InsufficientStockError(f"Insufficient stock: {'; '.join(problems)}")
+            if not needs:
+                if commit:
+                    await session.commit()
+                return True
+
+            item_ids = sorted(needs)
+            if session.get_bind().dialect.name == "postgresql":
+                # Lock in id order so overlapping reservations queue instead of deadlocking
+                await session.execute(
+                    select(WarehouseItem.id)
+                    .where(WarehouseItem.id.in_(item_ids))
+                    .order_by(WarehouseItem.id)
+                    .with_for_update()
+                )
+            await session.execute(
+                update(WarehouseItem)
+                .where(WarehouseItem.id.in_(item_ids))
+                .values(version=WarehouseItem.version + 1)
+            )
 
-                    if required_quantity > 0:
-                        reservation = OrderReservation(
-                            order_id=order_id,
-                            warehouse_item_id=warehouse_item.id,
-                            reserved_quantity=required_quantity
-                        )
-                        session.add(reservation)
-                        reservations_created.append(reservation)
+            if validate_availability:
+                # Re-check under the lock
+                stock_result = await session.execute(
+                    select(
+                        WarehouseItem.id, WarehouseItem.name,
+                        WarehouseItem.quantity - WarehouseItem.reserved_quantity
+                    )
+                    .where(WarehouseItem.id.in_(item_ids))
+                )
+                shortages = [
+                    f"{name}: required {needs[item_id]}, available {available}"
+                    for item_id, name, available in stock_result.all()
+                    if available < needs[item_id]
+                ]
+                if shortages:
+                    raise InsufficientStockError(f"Insufficient stock: {'; '.join(shortages)}")
+
+            expires_at = (
+                datetime.utcnow() + timedelta(hours=RESERVATION_TTL_HOURS)
+                if order.status == OrderStatus.NEW else None
+            )
+            await session.execute(
+                insert(OrderReservation).values([
+                    {
+                        "order_id": order_id,
+                        "warehouse_item_id": item_id,
+                        "reserved_quantity": needs[item_id],
+                        "expires_at": expires_at
+                    }
+                    for item_id in item_ids
+                ])
+            )
+            await InventoryService._adjust_reserved_quantities(session, needs)
 
-            await session.commit()
+            if commit:
+                await session.commit()
             return True
 
         except (InsufficientStockError, ReservationError):
-            await session.rollback()
+            if commit:
+                await session.rollback()
             raise
         except Exception as e:
-            await session.rollback()
+            if commit:
+                await session.rollback()
             raise ReservationError(f"Failed to create reservations: {str(e)}")
 
     @staticmethod
@@ -495,21 +562,61 @@ class InventoryService:
         """
         try:
             reservations_result = await session.execute(
-                select(OrderReservation).where(OrderReservation.order_id == order_id)
+                select(OrderReservation.warehouse_item_id, OrderReservation.reserved_quantity)
+                .where(OrderReservation.order_id == order_id)
             )
-            reservations = reservations_result.scalars().all()
+            reservations = reservations_result.all()
 
-            count = len(reservations)
-            for reservation in reservations:
-                await session.delete(reservation)
+            released: Dict[int, int] = defaultdict(int)
+            for warehouse_item_id, reserved_quantity in reservations:
+                released[warehouse_item_id] -= reserved_quantity
+
+            if reservations:
+                await session.execute(delete(OrderReservation).where(OrderReservation.order_id == order_id))
+                await InventoryService._adjust_reserved_quantities(session, released)
 
             await session.commit()
-            return count
+            return len(reservations)
 
         except Exception as e:
             await session.rollback()
             raise ReservationError(f"Failed to release reservations: {str(e)}")
 
+    @staticmethod
+    async def _adjust_reserved_quantities(
+        session: AsyncSession,
+        deltas: Dict[int, int]
+    ) -> None:
+        """
+        Apply reserved_quantity changes in place (SET reserved_quantity =
+        reserved_quantity + delta), so concurrent writers never lose updates.
+
+        Core statements bypass the session hooks of the availability engine,
+        so the items are reported to it here.
+
+        Args:
+            session: Database session
+            deltas: Dictionary mapping warehouse_item_id -> change (negative to release)
+        """
+        deltas = {item_id: delta for item_id, delta in deltas.items() if delta}
+        if not deltas:
+            return
+
+        table = WarehouseItem.__table__
+        await session.execute(
+            update(table)
+            .where(table.c.id == bindparam("item_id"))
+            .values(reserved_quantity=table.c.reserved_quantity + bindparam("delta")),
+            [{"item_id": item_id, "delta": delta} for item_id, delta in sorted(deltas.items())]
+        )
+        # Keep items already loaded in this session in step with the in-place update
+        for item_id, delta in deltas.items():
+            loaded = session.identity_map.get(identity_key(WarehouseItem, item_id))
+            if loaded is not None and "reserved_quantity" in loaded.__dict__:
+                set_committed_value(loaded, "reserved_quantity", loaded.reserved_quantity + delta)
+
+        AvailabilityEngine.record_stock_change(session, deltas)
+
     @staticmethod
     async def get_order_reservations(
         session: AsyncSession,
@@ -538,7 +645,8 @@ class InventoryService:
                 "warehouse_item_id": warehouse_item.id,
                 "warehouse_item_name": warehouse_item.name,
                 "reserved_quantity": reservation.reserved_quantity,
-                "created_at": reservation.created_at
+                "created_at": reservation.created_at,
+                "expires_at": reservation.expires_at
             })
 
         return reservations_data
@@ -557,6 +665,10 @@ class InventoryService:
         Convert order reservations to actual warehouse deductions.
         Used when an order is assembled.
 
+        Set-based: one aggregated read of the reservations, one guarded stock
+        UPDATE (which also releases the reserved counters), one multi-row
+        ledger insert and one DELETE of the order's reservations.
+
         Args:
             session: Database session
             order_id: Order ID to process
@@ -574,48 +686,29 @@ class InventoryService:
             if not order:
                 raise InventoryError(f"Order {order_id} not found")
 
-            # Get all reservations for this order with warehouse items
             reservations_result = await session.execute(
-                select(OrderReservation, WarehouseItem)
-                .join(WarehouseItem, OrderReservation.warehouse_item_id == WarehouseItem.id)
+                select(OrderReservation.warehouse_item_id, func.sum(OrderReservation.reserved_quantity))
                 .where(OrderReservation.order_id == order_id)
+                .group_by(OrderReservation.warehouse_item_id)
             )
+            reserved = dict(reservations_result.all())
 
-            reservations_with_items = reservations_result.all()
-
-            if not reservations_with_items:
+            if not reserved:
                 # No reservations found, try fallback legacy deduction
                 return await InventoryService._process_legacy_warehouse_deductions(session, order)
 
-            operations_created = []
-
-            # Process each reservation
-            for reservation, warehouse_item in reservations_with_items:
-                # Safety check - ensure we still have enough stock
-                if warehouse_item.quantity < reservation.reserved_quantity:
-                    raise InsufficientStockError(
-                        f"Insufficient stock for {warehouse_item.name}. "
-                        f"Required: {reservation.reserved_quantity}, Available: {warehouse_item.quantity}"
-                    )
-
-                # Perform deduction
-                warehouse_item.quantity -= reservation.reserved_quantity
-
-                # Create warehouse operation record
-                operation = WarehouseOperation(
-                    warehouse_item_id=warehouse_item.id,
-                    operation_type=WarehouseOperationType.SALE,
-                    quantity_change=-reservation.reserved_quantity,
-                    balance_after=warehouse_item.quantity,
-                    description=f"Order Assembly - #{order.orderNumber} (from reservation)",
-                    order_id=order.id
-                )
-
-                session.add(operation)
-                operations_created.append(operation)
+            operations_created = await InventoryService._deduct_for_order(
+                session,
+                order,
+                deductions=reserved,
+                released=reserved,
+                descriptions={
+                    item_id: f"Order Assembly - #{order.orderNumber} (from reservation)" for item_id in reserved
+                }
+            )
 
-                # Delete the reservation since it's now converted to actual deduction
-                await session.delete(reservation)
+            # The reservations are now converted to actual deductions
+            await session.execute(delete(OrderReservation).where(OrderReservation.order_id == order_id))
 
             # Only commit if requested (allows caller to control transaction)
             if commit:
@@ -647,104 +740,542 @@ class InventoryService:
         Returns:
             List of created warehouse operations
         """
-        # Get all order items
+        # All order items with their required recipe lines in one query
         items_result = await session.execute(
-            select(OrderItem).where(OrderItem.order_id == order.id)
+            select(
+                OrderItem.id, OrderItem.product_name, OrderItem.quantity,
+                ProductRecipe.warehouse_item_id, ProductRecipe.quantity
+            )
+            .outerjoin(
+                ProductRecipe,
+                (ProductRecipe.product_id == OrderItem.product_id) & (ProductRecipe.is_optional == False)  # noqa: E712
+            )
+            .where(OrderItem.order_id == order.id)
+            .order_by(OrderItem.id)
         )
-        order_items = items_result.scalars().all()
+        rows = items_result.all()
 
-        if not order_items:
+        if not rows:
             raise InventoryError("Order has no items to assemble")
 
         # Collect all warehouse deductions needed
-        warehouse_deductions = {}
+        deductions: Dict[int, int] = defaultdict(int)
+        product_details: Dict[int, List[Dict]] = defaultdict(list)
 
-        for item in order_items:
-            # Get product recipes for this item
-            recipes_result = await session.execute(
-                select(ProductRecipe, WarehouseItem)
-                .join(WarehouseItem, ProductRecipe.warehouse_item_id == WarehouseItem.id)
-                .where(ProductRecipe.product_id == item.product_id)
+        for _, product_name, order_quantity, warehouse_item_id, recipe_quantity in rows:
+            if warehouse_item_id is None:
+                # Product has no recipe - skip deduction for this item
+                continue
+
+            total_needed = recipe_quantity * order_quantity
+            deductions[warehouse_item_id] += total_needed
+            product_details[warehouse_item_id].append({
+                'product_name': product_name,
+                'order_quantity': order_quantity,
+                'total_needed': total_needed
+            })
+
+        return await InventoryService._deduct_for_order(
+            session,
+            order,
+            deductions=deductions,
+            descriptions={
+                item_id: f"Order Assembly - #{order.orderNumber} - " + "; ".join(
+                    f"{detail['product_name']} x{detail['order_quantity']} (needs {detail['total_needed']})"
+                    for detail in details
+                )
+                for item_id, details in product_details.items()
+            },
+            shortage_notes={
+                item_id: "Needed for products: " + ", ".join(
+                    f"{detail['product_name']} (x{detail['order_quantity']})" for detail in details
+                )
+                for item_id, details in product_details.items()
+            }
+        )
+
+    @staticmethod
+    async def _deduct_for_order(
+        session: AsyncSession,
+        order: Order,
+        deductions: Dict[int, int],
+        descriptions: Dict[int, str],
+        released: Optional[Dict[int, int]] = None,
+        shortage_notes: Optional[Dict[int, str]] = None
+    ) -> List[WarehouseOperation]:
+        """
+        Deduct stock for an order in one guarded UPDATE and record the SALE
+        operations in one multi-row insert.
+
+        The UPDATE only touches rows that cover their deduction
+        (quantity >= deduction), so stock never goes negative; if any row was
+        left out, nothing is written to the ledger and InsufficientStockError
+        is raised for the caller to roll back.
+
+        Args:
+            session: Database session
+            order: Order being assembled
+            deductions: Dictionary mapping warehouse_item_id -> units to deduct
+            descriptions: Ledger description per warehouse_item_id
+            released: Reserved units to take off the reserved_quantity counters
+            shortage_notes: Extra detail per warehouse_item_id for the error message
+
+        Returns:
+            List of created warehouse operations
+
+        Raises:
+            InsufficientStockError: If an item has less stock than its deduction
+        """
+        deductions = {item_id: quantity for item_id, quantity in deductions.items() if quantity > 0}
+        if not deductions:
+            return []
+        released = released or {}
+        item_ids = sorted(deductions)
+
+        table = WarehouseItem.__table__
+        deduction = case(deductions, value=table.c.id, else_=0)
+        values = {"quantity": table.c.quantity - deduction}
+        if released:
+            values["reserved_quantity"] = table.c.reserved_quantity - case(released, value=table.c.id, else_=0)
+        result = await session.execute(
+            update(table)
+            .where(table.c.id.in_(item_ids), table.c.quantity >= deduction)
+            .values(**values)
+            .returning(table.c.id, table.c.quantity, table.c.reserved_quantity)
+        )
+        updated = {item_id: (quantity, reserved) for item_id, quantity, reserved in result.all()}
+
+        short = [item_id for item_id in item_ids if item_id not in updated]
+        if short:
+            stock_result = await session.execute(
+                select(WarehouseItem.id, WarehouseItem.name, WarehouseItem.quantity)
+                .where(WarehouseItem.id.in_(short))
             )
+            stock = {item_id: (name, quantity) for item_id, name, quantity in stock_result.all()}
+            messages = []
+            for item_id in short:
+                if item_id not in stock:
+                    messages.append(f"Warehouse item {item_id} not found")
+                    continue
+                name, available = stock[item_id]
+                message = f"Insufficient stock for {name}. Required: {deductions[item_id]}, Available: {available}"
+                if shortage_notes and item_id in shortage_notes:
+                    message += f". {shortage_notes[item_id]}"
+                messages.append(message)
+            raise InsufficientStockError("; ".join(messages))
+
+        # Keep items already loaded in this session in step with the UPDATE
+        for item_id, (quantity, reserved) in updated.items():
+            loaded = session.identity_map.get(identity_key(WarehouseItem, item_id))
+            if loaded is not None:
+                set_committed_value(loaded, "quantity", quantity)
+                if "reserved_quantity" in loaded.__dict__:
+                    set_committed_value(loaded, "reserved_quantity", reserved)
+
+        operations_result = await session.scalars(
+            insert(WarehouseOperation).returning(WarehouseOperation),
+            [
+                {
+                    "warehouse_item_id": item_id,
+                    "operation_type": WarehouseOperationType.SALE,
+                    "quantity_change": -deductions[item_id],
+                    "balance_after": updated[item_id][0],
+                    "description": descriptions[item_id],
+                    "order_id": order.id
+                }
+                for item_id in item_ids
+            ]
+        )
+        operations_created = list(operations_result.all())
 
-            recipes_with_items = recipes_result.all()
+        AvailabilityEngine.record_stock_change(session, item_ids)
+        return operations_created
 
-            if not recipes_with_items:
-                # Product has no recipe - skip deduction for this item
-                continue
+    @staticmethod
+    async def apply_warehouse_batch(
+        session: AsyncSession,
+        shop_id: int,
+        lines: List[WarehouseBatchLine],
+        user_id: Optional[int] = None
+    ) -> WarehouseBatchResult:
+        """
+        Apply many deliveries and write-offs in one transaction.
 
-            # Calculate total deductions for this item quantity
-            for recipe, warehouse_item in recipes_with_items:
-                if recipe.is_optional:
-                    continue  # Skip optional ingredients
+        Lines are validated in order against a locked read of the items
+        (several lines may touch the same item); invalid lines are reported
+        and skipped. Valid lines are applied with one stock UPDATE and one
+        multi-row WarehouseOperation insert, and availability caches are
+        invalidated once for the whole batch.
 
-                total_needed = recipe.quantity * item.quantity
+        Args:
+            session: Database session
+            shop_id: Shop the items must belong to
+            lines: Batch lines (positive quantity: delivery, negative: write-off)
+            user_id: User recorded on the operations
 
-                if warehouse_item.id not in warehouse_deductions:
-                    warehouse_deductions[warehouse_item.id] = {
-                        'warehouse_item': warehouse_item,
-                        'total_quantity': 0,
-                        'product_details': []
-                    }
+        Returns:
+            WarehouseBatchResult with one result per line, in line order
 
-                warehouse_deductions[warehouse_item.id]['total_quantity'] += total_needed
-                warehouse_deductions[warehouse_item.id]['product_details'].append({
-                    'product_name': item.product_name,
-                    'order_quantity': item.quantity,
-                    'recipe_quantity': recipe.quantity,
-                    'total_needed': total_needed
+        Raises:
+            InsufficientStockError: If stock changed concurrently under the batch
+        """
+        item_ids = sorted({line.warehouse_item_id for line in lines})
+        stock_result = await session.execute(
+            select(WarehouseItem.id, WarehouseItem.quantity, WarehouseItem.cost_price)
+            .where(WarehouseItem.id.in_(item_ids), WarehouseItem.shop_id == shop_id)
+            .order_by(WarehouseItem.id)
+            .with_for_update()
+        )
+        balances: Dict[int, int] = {}
+        cost_prices: Dict[int, int] = {}
+        for item_id, quantity, cost_price in stock_result.all():
+            balances[item_id] = quantity
+            cost_prices[item_id] = cost_price
+
+        results: List[WarehouseBatchLineResult] = []
+        operation_rows: List[Dict] = []
+        line_rows: List[Optional[int]] = []  # Operation row index per line
+        delivered = set()
+
+        for line in lines:
+            item_id = line.warehouse_item_id
+            error = None
+            if item_id not in balances:
+                error = "Warehouse item not found"
+            elif line.quantity == 0:
+                error = "Quantity must not be zero"
+            elif line.quantity < 0 and line.cost_price_tenge is not None:
+                error = "Cost price can only be set on deliveries"
+            elif -line.quantity > balances[item_id]:
+                error = f"Cannot write off more than available quantity ({balances[item_id]})"
+            if error:
+                results.append(WarehouseBatchLineResult(warehouse_item_id=item_id, applied=False, error=error))
+                line_rows.append(None)
+                continue
+
+            balances[item_id] += line.quantity
+            if line.quantity > 0:
+                delivered.add(item_id)
+                operation_type = WarehouseOperationType.DELIVERY
+                description = line.description or "Поставка"
+            else:
+                operation_type = WarehouseOperationType.WRITEOFF
+                description = f"Списание: {line.description}" if line.description else "Списание"
+            line_rows.append(len(operation_rows))
+            operation_rows.append({
+                "warehouse_item_id": item_id,
+                "operation_type": operation_type,
+                "quantity_change": line.quantity,
+                "balance_after": balances[item_id],
+                "description": description,
+                "old_value": None,
+                "new_value": None,
+                "user_id": user_id
+            })
+            results.append(WarehouseBatchLineResult(
+                warehouse_item_id=item_id, applied=True, balance_after=balances[item_id]
+            ))
+
+            new_cost = tenge_to_kopecks(line.cost_price_tenge) if line.cost_price_tenge is not None else None
+            if new_cost is not None and new_cost != cost_prices[item_id]:
+                operation_rows.append({
+                    "warehouse_item_id": item_id,
+                    "operation_type": WarehouseOperationType.PRICE_CHANGE,
+                    "quantity_change": 0,
+                    "balance_after": balances[item_id],
+                    "description": (
+                        f"Себестоимость: {kopecks_to_tenge(cost_prices[item_id])}₸ → {line.cost_price_tenge}₸"
+                    ),
+                    "old_value": cost_prices[item_id],
+                    "new_value": new_cost,
+                    "user_id": user_id
                 })
+                cost_prices[item_id] = new_cost
+
+        if not operation_rows:
+            return WarehouseBatchResult(applied=0, failed=len(results), results=results)
+
+        # Net change per item; write-offs were checked against the locked balances
+        deltas: Dict[int, int] = defaultdict(int)
+        changed_costs: Dict[int, int] = {}
+        for row in operation_rows:
+            deltas[row["warehouse_item_id"]] += row["quantity_change"]
+            if row["operation_type"] == WarehouseOperationType.PRICE_CHANGE:
+                changed_costs[row["warehouse_item_id"]] = row["new_value"]
+        touched = sorted(deltas)
+
+        table = WarehouseItem.__table__
+        delta = case(deltas, value=table.c.id, else_=0)
+        values = {"quantity": table.c.quantity + delta}
+        if delivered:
+            values["last_delivery_date"] = case(
+                (table.c.id.in_(sorted(delivered)), datetime.now()), else_=table.c.last_delivery_date
+            )
+        if changed_costs:
+            values["cost_price"] = case(changed_costs, value=table.c.id, else_=table.c.cost_price)
+        update_result = await session.execute(
+            update(table)
+            .where(table.c.id.in_(touched), table.c.quantity + delta >= 0)
+            .values(**values)
+            .returning(table.c.id, table.c.quantity, table.c.cost_price, table.c.last_delivery_date)
+        )
+        updated = {row[0]: row[1:] for row in update_result.all()}
+        if len(updated) != len(touched):
+            # Only reachable where SELECT ... FOR UPDATE does not lock (SQLite)
+            raise InsufficientStockError("Stock changed while applying the batch, please retry")
+
+        operation_ids = (await session.scalars(
+            insert(WarehouseOperation).returning(WarehouseOperation.id, sort_by_parameter_order=True),
+            operation_rows
+        )).all()
+        for result, row_index in zip(results, line_rows):
+            if row_index is not None:
+                result.operation_id = operation_ids[row_index]
+
+        # Keep items already loaded in this session in step with the UPDATE
+        for item_id, (quantity, cost_price, last_delivery_date) in updated.items():
+            loaded = session.identity_map.get(identity_key(WarehouseItem, item_id))
+            if loaded is not None:
+                set_committed_value(loaded, "quantity", quantity)
+                set_committed_value(loaded, "cost_price", cost_price)
+                set_committed_value(loaded, "last_delivery_date", last_delivery_date)
+
+        AvailabilityEngine.record_stock_change(session, touched)
+        await session.commit()
+
+        applied = sum(1 for result in results if result.applied)
+        return WarehouseBatchResult(applied=applied, failed=len(results) - applied, results=results)
 
-        # Check stock availability and perform deductions
-        operations_created = []
+    @staticmethod
+    async def claim_inventory_check(session: AsyncSession, check_id: int) -> bool:
+        """
+        Move a check to "applying" unless another apply holds it.
 
-        for warehouse_item_id, deduction_data in warehouse_deductions.items():
-            warehouse_item = deduction_data['warehouse_item']
-            total_quantity = deduction_data['total_quantity']
-            product_details = deduction_data['product_details']
+        One conditional UPDATE, so of two concurrent requests only one wins.
+        A pending or failed check can be claimed, and so can an applying one
+        whose heartbeat is older than INVENTORY_APPLY_STALE_SECONDS. Does not
+        commit: a synchronous apply keeps the claim in its own transaction.
 
-            # Check if we have sufficient stock
-            if warehouse_item.quantity < total_quantity:
-                # Build detailed error message
-                products_str = ", ".join([
-                    f"{detail['product_name']} (x{detail['order_quantity']})"
-                    for detail in product_details
-                ])
+        Args:
+            session: Database session
+            check_id: Inventory check ID
 
-                raise InsufficientStockError(
-                    f"Insufficient stock for {warehouse_item.name}. "
-                    f"Required: {total_quantity}, Available: {warehouse_item.quantity}. "
-                    f"Needed for products: {products_str}"
+        Returns:
+            True if this call claimed the check
+        """
+        now = datetime.now()
+        stale_before = now - timedelta(seconds=INVENTORY_APPLY_STALE_SECONDS)
+        result = await session.execute(
+            update(InventoryCheck)
+            .where(
+                InventoryCheck.id == check_id,
+                or_(
+                    InventoryCheck.status.in_(["pending", "failed"]),
+                    and_(
+                        InventoryCheck.status == "applying",
+                        or_(
+                            InventoryCheck.apply_heartbeat_at.is_(None),
+                            InventoryCheck.apply_heartbeat_at < stale_before
+                        )
+                    )
                 )
+            )
+            .values(status="applying", apply_error=None, apply_heartbeat_at=now)
+            .execution_options(synchronize_session="fetch")
+        )
+        return result.rowcount == 1
+
+    @staticmethod
+    async def apply_inventory_check(
+        session: AsyncSession,
+        check_id: int,
+        chunk_size: Optional[int] = None
+    ) -> int:
+        """
+        Reconcile warehouse stock with an inventory check.
+
+        Differences are applied set-based: per chunk, one locked read of the
+        current quantities, one UPDATE setting the counted quantities and one
+        multi-row INVENTORY ledger insert. Without chunk_size everything runs
+        in the caller's single transaction; with it, each chunk is committed
+        and check.items_applied records progress, so a failed apply resumes
+        where it stopped.
 
-            # Update warehouse quantity
-            warehouse_item.quantity -= total_quantity
-
-            # Create detailed description
-            products_detail = "; ".join([
-                f"{detail['product_name']} x{detail['order_quantity']} (needs {detail['total_needed']})"
-                for detail in product_details
-            ])
-
-            # Create warehouse operation record
-            operation = WarehouseOperation(
-                warehouse_item_id=warehouse_item_id,
-                operation_type=WarehouseOperationType.SALE,
-                quantity_change=-total_quantity,
-                balance_after=warehouse_item.quantity,
-                description=f"Order Assembly - #{order.orderNumber} - {products_detail}",
-                order_id=order.id
+        Args:
+            session: Database session
+            check_id: Inventory check ID
+            chunk_size: Items per committed chunk (None: one transaction)
+
+        Returns:
+            Number of items reconciled by this call
+
+        Raises:
+            InventoryError: If the check does not exist or is already applied
+        """
+        check = await session.get(InventoryCheck, check_id)
+        if not check:
+            raise InventoryError(f"Inventory check {check_id} not found")
+        if check.status == "applied":
+            raise InventoryError("Inventory check already applied")
+
+        items_result = await session.execute(
+            select(InventoryCheckItem.warehouse_item_id, InventoryCheckItem.actual_quantity, InventoryCheckItem.difference)
+            .where(InventoryCheckItem.inventory_check_id == check_id, InventoryCheckItem.difference != 0)
+            .order_by(InventoryCheckItem.id)
+        )
+        pending = items_result.all()[check.items_applied:]
+
+        chunk_size = chunk_size or max(len(pending), 1)
+        for start in range(0, len(pending), chunk_size):
+            chunk = pending[start:start + chunk_size]
+            await InventoryService._apply_inventory_chunk(session, check, chunk)
+            check.items_applied += len(chunk)
+            if start + chunk_size < len(pending):
+                check.apply_heartbeat_at = datetime.now()
+                await session.commit()
+
+        check.status = "applied"
+        check.applied_at = datetime.now()
+        check.apply_error = None
+        await session.commit()
+        return len(pending)
+
+    @staticmethod
+    async def apply_inventory_check_job(check_id: int) -> None:
+        """Background entry point: apply a check in committed chunks, recording failures on the check"""
+        from database import async_session
+
+        async with async_session() as session:
+            try:
+                applied = await InventoryService.apply_inventory_check(
+                    session, check_id, INVENTORY_APPLY_CHUNK_SIZE
+                )
+                logger.info("inventory_check_applied", check_id=check_id, items=applied)
+            except Exception as e:
+                await session.rollback()
+                logger.error("inventory_check_apply_failed", check_id=check_id, error=str(e))
+                check = await session.get(InventoryCheck, check_id)
+                if check and check.status != "applied":
+                    check.status = "failed"
+                    check.apply_error = str(e)[:500]
+                    await session.commit()
+
+    @staticmethod
+    async def _apply_inventory_chunk(
+        session: AsyncSession,
+        check: InventoryCheck,
+        chunk: List[Tuple[int, int, int]]
+    ) -> None:
+        """
+        Set counted quantities for one chunk of check items and record them
+        in the ledger. Items deleted since the count are skipped.
+
+        Args:
+            session: Database session
+            check: Inventory check being applied
+            chunk: (warehouse_item_id, actual_quantity, difference) rows
+        """
+        item_ids = sorted({warehouse_item_id for warehouse_item_id, _, _ in chunk})
+        stock_result = await session.execute(
+            select(WarehouseItem.id, WarehouseItem.quantity)
+            .where(WarehouseItem.id.in_(item_ids))
+            .order_by(WarehouseItem.id)
+            .with_for_update()
+        )
+        old_quantities = dict(stock_result.all())
+        chunk = [row for row in chunk if row[0] in old_quantities]
+        if not chunk:
+            return
+
+        # A later line for the same item wins, as when applying line by line
+        counted = {warehouse_item_id: actual_quantity for warehouse_item_id, actual_quantity, _ in chunk}
+        table = WarehouseItem.__table__
+        await session.execute(
+            update(table)
+            .where(table.c.id.in_(list(counted)))
+            .values(quantity=case(counted, value=table.c.id))
+        )
+
+        operation_rows = []
+        for warehouse_item_id, actual_quantity, difference in chunk:
+            description = (
+                f"Инвентаризация: было {old_quantities[warehouse_item_id]} шт, стало {actual_quantity} шт"
             )
+            if difference > 0:
+                description += f" (излишки: +{difference} шт)"
+            else:
+                description += f" (недостача: {difference} шт)"
+            if check.comment:
+                description += f". Комментарий: {check.comment}"
+            description += f". Проводил: {check.conducted_by}"
+
+            operation_rows.append({
+                "warehouse_item_id": warehouse_item_id,
+                "operation_type": WarehouseOperationType.INVENTORY,
+                "quantity_change": difference,
+                "balance_after": actual_quantity,
+                "description": description
+            })
+        await session.execute(insert(WarehouseOperation), operation_rows)
 
-            session.add(operation)
-            operations_created.append(operation)
+        # Keep items already loaded in this session in step with the UPDATE
+        for warehouse_item_id, quantity in counted.items():
+            loaded = session.identity_map.get(identity_key(WarehouseItem, warehouse_item_id))
+            if loaded is not None:
+                set_committed_value(loaded, "quantity", quantity)
 
-        return operations_created
+        AvailabilityEngine.record_stock_change(session, counted)
 
     # ===============================
     # Cleanup and Maintenance
     # ===============================
 
+    @staticmethod
+    async def release_expired_reservations(
+        session: AsyncSession,
+        now: Optional[datetime] = None,
+        batch_size: int = EXPIRY_BATCH_SIZE,
+        max_batches: Optional[int] = 20
+    ) -> Dict[str, int]:
+        """
+        Release reservations whose expires_at has passed.
+
+        Expired rows are found through the partial expires_at index and
+        deleted batch_size at a time, each batch in its own transaction, so a
+        large backlog never holds warehouse rows locked for long.
+
+        Args:
+            session: Database session
+            now: Expiry reference time (UTC, defaults to now)
+            batch_size: Reservations deleted per statement
+            max_batches: Upper bound on batches per call (None: until done)
+
+        Returns:
+            Dictionary with reservations_released and units_released
+        """
+        now = now or datetime.utcnow()
+        reservations, units = await InventoryService._release_reservation_batches(
+            session,
+            OrderReservation.expires_at <= now,
+            OrderReservation.expires_at,
+            batch_size,
+            max_batches
+        )
+        if reservations:
+            logger.info("reservations_expired", reservations=reservations, units=units)
+        return {"reservations_released": reservations, "units_released": units}
+
+    @staticmethod
+    async def release_expired_reservations_job() -> None:
+        """APScheduler entry point: release expired reservations in a fresh session"""
+        from database import async_session
+
+        try:
+            async with async_session() as session:
+                await InventoryService.release_expired_reservations(session)
+        except Exception as e:
+            logger.error("reservation_expiry_failed", error=str(e))
+
     @staticmethod
     async def cleanup_expired_reservations(
         session: AsyncSession,
@@ -754,6 +1285,9 @@ class InventoryService:
         """
         Clean up expired reservations based on order age and status.
 
+        Manual counterpart of release_expired_reservations for reservations
+        that predate expires_at or whose TTL should be overridden.
+
         Args:
             session: Database session
             max_age_hours: Age threshold in hours for considering reservations expired
@@ -764,56 +1298,137 @@ class InventoryService:
         """
         cutoff_time = datetime.now() - timedelta(hours=max_age_hours)
 
-        # Find orders with reservations that meet cleanup criteria
-        query = select(Order, OrderReservation).join(
-            OrderReservation, Order.id == OrderReservation.order_id
-        ).where(
-            Order.created_at < cutoff_time
-        ).where(
-            # Clean up reservations for:
-            # 1. NEW orders that haven't been paid (likely abandoned)
-            # 2. CANCELLED orders (should have been cleaned already, but failsafe)
+        # Clean up reservations for:
+        # 1. NEW orders that haven't been paid (likely abandoned)
+        # 2. CANCELLED orders (should have been cleaned already, but failsafe)
+        stale_orders = select(Order.id).where(
+            Order.created_at < cutoff_time,
             Order.status.in_([OrderStatus.NEW, OrderStatus.CANCELLED])
         )
+        condition = OrderReservation.order_id.in_(stale_orders)
 
-        result = await session.execute(query)
-        orders_with_reservations = result.all()
+        counts = await session.execute(
+            select(func.count(func.distinct(OrderReservation.order_id)), func.count(OrderReservation.id))
+            .where(condition)
+        )
+        orders_found, reservations_found = counts.one()
 
         stats = {
-            "orders_found": 0,
-            "reservations_found": 0,
+            "orders_found": orders_found,
+            "reservations_found": reservations_found,
             "reservations_deleted": 0
         }
 
-        if not orders_with_reservations:
-            return stats
+        if reservations_found and not dry_run:
+            stats["reservations_deleted"], _ = await InventoryService._release_reservation_batches(
+                session, condition, OrderReservation.id, EXPIRY_BATCH_SIZE
+            )
 
-        # Group by order for processing
-        orders_to_clean = {}
+        return stats
 
-        for order, reservation in orders_with_reservations:
-            if order.id not in orders_to_clean:
-                orders_to_clean[order.id] = {
-                    'order': order,
-                    'reservations': []
-                }
-            orders_to_clean[order.id]['reservations'].append(reservation)
+    @staticmethod
+    async def _release_reservation_batches(
+        session: AsyncSession,
+        condition,
+        order_by,
+        batch_size: int,
+        max_batches: Optional[int] = None
+    ) -> Tuple[int, int]:
+        """
+        Delete reservations matching condition, batch_size rows per statement,
+        committing each batch together with its reserved_quantity adjustment.
+
+        The condition is repeated on the DELETE itself, so a reservation that
+        stopped matching after being picked (its order was just paid) is kept.
+
+        Args:
+            session: Database session
+            condition: WHERE clause selecting reservations to release
+            order_by: Column deciding which reservations go first
+            batch_size: Reservations per batch
+            max_batches: Upper bound on batches (None: until none match)
+
+        Returns:
+            Tuple of (reservations released, units released)
+        """
+        released_reservations = released_units = batches = 0
+        while max_batches is None or batches < max_batches:
+            batch = select(OrderReservation.id).where(condition).order_by(order_by).limit(batch_size)
+            result = await session.execute(
+                delete(OrderReservation)
+                .where(OrderReservation.id.in_(batch.scalar_subquery()), condition)
+                .returning(OrderReservation.warehouse_item_id, OrderReservation.reserved_quantity)
+                .execution_options(synchronize_session=False)
+            )
+            rows = result.all()
+            batches += 1
+
+            released: Dict[int, int] = defaultdict(int)
+            for warehouse_item_id, reserved_quantity in rows:
+                released[warehouse_item_id] -= reserved_quantity
+            await InventoryService._adjust_reserved_quantities(session, released)
+            await session.commit()
+
+            units = -sum(released.values())
+            released_reservations += len(rows)
+            released_units += units
+            reservations_expired_total.inc(len(rows))
+            reserved_units_released_total.inc(units)
+
+            if len(rows) < batch_size:
+                break
+
+        return released_reservations, released_units
 
-        stats["orders_found"] = len(orders_to_clean)
-        stats["reservations_found"] = len(orders_with_reservations)
+    @staticmethod
+    async def audit_reserved_quantities(
+        session: AsyncSession,
+        repair: bool = False
+    ) -> Dict:
+        """
+        Compare reserved_quantity counters with the reservations they summarize.
 
-        if not dry_run:
-            # Actually delete the reservations
-            deleted_count = 0
-            for order_id, data in orders_to_clean.items():
-                for reservation in data['reservations']:
-                    await session.delete(reservation)
-                    deleted_count += 1
+        Args:
+            session: Database session
+            repair: If True, overwrite drifted counters with the recomputed sums and commit
 
+        Returns:
+            Dictionary with audit statistics and the drifted items
+            (warehouse_item_id, counter, actual)
+        """
+        reserved = (
+            select(
+                OrderReservation.warehouse_item_id,
+                func.sum(OrderReservation.reserved_quantity).label("actual")
+            )
+            .group_by(OrderReservation.warehouse_item_id)
+            .subquery()
+        )
+        actual = func.coalesce(reserved.c.actual, 0)
+        result = await session.execute(
+            select(WarehouseItem.id, WarehouseItem.reserved_quantity, actual)
+            .outerjoin(reserved, reserved.c.warehouse_item_id == WarehouseItem.id)
+            .where(WarehouseItem.reserved_quantity != actual)
+            .order_by(WarehouseItem.id)
+        )
+        drifted = [
+            {"warehouse_item_id": item_id, "counter": counter, "actual": actual_quantity}
+            for item_id, counter, actual_quantity in result.all()
+        ]
+        items_checked = (await session.execute(select(func.count(WarehouseItem.id)))).scalar()
+
+        if repair and drifted:
+            await InventoryService._adjust_reserved_quantities(
+                session, {row["warehouse_item_id"]: row["actual"] - row["counter"] for row in drifted}
+            )
             await session.commit()
-            stats["reservations_deleted"] = deleted_count
 
-        return stats
+        return {
+            "items_checked": items_checked,
+            "items_drifted": len(drifted),
+            "repaired": repair and bool(drifted),
+            "drifted": drifted
+        }
 
     @staticmethod
     async def get_inventory_summary(
@@ -834,12 +1449,6 @@ class InventoryService:
         )
         warehouse_items = warehouse_items_result.scalars().all()
 
-        # Get all warehouse item IDs for batch reservation lookup
-        warehouse_item_ids = [item.id for item in warehouse_items]
-        reserved_quantities = await InventoryService.get_reserved_quantities(
-            session, warehouse_item_ids
-        )
-
         # Calculate summary statistics
         total_items = len(warehouse_items)
         total_stock_value = 0
@@ -850,7 +1459,7 @@ class InventoryService:
         detailed_items = []
 
         for item in warehouse_items:
-            reserved_qty = reserved_quantities.get(item.id, 0)
+            reserved_qty = item.reserved_quantity
             available_qty = item.quantity - reserved_qty
             item_value = item.quantity * item.cost_price
 
@@ -900,6 +1509,10 @@ class InventoryService:
         Validate that all order items have sufficient stock.
         Returns list of error messages for insufficient items.
 
+        Carts that fit are answered from the precomputed AvailabilityEngine
+        figures; only a short cart runs the full per-ingredient check for
+        its messages. Reservations stay the oversell guard at checkout.
+
         Args:
             session: Database session
             order_items: List of order items to validate
@@ -907,6 +1520,13 @@ class InventoryService:
         Returns:
             List of error messages (empty if all valid)
         """
+        requested: Dict[int, int] = defaultdict(int)
+        for item in order_items:
+            requested[item.product_id] += item.quantity
+        max_quantities = await AvailabilityEngine.get_product_max_quantities(session, requested)
+        if all(max_quantities.get(product_id, 0) >= quantity for product_id, quantity in requested.items()):
+            return []
+
         availability = await InventoryService.check_batch_availability(session, order_items)
 
         errors = []
@@ -928,9 +1548,7 @@ class InventoryService:
             product_id: Product ID
 
         Returns:
-            Maximum quantity that can be produced
+            Maximum quantity that can be produced (0 for unknown or disabled products)
         """
-        availability = await InventoryService.check_product_availability(
-            session, product_id, 1  # Check for 1 to get max_quantity
-        )
-        return availability.max_quantity
\ No newline at end of file
+        max_quantities = await AvailabilityEngine.get_product_max_quantities(session, [product_id])
+        return max_quantities.get(product_id, 0)
\ No newline at end of file
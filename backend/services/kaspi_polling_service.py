@@ -21,6 +21,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from core.logging import get_logger
 from services.kaspi_pay_service import get_kaspi_service, KaspiPayServiceError
 from models.orders import Order
+from services.product_sales_service import ProductSalesService
 from database import get_session
 
 # Import settings based on environment
@@ -160,6 +161,7 @@ class KaspiPollingService:
                 if order.status != OrderStatus.PAID:
                     old_order_status = order.status
                     order.status = OrderStatus.PAID
+                    await ProductSalesService.on_status_change(session, order)
 
                     logger.info(
                         "kaspi_polling_order_paid",
@@ -0,0 +1,217 @@
+"""
+Order Event Broker - Push order changes to admin clients
+
+Order writes are turned into events by session hooks (below), so every
+writer emits them without extra calls: OrderService, the status, tracking
+and assignment routers, Kaspi payment polling.
+
+- order.created: a new order
+- order.status_changed: status moved (old_status -> status)
+- order.payment_confirmed: status became paid, or Kaspi reported the payment as Processed
+- order.assigned: responsible person or courier changed
+
+Events leave a process only once the writing transaction commits.
+Subscribers (GET /orders/events, one per open SSE connection) hold a
+bounded queue per shop.
+
+Fan-out across replicas: on PostgreSQL every process LISTENs on
+ORDER_EVENTS_CHANNEL (listen(), started from the app lifespan). Events are
+sent with pg_notify inside the writing transaction, so PostgreSQL delivers
+them on commit and drops them on rollback, and each replica, the writer
+included, publishes what it hears to its own subscribers. Without a
+listener (SQLite, local dev) committed events are published in process.
+"""
+
+import asyncio
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Set
+
+from sqlalchemy import event, inspect, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+
+from models import Order, OrderStatus
+from core.logging import get_logger
+from core.session_hooks import TransactionState
+
+logger = get_logger(__name__)
+
+ORDER_EVENTS_CHANNEL = "order_events"
+
+# Events buffered per subscriber; a client that falls further behind is disconnected
+SUBSCRIBER_QUEUE_SIZE = 100
+
+LISTEN_RETRY_SECONDS = 5
+
+KASPI_PAYMENT_PROCESSED = "Processed"
+
+# shop_id -> queues of open subscriptions
+_subscribers: Dict[int, Set[asyncio.Queue]] = {}
+
+# A LISTEN connection delivers this process's own events back to it
+_listening = False
+
+
+class OrderEventBroker:
+    """In-process pub/sub of order events, per shop"""
+
+    @staticmethod
+    def subscribe(shop_id: int) -> asyncio.Queue:
+        """
+        Open a subscription to a shop's events.
+
+        The queue yields event dicts; None means the subscriber fell behind
+        and was dropped (reconnect and refetch).
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        _subscribers.setdefault(shop_id, set()).add(queue)
+        return queue
+
+    @staticmethod
+    def unsubscribe(shop_id: int, queue: asyncio.Queue) -> None:
+        queues = _subscribers.get(shop_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del _subscribers[shop_id]
+
+    @staticmethod
+    def publish(order_event: Dict[str, Any]) -> None:
+        """Hand an event to this process's subscribers of its shop"""
+        for queue in list(_subscribers.get(order_event["shop_id"], ())):
+            try:
+                queue.put_nowait(order_event)
+            except asyncio.QueueFull:
+                # Too slow: replace the backlog with the drop marker
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+                OrderEventBroker.unsubscribe(order_event["shop_id"], queue)
+                logger.warning("order_event_subscriber_dropped", shop_id=order_event["shop_id"])
+
+    @staticmethod
+    async def listen(engine: AsyncEngine) -> None:
+        """
+        Relay ORDER_EVENTS_CHANNEL notifications to local subscribers.
+
+        Runs until cancelled on a dedicated asyncpg connection, reconnecting
+        after failures. PostgreSQL only.
+        """
+        global _listening
+        import asyncpg
+
+        dsn = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+
+        def relay(connection, pid, channel, payload) -> None:
+            try:
+                OrderEventBroker.publish(json.loads(payload))
+            except (ValueError, KeyError) as e:
+                logger.warning("order_event_payload_invalid", error=str(e))
+
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(dsn)
+                await connection.add_listener(ORDER_EVENTS_CHANNEL, relay)
+                _listening = True
+                logger.info("order_event_listener_started", channel=ORDER_EVENTS_CHANNEL)
+                while not connection.is_closed():
+                    await asyncio.sleep(LISTEN_RETRY_SECONDS)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("order_event_listener_failed", error=str(e))
+            finally:
+                _listening = False
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(LISTEN_RETRY_SECONDS)
+
+    @staticmethod
+    def clear() -> None:
+        """Drop all subscriptions"""
+        _subscribers.clear()
+
+
+def _order_events(state: str, order: Order) -> List[Dict[str, Any]]:
+    """Events of one flushed order"""
+    values = inspect(order).dict
+    if values.get("shop_id") is None or order.id is None:
+        return []
+    base = {
+        "order_id": order.id,
+        "shop_id": values["shop_id"],
+        "order_number": values.get("orderNumber"),
+        "status": OrderStatus(values["status"]).value if values.get("status") else None,
+        "at": datetime.utcnow().isoformat(),
+    }
+    if state == "new":
+        return [{"type": "order.created", **base}]
+
+    attrs = inspect(order).attrs
+    events = []
+    status_history = attrs.status.history
+    if status_history.has_changes():
+        old_status = status_history.deleted[0] if status_history.deleted else None
+        events.append({
+            "type": "order.status_changed",
+            **base,
+            "old_status": OrderStatus(old_status).value if old_status else None,
+        })
+    paid = status_history.has_changes() and base["status"] == OrderStatus.PAID.value
+    kaspi_processed = (
+        attrs.kaspi_payment_status.history.has_changes()
+        and values.get("kaspi_payment_status") == KASPI_PAYMENT_PROCESSED
+    )
+    if paid or kaspi_processed:
+        events.append({"type": "order.payment_confirmed", **base})
+    if attrs.assigned_to_id.history.has_changes() or attrs.courier_id.history.has_changes():
+        events.append({
+            "type": "order.assigned",
+            **base,
+            "assigned_to_id": values.get("assigned_to_id"),
+            "courier_id": values.get("courier_id"),
+        })
+    return events
+
+
+# ===============================
+# Session hooks
+# ===============================
+# Events are collected per flush: sent with pg_notify inside the transaction
+# while a listener runs, else published in process once the transaction commits.
+
+def _publish_order_events(events: List[Dict[str, Any]]) -> None:
+    """Publish committed events to this process's subscribers"""
+    for order_event in events:
+        OrderEventBroker.publish(order_event)
+
+
+_pending = TransactionState("order_events_pending", _publish_order_events, factory=list)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_order_events(session: Session, flush_context) -> None:
+    """Turn inserted and changed orders into events"""
+    events = [
+        order_event
+        for state, instances in (("new", session.new), ("dirty", session.dirty))
+        for instance in instances
+        if isinstance(instance, Order)
+        for order_event in _order_events(state, instance)
+    ]
+    if not events:
+        return
+
+    if _listening and session.get_bind().dialect.name == "postgresql":
+        # Delivered by PostgreSQL on commit, dropped on rollback
+        connection = session.connection()
+        for order_event in events:
+            connection.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": ORDER_EVENTS_CHANNEL, "payload": json.dumps(order_event)}
+            )
+        return
+    _pending.get(session).extend(events)
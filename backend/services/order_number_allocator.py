@@ -0,0 +1,233 @@
+"""
+Order Number Allocator - Block (hi-lo) allocation of order numbers
+
+Instead of bumping the counter row once per order, a worker reserves a block
+of ORDER_NUMBER_BLOCK_SIZE numbers with one UPDATE ... RETURNING and hands
+them out in process. The counter row is touched once per block, so orders
+no longer queue on it one by one.
+
+The block is reserved in the caller's transaction. Until that transaction
+commits its unused numbers belong to that session only; a rollback discards
+them together with the counter bump (session hooks below), so a number is
+never handed out twice across workers.
+
+Modes:
+- ORDER_NUMBER_BLOCK_SIZE=1 (default): one counter bump per order in the
+  order's own transaction; a rolled-back order gives its number back (no gaps)
+- ORDER_NUMBER_BLOCK_SIZE>1 (opt-in, e.g. 20): gap-tolerant. Numbers a worker
+  never hands out (restart, deploy) are skipped, and numbers from different
+  workers interleave rather than follow creation time.
+- ORDER_NUMBER_PER_SHOP=true: each shop counts its own orders, formatted as
+  #<shop_id>-00001 (shop_order_counter); the default is one platform-wide
+  sequence (#00001, ordercounter row 1)
+
+The same handout serves the tracking ID sequence (TRACKING_SCOPE, see
+TrackingIdService).
+"""
+
+import os
+import secrets
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from sqlalchemy import Integer, cast, insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import func, select
+
+from models import Order, OrderCounter, ShopOrderCounter, TrackingIdSequence
+from core.session_hooks import TransactionState
+
+ORDER_NUMBER_BLOCK_SIZE = max(1, int(os.getenv("ORDER_NUMBER_BLOCK_SIZE", "1")))
+ORDER_NUMBER_PER_SHOP = os.getenv("ORDER_NUMBER_PER_SHOP", "false").lower() == "true"
+
+# Counter scope: None for the platform-wide counter, a shop id, or TRACKING_SCOPE
+TRACKING_SCOPE = "tracking"
+Scope = Union[None, int, str]
+
+# Called with (session, first, last) of a fresh block; returns values not to hand out
+BlockFilter = Callable[[AsyncSession, int, int], Awaitable[Iterable[int]]]
+
+# Committed, not yet handed out blocks of this process: scope -> [[next, last], ...]
+_blocks: Dict[Scope, List[List[int]]] = {}
+
+
+def _without(first: int, last: int, skipped: Iterable[int]) -> List[List[int]]:
+    """[next, last] blocks covering first..last except the skipped values"""
+    blocks = []
+    for value in sorted(set(skipped)):
+        if first <= value <= last:
+            if first < value:
+                blocks.append([first, value - 1])
+            first = value + 1
+    if first <= last:
+        blocks.append([first, last])
+    return blocks
+
+
+def _take(blocks: List[List[int]]) -> Optional[int]:
+    """Next number from a list of [next, last] blocks, dropping used-up ones"""
+    while blocks:
+        block = blocks[0]
+        if block[0] <= block[1]:
+            number = block[0]
+            block[0] += 1
+            return number
+        blocks.pop(0)
+    return None
+
+
+class OrderNumberAllocator:
+    """
+    Order number handout from per-process blocks.
+
+    next_number() never commits; the counter bump commits or rolls back with
+    the caller's transaction.
+    """
+
+    @staticmethod
+    async def next_number(
+        session: AsyncSession,
+        shop_id: Optional[int] = None,
+        block_size: Optional[int] = None,
+        per_shop: Optional[bool] = None
+    ) -> str:
+        """
+        Next order number.
+
+        Args:
+            session: Database session (the order's transaction)
+            shop_id: Shop the order belongs to
+            block_size: Numbers reserved per counter bump (default: ORDER_NUMBER_BLOCK_SIZE)
+            per_shop: Number per shop (default: ORDER_NUMBER_PER_SHOP)
+
+        Returns:
+            Order number like #00042, or #7-00042 per shop
+        """
+        block_size = block_size or ORDER_NUMBER_BLOCK_SIZE
+        per_shop = ORDER_NUMBER_PER_SHOP if per_shop is None else per_shop
+        if per_shop and shop_id is None:
+            raise ValueError("shop_id is required for per-shop order numbers")
+        scope: Scope = shop_id if per_shop else None
+
+        number = await OrderNumberAllocator.next_value(session, scope, block_size)
+        return OrderNumberAllocator.format_number(number, scope)
+
+    @staticmethod
+    async def next_value(
+        session: AsyncSession,
+        scope: Scope,
+        block_size: int,
+        block_filter: Optional[BlockFilter] = None
+    ) -> int:
+        """
+        Next raw counter value of a scope.
+
+        Args:
+            session: Database session (the caller's transaction)
+            scope: None, a shop id or TRACKING_SCOPE
+            block_size: Values reserved per counter bump
+            block_filter: Drops values of each freshly reserved block
+
+        Returns:
+            A value no other transaction or worker is handed out
+        """
+        pending = _pending.get(session.sync_session).setdefault(scope, [])
+        value = _take(pending)
+        if value is None:
+            value = _take(_blocks.setdefault(scope, []))
+        while value is None:
+            last = await OrderNumberAllocator._reserve_block(session, scope, block_size)
+            first = last - block_size + 1
+            skipped = await block_filter(session, first, last) if block_filter else ()
+            pending.extend(_without(first, last, skipped))
+            value = _take(pending)
+        return value
+
+    @staticmethod
+    def format_number(number: int, shop_id: Scope = None) -> str:
+        """#00042 for the platform-wide counter, #7-00042 for shop 7"""
+        if shop_id is None:
+            return f"#{number:05d}"
+        return f"#{shop_id}-{number:05d}"
+
+    @staticmethod
+    def clear() -> None:
+        """Forget this process's unused blocks (their numbers are skipped)"""
+        _blocks.clear()
+
+    # ===== Internals =====
+
+    @staticmethod
+    def _counter(scope: Scope) -> Tuple[object, object, object]:
+        """(table, counter column, row filter) of a scope"""
+        if scope is None:
+            return OrderCounter, OrderCounter.counter, OrderCounter.id == 1
+        if scope == TRACKING_SCOPE:
+            return TrackingIdSequence, TrackingIdSequence.counter, TrackingIdSequence.id == 1
+        return ShopOrderCounter, ShopOrderCounter.counter, ShopOrderCounter.shop_id == scope
+
+    @staticmethod
+    async def _reserve_block(session: AsyncSession, scope: Scope, block_size: int) -> int:
+        """Bump the scope's counter by block_size; returns the last number of the block"""
+        table, counter, row_filter = OrderNumberAllocator._counter(scope)
+        bump = (
+            update(table)
+            .where(row_filter)
+            .values(counter=counter + block_size, last_updated=func.now())
+            .returning(counter)
+        )
+        last = (await session.execute(bump)).scalar()
+        if last is None:
+            await OrderNumberAllocator._create_counter(session, scope)
+            last = (await session.execute(bump)).scalar_one()
+        return last
+
+    @staticmethod
+    async def _create_counter(session: AsyncSession, scope: Scope) -> None:
+        """Create a scope's counter row, starting after the highest existing order number"""
+        table, _, _ = OrderNumberAllocator._counter(scope)
+        if scope == TRACKING_SCOPE:
+            # The permutation key is drawn once and never changes
+            await OrderNumberAllocator._insert_counter(
+                session, table, {"id": 1, "counter": 0, "key": secrets.token_hex(32)}
+            )
+            return
+
+        prefix = OrderNumberAllocator.format_number(0, scope)[:-5]
+        query = select(func.max(cast(func.substr(Order.orderNumber, len(prefix) + 1), Integer)))
+        if scope is None:
+            # Shop-scoped numbers (#7-00042) are not part of the platform-wide sequence
+            query = query.where(Order.orderNumber.not_like("%-%"))
+        else:
+            query = query.where(Order.shop_id == scope, Order.orderNumber.like(f"{prefix}%"))
+        highest = (await session.execute(query)).scalar() or 0
+
+        values = {"id": 1} if scope is None else {"shop_id": scope}
+        await OrderNumberAllocator._insert_counter(session, table, {"counter": highest, **values})
+
+    @staticmethod
+    async def _insert_counter(session: AsyncSession, table, values: Dict[str, object]) -> None:
+        try:
+            async with session.begin_nested():
+                await session.execute(insert(table).values(**values))
+        except IntegrityError:
+            # Another worker created it first
+            pass
+
+
+# ===============================
+# Session hooks
+# ===============================
+# Blocks reserved in a transaction are handed out to other sessions only once
+# it commits; a rollback undoes the counter bump, so its numbers are dropped.
+
+
+def _release_pending_blocks(pending: Dict[Scope, List[List[int]]]) -> None:
+    """Make the unused rest of committed blocks available to the whole process"""
+    for scope, blocks in pending.items():
+        _blocks.setdefault(scope, []).extend(block for block in blocks if block[0] <= block[1])
+
+
+# Numbers of a rolled-back counter bump may be reserved again by anyone, so
+# they are dropped (savepoint rollbacks too: that leaves a gap, never a duplicate)
+_pending = TransactionState("order_number_blocks_pending", _release_pending_blocks, factory=dict)
@@ -0,0 +1,86 @@
+"""
+Order Search Service - Indexed order lookup by phone, customer name and number
+
+A query that is a phone number (any format normalize_phone_number accepts)
+matches order.phone_normalized exactly, served by the
+(shop_id, phone_normalized, created_at) index together with the shop filter
+and newest-first ordering. Anything else is a substring match on the
+customer name and order number, plus the phone for queries with enough
+digits ("1545" finds +77015211545); on PostgreSQL pg_trgm GIN indexes serve
+these ILIKE '%...%' filters.
+
+phone_normalized is kept in sync by mapper hooks on Order (models/orders.py)
+and backfilled by migrate_order_phone_normalized.
+"""
+
+import re
+from typing import Optional
+
+from sqlalchemy import or_
+from sqlalchemy.sql import Select
+from sqlmodel import col
+
+from models import Order
+from utils import normalize_phone_number, phone_search_key
+
+# Fewer digits than this are too unselective for a phone substring match
+MIN_PHONE_DIGITS = 4
+
+_PHONE_CHARACTERS = re.compile(r"[\d\s+()\-]+")
+
+
+def phone_query(search: str) -> Optional[str]:
+    """Normalized phone if the whole query is a phone number, else None"""
+    if not _PHONE_CHARACTERS.fullmatch(search):
+        return None
+    try:
+        return normalize_phone_number(search)
+    except ValueError:
+        return None
+
+
+class OrderSearchService:
+    """Order search filters for select(Order) statements"""
+
+    @staticmethod
+    def apply_phone(query: Select, phone: str) -> Select:
+        """
+        Restrict to orders of a customer phone (exact, any input format).
+
+        Args:
+            query: select(Order) statement
+            phone: Phone number as entered
+
+        Returns:
+            Statement filtered on order.phone_normalized
+        """
+        return query.where(Order.phone_normalized == phone_search_key(phone))
+
+    @staticmethod
+    def apply_search(query: Select, search: str) -> Select:
+        """
+        Restrict to orders matching a free-text query.
+
+        Args:
+            query: select(Order) statement (other filters may already be applied)
+            search: Phone number, part of a customer name, order number or phone
+
+        Returns:
+            Statement with the match condition
+        """
+        search = search.strip()
+        if not search:
+            return query
+
+        phone = phone_query(search)
+        if phone:
+            return query.where(Order.phone_normalized == phone)
+
+        conditions = [
+            col(Order.customerName).ilike(f"%{search}%"),
+            col(Order.orderNumber).ilike(f"%{search}%"),
+        ]
+        digits = re.sub(r"\D", "", search)
+        if len(digits) >= MIN_PHONE_DIGITS and _PHONE_CHARACTERS.fullmatch(search):
+            conditions.append(col(Order.phone_normalized).like(f"%{digits}%"))
+        return query.where(or_(*conditions))
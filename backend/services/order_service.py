@@ -8,120 +8,47 @@ Handles order total calculations, validation, and data integrity.
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import text, select, func, Integer
+from sqlalchemy import select
 from fastapi import HTTPException
 
 from models import (
     Order, OrderCreate, OrderCreateWithItems, OrderRead, OrderItemRequest, OrderUpdate,
-    OrderItem, Product, OrderStatus, OrderCounter, OrderHistory
+    OrderItem, Product, OrderStatus, OrderHistory
 )
+from services.order_number_allocator import OrderNumberAllocator
+from services.tracking_id_service import TrackingIdService
+from services.product_sales_service import ProductSalesService
 from core.logging import get_logger
 
 
 class OrderService:
     """Service class for order operations with atomic guarantees"""
 
-    @staticmethod
-    async def ensure_counter_exists(session: AsyncSession) -> None:
-        """Ensure the order counter record exists and is synchronized with existing orders"""
-        try:
-            # Try to get the counter record
-            result = await session.execute(select(OrderCounter).where(OrderCounter.id == 1))
-            counter = result.scalar_one_or_none()
-
-            if not counter:
-                # Get the maximum order number from existing orders
-                max_order_query = await session.execute(
-                    select(func.max(
-                        func.cast(func.substr(Order.orderNumber, 2), Integer)
-                    )).select_from(Order)
-                )
-                max_order_num = max_order_query.scalar() or 0
-
-                # Create the counter record initialized with the max order number
-                counter = OrderCounter(id=1, counter=max_order_num)
-                session.add(counter)
-                await session.commit()
-        except Exception as e:
-            # Handle potential race condition during creation
-            await session.rollback()
-            # Try again - another process might have created it
-            result = await session.execute(select(OrderCounter).where(OrderCounter.id == 1))
-            if not result.scalar_one_or_none():
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"Failed to initialize order counter: {str(e)}"
-                )
-
     @staticmethod
     async def generate_tracking_id(session: AsyncSession) -> str:
         """
         Generate unique 9-digit tracking ID for public order tracking.
 
+        IDs are a keyed permutation of a sequence (TrackingIdService): unique
+        by construction, no lookup per ID. Nothing is committed here.
+
         Returns:
             9-digit string (e.g., "847562910")
-
-        Raises:
-            HTTPException if unable to generate unique ID after max attempts
         """
-        import random
-
-        max_attempts = 10
-
-        for _ in range(max_attempts):
-            # Generate random 9-digit number
-            tracking_id = ''.join([str(random.randint(0, 9)) for _ in range(9)])
-
-            # Check uniqueness
-            result = await session.execute(
-                select(Order).where(Order.tracking_id == tracking_id)
-            )
-            existing = result.scalar_one_or_none()
-
-            if not existing:
-                return tracking_id
-
-        # If we couldn't generate unique ID after max attempts
-        raise HTTPException(
-            status_code=500,
-            detail="Failed to generate unique tracking ID"
-        )
+        return await TrackingIdService.next_tracking_id(session)
 
     @staticmethod
-    async def generate_order_number(session: AsyncSession) -> str:
+    async def generate_order_number(session: AsyncSession, shop_id: Optional[int] = None) -> str:
         """
-        Generate unique order number atomically using transaction isolation.
+        Generate a unique order number in the caller's transaction.
 
-        This method ensures no race conditions even under high concurrency.
-        Returns order number in format: #00001
+        Numbers come from per-worker blocks (OrderNumberAllocator), so the
+        counter row is only updated once per block. Nothing is committed here.
+        Returns order number in format: #00001 (or #<shop_id>-00001 with
+        ORDER_NUMBER_PER_SHOP)
         """
         try:
-            # Ensure counter exists
-            await OrderService.ensure_counter_exists(session)
-
-            # Begin a new transaction for atomicity
-            await session.begin_nested()
-
-            # For SQLite: UPDATE and SELECT in one transaction with immediate mode
-            # This ensures atomicity even without RETURNING clause
-            await session.execute(
-                text("UPDATE ordercounter SET counter = counter + 1, last_updated = CURRENT_TIMESTAMP WHERE id = 1")
-            )
-
-            # Get the updated counter value in the same transaction
-            result = await session.execute(
-                text("SELECT counter FROM ordercounter WHERE id = 1")
-            )
-            new_counter = result.scalar_one()
-
-            # Commit the nested transaction
-            await session.commit()
-
-            # Generate order number with zero-padding
-            order_number = f"#{str(new_counter).zfill(5)}"
-
-            return order_number
-
+            return await OrderNumberAllocator.next_number(session, shop_id)
         except Exception as e:
             await session.rollback()
             raise HTTPException(
@@ -235,7 +162,7 @@ class OrderService:
                 )
 
         # Generate atomic order number and tracking ID
-        order_number = await OrderService.generate_order_number(session)
+        order_number = await OrderService.generate_order_number(session, shop_id)
         tracking_id = await OrderService.generate_tracking_id(session)
 
         # Calculate totals and validate items belong to shop
@@ -283,6 +210,22 @@ class OrderService:
             session.add(order_item)
             created_items.append(order_item)
 
+        # Reserve ingredients in the same transaction: stock is re-checked
+        # under row locks, so concurrent checkouts cannot oversell
+        if check_availability and order_data.items:
+            from services.inventory_service import InventoryService, InsufficientStockError
+            await session.flush()
+            try:
+                await InventoryService.create_reservation(
+                    session, order.id, order_data.items, validate_availability=True, commit=False
+                )
+            except InsufficientStockError as e:
+                await session.rollback()
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Order cannot be created due to insufficient stock: {e}"
+                )
+
         # Commit the transaction
         await session.commit()
 
@@ -291,18 +234,6 @@ class OrderService:
         for item in created_items:
             await session.refresh(item)
 
-        # Reserve ingredients if availability checking was enabled
-        if check_availability and order_data.items:
-            try:
-                from services.inventory_service import InventoryService
-                await InventoryService.create_reservation(
-                    session, order.id, order_data.items, validate_availability=False
-                )
-            except Exception as e:
-                # Log warning but don't fail the order creation
-                # In production, you might want to handle this differently
-                pass
-
         return order
 
     @staticmethod
@@ -323,7 +254,7 @@ class OrderService:
             Created Order instance
         """
         # Generate atomic order number and tracking ID
-        order_number = await OrderService.generate_order_number(session)
+        order_number = await OrderService.generate_order_number(session, shop_id)
         tracking_id = await OrderService.generate_tracking_id(session)
 
         # Create order instance with shop_id
@@ -558,6 +489,9 @@ class OrderService:
                 # Update the order field
                 setattr(order, field, new_value)
 
+        if "status" in order_data:
+            await ProductSalesService.on_status_change(session, order)
+
         # Commit changes
         await session.commit()
 
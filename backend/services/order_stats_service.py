@@ -0,0 +1,242 @@
+"""
+Order Stats Service - Per-shop rollup behind the admin order dashboard
+
+The dashboard (orders by status, today's orders and revenue) is polled
+constantly, so each shop's counters are kept in process instead of being
+recounted on every request. A rollup is built with one GROUP BY query over
+the shop's orders (today as a created_at range, served by the
+(shop_id, created_at, id) index) and then maintained incrementally: order
+inserts, status or total changes and deletes are collected per flush and
+applied once the transaction commits (session hooks below).
+
+A rollup is rebuilt at day change and after ORDER_STATS_TTL_SECONDS, which
+bounds staleness from writes made in other worker processes or by
+set-based statements the session hooks cannot see.
+"""
+
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from sqlalchemy import case, event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlmodel import func, select
+
+from models import Order, OrderStatus
+from core.session_hooks import TransactionState
+
+ORDER_STATS_TTL_SECONDS = 60
+
+# Statuses counted in revenue_today
+REVENUE_STATUSES = (OrderStatus.PAID.value, OrderStatus.DELIVERED.value)
+
+
+class ShopOrderStats:
+    """Dashboard counters of one shop for one day"""
+
+    def __init__(self, day: date, by_status: Dict[str, int], orders_today: int, revenue_today: int):
+        self.day = day
+        self.expires_at = time.monotonic() + ORDER_STATS_TTL_SECONDS
+        self.by_status = {status.value: 0 for status in OrderStatus}
+        self.by_status.update(by_status)
+        self.orders_today = orders_today
+        self.revenue_today = revenue_today
+
+    def apply(self, delta: "OrderStatsDelta") -> None:
+        for status, count in delta.by_status.items():
+            self.by_status[status] = self.by_status.get(status, 0) + count
+        self.orders_today += delta.orders_today
+        self.revenue_today += delta.revenue_today
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "orders_by_status": dict(self.by_status),
+            "orders_today": self.orders_today,
+            "revenue_today": self.revenue_today,
+            "total_orders": sum(self.by_status.values())
+        }
+
+
+class OrderStatsDelta:
+    """Counter changes of one shop made by an uncommitted transaction"""
+
+    def __init__(self, day: date):
+        self.day = day
+        self.by_status: Dict[str, int] = {}
+        self.orders_today = 0
+        self.revenue_today = 0
+
+    def add(self, status: str, total: int, created_at: Optional[datetime], sign: int) -> None:
+        """Count (sign=1) or uncount (sign=-1) one order"""
+        self.by_status[status] = self.by_status.get(status, 0) + sign
+        if created_at is None or created_at.date() == self.day:
+            self.orders_today += sign
+            if status in REVENUE_STATUSES:
+                self.revenue_today += sign * (total or 0)
+
+
+# shop_id -> rollup
+_stats: Dict[int, ShopOrderStats] = {}
+# shop_id -> number of committed changes, to detect commits racing a build
+_versions: Dict[int, int] = {}
+
+
+class OrderStatsService:
+    """Admin dashboard statistics of orders"""
+
+    @staticmethod
+    async def get_dashboard_stats(session: AsyncSession, shop_id: int) -> Dict[str, object]:
+        """
+        Order counts by status, today's orders and revenue of a shop.
+
+        Returns:
+            {"orders_by_status": {...}, "orders_today": int, "revenue_today": int, "total_orders": int}
+        """
+        today = datetime.now().date()
+        stats = _stats.get(shop_id)
+        if stats is None or stats.day != today or stats.expires_at < time.monotonic():
+            version = _versions.get(shop_id, 0)
+            stats = await OrderStatsService._build(session, shop_id, today)
+            if _versions.get(shop_id, 0) == version:
+                _stats[shop_id] = stats
+            else:
+                # A commit landed during the query; it may or may not be counted
+                _stats.pop(shop_id, None)
+        return stats.as_dict()
+
+    @staticmethod
+    def invalidate(shop_ids: Iterable[int]) -> None:
+        """Rebuild these shops' rollups on the next read"""
+        for shop_id in shop_ids:
+            _stats.pop(shop_id, None)
+            _versions[shop_id] = _versions.get(shop_id, 0) + 1
+
+    @staticmethod
+    def clear() -> None:
+        """Drop all rollups"""
+        _stats.clear()
+        _versions.clear()
+
+    # ===== Internals =====
+
+    @staticmethod
+    async def _build(session: AsyncSession, shop_id: int, day: date) -> ShopOrderStats:
+        """Counters of a shop from one GROUP BY query"""
+        day_start = datetime.combine(day, datetime.min.time())
+        is_today = (Order.created_at >= day_start) & (Order.created_at < day_start + timedelta(days=1))
+        result = await session.execute(
+            select(
+                Order.status,
+                func.count(Order.id),
+                func.sum(case((is_today, 1), else_=0)),
+                func.sum(case((is_today, Order.total), else_=0))
+            )
+            .where(Order.shop_id == shop_id)
+            .group_by(Order.status)
+        )
+
+        by_status: Dict[str, int] = {}
+        orders_today = 0
+        revenue_today = 0
+        for status, count, today_count, today_total in result.all():
+            status = OrderStatus(status).value
+            by_status[status] = count
+            orders_today += today_count or 0
+            if status in REVENUE_STATUSES:
+                revenue_today += today_total or 0
+        return ShopOrderStats(day, by_status, orders_today, revenue_today)
+
+
+# ===============================
+# Session hooks
+# ===============================
+# Order changes are collected per flush and applied to the rollups only once
+# the transaction commits, so rolled-back writes are never counted.
+
+
+def _apply_order_stats_changes(pending: Tuple[Dict[int, OrderStatsDelta], Set[int]]) -> None:
+    """Hand committed deltas to the rollups"""
+    deltas, stale = pending
+    for shop_id, delta in deltas.items():
+        _versions[shop_id] = _versions.get(shop_id, 0) + 1
+        stats = _stats.get(shop_id)
+        if stats is None:
+            continue
+        if stats.day != delta.day:
+            _stats.pop(shop_id, None)
+            continue
+        stats.apply(delta)
+    if stale:
+        OrderStatsService.invalidate(stale)
+
+
+def _discard_order_stats_changes(pending: Tuple[Dict[int, OrderStatsDelta], Set[int]]) -> None:
+    """Forget changes of a rolled-back transaction"""
+    # A savepoint rollback also lands here while the enclosing
+    # transaction's changes may still commit: rebuild these shops
+    deltas, stale = pending
+    OrderStatsService.invalidate(set(deltas) | stale)
+
+
+_pending = TransactionState(
+    "order_stats_pending",
+    _apply_order_stats_changes,
+    on_rollback=_discard_order_stats_changes,
+    factory=lambda: ({}, set())
+)
+
+
+_UNKNOWN = object()
+
+
+def _old_value(order: Order, attribute: str):
+    """Value of a loaded attribute before this flush (_UNKNOWN if it was never loaded)"""
+    history = inspect(order).attrs[attribute].history
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return _UNKNOWN
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_order_stats_changes(session: Session, flush_context) -> None:
+    """Turn inserted, updated and deleted orders into counter deltas"""
+    orders = [
+        (state, instance)
+        for state, instances in (("new", session.new), ("dirty", session.dirty), ("deleted", session.deleted))
+        for instance in instances
+        if isinstance(instance, Order)
+    ]
+    if not orders:
+        return
+
+    deltas, stale = _pending.get(session)
+    today = datetime.now().date()
+    for state, order in orders:
+        # Read loaded values only: expired attributes cannot be loaded here
+        values = inspect(order).dict
+        shop_id = values.get("shop_id")
+        # An inserted order's created_at is the server default: now
+        created_at = values.get("created_at")
+        if state == "new":
+            if shop_id is not None:
+                deltas.setdefault(shop_id, OrderStatsDelta(today)).add(
+                    OrderStatus(order.status).value, order.total, created_at, 1
+                )
+            continue
+
+        attrs = inspect(order).attrs
+        if state == "dirty" and not (attrs.status.history.has_changes() or attrs.total.history.has_changes()):
+            continue
+        old_status, old_total = _old_value(order, "status"), _old_value(order, "total")
+        if shop_id is None or created_at is None or old_status is _UNKNOWN or old_total is _UNKNOWN:
+            # Not enough loaded to tell what was counted
+            stale.update([shop_id] if shop_id is not None else list(_stats))
+            continue
+
+        delta = deltas.setdefault(shop_id, OrderStatsDelta(today))
+        delta.add(OrderStatus(old_status).value, old_total, created_at, -1)
+        if state == "dirty":
+            delta.add(OrderStatus(order.status).value, order.total, created_at, 1)
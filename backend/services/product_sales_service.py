@@ -0,0 +1,325 @@
+"""
+Product Sales Service - Sales rollup for bestseller rankings
+
+Maintains ProductSalesStats (units and revenue per product, all-time and over
+7/30-day windows) so bestseller lists read a few indexed rows instead of
+aggregating every OrderItem per request.
+
+An order is counted once, when it first reaches PAID or DELIVERED, and is
+subtracted again if it is cancelled afterwards; Order.sales_recorded_at marks
+counted orders. Status write paths call on_status_change() before
+committing. Rolling windows are recomputed periodically by
+refresh_windows(), which only reads the last 30 days of counted orders.
+"""
+
+from datetime import datetime, timedelta
+from typing import List, Optional, Dict, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, update, delete, case
+from sqlalchemy.orm import selectinload
+from sqlmodel import select
+
+from models import Order, OrderItem, OrderStatus, Product, ProductSalesStats, Shop
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+SALE_STATUSES = (OrderStatus.PAID, OrderStatus.DELIVERED)
+
+# Bestseller period -> ranking column
+PERIOD_COLUMNS = {
+    "all": ProductSalesStats.units_total,
+    "30d": ProductSalesStats.units_30d,
+    "7d": ProductSalesStats.units_7d,
+}
+
+
+class ProductSalesService:
+    """
+    Sales rollup maintenance and bestseller lookups.
+
+    Mutating methods never commit unless stated; callers own the transaction.
+    """
+
+    # ===== Order status hooks =====
+
+    @staticmethod
+    async def on_status_change(session: AsyncSession, order: Order) -> None:
+        """
+        Count or un-count an order after its status was changed.
+
+        Idempotent: safe to call on every status write.
+
+        Args:
+            session: Database session
+            order: Order with its new status already set
+        """
+        if order.status in SALE_STATUSES and order.sales_recorded_at is None:
+            await ProductSalesService.record_order(session, order)
+        elif order.status == OrderStatus.CANCELLED and order.sales_recorded_at is not None:
+            await ProductSalesService.revert_order(session, order)
+
+    @staticmethod
+    async def record_order(session: AsyncSession, order: Order) -> None:
+        """
+        Add an order's items to the rollup and mark it as counted.
+
+        Args:
+            session: Database session
+            order: Order to count
+        """
+        now = datetime.utcnow()
+        for product_id, units, revenue in await ProductSalesService._order_lines(session, order.id):
+            await ProductSalesService._add(
+                session, product_id, order.shop_id, units, revenue, in_7d=True, in_30d=True, sold_at=now
+            )
+
+        order.sales_recorded_at = now
+        session.add(order)
+        logger.info("order_sales_recorded", order_id=order.id, shop_id=order.shop_id)
+
+    @staticmethod
+    async def revert_order(session: AsyncSession, order: Order) -> None:
+        """
+        Subtract a previously counted order (cancelled after payment).
+
+        Args:
+            session: Database session
+            order: Counted order
+        """
+        age = datetime.utcnow() - order.sales_recorded_at
+        for product_id, units, revenue in await ProductSalesService._order_lines(session, order.id):
+            await ProductSalesService._add(
+                session, product_id, order.shop_id, -units, -revenue,
+                in_7d=age <= timedelta(days=7),
+                in_30d=age <= timedelta(days=30)
+            )
+
+        order.sales_recorded_at = None
+        session.add(order)
+        logger.info("order_sales_reverted", order_id=order.id, shop_id=order.shop_id)
+
+    @staticmethod
+    async def _order_lines(session: AsyncSession, order_id: int) -> List[Tuple[int, int, int]]:
+        """(product_id, units, revenue) per product of an order"""
+        result = await session.execute(
+            select(OrderItem.product_id, func.sum(OrderItem.quantity), func.sum(OrderItem.item_total))
+            .where(OrderItem.order_id == order_id)
+            .group_by(OrderItem.product_id)
+        )
+        return [(product_id, int(units), int(revenue)) for product_id, units, revenue in result.all()]
+
+    @staticmethod
+    async def _add(
+        session: AsyncSession,
+        product_id: int,
+        shop_id: int,
+        units: int,
+        revenue: int,
+        in_7d: bool,
+        in_30d: bool,
+        sold_at: Optional[datetime] = None
+    ) -> None:
+        """Apply a units/revenue delta to one product's counters"""
+        values = {
+            "units_total": ProductSalesStats.units_total + units,
+            "revenue_total": ProductSalesStats.revenue_total + revenue,
+        }
+        if in_7d:
+            values["units_7d"] = ProductSalesStats.units_7d + units
+            values["revenue_7d"] = ProductSalesStats.revenue_7d + revenue
+        if in_30d:
+            values["units_30d"] = ProductSalesStats.units_30d + units
+            values["revenue_30d"] = ProductSalesStats.revenue_30d + revenue
+        if sold_at is not None:
+            values["last_sold_at"] = sold_at
+
+        result = await session.execute(
+            update(ProductSalesStats)
+            .where(ProductSalesStats.product_id == product_id)
+            .values(**values)
+        )
+        if result.rowcount == 0 and units > 0:
+            session.add(ProductSalesStats(
+                product_id=product_id,
+                shop_id=shop_id,
+                units_total=units,
+                revenue_total=revenue,
+                units_7d=units if in_7d else 0,
+                revenue_7d=revenue if in_7d else 0,
+                units_30d=units if in_30d else 0,
+                revenue_30d=revenue if in_30d else 0,
+                last_sold_at=sold_at,
+            ))
+            await session.flush()
+
+    # ===== Rebuilds =====
+
+    @staticmethod
+    async def refresh_windows(session: AsyncSession) -> int:
+        """
+        Recompute 7/30-day counters from counted orders of the last 30 days.
+
+        Commits.
+
+        Returns:
+            Number of products with sales in the last 30 days
+        """
+        now = datetime.utcnow()
+        windows = await ProductSalesService._window_totals(session, now)
+
+        await session.execute(
+            update(ProductSalesStats)
+            .where((ProductSalesStats.units_30d != 0) | (ProductSalesStats.units_7d != 0))
+            .values(units_7d=0, revenue_7d=0, units_30d=0, revenue_30d=0)
+        )
+        for product_id, totals in windows.items():
+            await session.execute(
+                update(ProductSalesStats)
+                .where(ProductSalesStats.product_id == product_id)
+                .values(**totals)
+            )
+        await session.commit()
+
+        logger.info("product_sales_windows_refreshed", products=len(windows))
+        return len(windows)
+
+    @staticmethod
+    async def refresh_windows_job() -> None:
+        """APScheduler entry point: refresh rolling windows in a fresh session"""
+        from database import async_session
+
+        try:
+            async with async_session() as session:
+                await ProductSalesService.refresh_windows(session)
+        except Exception as e:
+            logger.error("product_sales_windows_refresh_failed", error=str(e))
+
+    @staticmethod
+    async def _window_totals(session: AsyncSession, now: datetime) -> Dict[int, Dict[str, int]]:
+        """7/30-day units and revenue per product, from counted orders"""
+        in_week = Order.sales_recorded_at >= now - timedelta(days=7)
+        result = await session.execute(
+            select(
+                OrderItem.product_id,
+                func.sum(case((in_week, OrderItem.quantity), else_=0)),
+                func.sum(case((in_week, OrderItem.item_total), else_=0)),
+                func.sum(OrderItem.quantity),
+                func.sum(OrderItem.item_total)
+            )
+            .join(Order, OrderItem.order_id == Order.id)
+            .where(Order.sales_recorded_at >= now - timedelta(days=30))
+            .group_by(OrderItem.product_id)
+        )
+        return {
+            product_id: {
+                "units_7d": int(units_7d),
+                "revenue_7d": int(revenue_7d),
+                "units_30d": int(units_30d),
+                "revenue_30d": int(revenue_30d),
+            }
+            for product_id, units_7d, revenue_7d, units_30d, revenue_30d in result.all()
+        }
+
+    @staticmethod
+    async def rebuild_all(session: AsyncSession) -> int:
+        """
+        Backfill: count PAID/DELIVERED orders not yet counted, then rebuild
+        every product's counters from counted orders.
+
+        Orders paid in the past but now in an intermediate status are counted
+        once they are delivered. Commits.
+
+        Returns:
+            Number of products with sales
+        """
+        await session.execute(
+            update(Order)
+            .where(Order.status.in_(SALE_STATUSES))
+            .where(Order.sales_recorded_at.is_(None))
+            .values(sales_recorded_at=func.coalesce(Order.updated_at, Order.created_at, func.now()))
+        )
+
+        result = await session.execute(
+            select(
+                OrderItem.product_id,
+                Product.shop_id,
+                func.sum(OrderItem.quantity),
+                func.sum(OrderItem.item_total),
+                func.max(Order.sales_recorded_at)
+            )
+            .join(Order, OrderItem.order_id == Order.id)
+            .join(Product, OrderItem.product_id == Product.id)
+            .where(Order.sales_recorded_at.is_not(None))
+            .group_by(OrderItem.product_id, Product.shop_id)
+        )
+        rows = result.all()
+
+        await session.execute(delete(ProductSalesStats))
+        for product_id, shop_id, units, revenue, last_sold_at in rows:
+            session.add(ProductSalesStats(
+                product_id=product_id,
+                shop_id=shop_id,
+                units_total=int(units),
+                revenue_total=int(revenue),
+                last_sold_at=last_sold_at,
+            ))
+        await session.flush()
+
+        await ProductSalesService.refresh_windows(session)
+        logger.info("product_sales_rebuilt", products=len(rows))
+        return len(rows)
+
+    # ===== Queries =====
+
+    @staticmethod
+    async def get_bestsellers(
+        session: AsyncSession,
+        shop_id: Optional[int] = None,
+        period: str = "all",
+        limit: int = 20
+    ) -> List[Product]:
+        """
+        Enabled products of active shops ranked by units sold.
+
+        Products without sales fill the remaining slots, newest first, so the
+        list is never shorter than the catalog allows.
+
+        Args:
+            session: Database session
+            shop_id: Filter by shop_id (None for the whole marketplace)
+            period: 'all', '30d' or '7d'
+            limit: Maximum number of products
+
+        Returns:
+            List of Product instances, best selling first
+        """
+        units = PERIOD_COLUMNS[period]
+
+        base = (
+            select(Product)
+            .options(selectinload(Product.images))
+            .join(Shop, Product.shop_id == Shop.id)
+            .where(Product.enabled == True)
+            .where(Shop.is_active == True)
+        )
+        if shop_id is not None:
+            base = base.where(Product.shop_id == shop_id)
+
+        result = await session.execute(
+            base.join(ProductSalesStats, ProductSalesStats.product_id == Product.id)
+            .where(units > 0)
+            .order_by(units.desc(), Product.id)
+            .limit(limit)
+        )
+        products = list(result.scalars().all())
+
+        if len(products) < limit:
+            ranked_ids = [p.id for p in products]
+            query = base.order_by(Product.created_at.desc(), Product.id.desc()).limit(limit - len(products))
+            if ranked_ids:
+                query = query.where(Product.id.notin_(ranked_ids))
+            result = await session.execute(query)
+            products.extend(result.scalars().all())
+
+        return products
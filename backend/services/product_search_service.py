@@ -0,0 +1,306 @@
+"""
+Product Search Service - Ranked full-text product search
+
+PostgreSQL: weighted tsvector over name, tags and description (russian
+stemming plus a 'simple' copy for Kazakh and brand names) with a GIN index,
+and pg_trgm word similarity on the name for typo tolerance. Without pg_trgm
+(the role cannot create extensions) names are substring-matched with ILIKE
+instead; without the search_vector column search is ILIKE only and indexing
+is a no-op (see ensure_schema).
+
+SQLite (local dev): FTS5 table keyed by product id, ranked with bm25().
+
+Both backends prefix-match every query term for autocomplete. The index is
+maintained through index_product()/index_products()/remove_product(), called by
+ProductService and the Bitrix product-sync webhook.
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+from sqlalchemy import literal_column, bindparam, text, func, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+from sqlmodel import select
+
+from models import Product
+from models.products import POSTGRES_TRIGRAM_DDL, POSTGRES_VECTOR_DDL, SQLITE_SEARCH_DDL
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+MAX_QUERY_TERMS = 8
+
+# Weighted document: name (A), tags (B), description (C)
+_PG_DOCUMENT_SQL = (
+    "setweight(to_tsvector('russian', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(tags::text, '')), 'B') || "
+    "setweight(to_tsvector('russian', coalesce(description, '')), 'C')"
+)
+
+
+def tokenize_query(search: str) -> List[str]:
+    """
+    Split a user query into search terms.
+
+    Only word characters survive, so the result is safe to embed in
+    tsquery / FTS5 MATCH syntax.
+
+    Args:
+        search: Raw search string
+
+    Returns:
+        Lowercased terms (at most MAX_QUERY_TERMS)
+    """
+    return re.findall(r"\w+", search.lower())[:MAX_QUERY_TERMS]
+
+
+def build_tsquery(terms: List[str]) -> str:
+    """Build a prefix-matching tsquery string: 'роз:* & крас:*'"""
+    return " & ".join(f"{term}:*" for term in terms)
+
+
+def build_fts5_match(terms: List[str]) -> str:
+    """Build a prefix-matching FTS5 MATCH string: '"роз"* "крас"*'"""
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+class ProductSearchService:
+    """
+    Full-text search over products.
+
+    Index maintenance methods never commit; callers own the transaction.
+    """
+
+    # PostgreSQL structures available in this process, recorded by ensure_schema
+    has_vector = True
+    has_trigram = True
+
+    @staticmethod
+    def _dialect(session: AsyncSession) -> str:
+        return session.get_bind().dialect.name
+
+    # ===== Schema =====
+
+    @staticmethod
+    async def ensure_schema(engine) -> None:
+        """
+        Create search structures on an existing database and backfill them.
+
+        Idempotent; safe to run on every startup. On PostgreSQL the tsvector
+        column and the pg_trgm structures are created in separate
+        transactions, and has_vector / has_trigram record which of them
+        exist, so a failed CREATE EXTENSION does not break product writes.
+
+        Args:
+            engine: Async engine
+        """
+        if engine.dialect.name == "postgresql":
+            try:
+                async with engine.begin() as conn:
+                    for statement in POSTGRES_VECTOR_DDL:
+                        await conn.execute(text(statement))
+                    await conn.execute(text(
+                        f"UPDATE product SET search_vector = {_PG_DOCUMENT_SQL} WHERE search_vector IS NULL"
+                    ))
+                ProductSearchService.has_vector = True
+            except Exception as e:
+                ProductSearchService.has_vector = False
+                logger.warning("product_search_vector_unavailable", error=str(e))
+
+            try:
+                async with engine.begin() as conn:
+                    for statement in POSTGRES_TRIGRAM_DDL:
+                        await conn.execute(text(statement))
+                ProductSearchService.has_trigram = True
+            except Exception as e:
+                ProductSearchService.has_trigram = False
+                logger.warning("product_search_trigram_unavailable", error=str(e))
+
+        elif engine.dialect.name == "sqlite":
+            async with engine.begin() as conn:
+                for statement in SQLITE_SEARCH_DDL:
+                    await conn.execute(text(statement))
+                await conn.execute(text(
+                    "INSERT INTO product_fts (rowid, name, tags, description) "
+                    "SELECT id, name, coalesce(tags, ''), coalesce(description, '') FROM product "
+                    "WHERE id NOT IN (SELECT rowid FROM product_fts)"
+                ))
+
+    # ===== Index maintenance =====
+
+    @staticmethod
+    async def index_product(session: AsyncSession, product: Product) -> None:
+        """
+        (Re)index a product after it was created or updated.
+
+        The product must already be flushed.
+
+        Args:
+            session: Database session
+            product: Product instance
+        """
+        dialect = ProductSearchService._dialect(session)
+        if dialect == "postgresql":
+            if not ProductSearchService.has_vector:
+                return
+            await session.execute(
+                text(f"UPDATE product SET search_vector = {_PG_DOCUMENT_SQL} WHERE id = :id"),
+                {"id": product.id}
+            )
+        elif dialect == "sqlite":
+            await session.execute(text("DELETE FROM product_fts WHERE rowid = :id"), {"id": product.id})
+            await session.execute(
+                text("INSERT INTO product_fts (rowid, name, tags, description) VALUES (:id, :name, :tags, :description)"),
+                {
+                    "id": product.id,
+                    "name": product.name or "",
+                    "tags": " ".join(product.tags or []),
+                    "description": product.description or "",
+                }
+            )
+
+    @staticmethod
+    async def index_products(session: AsyncSession, rows: List[Dict[str, Any]]) -> None:
+        """
+        (Re)index many products at once (bulk upserts).
+
+        Args:
+            session: Database session
+            rows: Dicts with id, name, tags and description of flushed products
+        """
+        if not rows:
+            return
+        dialect = ProductSearchService._dialect(session)
+        product_ids = [row["id"] for row in rows]
+        if dialect == "postgresql":
+            if not ProductSearchService.has_vector:
+                return
+            await session.execute(
+                text(f"UPDATE product SET search_vector = {_PG_DOCUMENT_SQL} WHERE id = ANY(:ids)"),
+                {"ids": product_ids}
+            )
+        elif dialect == "sqlite":
+            await session.execute(
+                text("DELETE FROM product_fts WHERE rowid IN :ids").bindparams(bindparam("ids", expanding=True)),
+                {"ids": product_ids}
+            )
+            await session.execute(
+                text("INSERT INTO product_fts (rowid, name, tags, description) VALUES (:id, :name, :tags, :description)"),
+                [
+                    {
+                        "id": row["id"],
+                        "name": row.get("name") or "",
+                        "tags": " ".join(row.get("tags") or []),
+                        "description": row.get("description") or "",
+                    }
+                    for row in rows
+                ]
+            )
+
+    @staticmethod
+    async def remove_product(session: AsyncSession, product_id: int) -> None:
+        """
+        Drop a deleted product from the index.
+
+        PostgreSQL needs nothing here - the vector lives on the product row.
+        """
+        if ProductSearchService._dialect(session) == "sqlite":
+            await session.execute(text("DELETE FROM product_fts WHERE rowid = :id"), {"id": product_id})
+
+    # ===== Queries =====
+
+    @staticmethod
+    def apply_search(query: Select, search: str, dialect: str) -> Select:
+        """
+        Restrict a Product select to search matches, ordered by relevance.
+
+        Args:
+            query: select(Product) statement (other filters may already be applied)
+            search: Raw search string
+            dialect: Database dialect name
+
+        Returns:
+            Statement with match condition and relevance ordering
+        """
+        terms = tokenize_query(search)
+        if not terms:
+            return query
+
+        if dialect == "postgresql" and ProductSearchService.has_vector:
+            vector = literal_column("product.search_vector")
+            tsquery = bindparam("search_tsquery", build_tsquery(terms))
+            ts_query = func.to_tsquery(literal_column("'russian'"), tsquery).op("||")(
+                func.to_tsquery(literal_column("'simple'"), tsquery)
+            )
+            if not ProductSearchService.has_trigram:
+                # No pg_trgm: substring match on the name instead of typo tolerance
+                return (
+                    query
+                    .where(or_(vector.op("@@")(ts_query), Product.name.ilike(f"%{search}%")))
+                    .order_by(func.ts_rank_cd(vector, ts_query).desc(), Product.id)
+                )
+
+            phrase = bindparam("search_phrase", " ".join(terms))
+            lowered_name = func.lower(Product.name)
+            return (
+                query
+                .where(or_(
+                    vector.op("@@")(ts_query),
+                    phrase.op("<%")(lowered_name)  # pg_trgm word similarity: typo tolerance
+                ))
+                .order_by(
+                    func.ts_rank_cd(vector, ts_query).desc(),
+                    func.word_similarity(phrase, lowered_name).desc(),
+                    Product.id
+                )
+            )
+
+        if dialect == "sqlite":
+            matches = (
+                select(
+                    literal_column("rowid").label("product_id"),
+                    literal_column("bm25(product_fts, 10.0, 5.0, 1.0)").label("rank")
+                )
+                .select_from(text("product_fts"))
+                .where(text("product_fts MATCH :search_match").bindparams(
+                    search_match=build_fts5_match(terms)
+                ))
+                .subquery("search_matches")
+            )
+            return (
+                query
+                .join(matches, matches.c.product_id == Product.id)
+                .order_by(matches.c.rank, Product.id)  # bm25: lower is better
+            )
+
+        # Unknown backend, or PostgreSQL without search_vector: unranked substring match
+        return query.where(Product.name.ilike(f"%{search}%"))
+
+    @staticmethod
+    async def suggest_names(
+        session: AsyncSession,
+        search: str,
+        shop_id: Optional[int] = None,
+        limit: int = 5
+    ) -> List[str]:
+        """
+        Relevance-ranked product name suggestions for autocomplete.
+
+        Args:
+            session: Database session
+            search: Partial query typed by the user
+            shop_id: Filter by shop_id for multi-tenancy
+            limit: Maximum number of suggestions
+
+        Returns:
+            List of product names, best match first
+        """
+        query = select(Product.name).where(Product.enabled == True)
+        if shop_id is not None:
+            query = query.where(Product.shop_id == shop_id)
+
+        query = ProductSearchService.apply_search(query, search, ProductSearchService._dialect(session))
+
+        result = await session.execute(query.limit(limit))
+        return list(result.scalars().all())
@@ -5,13 +5,30 @@ Provides clean interfaces for product CRUD operations with proper
 transaction discipline (no commits without explicit flag).
 """
 
-from typing import Optional, List
+import hashlib
+import json
+from typing import Any, Dict, Optional, List, Tuple
+from sqlalchemy import delete, func, insert
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
 from fastapi import HTTPException
 
 from models import (
-    Product, ProductCreate, ProductUpdate, ProductImage, ProductImageCreate
+    Product, ProductBase, ProductCreate, ProductUpdate, ProductImage, ProductImageCreate,
+    ProductBulkUpsertItem, ProductBulkUpsertResult, ProductTag, ProductCity
 )
+from models.catalog import SCOPE_CATALOG, bump_resource_version
+from models.products import normalize_filter_values
+from services.catalog_facet_service import CatalogFacetService
+from services.product_search_service import ProductSearchService
+from core.cache import product_detail_cache
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Product columns written by bulk upserts (and covered by the content hash)
+UPSERT_COLUMNS = tuple(ProductBase.model_fields)
 
 
 class ProductService:
@@ -52,12 +69,15 @@ class ProductService:
 
         # Add to session
         session.add(product)
+        await session.flush()
+
+        # Keep storefront facet and search indexes in sync (same transaction)
+        await CatalogFacetService.apply_change(session, None, CatalogFacetService.snapshot(product))
+        await ProductSearchService.index_product(session, product)
 
         if commit:
             await session.commit()
             await session.refresh(product)
-        else:
-            await session.flush()
 
         return product
 
@@ -94,16 +114,22 @@ class ProductService:
         if product.shop_id != shop_id:
             raise HTTPException(status_code=403, detail="Product does not belong to your shop")
 
+        facets_before = CatalogFacetService.snapshot(product)
+
         # Update fields that were provided
         product_data = product_in.model_dump(exclude_unset=True)
         for field, value in product_data.items():
             setattr(product, field, value)
 
+        await session.flush()
+        await CatalogFacetService.apply_change(session, facets_before, CatalogFacetService.snapshot(product))
+        await ProductSearchService.index_product(session, product)
+        # Name/price also appear in other products' bundle lists
+        product_detail_cache.clear_on_commit(session)
+
         if commit:
             await session.commit()
             await session.refresh(product)
-        else:
-            await session.flush()
 
         return product
 
@@ -140,14 +166,18 @@ class ProductService:
         if product.shop_id != shop_id:
             raise HTTPException(status_code=403, detail="Product does not belong to your shop")
 
+        facets_before = CatalogFacetService.snapshot(product)
+
         # Update enabled status
         product.enabled = enabled
 
+        await session.flush()
+        await CatalogFacetService.apply_change(session, facets_before, CatalogFacetService.snapshot(product))
+        product_detail_cache.clear_on_commit(session)
+
         if commit:
             await session.commit()
             await session.refresh(product)
-        else:
-            await session.flush()
 
         return product
 
@@ -177,14 +207,220 @@ class ProductService:
         for product_id in product_ids:
             product = await session.get(Product, product_id)
             if product and product.shop_id == shop_id:
+                facets_before = CatalogFacetService.snapshot(product)
                 product.enabled = enabled
+                await session.flush()
+                await CatalogFacetService.apply_change(session, facets_before, CatalogFacetService.snapshot(product))
                 updated_count += 1
 
+        if updated_count:
+            product_detail_cache.clear_on_commit(session)
+
         if commit:
             await session.commit()
 
         return updated_count
 
+    @staticmethod
+    def content_hash(data: Dict[str, Any], images: Optional[List[str]]) -> str:
+        """
+        Hash of a product's synced content (ProductBase fields and images).
+
+        Args:
+            data: Product field values
+            images: Gallery image URLs, or None when images are not synced
+
+        Returns:
+            Hex SHA-256 digest
+        """
+        payload = {field: data.get(field) for field in UPSERT_COLUMNS}
+        payload["images"] = images
+        encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(encoded.encode()).hexdigest()
+
+    @staticmethod
+    async def bulk_upsert_products(
+        session: AsyncSession,
+        items: List[ProductBulkUpsertItem],
+        shop_id: int,
+        create_missing_ids: bool = False,
+        commit: bool = False
+    ) -> ProductBulkUpsertResult:
+        """
+        Create or update many products with set-based statements.
+
+        Rows whose content hash matches the stored one are skipped entirely.
+        Changed rows are written with one multi-row INSERT ... ON CONFLICT;
+        images, tag/city links, the search index, facets and the catalog
+        version are then maintained in batches instead of per product.
+
+        Args:
+            session: Database session
+            items: Products to upsert; items with an id update that product
+            shop_id: Shop ID for multi-tenancy verification
+            create_missing_ids: Insert items whose id does not exist yet
+                (external catalogs keyed by their own IDs, e.g. Bitrix)
+            commit: Whether to commit the transaction
+
+        Returns:
+            ProductBulkUpsertResult with created/updated/unchanged IDs and
+            the products whose main image changed
+
+        Raises:
+            HTTPException: If ids repeat, are missing or belong to another shop
+        """
+        result = ProductBulkUpsertResult()
+        if not items:
+            return result
+
+        rows = []
+        for item in items:
+            data = item.model_dump(include=set(UPSERT_COLUMNS))
+            data["shop_id"] = shop_id
+            data["content_hash"] = ProductService.content_hash(data, item.images)
+            rows.append((item.id, data, item.images))
+
+        ids = [product_id for product_id, _, _ in rows if product_id is not None]
+        if len(ids) != len(set(ids)):
+            raise HTTPException(status_code=400, detail="Duplicate product ids in bulk upsert")
+
+        existing = {}
+        if ids:
+            found = await session.execute(
+                select(Product.id, Product.shop_id, Product.content_hash, Product.image)
+                .where(Product.id.in_(ids))
+            )
+            existing = {row.id: row for row in found.all()}
+
+        foreign = sorted(pid for pid, row in existing.items() if row.shop_id != shop_id)
+        if foreign:
+            raise HTTPException(status_code=403, detail=f"Products do not belong to your shop: {foreign}")
+        missing = sorted(pid for pid in ids if pid not in existing)
+        if missing and not create_missing_ids:
+            raise HTTPException(status_code=404, detail=f"Products not found: {missing}")
+
+        table = Product.__table__
+        keyed, unkeyed, changed = [], [], []
+        for product_id, data, images in rows:
+            current = existing.get(product_id)
+            if current is not None and current.content_hash == data["content_hash"]:
+                result.unchanged.append(product_id)
+                continue
+            if product_id is None:
+                unkeyed.append((data, images))
+            else:
+                keyed.append({**data, "id": product_id})
+                changed.append((product_id, data, images))
+                (result.updated if current is not None else result.created).append(product_id)
+
+        if keyed:
+            dialect_insert = postgresql.insert if session.get_bind().dialect.name == "postgresql" else sqlite.insert
+            statement = dialect_insert(table)
+            await session.execute(
+                statement.on_conflict_do_update(
+                    index_elements=[table.c.id],
+                    set_={
+                        **{column: statement.excluded[column] for column in (*UPSERT_COLUMNS, "content_hash")},
+                        "updated_at": func.now()
+                    },
+                    where=table.c.shop_id == statement.excluded.shop_id
+                ),
+                keyed
+            )
+
+        if unkeyed:
+            inserted = await session.execute(
+                insert(table).returning(table.c.id, sort_by_parameter_order=True),
+                [data for data, _ in unkeyed]
+            )
+            for product_id, (data, images) in zip(inserted.scalars().all(), unkeyed):
+                changed.append((product_id, data, images))
+                result.created.append(product_id)
+
+        if not changed:
+            return result
+
+        await ProductService._replace_images(session, [(pid, images) for pid, _, images in changed if images is not None])
+        await ProductService._replace_links(session, changed)
+        await ProductSearchService.index_products(session, [{**data, "id": pid} for pid, data, _ in changed])
+        await CatalogFacetService.rebuild_shop(session, shop_id)
+        # Core statements bypass the mapper events that bump the catalog version
+        await session.run_sync(lambda sync_session: bump_resource_version(
+            sync_session.connection(), SCOPE_CATALOG, shop_id
+        ))
+        product_detail_cache.clear_on_commit(session)
+
+        result.image_changed = [
+            pid for pid, data, _ in changed
+            if data["image"] and (pid not in existing or existing[pid].image != data["image"])
+        ]
+
+        logger.info(
+            "products_bulk_upserted",
+            shop_id=shop_id,
+            created=len(result.created),
+            updated=len(result.updated),
+            unchanged=len(result.unchanged),
+            image_changed=len(result.image_changed)
+        )
+
+        if commit:
+            await session.commit()
+
+        return result
+
+    @staticmethod
+    async def _replace_images(session: AsyncSession, galleries: List[Tuple[int, List[str]]]) -> None:
+        """Rewrite the galleries that differ from the stored image URLs"""
+        if not galleries:
+            return
+
+        found = await session.execute(
+            select(ProductImage.product_id, ProductImage.url)
+            .where(ProductImage.product_id.in_([product_id for product_id, _ in galleries]))
+            .order_by(ProductImage.product_id, ProductImage.order)
+        )
+        current: Dict[int, List[str]] = {}
+        for product_id, url in found.all():
+            current.setdefault(product_id, []).append(url)
+
+        stale = [(product_id, urls) for product_id, urls in galleries if current.get(product_id, []) != urls]
+        if not stale:
+            return
+
+        await session.execute(
+            delete(ProductImage).where(ProductImage.product_id.in_([product_id for product_id, _ in stale]))
+        )
+        image_rows = [
+            {"product_id": product_id, "url": url, "order": index, "is_primary": index == 0}
+            for product_id, urls in stale
+            for index, url in enumerate(urls)
+        ]
+        if image_rows:
+            await session.execute(insert(ProductImage), image_rows)
+
+    @staticmethod
+    async def _replace_links(session: AsyncSession, changed: List[Tuple[int, Dict[str, Any], Any]]) -> None:
+        """Rewrite product_tag / product_city rows of the upserted products"""
+        product_ids = [product_id for product_id, _, _ in changed]
+        await session.execute(delete(ProductTag).where(ProductTag.product_id.in_(product_ids)))
+        await session.execute(delete(ProductCity).where(ProductCity.product_id.in_(product_ids)))
+
+        tag_links = [
+            {"product_id": product_id, "tag": tag}
+            for product_id, data, _ in changed
+            for tag in normalize_filter_values(data.get("tags"))
+        ]
+        city_links = [
+            {"product_id": product_id, "city": city}
+            for product_id, data, _ in changed
+            for city in normalize_filter_values(data.get("cities"))
+        ]
+        if tag_links:
+            await session.execute(insert(ProductTag), tag_links)
+        if city_links:
+            await session.execute(insert(ProductCity), city_links)
+
     @staticmethod
     async def delete_product(
         session: AsyncSession,
@@ -213,8 +449,14 @@ class ProductService:
         if product.shop_id != shop_id:
             raise HTTPException(status_code=403, detail="Product does not belong to your shop")
 
+        facets_before = CatalogFacetService.snapshot(product)
+
         # Delete product
         await session.delete(product)
+        await session.flush()
+        await CatalogFacetService.apply_change(session, facets_before, None)
+        await ProductSearchService.remove_product(session, product_id)
+        product_detail_cache.clear_on_commit(session)
 
         if commit:
             await session.commit()
@@ -256,6 +498,7 @@ class ProductService:
         # Create image record
         image = ProductImage.model_validate(image_in)
         session.add(image)
+        product_detail_cache.invalidate_on_commit(session, product_id)
 
         if commit:
             await session.commit()
@@ -296,6 +539,7 @@ class ProductService:
             raise HTTPException(status_code=403, detail="Image does not belong to your shop")
 
         await session.delete(image)
+        product_detail_cache.invalidate_on_commit(session, product_id)
 
         if commit:
             await session.commit()
@@ -0,0 +1,172 @@
+"""
+Product Snapshot Service - Pre-serialized ProductRead JSON per product version
+
+Validating ORM products through ProductRead (plus the colors_detailed
+enrichment) dominates the cost of product list responses. A snapshot is the
+ProductRead JSON of one product, cached under a version key built from the
+row's own column values and its images, so:
+
+- an unchanged product is never re-validated; its bytes are spliced into
+  list and detail responses as-is
+- any write (through any path or worker) changes the version key, so a
+  stale snapshot is never served and no invalidation hooks are needed
+
+Live stock fields (in_stock, max_quantity) are not part of a snapshot; list
+responses splice them in per request from services.availability_engine.
+"""
+
+from operator import attrgetter, itemgetter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from fastapi import Response
+
+from core.cache import product_snapshot_cache
+from core.serialization import RawJSONResponse, json_array
+from models import Product, ProductImage, ProductRead
+
+# Per-request fields, added to snapshots by with_stock()
+LIVE_STOCK_FIELDS = frozenset({"in_stock", "max_quantity"})
+
+# Columns serialized into ProductRead (everything except derived/nested fields)
+PRODUCT_READ_COLUMNS: Tuple[str, ...] = tuple(
+    name for name in ProductRead.model_fields
+    if name not in ("images", "colors_detailed") and name not in LIVE_STOCK_FIELDS
+)
+IMAGE_VERSION_COLUMNS: Tuple[str, ...] = ("id", "url", "order", "is_primary", "created_at")
+
+# Version keys read loaded values straight from the instance state: going
+# through the instrumented attributes costs more than the cache saves
+_product_state_columns = itemgetter(*PRODUCT_READ_COLUMNS)
+_product_columns = attrgetter(*PRODUCT_READ_COLUMNS)
+_image_state_columns = itemgetter(*IMAGE_VERSION_COLUMNS)
+_image_columns = attrgetter(*IMAGE_VERSION_COLUMNS)
+
+
+class ProductSnapshotService:
+    """Build, cache and splice product JSON snapshots"""
+
+    @staticmethod
+    def version_key(product: Product, images: Sequence[ProductImage]) -> tuple:
+        """
+        Version of a product's serialized form.
+
+        Args:
+            product: Product instance
+            images: The product's images
+
+        Returns:
+            Tuple that changes whenever the ProductRead JSON would change
+        """
+        try:
+            columns = _product_state_columns(product.__dict__)
+            image_columns = tuple(_image_state_columns(image.__dict__) for image in images)
+        except KeyError:
+            # Expired or deferred attribute: let the ORM load it
+            columns = _product_columns(product)
+            image_columns = tuple(_image_columns(image) for image in images)
+        return columns, image_columns
+
+    @staticmethod
+    def build_read(product: Product, images: Optional[Sequence[ProductImage]] = None) -> ProductRead:
+        """
+        Validate a product into ProductRead without touching lazy relationships.
+
+        Args:
+            product: Product instance
+            images: The product's images (default: product.images, which must
+                be eagerly loaded)
+
+        Returns:
+            ProductRead instance
+        """
+        data = {name: getattr(product, name) for name in PRODUCT_READ_COLUMNS}
+        data["images"] = list(product.images if images is None else images)
+        return ProductRead.model_validate(data)
+
+    @staticmethod
+    def snapshot(product: Product, images: Optional[Sequence[ProductImage]] = None) -> bytes:
+        """
+        ProductRead JSON for a product, served from cache when unchanged.
+
+        Args:
+            product: Product instance
+            images: The product's images (default: product.images, which must
+                be eagerly loaded)
+
+        Returns:
+            JSON object as bytes
+        """
+        if images is None:
+            images = product.images
+        version = ProductSnapshotService.version_key(product, images)
+
+        cached = product_snapshot_cache.get(product.id)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        data = ProductRead.__pydantic_serializer__.to_json(
+            ProductSnapshotService.build_read(product, images), exclude=LIVE_STOCK_FIELDS
+        )
+        product_snapshot_cache.set(product.id, (version, data))
+        return data
+
+    @staticmethod
+    def with_stock(snapshot: bytes, max_quantity: int) -> bytes:
+        """Append in_stock and max_quantity to a snapshot JSON object"""
+        in_stock = b"true" if max_quantity > 0 else b"false"
+        return b"%s,\"in_stock\":%s,\"max_quantity\":%d}" % (snapshot[:-1], in_stock, max_quantity)
+
+    @staticmethod
+    def render_list(products: Iterable[Product], stock: Optional[Dict[int, int]] = None) -> bytes:
+        """
+        JSON array of product snapshots (images must be eagerly loaded).
+
+        Args:
+            products: Products with images eagerly loaded
+            stock: max_quantity per product id; adds the live stock fields
+        """
+        if stock is None:
+            return json_array(ProductSnapshotService.snapshot(product) for product in products)
+        return json_array(
+            ProductSnapshotService.with_stock(ProductSnapshotService.snapshot(product), stock[product.id])
+            for product in products
+        )
+
+    @staticmethod
+    def list_response(
+        products: Iterable[Product],
+        response: Optional[Response] = None,
+        stock: Optional[Dict[int, int]] = None
+    ) -> RawJSONResponse:
+        """
+        List[ProductRead] response spliced from snapshots.
+
+        Args:
+            products: Products with images eagerly loaded
+            response: The endpoint's injected Response, whose headers are kept
+            stock: max_quantity per product id (AvailabilityEngine.get_max_quantities)
+                to fill in_stock and max_quantity
+
+        Returns:
+            RawJSONResponse
+        """
+        return RawJSONResponse(ProductSnapshotService.render_list(products, stock), sub_response=response)
+
+    @staticmethod
+    def item_response(
+        product: Product,
+        images: Optional[List[ProductImage]] = None,
+        response: Optional[Response] = None
+    ) -> RawJSONResponse:
+        """
+        ProductRead response from a product snapshot.
+
+        Args:
+            product: Product instance
+            images: The product's images (default: eagerly loaded product.images)
+            response: The endpoint's injected Response, whose headers are kept
+
+        Returns:
+            RawJSONResponse
+        """
+        return RawJSONResponse(ProductSnapshotService.snapshot(product, images), sub_response=response)
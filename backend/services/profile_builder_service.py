@@ -13,6 +13,7 @@ from sqlalchemy.exc import IntegrityError
 from sqlmodel import select, func
 
 from models import Order, Client, ClientProfile, OrderStatus
+from utils import phone_search_key
 
 
 class ProfileBuilderService:
@@ -157,7 +158,7 @@ class ProfileBuilderService:
             func.max(Order.total).label("max"),
             func.count(Order.id).label("count")
         ).where(
-            Order.phone == client.phone,
+            Order.phone_normalized == phone_search_key(client.phone),
             Order.shop_id == shop_id,
             Order.status == OrderStatus.DELIVERED
         )
@@ -212,7 +213,7 @@ class ProfileBuilderService:
             Order.delivery_address,
             func.count(Order.id).label("count")
         ).where(
-            Order.phone == client.phone,
+            Order.phone_normalized == phone_search_key(client.phone),
             Order.shop_id == shop_id,
             Order.status == OrderStatus.DELIVERED,
             Order.recipient_name.isnot(None),
@@ -0,0 +1,57 @@
+"""
+Resource Version Service - Change tokens for conditional HTTP responses
+
+Reads the ResourceVersion counters maintained by mapper events in
+models.catalog. A token changes whenever anything in its scope is written,
+so it can stand in for the response body when computing an ETag.
+
+SCOPE_STOCK has no counter row: its token is a digest of the live stock
+values served by the AvailabilityEngine.
+"""
+
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func
+from sqlmodel import select
+
+from models import ResourceVersion
+from models.catalog import SCOPE_CATALOG, SCOPE_STOCK
+from services.availability_engine import AvailabilityEngine
+
+# Scopes whose counters are kept per shop
+SHOP_SCOPED = {SCOPE_CATALOG}
+
+
+class ResourceVersionService:
+    """Version token lookups (one indexed read per scope)"""
+
+    @staticmethod
+    async def get_token(
+        session: AsyncSession,
+        scope: str,
+        shop_id: Optional[int] = None
+    ) -> str:
+        """
+        Current change token for a scope.
+
+        Args:
+            session: Database session
+            scope: Version scope (SCOPE_CATALOG, SCOPE_SHOPS, SCOPE_FAQS, SCOPE_STOCK)
+            shop_id: Shop for per-shop scopes; None aggregates over all shops
+
+        Returns:
+            Opaque token that changes on every write in the scope
+        """
+        if scope == SCOPE_STOCK:
+            return f"{scope}:{await AvailabilityEngine.version_token(session, shop_id)}"
+
+        query = select(
+            func.count(ResourceVersion.id),
+            func.coalesce(func.sum(ResourceVersion.version), 0)
+        ).where(ResourceVersion.scope == scope)
+
+        if scope in SHOP_SCOPED and shop_id is not None:
+            query = query.where(ResourceVersion.shop_id == shop_id)
+
+        rows, total = (await session.execute(query)).one()
+        return f"{scope}:{rows}.{total}"
@@ -0,0 +1,168 @@
+"""
+Shop Rating Service - Company review rollup for the shop directory
+
+Maintains ShopRatingStats (review count and average rating per shop) so the
+public shop listing reads ratings with one join instead of aggregating
+CompanyReview once per shop, and can sort by rating from an index.
+
+Review write paths call record_review() before committing; rebuild_all()
+recomputes the rollup from the review table (first deploy, seeds).
+"""
+
+from typing import List, Literal, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, delete
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import select
+
+from models import CompanyReview, Shop, ShopRatingStats
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+ShopSort = Literal["newest", "rating"]
+
+
+class ShopRatingService:
+    """
+    Rating rollup maintenance and shop directory queries.
+
+    Mutating methods never commit; callers own the transaction.
+    """
+
+    # ===== Maintenance =====
+
+    @staticmethod
+    async def record_review(session: AsyncSession, shop_id: int, rating: int) -> None:
+        """
+        Count a new company review (atomic upsert, safe under concurrent posts).
+
+        Args:
+            session: Database session
+            shop_id: Reviewed shop
+            rating: Review rating (1-5)
+        """
+        table = ShopRatingStats.__table__
+        dialect_insert = postgresql.insert if session.get_bind().dialect.name == "postgresql" else sqlite.insert
+        statement = dialect_insert(table).values(
+            shop_id=shop_id, review_count=1, rating_sum=rating, rating_avg=float(rating)
+        )
+        await session.execute(statement.on_conflict_do_update(
+            index_elements=[table.c.shop_id],
+            set_={
+                "review_count": table.c.review_count + 1,
+                "rating_sum": table.c.rating_sum + rating,
+                "rating_avg": (table.c.rating_sum + rating) * 1.0 / (table.c.review_count + 1),
+                "updated_at": func.now(),
+            }
+        ))
+
+    @staticmethod
+    async def rebuild_all(session: AsyncSession) -> int:
+        """
+        Recompute the rollup for every shop from the review table.
+
+        Returns:
+            Number of shops with reviews
+        """
+        result = await session.execute(
+            select(CompanyReview.shop_id, func.count(CompanyReview.id), func.sum(CompanyReview.rating))
+            .group_by(CompanyReview.shop_id)
+        )
+        rows = result.all()
+
+        await session.execute(delete(ShopRatingStats))
+        for shop_id, review_count, rating_sum in rows:
+            session.add(ShopRatingStats(
+                shop_id=shop_id,
+                review_count=review_count,
+                rating_sum=rating_sum,
+                rating_avg=rating_sum / review_count
+            ))
+        await session.flush()
+
+        logger.info("shop_rating_stats_rebuilt", shops=len(rows))
+        return len(rows)
+
+    # ===== Queries =====
+
+    @staticmethod
+    async def get_rating(session: AsyncSession, shop_id: int) -> Tuple[Optional[float], int]:
+        """
+        Rating of one shop.
+
+        Returns:
+            (average_rating, review_count); (None, 0) without reviews
+        """
+        result = await session.execute(
+            select(ShopRatingStats.rating_avg, ShopRatingStats.review_count)
+            .where(ShopRatingStats.shop_id == shop_id)
+        )
+        row = result.first()
+        return (row.rating_avg, row.review_count) if row else (None, 0)
+
+    @staticmethod
+    async def list_shops(
+        session: AsyncSession,
+        city: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 20,
+        sort: ShopSort = "newest"
+    ) -> List[Tuple[Shop, Optional[float], int]]:
+        """
+        Active shops with their ratings in one query per ordering.
+
+        With sort="rating", rated shops come first in index order (best
+        rating, then most reviews); unrated shops fill the remaining slots,
+        newest first.
+
+        Args:
+            session: Database session
+            city: Filter by city
+            skip: Number of shops to skip
+            limit: Maximum number of shops
+            sort: "newest" or "rating"
+
+        Returns:
+            List of (shop, average_rating, review_count)
+        """
+        active = [Shop.is_active == True]
+        if city:
+            active.append(Shop.city == city)
+
+        if sort == "newest":
+            result = await session.execute(
+                select(Shop, ShopRatingStats.rating_avg, ShopRatingStats.review_count)
+                .outerjoin(ShopRatingStats, ShopRatingStats.shop_id == Shop.id)
+                .where(*active)
+                .order_by(Shop.created_at.desc(), Shop.id.desc())
+                .offset(skip).limit(limit)
+            )
+            return [(shop, rating, review_count or 0) for shop, rating, review_count in result.all()]
+
+        result = await session.execute(
+            select(Shop, ShopRatingStats.rating_avg, ShopRatingStats.review_count)
+            .join(ShopRatingStats, ShopRatingStats.shop_id == Shop.id)
+            .where(*active)
+            .order_by(ShopRatingStats.rating_avg.desc(), ShopRatingStats.review_count.desc(), Shop.id.desc())
+            .offset(skip).limit(limit)
+        )
+        shops: List[Tuple[Shop, Optional[float], int]] = [tuple(row) for row in result.all()]
+
+        if len(shops) < limit:
+            # Offset into the unrated shops: skip minus the rated shops before them
+            rated_total = (await session.execute(
+                select(func.count()).select_from(ShopRatingStats)
+                .join(Shop, ShopRatingStats.shop_id == Shop.id)
+                .where(*active)
+            )).scalar()
+            unrated = await session.execute(
+                select(Shop)
+                .outerjoin(ShopRatingStats, ShopRatingStats.shop_id == Shop.id)
+                .where(*active, ShopRatingStats.id.is_(None))
+                .order_by(Shop.created_at.desc(), Shop.id.desc())
+                .offset(max(skip - rated_total, 0)).limit(limit - len(shops))
+            )
+            shops.extend((shop, None, 0) for shop in unrated.scalars().all())
+
+        return shops
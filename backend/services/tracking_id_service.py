@@ -0,0 +1,163 @@
+"""
+Tracking ID Service - Public tracking IDs from a keyed permutation
+
+A tracking ID is the next value of a monotonic sequence (block-allocated
+like order numbers, OrderNumberAllocator with TRACKING_SCOPE) passed through
+a keyed permutation of the 9-digit numbers. Different sequence values give
+different IDs, so no uniqueness probe is needed, and without the key the
+next ID cannot be derived from earlier ones.
+
+The permutation is a 10-round Feistel network over Z_m x Z_m (m*m >= 10^9)
+with cycle walking back into [0, 10^9). The rounds use a keyed 64-bit
+mixer, vectorized with NumPy. This keeps IDs unguessable for customers; it
+is not meant to protect secrets.
+
+The key is drawn once when the sequence row is created and stored next to
+it (tracking_id_sequence). Changing it would break uniqueness.
+
+IDs handed out before this scheme were random; each freshly reserved block
+drops the few values whose IDs already exist (one query per block).
+"""
+
+import hashlib
+from math import isqrt
+from typing import List, Optional, Set
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from models import Order, TrackingIdSequence
+from core.session_hooks import TransactionState
+from services.order_number_allocator import TRACKING_SCOPE, OrderNumberAllocator
+
+TRACKING_ID_DIGITS = 9
+
+# Sequence values reserved per counter bump
+TRACKING_ID_BLOCK_SIZE = 100
+
+FEISTEL_ROUNDS = 10
+
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+class TrackingIdPermutation:
+    """Keyed permutation of [0, 10^digits)"""
+
+    def __init__(self, key: bytes, digits: int = TRACKING_ID_DIGITS, rounds: int = FEISTEL_ROUNDS):
+        self.digits = digits
+        self.domain = 10 ** digits
+        # Halves of the Feistel network: half * half >= domain
+        self.half = isqrt(self.domain - 1) + 1
+        self.round_keys = [
+            np.uint64(int.from_bytes(
+                hashlib.blake2b(bytes([round_index]), key=key, digest_size=8, person=b"tracking-id").digest(),
+                "little"
+            ))
+            for round_index in range(rounds)
+        ]
+
+    def permute(self, values: np.ndarray) -> np.ndarray:
+        """Permuted values of an array of integers in [0, domain)"""
+        values = np.asarray(values, dtype=np.uint64)
+        result = self._feistel(values)
+        # Cycle walking: values of the Feistel square outside the domain go round again
+        outside = result >= self.domain
+        while outside.any():
+            result[outside] = self._feistel(result[outside])
+            outside = result >= self.domain
+        return result
+
+    def format(self, value: int) -> str:
+        """Zero-padded tracking ID of a sequence value"""
+        return self.format_many([value])[0]
+
+    def format_many(self, values) -> List[str]:
+        """Zero-padded tracking IDs of sequence values"""
+        return [f"{permuted:0{self.digits}d}" for permuted in self.permute(values).tolist()]
+
+    def _feistel(self, values: np.ndarray) -> np.ndarray:
+        half = np.uint64(self.half)
+        left, right = values // half, values % half
+        for round_key in self.round_keys:
+            left, right = right, (left + self._mix(right, round_key) % half) % half
+        return left * half + right
+
+    @staticmethod
+    def _mix(values: np.ndarray, round_key: np.uint64) -> np.ndarray:
+        """splitmix64 finalizer of value + round key (wraps modulo 2^64)"""
+        mixed = (values + round_key) * _GOLDEN
+        mixed = (mixed ^ (mixed >> np.uint64(30))) * _MIX_1
+        mixed = (mixed ^ (mixed >> np.uint64(27))) * _MIX_2
+        return mixed ^ (mixed >> np.uint64(31))
+
+
+# Permutation of the committed key, once read
+_permutation: Optional[TrackingIdPermutation] = None
+
+
+class TrackingIdService:
+    """Tracking ID handout; never commits"""
+
+    @staticmethod
+    async def next_tracking_id(session: AsyncSession) -> str:
+        """
+        Next public tracking ID, unique by construction.
+
+        Args:
+            session: Database session (the order's transaction)
+
+        Returns:
+            9-digit string (e.g., "847562910")
+        """
+        value = await OrderNumberAllocator.next_value(
+            session, TRACKING_SCOPE, TRACKING_ID_BLOCK_SIZE, TrackingIdService._taken_by_legacy_ids
+        )
+        permutation = await TrackingIdService._get_permutation(session)
+        return permutation.format(value)
+
+    @staticmethod
+    def clear() -> None:
+        """Forget the cached key (tests recreate the database)"""
+        global _permutation
+        _permutation = None
+
+    # ===== Internals =====
+
+    @staticmethod
+    async def _get_permutation(session: AsyncSession) -> TrackingIdPermutation:
+        """Permutation of the stored key; a key created in this transaction is cached once it commits"""
+        if _permutation is not None:
+            return _permutation
+        permutation = _pending.peek(session.sync_session)
+        if permutation is None:
+            key = (await session.execute(select(TrackingIdSequence.key).where(TrackingIdSequence.id == 1))).scalar_one()
+            permutation = TrackingIdPermutation(bytes.fromhex(key))
+            _pending.set(session.sync_session, permutation)
+        return permutation
+
+    @staticmethod
+    async def _taken_by_legacy_ids(session: AsyncSession, first: int, last: int) -> Set[int]:
+        """Values of a fresh block whose IDs were already handed out by the old random generator"""
+        permutation = await TrackingIdService._get_permutation(session)
+        values = range(first, last + 1)
+        candidates = dict(zip(permutation.format_many(values), values))
+        result = await session.execute(select(Order.tracking_id).where(Order.tracking_id.in_(list(candidates))))
+        return {candidates[tracking_id] for tracking_id in result.scalars()}
+
+
+# ===============================
+# Session hooks
+# ===============================
+# The key row may be created by the transaction that first reads it; the key
+# is only cached for the process once that transaction commits.
+
+
+def _cache_committed_permutation(permutation: TrackingIdPermutation) -> None:
+    global _permutation
+    _permutation = permutation
+
+
+_pending = TransactionState("tracking_id_permutation_pending", _cache_committed_permutation)
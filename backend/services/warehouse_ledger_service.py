@@ -0,0 +1,290 @@
+"""
+Warehouse Ledger Service - Daily stock snapshots and ledger reports
+
+WarehouseOperation is an append-only ledger. take_snapshots() rolls every
+completed day up into WarehouseStockSnapshot (closing balance and net change
+per operation type, per item), so reports read a snapshot row plus the
+operations after it instead of an item's whole history:
+
+- stock at time T: balance_after of the item's last operation before T,
+  searched only after the latest snapshot (else the snapshot's closing balance)
+- movements over [date_from, date_to): snapshot rows for the whole days that
+  are already snapshotted, raw operations for the partial days at either end
+
+All times are naive UTC, like WarehouseOperation.created_at.
+"""
+
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import Date, case, insert, type_coerce
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import func, select
+
+from models import (
+    WarehouseItem, WarehouseOperation, WarehouseOperationType, WarehouseStockReport, WarehouseStockSnapshot
+)
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Operation types with a snapshot column of the same name
+MOVEMENT_TYPES = (
+    WarehouseOperationType.DELIVERY,
+    WarehouseOperationType.SALE,
+    WarehouseOperationType.WRITEOFF,
+    WarehouseOperationType.INVENTORY,
+)
+
+# Snapshot rows written per statement
+SNAPSHOT_CHUNK_SIZE = 1000
+
+
+def _midnight(day: date) -> datetime:
+    return datetime.combine(day, time.min)
+
+
+class WarehouseLedgerService:
+    """
+    Ledger snapshots and stock reports.
+
+    Only take_snapshots() writes (and commits); reports are read-only.
+    """
+
+    # ===== Snapshots =====
+
+    @staticmethod
+    async def take_snapshots(session: AsyncSession, until: Optional[date] = None) -> int:
+        """
+        Snapshot every completed day after the latest snapshotted day.
+
+        The first run rolls up the whole ledger; later runs only read the
+        days since the previous one.
+
+        Args:
+            session: Database session
+            until: First day not to snapshot (defaults to today, UTC)
+
+        Returns:
+            Number of snapshot rows written
+        """
+        until = until or datetime.utcnow().date()
+        watermark = await WarehouseLedgerService._snapshot_watermark(session)
+
+        day = type_coerce(func.date(WarehouseOperation.created_at), Date)
+        query = (
+            select(
+                WarehouseOperation.warehouse_item_id,
+                day,
+                func.max(WarehouseOperation.id),
+                *(
+                    func.sum(case(
+                        (WarehouseOperation.operation_type == operation_type, WarehouseOperation.quantity_change),
+                        else_=0
+                    ))
+                    for operation_type in MOVEMENT_TYPES
+                )
+            )
+            .where(WarehouseOperation.created_at < _midnight(until))
+            .group_by(WarehouseOperation.warehouse_item_id, day)
+        )
+        if watermark is not None:
+            query = query.where(WarehouseOperation.created_at >= _midnight(watermark + timedelta(days=1)))
+        rows = (await session.execute(query)).all()
+
+        for start in range(0, len(rows), SNAPSHOT_CHUNK_SIZE):
+            chunk = rows[start:start + SNAPSHOT_CHUNK_SIZE]
+            closing_result = await session.execute(
+                select(WarehouseOperation.id, WarehouseOperation.balance_after)
+                .where(WarehouseOperation.id.in_([row[2] for row in chunk]))
+            )
+            closing = dict(closing_result.all())
+            await session.execute(insert(WarehouseStockSnapshot), [
+                {
+                    "warehouse_item_id": item_id,
+                    "day": snapshot_day,
+                    "closing_quantity": closing[last_operation_id],
+                    "last_operation_id": last_operation_id,
+                    **{
+                        operation_type.value: total
+                        for operation_type, total in zip(MOVEMENT_TYPES, totals)
+                    }
+                }
+                for item_id, snapshot_day, last_operation_id, *totals in chunk
+            ])
+
+        await session.commit()
+        return len(rows)
+
+    @staticmethod
+    async def snapshot_job() -> None:
+        """APScheduler entry point: snapshot completed days in a fresh session"""
+        from database import async_session
+
+        try:
+            async with async_session() as session:
+                written = await WarehouseLedgerService.take_snapshots(session)
+            if written:
+                logger.info("warehouse_snapshots_taken", rows=written)
+        except Exception as e:
+            logger.error("warehouse_snapshots_failed", error=str(e))
+
+    @staticmethod
+    async def _snapshot_watermark(session: AsyncSession) -> Optional[date]:
+        """Latest snapshotted day; every day up to it is covered"""
+        result = await session.execute(select(func.max(WarehouseStockSnapshot.day)))
+        return result.scalar()
+
+    # ===== Reports =====
+
+    @staticmethod
+    async def stock_at(session: AsyncSession, warehouse_item_id: int, at: datetime) -> int:
+        """
+        Stock of an item just before a moment.
+
+        Args:
+            session: Database session
+            warehouse_item_id: Warehouse item ID
+            at: Moment (operations created before it count)
+
+        Returns:
+            Quantity in stock
+        """
+        snapshot_result = await session.execute(
+            select(WarehouseStockSnapshot.day, WarehouseStockSnapshot.closing_quantity)
+            .where(
+                WarehouseStockSnapshot.warehouse_item_id == warehouse_item_id,
+                WarehouseStockSnapshot.day < at.date()
+            )
+            .order_by(WarehouseStockSnapshot.day.desc())
+            .limit(1)
+        )
+        snapshot = snapshot_result.first()
+
+        query = (
+            select(WarehouseOperation.balance_after)
+            .where(WarehouseOperation.warehouse_item_id == warehouse_item_id, WarehouseOperation.created_at < at)
+            .order_by(WarehouseOperation.created_at.desc(), WarehouseOperation.id.desc())
+            .limit(1)
+        )
+        if snapshot is not None:
+            query = query.where(WarehouseOperation.created_at >= _midnight(snapshot.day + timedelta(days=1)))
+        balance = (await session.execute(query)).scalar()
+        if balance is not None:
+            return balance
+        if snapshot is not None:
+            return snapshot.closing_quantity
+
+        # Before the first operation: its opening balance, or the current stock if none yet
+        first_result = await session.execute(
+            select(WarehouseOperation.balance_after - WarehouseOperation.quantity_change)
+            .where(WarehouseOperation.warehouse_item_id == warehouse_item_id)
+            .order_by(WarehouseOperation.created_at, WarehouseOperation.id)
+            .limit(1)
+        )
+        opening = first_result.scalar()
+        if opening is not None:
+            return opening
+        item = await session.get(WarehouseItem, warehouse_item_id)
+        return item.quantity if item else 0
+
+    @staticmethod
+    async def movements(
+        session: AsyncSession,
+        warehouse_item_id: int,
+        date_from: Optional[datetime],
+        date_to: datetime
+    ) -> Dict[str, int]:
+        """
+        Net change per operation type over [date_from, date_to).
+
+        Args:
+            session: Database session
+            warehouse_item_id: Warehouse item ID
+            date_from: Period start (None: from the first operation)
+            date_to: Period end (exclusive)
+
+        Returns:
+            Dictionary mapping operation type -> net quantity change
+        """
+        totals = {operation_type.value: 0 for operation_type in MOVEMENT_TYPES}
+
+        # Whole days inside the period that are already snapshotted
+        first_day = None
+        if date_from is not None:
+            first_day = date_from.date()
+            if date_from != _midnight(first_day):
+                first_day += timedelta(days=1)
+        last_day = date_to.date() - timedelta(days=1)
+        watermark = await WarehouseLedgerService._snapshot_watermark(session)
+        if watermark is not None and watermark < last_day:
+            last_day = watermark
+
+        raw_ranges = [(date_from, date_to)]
+        if watermark is not None and (first_day is None or first_day <= last_day):
+            snapshot_query = select(*(
+                func.coalesce(func.sum(getattr(WarehouseStockSnapshot, operation_type.value)), 0)
+                for operation_type in MOVEMENT_TYPES
+            )).where(
+                WarehouseStockSnapshot.warehouse_item_id == warehouse_item_id,
+                WarehouseStockSnapshot.day <= last_day
+            )
+            if first_day is not None:
+                snapshot_query = snapshot_query.where(WarehouseStockSnapshot.day >= first_day)
+            for operation_type, total in zip(MOVEMENT_TYPES, (await session.execute(snapshot_query)).one()):
+                totals[operation_type.value] += total
+
+            raw_ranges = [(_midnight(last_day + timedelta(days=1)), date_to)]
+            if first_day is not None:
+                raw_ranges.append((date_from, _midnight(first_day)))
+
+        for start, end in raw_ranges:
+            query = (
+                select(WarehouseOperation.operation_type, func.sum(WarehouseOperation.quantity_change))
+                .where(
+                    WarehouseOperation.warehouse_item_id == warehouse_item_id,
+                    WarehouseOperation.operation_type.in_(MOVEMENT_TYPES),
+                    WarehouseOperation.created_at < end
+                )
+                .group_by(WarehouseOperation.operation_type)
+            )
+            if start is not None:
+                query = query.where(WarehouseOperation.created_at >= start)
+            for operation_type, total in (await session.execute(query)).all():
+                totals[operation_type.value] += total
+
+        return totals
+
+    @staticmethod
+    async def stock_report(
+        session: AsyncSession,
+        warehouse_item_id: int,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None
+    ) -> WarehouseStockReport:
+        """
+        Stock at both ends of a period and the movements inside it.
+
+        Args:
+            session: Database session
+            warehouse_item_id: Warehouse item ID
+            date_from: Period start (None: from the first operation)
+            date_to: Period end, exclusive (defaults to now, UTC)
+
+        Returns:
+            WarehouseStockReport
+        """
+        date_to = date_to or datetime.utcnow()
+        movements = await WarehouseLedgerService.movements(session, warehouse_item_id, date_from, date_to)
+        return WarehouseStockReport(
+            warehouse_item_id=warehouse_item_id,
+            date_from=date_from,
+            date_to=date_to,
+            stock_at_start=(
+                await WarehouseLedgerService.stock_at(session, warehouse_item_id, date_from)
+                if date_from is not None else None
+            ),
+            stock_at_end=await WarehouseLedgerService.stock_at(session, warehouse_item_id, date_to),
+            movements=movements,
+            net_change=sum(movements.values())
+        )
@@ -54,6 +54,31 @@ async def async_session(async_engine):
         yield session
 
 
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Drop in-process caches, rollups, event subscriptions, order number blocks and the tracking key between tests"""
+    from core.cache import product_detail_cache
+    from services.availability_engine import AvailabilityEngine
+    from services.order_event_broker import OrderEventBroker
+    from services.order_number_allocator import OrderNumberAllocator
+    from services.order_stats_service import OrderStatsService
+    from services.tracking_id_service import TrackingIdService
+
+    product_detail_cache.clear()
+    AvailabilityEngine.clear()
+    OrderNumberAllocator.clear()
+    TrackingIdService.clear()
+    OrderStatsService.clear()
+    OrderEventBroker.clear()
+    yield
+    product_detail_cache.clear()
+    AvailabilityEngine.clear()
+    OrderNumberAllocator.clear()
+    TrackingIdService.clear()
+    OrderStatsService.clear()
+    OrderEventBroker.clear()
+
+
 @pytest.fixture(scope="function")
 async def client(async_session):
     """
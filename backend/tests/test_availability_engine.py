@@ -0,0 +1,202 @@
+"""
+Tests for the catalog-wide availability engine and live stock on listings
+"""
+import pytest
+from httpx import AsyncClient
+
+from models import Order, OrderItemRequest, Product, ProductRecipe, ProductType, WarehouseItem
+from services.availability_engine import UNLIMITED_QUANTITY, AvailabilityEngine
+from models.catalog import SCOPE_CATALOG
+from services.inventory_service import InventoryService
+from services.resource_version_service import ResourceVersionService
+
+
+async def _order(session, shop_id) -> Order:
+    order = Order(
+        tracking_id="900000101",
+        orderNumber="#10101",
+        customerName="Test Customer",
+        phone="+77001234567",
+        subtotal=0,
+        total=0,
+        shop_id=shop_id
+    )
+    session.add(order)
+    await session.commit()
+    return order
+
+
+async def _product(session, shop_id, name, enabled=True) -> Product:
+    product = Product(name=name, price=100, type=ProductType.FLOWERS, enabled=enabled, shop_id=shop_id)
+    session.add(product)
+    await session.commit()
+    return product
+
+
+@pytest.mark.asyncio
+async def test_engine_matches_inventory_service_and_tracks_writes(
+    async_session, sample_shop, sample_product_with_recipe, sample_warehouse_items
+):
+    roses = sample_warehouse_items[0]
+    roses_id = roses.id
+    no_recipe = await _product(async_session, sample_shop.id, "Gift card")
+    disabled = await _product(async_session, sample_shop.id, "Archived", enabled=False)
+    async_session.add(ProductRecipe(product_id=disabled.id, warehouse_item_id=roses.id, quantity=1))
+    await async_session.commit()
+    products = [sample_product_with_recipe, no_recipe, disabled]
+    shop_id, bouquet_id, no_recipe_id = sample_shop.id, sample_product_with_recipe.id, no_recipe.id
+
+    # Roses 50 // 15 limit the bouquet; same answer as the per-product path
+    engine = await AvailabilityEngine.get_max_quantities(async_session, products)
+    assert engine == {bouquet_id: 3, no_recipe_id: UNLIMITED_QUANTITY, disabled.id: 0}
+    batch = await InventoryService.check_batch_availability(
+        async_session, [OrderItemRequest(product_id=p.id, quantity=1) for p in products]
+    )
+    assert {item.product_id: item.max_quantity for item in batch.items} == engine
+
+    async def engine_max():
+        return await AvailabilityEngine.get_shop_max_quantities(async_session, shop_id)
+
+    # Reservations reduce effective stock: 50 - 30 reserved
+    order = await _order(async_session, shop_id)
+    order_id = order.id
+    await InventoryService.create_reservation(
+        async_session, order_id, [OrderItemRequest(product_id=bouquet_id, quantity=2)]
+    )
+    assert (await engine_max())[bouquet_id] == 1
+
+    # Rolled-back writes never reach the engine
+    roses.quantity = 0
+    await async_session.flush()
+    await async_session.rollback()
+    assert (await engine_max())[bouquet_id] == 1
+
+    # Committed write-off, then releasing the reservation
+    roses = await async_session.get(WarehouseItem, roses_id)
+    roses.quantity = 40
+    await async_session.commit()
+    assert (await engine_max())[bouquet_id] == 0
+    await InventoryService.release_reservations(async_session, order_id)
+    assert (await engine_max())[bouquet_id] == 2
+
+    # A new recipe rebuilds the shop's matrix
+    async_session.add(ProductRecipe(product_id=no_recipe_id, warehouse_item_id=roses_id, quantity=8))
+    await async_session.commit()
+    assert (await engine_max())[no_recipe_id] == 5
+
+
+@pytest.mark.asyncio
+async def test_stock_token_derived_from_values(
+    async_session, sample_shop, sample_product_with_recipe, sample_warehouse_items
+):
+    shop_id = sample_shop.id
+    token = await AvailabilityEngine.version_token(async_session, shop_id)
+    all_shops = await AvailabilityEngine.version_token(async_session)
+
+    # A fresh process (another replica, a restart) serving the same stock agrees
+    AvailabilityEngine.clear()
+    assert await AvailabilityEngine.version_token(async_session, shop_id) == token
+    assert await AvailabilityEngine.version_token(async_session) == all_shops
+
+    # Stock that changes max_quantity moves the token
+    roses = sample_warehouse_items[0]
+    roses.quantity = 10
+    await async_session.commit()
+    assert await AvailabilityEngine.version_token(async_session, shop_id) != token
+
+
+@pytest.mark.asyncio
+async def test_catalog_listing_shows_live_stock(
+    client: AsyncClient, async_session, sample_shop, sample_product_with_recipe, sample_warehouse_items
+):
+    params = {"shop_id": sample_shop.id}
+    response = await client.get("/api/v1/products/", params=params)
+    [product] = response.json()
+    assert (product["in_stock"], product["max_quantity"]) == (True, 3)
+    etag = response.headers["ETag"]
+
+    # Stock changes move the stock token (not the shop's catalog version row),
+    # so the cached listing is not reused
+    catalog_token = await ResourceVersionService.get_token(async_session, SCOPE_CATALOG, sample_shop.id)
+    roses = sample_warehouse_items[0]
+    roses.quantity = 10
+    await async_session.commit()
+    assert await ResourceVersionService.get_token(async_session, SCOPE_CATALOG, sample_shop.id) == catalog_token
+
+    response = await client.get("/api/v1/products/", params=params, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    [product] = response.json()
+    assert (product["in_stock"], product["max_quantity"]) == (False, 0)
+
+    # Single-product responses carry no stock fields
+    detail = (await client.get(f"/api/v1/products/{sample_product_with_recipe.id}")).json()
+    assert "in_stock" not in detail
+
+
+@pytest.mark.asyncio
+async def test_optional_recipe_lines_do_not_limit(
+    async_session, sample_shop, sample_product_with_recipe, sample_warehouse_items
+):
+    """Optional lines are not reserved, so neither the engine nor InventoryService counts them"""
+    ribbon = sample_warehouse_items[2]
+    ribbon.quantity = 0
+    await async_session.commit()
+    bouquet_id = sample_product_with_recipe.id
+
+    engine = await AvailabilityEngine.get_shop_max_quantities(async_session, sample_shop.id)
+    availability = await InventoryService.check_product_availability(async_session, bouquet_id, 3)
+    assert engine[bouquet_id] == availability.max_quantity == 3
+    assert availability.available
+
+
+def test_stock_change_recomputes_only_dependent_products():
+    from services.availability_engine import ShopStockMatrix
+
+    tulips, roses, ribbon = 1, 2, 3
+    matrix = ShopStockMatrix(
+        shop_id=1,
+        recipe_rows=[
+            (10, tulips, 5), (10, ribbon, 1),  # tulip bouquet
+            (11, roses, 7), (11, ribbon, 1),   # rose bouquet
+            (12, tulips, 3), (12, roses, 3),   # mixed bouquet
+        ],
+        stock_rows=[(tulips, 20), (roses, 21), (ribbon, 10)]
+    )
+    assert matrix.as_dict() == {10: 4, 11: 3, 12: 6}
+
+    # Only bouquets with tulips are recomputed on a tulip delivery
+    assert [int(matrix.product_ids[row]) for row in matrix.dependent_rows([matrix.item_columns[tulips]])] == [10, 12]
+    matrix.max_quantity[matrix.product_rows[11]] = -1
+    matrix.update_stock([(tulips, 50)])
+    assert matrix.as_dict() == {10: 10, 11: -1, 12: 7}
+
+    matrix.update_stock([(roses, 0), (ribbon, 3)])
+    assert matrix.as_dict() == {10: 3, 11: 0, 12: 0}
+
+
+@pytest.mark.asyncio
+async def test_bulk_max_quantities(
+    client: AsyncClient, async_session, sample_shop, sample_product_with_recipe, sample_warehouse_items
+):
+    no_recipe = await _product(async_session, sample_shop.id, "Gift card")
+    bouquet_id = sample_product_with_recipe.id
+
+    response = await client.post(
+        "/api/v1/inventory/max-quantities",
+        json={"product_ids": [bouquet_id, no_recipe.id, 999999, bouquet_id]}
+    )
+    assert response.status_code == 200
+    assert response.json() == [
+        {"product_id": bouquet_id, "max_quantity": 3},
+        {"product_id": no_recipe.id, "max_quantity": UNLIMITED_QUANTITY},
+        {"product_id": 999999, "max_quantity": 0},
+    ]
+    assert await InventoryService.get_product_max_quantity(async_session, bouquet_id) == 3
+
+    # Carts that fit skip the per-ingredient check; short ones still explain why
+    fits = [OrderItemRequest(product_id=bouquet_id, quantity=2), OrderItemRequest(product_id=bouquet_id, quantity=1)]
+    assert await InventoryService.validate_order_items_stock(async_session, fits) == []
+    errors = await InventoryService.validate_order_items_stock(
+        async_session, fits + [OrderItemRequest(product_id=bouquet_id, quantity=1)]
+    )
+    assert "Product 'Test Bouquet' requested: 4, maximum available: 3" in errors
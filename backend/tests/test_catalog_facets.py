@@ -0,0 +1,125 @@
+"""
+Tests for the incrementally maintained catalog facet index
+"""
+import pytest
+
+from models import ProductCreate, ProductUpdate, ProductType
+from services.product_service import ProductService
+from services.catalog_facet_service import CatalogFacetService
+
+
+def _product_in(name: str, price: int, tags=None, cities=None, enabled: bool = True) -> ProductCreate:
+    return ProductCreate(
+        name=name,
+        price=price,
+        type=ProductType.FLOWERS,
+        enabled=enabled,
+        tags=tags,
+        cities=cities
+    )
+
+
+@pytest.mark.asyncio
+async def test_facets_built_lazily_from_existing_products(async_session, sample_product):
+    """Products inserted before the index existed are picked up on first read"""
+    facets = await CatalogFacetService.get_facets(async_session)
+
+    assert facets["tag_counts"] == {"roses": 1, "urgent": 1}
+    assert facets["city_counts"] == {"almaty": 1, "astana": 1}
+    assert facets["min_price"] == sample_product.price
+    assert facets["max_price"] == sample_product.price
+
+
+@pytest.mark.asyncio
+async def test_create_update_toggle_delete_keep_index_in_sync(async_session, sample_shop):
+    """Every ProductService write path updates counts and price bounds"""
+    shop_id = sample_shop.id
+
+    cheap = await ProductService.create_product(
+        async_session, _product_in("Cheap", 500000, ["budget"], ["almaty"]), shop_id, commit=True
+    )
+    pricey = await ProductService.create_product(
+        async_session, _product_in("Pricey", 3000000, ["budget", "premium"], ["astana"]), shop_id, commit=True
+    )
+
+    facets = await CatalogFacetService.get_facets(async_session, shop_id=shop_id)
+    assert facets["tag_counts"] == {"budget": 2, "premium": 1}
+    assert facets["city_counts"] == {"almaty": 1, "astana": 1}
+    assert (facets["min_price"], facets["max_price"]) == (500000, 3000000)
+
+    # Price change of the cheapest product moves the lower bound
+    await ProductService.update_product(
+        async_session, cheap.id, ProductUpdate(price=800000, cities=["almaty", "shymkent"]), shop_id, commit=True
+    )
+    facets = await CatalogFacetService.get_facets(async_session, shop_id=shop_id)
+    assert facets["min_price"] == 800000
+    assert facets["city_counts"] == {"almaty": 1, "astana": 1, "shymkent": 1}
+
+    # Disabling removes the product's contribution entirely
+    await ProductService.toggle_product_status(async_session, pricey.id, False, shop_id, commit=True)
+    facets = await CatalogFacetService.get_facets(async_session, shop_id=shop_id)
+    assert facets["tag_counts"] == {"budget": 1}
+    assert "astana" not in facets["city_counts"]
+    assert (facets["min_price"], facets["max_price"]) == (800000, 800000)
+
+    # Re-enabling restores it
+    await ProductService.toggle_product_status(async_session, pricey.id, True, shop_id, commit=True)
+    facets = await CatalogFacetService.get_facets(async_session, shop_id=shop_id)
+    assert facets["tag_counts"] == {"budget": 2, "premium": 1}
+    assert facets["max_price"] == 3000000
+
+    # Deleting the last product empties the index
+    await ProductService.delete_product(async_session, pricey.id, shop_id, commit=True)
+    await ProductService.delete_product(async_session, cheap.id, shop_id, commit=True)
+    facets = await CatalogFacetService.get_facets(async_session, shop_id=shop_id)
+    assert facets["tag_counts"] == {}
+    assert facets["city_counts"] == {}
+    assert facets["min_price"] is None
+
+
+@pytest.mark.asyncio
+async def test_incremental_index_matches_full_rebuild(async_session, sample_shop):
+    """Incremental maintenance produces the same result as a rebuild"""
+    shop_id = sample_shop.id
+    created = []
+    for i in range(6):
+        product = await ProductService.create_product(
+            async_session,
+            _product_in(f"P{i}", 100000 * (i + 1), [f"t{i % 3}"], [f"c{i % 2}"], enabled=i != 4),
+            shop_id,
+            commit=True
+        )
+        created.append(product)
+
+    await ProductService.update_product(
+        async_session, created[5].id, ProductUpdate(price=50000), shop_id, commit=True
+    )
+    await ProductService.delete_product(async_session, created[0].id, shop_id, commit=True)
+
+    incremental = await CatalogFacetService.get_facets(async_session, shop_id=shop_id)
+
+    await CatalogFacetService.rebuild_shop(async_session, shop_id)
+    await async_session.commit()
+    rebuilt = await CatalogFacetService.get_facets(async_session, shop_id=shop_id)
+
+    assert incremental == rebuilt
+
+
+@pytest.mark.asyncio
+async def test_first_write_builds_every_missing_shop(async_session, sample_shop, sample_product):
+    """A write in one shop before the index exists also builds the other shops"""
+    from models import Shop, User, UserRole
+
+    other_owner = User(name="Other Owner", phone="+77009999999", role=UserRole.DIRECTOR, password_hash="x", is_active=True)
+    async_session.add(other_owner)
+    await async_session.commit()
+    other_shop = Shop(name="Other Shop", owner_id=other_owner.id, phone="+77009999999", address="Other", is_active=True)
+    async_session.add(other_shop)
+    await async_session.commit()
+    await ProductService.create_product(
+        async_session, _product_in("Other", 700000, ["tulips"], ["shymkent"]), other_shop.id, commit=True
+    )
+
+    facets = await CatalogFacetService.get_facets(async_session)
+    assert facets["tag_counts"] == {"roses": 1, "tulips": 1, "urgent": 1}
+    assert (facets["min_price"], facets["max_price"]) == (700000, sample_product.price)
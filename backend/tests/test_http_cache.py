@@ -0,0 +1,85 @@
+"""
+Tests for conditional GET (ETag / 304) on public catalog endpoints
+"""
+import pytest
+from httpx import AsyncClient
+
+from core.http_cache import etag_matches
+from models import FAQ, ProductCreate, ProductUpdate, ProductType
+from services.product_service import ProductService
+
+
+def test_etag_matching_is_weak_and_accepts_lists():
+    etag = 'W/"abc"'
+    assert etag_matches('W/"abc"', etag)
+    assert etag_matches('"abc"', etag)
+    assert etag_matches('"zzz", W/"abc"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('W/"zzz"', etag)
+    assert not etag_matches(None, etag)
+
+
+@pytest.mark.asyncio
+async def test_products_list_revalidates_until_catalog_changes(
+    client: AsyncClient, async_session, sample_product, sample_shop
+):
+    params = {"shop_id": sample_shop.id}
+    response = await client.get("/api/v1/products/", params=params)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert "s-maxage" in response.headers["Cache-Control"]
+
+    response = await client.get("/api/v1/products/", params=params, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+
+    # Different query -> different representation
+    response = await client.get(
+        "/api/v1/products/", params={**params, "limit": 5}, headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 200
+
+    await ProductService.update_product(
+        async_session, sample_product.id, ProductUpdate(price=1300000), sample_shop.id, commit=True
+    )
+    response = await client.get("/api/v1/products/", params=params, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()[0]["price"] == 1300000
+
+
+@pytest.mark.asyncio
+async def test_catalog_version_is_per_shop(client: AsyncClient, async_session, sample_shop):
+    """A write in another shop does not invalidate this shop's listing"""
+    from models import Shop, User, UserRole
+
+    other_owner = User(name="Other Owner", phone="+77007654321", role=UserRole.DIRECTOR, password_hash="x")
+    async_session.add(other_owner)
+    await async_session.commit()
+    other_shop = Shop(name="Other", owner_id=other_owner.id, phone="+77007654321", is_active=True)
+    async_session.add(other_shop)
+    await async_session.commit()
+
+    params = {"shop_id": sample_shop.id}
+    etag = (await client.get("/api/v1/products/", params=params)).headers["ETag"]
+
+    await ProductService.create_product(
+        async_session, ProductCreate(name="Elsewhere", price=100, type=ProductType.FLOWERS), other_shop.id, commit=True
+    )
+
+    response = await client.get("/api/v1/products/", params=params, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+
+@pytest.mark.asyncio
+async def test_faqs_revalidate_until_faq_written(client: AsyncClient, async_session, sample_shop):
+    etag = (await client.get("/api/v1/faqs")).headers["ETag"]
+    assert (await client.get("/api/v1/faqs", headers={"If-None-Match": etag})).status_code == 304
+
+    async_session.add(FAQ(question="Delivery?", answer="Yes", shop_id=sample_shop.id))
+    await async_session.commit()
+
+    response = await client.get("/api/v1/faqs", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert len(response.json()) == 1
@@ -0,0 +1,105 @@
+"""
+Tests for set-based and background inventory check application
+"""
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlmodel import select
+
+from models import InventoryCheck, InventoryCheckItem, WarehouseItem, WarehouseOperation, WarehouseOperationType
+
+
+async def _check(session, shop_id, items, counted) -> int:
+    check = InventoryCheck(shop_id=shop_id, conducted_by="Aigerim", comment="Monthly")
+    session.add(check)
+    await session.flush()
+    for item, actual_quantity in zip(items, counted):
+        session.add(InventoryCheckItem(
+            inventory_check_id=check.id,
+            warehouse_item_id=item.id,
+            warehouse_item_name=item.name,
+            current_quantity=item.quantity,
+            actual_quantity=actual_quantity,
+            difference=actual_quantity - item.quantity
+        ))
+    await session.commit()
+    return check.id
+
+
+async def _stock_and_ledger(session):
+    stock = (await session.execute(select(WarehouseItem.quantity).order_by(WarehouseItem.id))).scalars().all()
+    ledger = (await session.execute(
+        select(WarehouseOperation.quantity_change, WarehouseOperation.balance_after)
+        .where(WarehouseOperation.operation_type == WarehouseOperationType.INVENTORY)
+        .order_by(WarehouseOperation.id)
+    )).all()
+    return stock, ledger
+
+
+@pytest.mark.asyncio
+async def test_apply_inventory_check(client: AsyncClient, async_session, sample_shop, sample_warehouse_items):
+    # Roses short by 3, leaves unchanged, ribbon 2 over
+    check_id = await _check(async_session, sample_shop.id, sample_warehouse_items, [47, 100, 32])
+
+    response = await client.post(f"/api/v1/inventory/{check_id}/apply")
+    assert response.status_code == 200
+
+    stock, ledger = await _stock_and_ledger(async_session)
+    assert stock == [47, 100, 32]
+    assert ledger == [(-3, 47), (2, 32)]
+    description = (await async_session.execute(select(WarehouseOperation.description))).scalars().first()
+    assert description == "Инвентаризация: было 50 шт, стало 47 шт (недостача: -3 шт). Комментарий: Monthly. Проводил: Aigerim"
+
+    progress = (await client.get(f"/api/v1/inventory/{check_id}/progress")).json()
+    assert (progress["status"], progress["items_applied"], progress["items_total"]) == ("applied", 2, 2)
+    assert (await client.post(f"/api/v1/inventory/{check_id}/apply")).status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_background_apply_in_chunks(
+    client: AsyncClient, async_engine, async_session, sample_shop, sample_warehouse_items, monkeypatch
+):
+    import database
+    from services import inventory_service
+
+    # The background job opens its own session, as the app's sessions do
+    session_maker = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+    monkeypatch.setattr(database, "async_session", session_maker)
+    monkeypatch.setattr(inventory_service, "INVENTORY_APPLY_CHUNK_SIZE", 1)
+    check_id = await _check(async_session, sample_shop.id, sample_warehouse_items, [40, 90, 20])
+
+    response = await client.post(f"/api/v1/inventory/{check_id}/apply", params={"background": True})
+    assert response.status_code == 202
+    assert response.json()["status"] == "applying"
+
+    # The background task has run by the time the ASGI call returns
+    async_session.expire_all()
+    progress = (await client.get(f"/api/v1/inventory/{check_id}/progress")).json()
+    assert (progress["status"], progress["items_applied"], progress["items_total"]) == ("applied", 3, 3)
+    stock, ledger = await _stock_and_ledger(async_session)
+    assert stock == [40, 90, 20]
+    assert ledger == [(-10, 40), (-10, 90), (-10, 20)]
+
+
+@pytest.mark.asyncio
+async def test_apply_resumes_after_dead_worker(client: AsyncClient, async_session, sample_shop, sample_warehouse_items):
+    from datetime import datetime, timedelta
+    from services.inventory_service import INVENTORY_APPLY_STALE_SECONDS
+
+    check_id = await _check(async_session, sample_shop.id, sample_warehouse_items, [40, 90, 20])
+    check = await async_session.get(InventoryCheck, check_id)
+
+    # A live background apply holds the check
+    check.status = "applying"
+    check.apply_heartbeat_at = datetime.now()
+    await async_session.commit()
+    assert (await client.post(f"/api/v1/inventory/{check_id}/apply")).status_code == 409
+
+    # Its worker died: once the heartbeat is stale the apply can run again
+    check.apply_heartbeat_at = datetime.now() - timedelta(seconds=INVENTORY_APPLY_STALE_SECONDS + 1)
+    await async_session.commit()
+    assert (await client.post(f"/api/v1/inventory/{check_id}/apply")).status_code == 200
+
+    async_session.expire_all()
+    stock, _ = await _stock_and_ledger(async_session)
+    assert stock == [40, 90, 20]
@@ -0,0 +1,104 @@
+"""
+Tests for set-based warehouse deductions on order assembly
+"""
+import pytest
+from sqlmodel import select
+
+from models import (
+    Order, OrderItem, OrderItemRequest, OrderReservation, WarehouseItem,
+    WarehouseOperation, WarehouseOperationType
+)
+from services.inventory_service import InsufficientStockError, InventoryService
+
+
+async def _order(session, shop_id, product, number: int, quantity: int = 0) -> Order:
+    order = Order(
+        tracking_id=f"90000040{number}",
+        orderNumber=f"#4040{number}",
+        customerName="Test Customer",
+        phone="+77001234567",
+        subtotal=0,
+        total=0,
+        shop_id=shop_id
+    )
+    session.add(order)
+    await session.flush()
+    if quantity:
+        session.add(OrderItem(
+            order_id=order.id,
+            product_id=product.id,
+            product_name=product.name,
+            product_price=product.price,
+            quantity=quantity,
+            item_total=product.price * quantity
+        ))
+    await session.commit()
+    return order
+
+
+async def _stock(session, item_ids):
+    result = await session.execute(
+        select(WarehouseItem.quantity, WarehouseItem.reserved_quantity)
+        .where(WarehouseItem.id.in_(item_ids))
+        .order_by(WarehouseItem.id)
+    )
+    return result.all()
+
+
+async def _ledger(session, order_id):
+    result = await session.execute(
+        select(WarehouseOperation.warehouse_item_id, WarehouseOperation.quantity_change, WarehouseOperation.balance_after)
+        .where(WarehouseOperation.order_id == order_id, WarehouseOperation.operation_type == WarehouseOperationType.SALE)
+        .order_by(WarehouseOperation.warehouse_item_id)
+    )
+    return result.all()
+
+
+@pytest.mark.asyncio
+async def test_assembly_from_reservations(
+    async_session, sample_shop, sample_product_with_recipe, sample_warehouse_items
+):
+    roses, leaves, ribbon = sample_warehouse_items
+    item_ids = [item.id for item in sample_warehouse_items]
+    order = await _order(async_session, sample_shop.id, sample_product_with_recipe, 1)
+    await InventoryService.create_reservation(
+        async_session, order.id, [OrderItemRequest(product_id=sample_product_with_recipe.id, quantity=2)]
+    )
+
+    operations = await InventoryService.convert_reservations_to_deductions(async_session, order.id)
+
+    assert len(operations) == 2 and all(operation.id for operation in operations)
+    assert await _ledger(async_session, order.id) == [(roses.id, -30, 20), (leaves.id, -10, 90)]
+    assert await _stock(async_session, item_ids) == [(20, 0), (90, 0), (30, 0)]
+    # Instances loaded in the session see the new balance
+    assert roses.quantity == 20
+    assert await InventoryService.get_order_reservations(async_session, order.id) == []
+
+
+@pytest.mark.asyncio
+async def test_legacy_assembly_without_reservations(
+    async_session, sample_shop, sample_product_with_recipe, sample_warehouse_items
+):
+    shop_id = sample_shop.id
+    # The failed attempt rolls back and expires loaded instances
+    item_ids = [item.id for item in sample_warehouse_items]
+    roses_id, leaves_id, _ = item_ids
+    product = sample_product_with_recipe
+
+    # 4 bouquets need 60 roses: nothing is deducted
+    too_big = await _order(async_session, shop_id, product, 1, quantity=4)
+    too_big_id = too_big.id
+    with pytest.raises(InsufficientStockError, match="Red Roses. Required: 60, Available: 50"):
+        await InventoryService.convert_reservations_to_deductions(async_session, too_big_id)
+    assert await _stock(async_session, item_ids) == [(50, 0), (100, 0), (30, 0)]
+    assert await _ledger(async_session, too_big_id) == []
+
+    await async_session.refresh(product)
+    order = await _order(async_session, shop_id, product, 2, quantity=3)
+    await InventoryService.convert_reservations_to_deductions(async_session, order.id)
+
+    # The optional ribbon is not deducted
+    assert await _ledger(async_session, order.id) == [(roses_id, -45, 5), (leaves_id, -15, 85)]
+    assert await _stock(async_session, item_ids) == [(5, 0), (85, 0), (30, 0)]
+    reservations = await async_session.execute(select(OrderReservation).where(OrderReservation.order_id == order.id))
+    assert reservations.first() is None
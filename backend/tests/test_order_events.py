@@ -0,0 +1,136 @@
+"""
+Tests for order events and their Server-Sent Events stream
+"""
+import json
+
+import pytest
+
+from models import Order, OrderStatus, User
+from services.order_event_broker import SUBSCRIBER_QUEUE_SIZE, OrderEventBroker
+from api.orders.events import _event_stream
+
+
+def _drain(queue):
+    events = []
+    while not queue.empty():
+        events.append(queue.get_nowait())
+    return events
+
+
+@pytest.mark.asyncio
+async def test_committed_order_changes_are_published(async_session, sample_shop):
+    courier_id = sample_shop.owner_id
+    queue = OrderEventBroker.subscribe(sample_shop.id)
+    other_shop = OrderEventBroker.subscribe(sample_shop.id + 1)
+
+    order = Order(
+        tracking_id="900000901",
+        orderNumber="#90001",
+        customerName="Client",
+        phone="+77001234567",
+        subtotal=1000,
+        total=1000,
+        shop_id=sample_shop.id
+    )
+    async_session.add(order)
+    await async_session.flush()
+    assert queue.empty()  # Not before the commit
+    await async_session.commit()
+    [created] = _drain(queue)
+    assert (created["type"], created["order_id"], created["order_number"]) == ("order.created", order.id, "#90001")
+
+    order.status = OrderStatus.ACCEPTED
+    await async_session.flush()
+    await async_session.rollback()
+    assert queue.empty()
+    await async_session.refresh(order)
+
+    order.status = OrderStatus.PAID
+    await async_session.commit()
+    order.courier_id = courier_id
+    await async_session.commit()
+    events = _drain(queue)
+    assert [order_event["type"] for order_event in events] == [
+        "order.status_changed", "order.payment_confirmed", "order.assigned"
+    ]
+    assert (events[0]["old_status"], events[0]["status"]) == ("new", "paid")
+    assert events[2]["courier_id"] == courier_id
+    assert other_shop.empty()
+
+
+@pytest.mark.asyncio
+async def test_event_stream_and_slow_subscribers(sample_shop):
+    class ConnectedRequest:
+        async def is_disconnected(self):
+            return False
+
+    queue = OrderEventBroker.subscribe(sample_shop.id)
+    OrderEventBroker.publish({"type": "order.created", "shop_id": sample_shop.id, "order_id": 1})
+    # A subscriber that falls behind gets the drop marker instead of a backlog
+    for order_id in range(SUBSCRIBER_QUEUE_SIZE):
+        OrderEventBroker.publish({"type": "order.created", "shop_id": sample_shop.id, "order_id": order_id})
+    assert queue.qsize() == 1
+
+    queue = OrderEventBroker.subscribe(sample_shop.id)
+    OrderEventBroker.publish({"type": "order.assigned", "shop_id": sample_shop.id, "order_id": 7})
+    queue.put_nowait(None)
+    chunks = [chunk async for chunk in _event_stream(ConnectedRequest(), sample_shop.id, queue)]
+    assert chunks[0].startswith("retry:")
+    event_line, data_line = chunks[1].strip().split("\n")
+    assert event_line == "event: order.assigned"
+    assert json.loads(data_line[len("data: "):])["order_id"] == 7
+    # The stream unsubscribed when it ended
+    OrderEventBroker.publish({"type": "order.created", "shop_id": sample_shop.id, "order_id": 8})
+    assert queue.empty()
+
+
+@pytest.mark.asyncio
+async def test_stream_query_token_must_be_stream_scoped(async_session, sample_shop):
+    from fastapi import HTTPException
+    from fastapi.security import HTTPAuthorizationCredentials
+    from auth_utils import create_access_token, create_stream_token, get_current_user, get_stream_user_shop_id
+
+    owner = await async_session.get(User, sample_shop.owner_id)
+
+    # EventSource cannot send headers: a stream token comes as ?access_token=
+    stream_token = create_stream_token(owner)
+    shop_id = await get_stream_user_shop_id(credentials=None, access_token=stream_token, session=async_session)
+    assert shop_id == sample_shop.id
+
+    # A regular access token is accepted in the header, never in the query string
+    access_token = create_access_token({"sub": str(owner.id)})
+    header = HTTPAuthorizationCredentials(scheme="Bearer", credentials=access_token)
+    assert await get_stream_user_shop_id(credentials=header, access_token=None, session=async_session) == sample_shop.id
+    with pytest.raises(HTTPException) as in_query:
+        await get_stream_user_shop_id(credentials=None, access_token=access_token, session=async_session)
+    assert in_query.value.status_code == 401
+
+    # The stream token opens nothing else
+    with pytest.raises(HTTPException) as elsewhere:
+        await get_current_user(HTTPAuthorizationCredentials(scheme="Bearer", credentials=stream_token), async_session)
+    assert elsewhere.value.status_code == 401
+
+    with pytest.raises(HTTPException) as missing:
+        await get_stream_user_shop_id(credentials=None, access_token=None, session=async_session)
+    assert missing.value.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_stream_token_endpoint(client, sample_shop):
+    from jose import jwt
+    from auth_utils import (
+        ALGORITHM, STREAM_TOKEN_EXPIRE_SECONDS, STREAM_TOKEN_SCOPE, create_access_token, settings
+    )
+
+    access_token = create_access_token({"sub": str(sample_shop.owner_id)})
+    response = await client.post(
+        "/api/v1/orders/events/token", headers={"Authorization": f"Bearer {access_token}"}
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["expires_in"] == STREAM_TOKEN_EXPIRE_SECONDS
+    payload = jwt.decode(body["access_token"], settings.secret_key, algorithms=[ALGORITHM])
+    assert payload["scope"] == STREAM_TOKEN_SCOPE
+    assert payload["sub"] == str(sample_shop.owner_id)
+
+    assert (await client.post("/api/v1/orders/events/token")).status_code in (401, 403)
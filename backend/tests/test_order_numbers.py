@@ -0,0 +1,79 @@
+"""
+Tests for block (hi-lo) order number allocation
+"""
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlmodel import select
+
+from models import Order, OrderCounter, ShopOrderCounter
+from services.order_number_allocator import OrderNumberAllocator
+
+
+async def _counter(session) -> int:
+    return (await session.execute(select(OrderCounter.counter).where(OrderCounter.id == 1))).scalar()
+
+
+@pytest.mark.asyncio
+async def test_blocks_are_handed_out_after_commit(async_engine):
+    session_maker = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_maker() as first, session_maker() as second:
+        # One counter bump reserves #1-#5; the rest is this transaction's until it commits
+        assert await OrderNumberAllocator.next_number(first, block_size=5) == "#00001"
+        assert await OrderNumberAllocator.next_number(first, block_size=5) == "#00002"
+        await first.commit()
+        assert await _counter(first) == 5
+
+        # Other sessions take the rest without touching the counter
+        numbers = [await OrderNumberAllocator.next_number(second, block_size=5) for _ in range(3)]
+        assert numbers == ["#00003", "#00004", "#00005"]
+        await second.commit()
+        assert await _counter(second) == 5
+
+        assert await OrderNumberAllocator.next_number(second, block_size=5) == "#00006"
+        await second.commit()
+        assert await _counter(second) == 10
+
+
+@pytest.mark.asyncio
+async def test_rolled_back_block_is_reserved_again(async_session):
+    # Gapless mode: the rolled-back order gives its number back
+    assert await OrderNumberAllocator.next_number(async_session, block_size=1) == "#00001"
+    await async_session.rollback()
+    assert await OrderNumberAllocator.next_number(async_session, block_size=1) == "#00001"
+    await async_session.commit()
+
+    # A rolled-back block never reaches other sessions
+    assert await OrderNumberAllocator.next_number(async_session, block_size=10) == "#00002"
+    await async_session.rollback()
+    assert await _counter(async_session) == 1
+    assert await OrderNumberAllocator.next_number(async_session, block_size=10) == "#00002"
+    await async_session.commit()
+    assert await _counter(async_session) == 11
+
+
+@pytest.mark.asyncio
+async def test_counters_start_after_existing_orders(async_session, sample_shop):
+    shop_id = sample_shop.id
+    for index, number in enumerate(("#00041", f"#{shop_id}-00007", f"#{shop_id}-00003")):
+        async_session.add(Order(
+            tracking_id=f"90000060{index}",
+            orderNumber=number,
+            customerName="Client",
+            phone="+77001234567",
+            subtotal=0,
+            total=0,
+            shop_id=shop_id
+        ))
+    await async_session.commit()
+
+    # Shop-scoped numbers are not part of the platform-wide sequence
+    assert await OrderNumberAllocator.next_number(async_session, shop_id, block_size=3) == "#00042"
+    assert await OrderNumberAllocator.next_number(
+        async_session, shop_id, block_size=3, per_shop=True
+    ) == f"#{shop_id}-00008"
+    await async_session.commit()
+
+    counter = await async_session.get(ShopOrderCounter, shop_id)
+    assert counter.counter == 10
+    with pytest.raises(ValueError):
+        await OrderNumberAllocator.next_number(async_session, per_shop=True)
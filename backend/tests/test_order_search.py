@@ -0,0 +1,76 @@
+"""
+Tests for indexed order search by phone, customer name and order number
+"""
+import pytest
+from sqlmodel import select
+
+from models import Order
+from services.order_search_service import OrderSearchService
+
+
+@pytest.fixture
+async def search_orders(async_session, sample_shop):
+    """Orders with phones in the formats imports leave behind"""
+    orders = []
+    for number, (name, phone) in enumerate((
+        ("Айгерим", "+77015211545"),
+        ("Айгерим Б.", "8 701 521 15 45"),
+        ("Dana", "87771234567"),
+        ("Import", "+49 30 1234567"),
+    )):
+        order = Order(
+            tracking_id=f"90000080{number}",
+            orderNumber=f"#8{number:04d}",
+            customerName=name,
+            phone=phone,
+            subtotal=1000,
+            total=1000,
+            shop_id=sample_shop.id
+        )
+        async_session.add(order)
+        orders.append(order)
+    await async_session.commit()
+    return orders
+
+
+async def _search(session, search):
+    result = await session.execute(OrderSearchService.apply_search(select(Order.customerName), search))
+    return sorted(result.scalars().all())
+
+
+@pytest.mark.asyncio
+async def test_phone_normalized_follows_phone(async_session, search_orders):
+    assert [order.phone_normalized for order in search_orders] == [
+        "+77015211545", "+77015211545", "+77771234567", "+49301234567"
+    ]
+    dana = search_orders[2]
+    dana.phone = "7 702 000 00 00"
+    await async_session.commit()
+    assert (await async_session.get(Order, dana.id)).phone_normalized == "+77020000000"
+
+
+@pytest.mark.asyncio
+async def test_search_by_phone_name_and_number(async_session, search_orders):
+    # A full phone in any format matches exactly
+    assert await _search(async_session, "8 (701) 521-15-45") == ["Айгерим", "Айгерим Б."]
+    assert await _search(async_session, "7015211545") == ["Айгерим", "Айгерим Б."]
+    # Part of a phone, name or order number
+    assert await _search(async_session, "4567") == ["Dana", "Import"]
+    assert await _search(async_session, "Айгерим Б") == ["Айгерим Б."]
+    assert await _search(async_session, "dan") == ["Dana"]
+    assert await _search(async_session, "#80003") == ["Import"]
+
+    # customer_phone filter of GET /orders/
+    result = await async_session.execute(OrderSearchService.apply_phone(select(Order.id), "87015211545"))
+    assert len(result.all()) == 2
+
+
+@pytest.mark.asyncio
+async def test_search_endpoint(client, sample_shop, search_orders):
+    from main import app
+    from auth_utils import get_current_user_shop_id
+
+    app.dependency_overrides[get_current_user_shop_id] = lambda: sample_shop.id
+    response = await client.get("/api/v1/orders/search", params={"q": "+7 701 521 15 45", "cursor": ""})
+    assert response.status_code == 200
+    assert [order["orderNumber"] for order in response.json()] == ["#80001", "#80000"]
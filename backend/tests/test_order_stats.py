@@ -0,0 +1,77 @@
+"""
+Tests for the incrementally maintained order dashboard rollup
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from models import Order, OrderStatus
+from services.order_stats_service import OrderStatsService
+
+
+def _order(shop_id, number, status, total, created_at=None):
+    return Order(
+        tracking_id=f"90000070{number}",
+        orderNumber=f"#7{number:04d}",
+        customerName="Client",
+        phone="+77001234567",
+        subtotal=total,
+        total=total,
+        status=status,
+        shop_id=shop_id,
+        created_at=created_at
+    )
+
+
+async def _fresh(session, shop_id):
+    """Stats from a rebuilt rollup"""
+    OrderStatsService.clear()
+    return await OrderStatsService.get_dashboard_stats(session, shop_id)
+
+
+@pytest.mark.asyncio
+async def test_rollup_follows_order_writes(async_engine, sample_shop):
+    shop_id = sample_shop.id
+    yesterday = datetime.now() - timedelta(days=1)
+    session_maker = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_maker() as session:
+        session.add_all([
+            _order(shop_id, 1, OrderStatus.PAID, 5000, yesterday),
+            _order(shop_id, 2, OrderStatus.DELIVERED, 7000, yesterday),
+            _order(shop_id, 3, OrderStatus.PAID, 3000),
+        ])
+        await session.commit()
+
+        stats = await OrderStatsService.get_dashboard_stats(session, shop_id)
+        assert stats["orders_by_status"]["paid"] == 2
+        assert stats["orders_by_status"]["new"] == 0
+        assert (stats["orders_today"], stats["revenue_today"], stats["total_orders"]) == (1, 3000, 3)
+
+        # Creation and status transitions are applied to the cached rollup
+        new_order = _order(shop_id, 4, OrderStatus.NEW, 2000)
+        session.add(new_order)
+        await session.commit()
+        order_id = new_order.id
+        new_order.status = OrderStatus.PAID
+        await session.commit()
+        new_order.status = OrderStatus.DELIVERED
+        new_order.total = 2500
+        await session.commit()
+
+        stats = await OrderStatsService.get_dashboard_stats(session, shop_id)
+        assert stats["orders_by_status"]["delivered"] == 2
+        assert (stats["orders_today"], stats["revenue_today"], stats["total_orders"]) == (2, 5500, 4)
+
+        # Rolled-back writes are not counted
+        new_order.status = OrderStatus.CANCELLED
+        session.add(_order(shop_id, 5, OrderStatus.PAID, 9000))
+        await session.flush()
+        await session.rollback()
+        assert await OrderStatsService.get_dashboard_stats(session, shop_id) == stats
+
+        await session.delete(await session.get(Order, order_id))
+        await session.commit()
+        stats = await OrderStatsService.get_dashboard_stats(session, shop_id)
+        assert (stats["orders_today"], stats["revenue_today"], stats["total_orders"]) == (1, 3000, 3)
+        assert stats == await _fresh(session, shop_id)
@@ -0,0 +1,108 @@
+"""
+Tests for keyset (cursor) pagination
+"""
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from sqlmodel import select
+
+from models import Order, Product, ProductType
+from core.pagination import apply_keyset, encode_cursor, decode_cursor, NEXT_CURSOR_HEADER
+from api.products import helpers
+
+
+async def _create_products(session, shop_id, count, created_at):
+    products = [
+        Product(name=f"P{i}", price=100, type=ProductType.FLOWERS, shop_id=shop_id, created_at=created_at)
+        for i in range(count)
+    ]
+    session.add_all(products)
+    await session.commit()
+    return products
+
+
+def test_cursor_roundtrip_and_invalid_cursor():
+    created_at = datetime(2025, 3, 8, 9, 30, 15, 123456)
+    assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor("not-a-cursor")
+    assert exc_info.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_keyset_pages_cover_equal_timestamps_once(async_session, sample_shop):
+    """Rows sharing created_at are split across pages by id, without gaps or repeats"""
+    products = await _create_products(async_session, sample_shop.id, 5, datetime(2025, 1, 1))
+
+    first = await helpers.get_products_filtered(async_session, shop_id=sample_shop.id, limit=2, cursor="")
+    second = await helpers.get_products_filtered(
+        async_session, shop_id=sample_shop.id, limit=2, cursor=encode_cursor(first[-1].created_at, first[-1].id)
+    )
+    third = await helpers.get_products_filtered(
+        async_session, shop_id=sample_shop.id, limit=2, cursor=encode_cursor(second[-1].created_at, second[-1].id)
+    )
+
+    paged = [p.id for p in first + second + third]
+    assert paged == sorted((p.id for p in products), reverse=True)
+
+
+@pytest.mark.asyncio
+async def test_products_endpoint_sets_next_cursor_header(client, async_session, sample_shop):
+    """The header is present while pages remain and absent on the last page"""
+    await _create_products(async_session, sample_shop.id, 3, datetime(2025, 1, 1))
+
+    response = await client.get("/api/v1/products/", params={"shop_id": sample_shop.id, "limit": 2, "cursor": ""})
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+    next_cursor = response.headers[NEXT_CURSOR_HEADER]
+
+    response = await client.get(
+        "/api/v1/products/", params={"shop_id": sample_shop.id, "limit": 2, "cursor": next_cursor}
+    )
+    assert response.status_code == 200
+    assert len(response.json()) == 1
+    assert NEXT_CURSOR_HEADER not in response.headers
+
+    # Offset mode is unchanged and does not advertise a cursor
+    response = await client.get("/api/v1/products/", params={"shop_id": sample_shop.id, "limit": 2})
+    assert NEXT_CURSOR_HEADER not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_cursor_walk_with_server_default_timestamps(client, async_session, sample_shop):
+    """Rows stamped by server_default (no microseconds on SQLite) page to the end"""
+    shop_id = sample_shop.id
+    async_session.add_all(Product(name=f"P{i}", price=100, type=ProductType.FLOWERS, shop_id=shop_id) for i in range(5))
+    async_session.add_all(
+        Order(
+            tracking_id=f"90000020{i}", orderNumber=f"#2000{i}", customerName="Client",
+            phone="+77001234567", subtotal=0, total=0, shop_id=shop_id
+        )
+        for i in range(5)
+    )
+    await async_session.commit()
+
+    seen, cursor = [], ""
+    for _ in range(5):
+        response = await client.get("/api/v1/products/", params={"shop_id": shop_id, "limit": 2, "cursor": cursor})
+        seen += [product["id"] for product in response.json()]
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            break
+    assert cursor is None
+    assert len(seen) == len(set(seen)) == 5
+
+    dialect = async_session.get_bind().dialect.name
+    seen, cursor = [], ""
+    while True:
+        query = apply_keyset(select(Order).where(Order.shop_id == shop_id), Order.created_at, Order.id, cursor, dialect)
+        page = (await async_session.execute(query.limit(2))).scalars().all()
+        seen += [order.id for order in page]
+        if len(page) < 2:
+            break
+        cursor = encode_cursor(page[-1].created_at, page[-1].id)
+        assert len(seen) <= 5, "cursor does not advance"
+    assert len(seen) == len(set(seen)) == 5
@@ -0,0 +1,154 @@
+"""
+Tests for bulk product upserts and the batched Bitrix product-sync webhook
+"""
+import pytest
+from fastapi import HTTPException
+from httpx import AsyncClient
+from sqlmodel import select
+
+from api import webhooks
+from models import Product, ProductBulkUpsertItem, ProductImage, ProductUpdate
+from services.product_service import ProductService
+
+
+def production_product(product_id: int, title: str, image: str) -> dict:
+    return {
+        "id": product_id,
+        "title": title,
+        "price": "4 950 ₸",
+        "isAvailable": True,
+        "image": image,
+        "images": [image, f"{image}?2"],
+        "catalogHeight": "70 см",
+    }
+
+
+@pytest.mark.asyncio
+async def test_bulk_upsert_creates_updates_and_skips_unchanged(async_session, sample_product, sample_shop):
+    items = [
+        ProductBulkUpsertItem(id=sample_product.id, name="Renamed", price=1500000, tags=["budget"]),
+        ProductBulkUpsertItem(name="New A", price=100, image="https://example.com/a.jpg", images=["https://example.com/a.jpg"]),
+        ProductBulkUpsertItem(name="New B", price=200, cities=["Almaty"]),
+    ]
+
+    result = await ProductService.bulk_upsert_products(async_session, items, sample_shop.id, commit=True)
+
+    assert result.updated == [sample_product.id]
+    assert len(result.created) == 2
+    new_a = result.created[0]
+    # The sample product kept its image; only the new product needs embeddings
+    assert result.image_changed == [new_a]
+
+    renamed = await async_session.get(Product, sample_product.id)
+    await async_session.refresh(renamed)
+    assert renamed.name == "Renamed" and renamed.tags == ["budget"]
+    images = (await async_session.execute(select(ProductImage).where(ProductImage.product_id == new_a))).scalars().all()
+    assert [image.url for image in images] == ["https://example.com/a.jpg"]
+
+    # Same payload again: nothing is written
+    items[1].id, items[2].id = result.created
+    again = await ProductService.bulk_upsert_products(async_session, items, sample_shop.id, commit=True)
+    assert again.unchanged == [sample_product.id, *result.created]
+    assert again.updated == [] and again.image_changed == []
+
+    # An ORM edit forgets the hash, so the next upsert rewrites the row
+    await ProductService.update_product(
+        async_session, sample_product.id, ProductUpdate(name="Edited in admin"), sample_shop.id, commit=True
+    )
+    again = await ProductService.bulk_upsert_products(async_session, items[:1], sample_shop.id, commit=True)
+    assert again.updated == [sample_product.id]
+
+
+@pytest.mark.asyncio
+async def test_bulk_upsert_keeps_indexes_in_sync(client: AsyncClient, async_session, sample_product, sample_shop):
+    await ProductService.bulk_upsert_products(
+        async_session,
+        [ProductBulkUpsertItem(name="Пионы розовые", price=300, tags=["Discount"], cities=["Astana"])],
+        sample_shop.id,
+        commit=True
+    )
+
+    found = (await client.get("/api/v1/products/", params={"search": "пионы"})).json()
+    assert [p["name"] for p in found] == ["Пионы розовые"]
+
+    tagged = (await client.get("/api/v1/products/", params={"shop_id": sample_shop.id, "search": "discount"})).json()
+    assert len(tagged) == 1
+
+    filters = (await client.get("/api/v1/products/filters", params={"shop_id": sample_shop.id})).json()
+    assert filters["tag_counts"]["Discount"] == 1
+
+
+@pytest.mark.asyncio
+async def test_bulk_upsert_rejects_foreign_and_missing_ids(async_session, sample_product, sample_shop):
+    with pytest.raises(HTTPException) as exc:
+        await ProductService.bulk_upsert_products(
+            async_session, [ProductBulkUpsertItem(id=sample_product.id, name="x", price=1)], sample_shop.id + 1
+        )
+    assert exc.value.status_code == 403
+
+    with pytest.raises(HTTPException) as exc:
+        await ProductService.bulk_upsert_products(
+            async_session, [ProductBulkUpsertItem(id=999999, name="x", price=1)], sample_shop.id
+        )
+    assert exc.value.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_batch_webhook_queues_reindex_only_for_changed_images(
+    client: AsyncClient, async_session, sample_shop, monkeypatch
+):
+    queued = []
+
+    async def fake_reindex(product_ids):
+        queued.append(sorted(product_ids))
+
+    monkeypatch.setattr(webhooks, "reindex_changed_images", fake_reindex)
+    monkeypatch.setattr(webhooks, "RAILWAY_SHOP_ID", sample_shop.id)
+    headers = {"x-webhook-secret": webhooks.WEBHOOK_SECRET}
+    url = "/api/v1/webhooks/product-sync/batch"
+
+    products = [
+        production_product(700001, "Эустомы", "https://cvety.kz/1.jpg"),
+        production_product(700002, "Розы", "https://cvety.kz/2.jpg"),
+    ]
+    response = await client.post(url, json={"products": products}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["created"] == 2
+    assert queued == [[700001, 700002]]
+
+    response = await client.post(url, json={"products": products}, headers=headers)
+    assert response.json()["unchanged"] == 2
+    assert response.json()["reindex_queued"] == 0
+
+    products[0]["price"] = "5 500 ₸"
+    products[1]["image"] = "https://cvety.kz/2-new.jpg"
+    response = await client.post(url, json={"products": products}, headers=headers)
+    assert response.json()["updated"] == 2
+    assert queued[-1] == [700002]
+
+    product = await async_session.get(Product, 700001)
+    await async_session.refresh(product)
+    assert product.price == 550000
+
+    response = await client.post(url, json={"products": products}, headers={"x-webhook-secret": "wrong"})
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_batch_webhook_reports_malformed_products_per_item(client: AsyncClient, sample_shop, monkeypatch):
+    async def fake_reindex(product_ids):
+        pass
+
+    monkeypatch.setattr(webhooks, "reindex_changed_images", fake_reindex)
+    monkeypatch.setattr(webhooks, "RAILWAY_SHOP_ID", sample_shop.id)
+    headers = {"x-webhook-secret": webhooks.WEBHOOK_SECRET}
+
+    malformed = production_product(700012, "Тюльпаны", "https://cvety.kz/12.jpg")
+    malformed["images"] = "https://cvety.kz/12.jpg"  # Not a list
+    products = [production_product(700011, "Пионы", "https://cvety.kz/11.jpg"), malformed, {"title": "No id"}]
+    response = await client.post("/api/v1/webhooks/product-sync/batch", json={"products": products}, headers=headers)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["created"], body["failed"]) == (1, 2)
+    assert [error["product_id"] for error in body["errors"]] == [700012, None]
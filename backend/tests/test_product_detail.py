@@ -0,0 +1,85 @@
+"""
+Tests for the product detail loader and its TTL cache
+"""
+import pytest
+from httpx import AsyncClient
+
+from core import cache as cache_module
+from core.cache import TTLCache
+from models import ProductImage, ProductImageCreate
+from services.product_service import ProductService
+from api.products import helpers
+
+
+def test_ttl_cache_expiry_and_eviction(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = TTLCache("test", ttl_seconds=10, max_entries=2)
+
+    cache.set(1, "a")
+    cache.set(2, "b")
+    cache.set(3, "c")  # evicts the oldest entry
+    assert cache.get(1) is None
+    assert cache.get(2) == "b"
+
+    now[0] += 11
+    assert cache.get(3) is None
+
+
+@pytest.mark.asyncio
+async def test_detail_loader_returns_all_parts(async_session, sample_product_with_recipe):
+    data = await helpers.load_product_detail_data(async_session, sample_product_with_recipe.id)
+
+    assert data["product"].id == sample_product_with_recipe.id
+    assert len(data["product"].recipes) == 3
+    assert set(data) == {
+        "product", "images", "variants", "addons", "bundle_rows",
+        "pickup_locations", "product_reviews", "company_reviews"
+    }
+    assert await helpers.load_product_detail_data(async_session, 999999) is None
+
+
+@pytest.mark.asyncio
+async def test_detail_cache_invalidated_by_image_writes(
+    client: AsyncClient, async_session, sample_product, sample_shop
+):
+    url = f"/api/v1/products/{sample_product.id}/detail"
+    assert (await client.get(url)).json()["images"] == []
+
+    # Direct DB write bypasses invalidation: the cached response is served
+    async_session.add(ProductImage(product_id=sample_product.id, url="https://example.com/1.jpg", order=0))
+    await async_session.commit()
+    assert (await client.get(url)).json()["images"] == []
+
+    # Writes through ProductService drop the cached entry
+    await ProductService.create_product_image(
+        async_session,
+        sample_product.id,
+        ProductImageCreate(product_id=sample_product.id, url="https://example.com/2.jpg", order=1),
+        sample_shop.id,
+        commit=True
+    )
+    assert len((await client.get(url)).json()["images"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_detail_cache_dropped_only_on_commit(async_session, sample_product, sample_shop):
+    cache = cache_module.product_detail_cache
+    # The rollback below expires the fixtures: read their ids up front
+    product_id, shop_id = sample_product.id, sample_shop.id
+    cache.set(product_id, b"{}")
+
+    # Before commit a concurrent read would re-cache the old row: keep the entry
+    await ProductService.toggle_product_status(async_session, product_id, False, shop_id, commit=False)
+    assert cache.get(product_id) == b"{}"
+    await async_session.rollback()
+    assert cache.get(product_id) == b"{}"
+
+    await ProductService.toggle_product_status(async_session, product_id, False, shop_id, commit=False)
+    generation = cache.generation
+    await async_session.commit()
+    assert cache.get(product_id) is None
+
+    # A value loaded before the drop is not stored after it
+    cache.set(product_id, b"{}", generation=generation)
+    assert cache.get(product_id) is None
@@ -0,0 +1,61 @@
+"""
+Tests for indexed tag/city filtering via product_tag / product_city link tables
+"""
+import pytest
+from sqlmodel import select
+
+from models import Product, ProductTag, ProductCity, ProductType, ProductUpdate
+from services.product_service import ProductService
+from api.products import helpers
+
+
+async def _links(session, model, product_id):
+    column = model.tag if model is ProductTag else model.city
+    result = await session.execute(select(column).where(model.product_id == product_id).order_by(column))
+    return list(result.scalars().all())
+
+
+@pytest.mark.asyncio
+async def test_links_follow_product_writes(async_session, sample_product, sample_shop):
+    """Links are written on insert, rewritten on update and removed on delete"""
+    assert await _links(async_session, ProductTag, sample_product.id) == ["roses", "urgent"]
+    assert await _links(async_session, ProductCity, sample_product.id) == ["almaty", "astana"]
+
+    await ProductService.update_product(
+        async_session, sample_product.id, ProductUpdate(cities=["Shymkent"]), sample_shop.id, commit=True
+    )
+    assert await _links(async_session, ProductCity, sample_product.id) == ["shymkent"]
+    assert await _links(async_session, ProductTag, sample_product.id) == ["roses", "urgent"]
+
+    product_id = sample_product.id
+    await ProductService.delete_product(async_session, product_id, sample_shop.id, commit=True)
+    assert await _links(async_session, ProductTag, product_id) == []
+    assert await _links(async_session, ProductCity, product_id) == []
+
+
+@pytest.mark.asyncio
+async def test_city_filter_is_exact(async_session, sample_shop):
+    """'astana' must not match 'astana-region'"""
+    exact = Product(name="A", price=100, type=ProductType.FLOWERS, cities=["astana"], shop_id=sample_shop.id)
+    region = Product(name="B", price=100, type=ProductType.FLOWERS, cities=["astana-region"], shop_id=sample_shop.id)
+    async_session.add_all([exact, region])
+    await async_session.commit()
+
+    results = await helpers.get_products_filtered(async_session, city="Astana")
+
+    assert [p.id for p in results] == [exact.id]
+
+
+@pytest.mark.asyncio
+async def test_tag_filter_requires_all_tags(async_session, sample_shop):
+    """Multi-tag filters return only products carrying every tag"""
+    both = Product(name="A", price=100, type=ProductType.FLOWERS, tags=["urgent", "budget"], shop_id=sample_shop.id)
+    one = Product(name="B", price=100, type=ProductType.FLOWERS, tags=["urgent"], shop_id=sample_shop.id)
+    async_session.add_all([both, one])
+    await async_session.commit()
+
+    results = await helpers.get_products_filtered(async_session, tags=["urgent", "budget"])
+    assert [p.id for p in results] == [both.id]
+
+    results = await helpers.get_products_filtered(async_session, tags=["urgent"])
+    assert sorted(p.id for p in results) == sorted([both.id, one.id])
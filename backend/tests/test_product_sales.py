@@ -0,0 +1,107 @@
+"""
+Tests for the product_sales_stats rollup and bestseller ranking
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import select
+
+from models import Order, OrderItem, OrderStatus, Product, ProductType, ProductSalesStats
+from services.product_sales_service import ProductSalesService
+
+
+async def _order(session, shop_id, items, number, status=OrderStatus.NEW):
+    """Create an order with (product, quantity) items"""
+    total = sum(product.price * quantity for product, quantity in items)
+    order = Order(
+        tracking_id=f"9000000{number:02d}",
+        orderNumber=f"#{number:05d}",
+        customerName="Test Customer",
+        phone="+77001234567",
+        subtotal=total,
+        total=total,
+        status=status,
+        shop_id=shop_id
+    )
+    session.add(order)
+    await session.flush()
+    for product, quantity in items:
+        session.add(OrderItem(
+            order_id=order.id,
+            product_id=product.id,
+            product_name=product.name,
+            product_price=product.price,
+            quantity=quantity,
+            item_total=product.price * quantity
+        ))
+    await session.commit()
+    return order
+
+
+async def _set_status(session, order, status):
+    order.status = status
+    await ProductSalesService.on_status_change(session, order)
+    await session.commit()
+
+
+async def _stats(session, product_id):
+    result = await session.execute(select(ProductSalesStats).where(ProductSalesStats.product_id == product_id))
+    return result.scalar_one_or_none()
+
+
+@pytest.mark.asyncio
+async def test_order_counted_once_and_reverted_on_cancel(async_session, sample_shop, sample_product):
+    """PAID then DELIVERED counts once; a later cancellation subtracts the sale"""
+    order = await _order(async_session, sample_shop.id, [(sample_product, 2)], 1)
+
+    await _set_status(async_session, order, OrderStatus.PAID)
+    await _set_status(async_session, order, OrderStatus.DELIVERED)
+
+    stats = await _stats(async_session, sample_product.id)
+    assert (stats.units_total, stats.units_7d, stats.units_30d) == (2, 2, 2)
+    assert stats.revenue_total == 2 * sample_product.price
+
+    await _set_status(async_session, order, OrderStatus.CANCELLED)
+
+    await async_session.refresh(stats)
+    assert (stats.units_total, stats.units_7d, stats.revenue_total) == (0, 0, 0)
+    assert order.sales_recorded_at is None
+
+
+@pytest.mark.asyncio
+async def test_windows_age_out_and_rebuild_matches(async_session, sample_shop, sample_product):
+    """refresh_windows drops old sales from 7/30-day counters; rebuild_all reproduces the rollup"""
+    old = await _order(async_session, sample_shop.id, [(sample_product, 3)], 1)
+    recent = await _order(async_session, sample_shop.id, [(sample_product, 1)], 2)
+    await _set_status(async_session, old, OrderStatus.PAID)
+    await _set_status(async_session, recent, OrderStatus.PAID)
+
+    old.sales_recorded_at = datetime.utcnow() - timedelta(days=10)
+    await async_session.commit()
+    await ProductSalesService.refresh_windows(async_session)
+
+    stats = await _stats(async_session, sample_product.id)
+    await async_session.refresh(stats)
+    assert (stats.units_total, stats.units_7d, stats.units_30d) == (4, 1, 4)
+
+    await ProductSalesService.rebuild_all(async_session)
+    stats = await _stats(async_session, sample_product.id)
+    assert (stats.units_total, stats.units_7d, stats.units_30d) == (4, 1, 4)
+
+
+@pytest.mark.asyncio
+async def test_bestsellers_ranked_by_units_then_filled(async_session, sample_shop, sample_product):
+    """Sold products rank by units; unsold products fill the remaining slots"""
+    hit = Product(name="Hit", price=500000, type=ProductType.FLOWERS, shop_id=sample_shop.id)
+    unsold = Product(name="Unsold", price=500000, type=ProductType.FLOWERS, shop_id=sample_shop.id)
+    async_session.add_all([hit, unsold])
+    await async_session.commit()
+
+    order = await _order(async_session, sample_shop.id, [(hit, 5), (sample_product, 1)], 1)
+    await _set_status(async_session, order, OrderStatus.PAID)
+
+    bestsellers = await ProductSalesService.get_bestsellers(async_session, shop_id=sample_shop.id, limit=3)
+    assert [p.id for p in bestsellers] == [hit.id, sample_product.id, unsold.id]
+
+    bestsellers = await ProductSalesService.get_bestsellers(async_session, shop_id=sample_shop.id, limit=1)
+    assert [p.id for p in bestsellers] == [hit.id]
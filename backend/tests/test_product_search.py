@@ -0,0 +1,166 @@
+"""
+Tests for ranked product search (SQLite FTS5 backend)
+"""
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlmodel import select
+
+from models import Product, ProductCreate, ProductUpdate, ProductType
+from services.product_service import ProductService
+from services.product_search_service import (
+    ProductSearchService, tokenize_query, build_tsquery, build_fts5_match
+)
+from api.products import helpers
+
+
+async def _create(session, shop_id, name, description=None, tags=None, enabled=True):
+    return await ProductService.create_product(
+        session,
+        ProductCreate(
+            name=name,
+            price=1000000,
+            type=ProductType.FLOWERS,
+            description=description,
+            tags=tags,
+            enabled=enabled
+        ),
+        shop_id,
+        commit=True
+    )
+
+
+class TestQueryBuilding:
+    """Test that user input is turned into safe prefix queries"""
+
+    def test_tokenize_strips_operators(self):
+        assert tokenize_query('Розы "красные" & OR (NEAR)') == ["розы", "красные", "or", "near"]
+
+    def test_tsquery_prefix_terms(self):
+        assert build_tsquery(["роз", "крас"]) == "роз:* & крас:*"
+
+    def test_fts5_prefix_terms(self):
+        assert build_fts5_match(["роз", "крас"]) == '"роз"* "крас"*'
+
+
+@pytest.mark.asyncio
+async def test_search_matches_prefix_and_ranks_name_first(async_session, sample_shop):
+    """Name matches outrank description matches; partial words match"""
+    in_description = await _create(async_session, sample_shop.id, "Весенний букет", description="Тюльпаны и розы")
+    in_name = await _create(async_session, sample_shop.id, "Розы красные")
+    await _create(async_session, sample_shop.id, "Хризантемы")
+
+    results = await helpers.get_products_filtered(async_session, shop_id=sample_shop.id, search="роз")
+
+    assert [p.id for p in results] == [in_name.id, in_description.id]
+
+
+@pytest.mark.asyncio
+async def test_search_covers_tags_and_respects_filters(async_session, sample_shop):
+    """Tags are searchable; enabled_only still applies"""
+    tagged = await _create(async_session, sample_shop.id, "Букет", tags=["birthday"])
+    await _create(async_session, sample_shop.id, "Букет 2", tags=["birthday"], enabled=False)
+
+    results = await helpers.get_products_filtered(async_session, shop_id=sample_shop.id, search="birth")
+
+    assert [p.id for p in results] == [tagged.id]
+
+
+@pytest.mark.asyncio
+async def test_search_index_follows_updates_and_deletes(async_session, sample_shop):
+    """ProductService keeps the search index in sync"""
+    product = await _create(async_session, sample_shop.id, "Пионы")
+
+    await ProductService.update_product(
+        async_session, product.id, ProductUpdate(name="Лилии"), sample_shop.id, commit=True
+    )
+    assert await helpers.search_product_suggestions(async_session, "пион", shop_id=sample_shop.id) == []
+    assert await helpers.search_product_suggestions(async_session, "лил", shop_id=sample_shop.id) == ["Лилии"]
+
+    await ProductService.delete_product(async_session, product.id, sample_shop.id, commit=True)
+    assert await helpers.search_product_suggestions(async_session, "лил", shop_id=sample_shop.id) == []
+
+
+class _NoTrigramEngine:
+    """PostgreSQL engine stand-in whose role cannot CREATE EXTENSION"""
+
+    dialect = SimpleNamespace(name="postgresql")
+
+    def __init__(self):
+        self.committed = []
+
+    @asynccontextmanager
+    async def begin(self):
+        executed = []
+
+        async def execute(statement, *args):
+            if "pg_trgm" in str(statement):
+                raise PermissionError("permission denied to create extension \"pg_trgm\"")
+            executed.append(str(statement))
+
+        yield SimpleNamespace(execute=execute)
+        self.committed.extend(executed)
+
+
+def _compile_pg(query) -> str:
+    return str(query.compile(dialect=postgresql.dialect()))
+
+
+class TestPostgresWithoutTrigram:
+    """Search degrades instead of failing when pg_trgm is unavailable"""
+
+    @pytest.mark.asyncio
+    async def test_ensure_schema_keeps_vector_without_extension(self, monkeypatch):
+        monkeypatch.setattr(ProductSearchService, "has_vector", False)
+        monkeypatch.setattr(ProductSearchService, "has_trigram", True)
+        engine = _NoTrigramEngine()
+
+        await ProductSearchService.ensure_schema(engine)
+
+        assert ProductSearchService.has_vector is True
+        assert ProductSearchService.has_trigram is False
+        assert any("ADD COLUMN IF NOT EXISTS search_vector" in s for s in engine.committed)
+        assert any(s.startswith("UPDATE product SET search_vector") for s in engine.committed)
+
+    def test_search_falls_back_to_ilike_without_trigram(self, monkeypatch):
+        monkeypatch.setattr(ProductSearchService, "has_vector", True)
+        monkeypatch.setattr(ProductSearchService, "has_trigram", False)
+
+        sql = _compile_pg(ProductSearchService.apply_search(select(Product), "роз", "postgresql"))
+
+        assert "@@" in sql
+        assert "ILIKE" in sql
+        assert "<%" not in sql
+        assert "word_similarity" not in sql
+
+    def test_search_is_ilike_only_without_vector(self, monkeypatch):
+        monkeypatch.setattr(ProductSearchService, "has_vector", False)
+        monkeypatch.setattr(ProductSearchService, "has_trigram", False)
+
+        sql = _compile_pg(ProductSearchService.apply_search(select(Product), "роз", "postgresql"))
+
+        assert "ILIKE" in sql
+        assert "search_vector" not in sql
+
+    @pytest.mark.asyncio
+    async def test_indexing_skipped_without_vector(self, monkeypatch):
+        monkeypatch.setattr(ProductSearchService, "has_vector", False)
+        executed = []
+
+        async def execute(*args, **kwargs):
+            executed.append(args)
+
+        session = SimpleNamespace(
+            get_bind=lambda: SimpleNamespace(dialect=SimpleNamespace(name="postgresql")),
+            execute=execute
+        )
+        product = Product(id=1, name="Розы", price=1000000, type=ProductType.FLOWERS, shop_id=1)
+
+        await ProductSearchService.index_product(session, product)
+        await ProductSearchService.index_products(
+            session, [{"id": 1, "name": "Розы", "tags": None, "description": None}]
+        )
+
+        assert executed == []
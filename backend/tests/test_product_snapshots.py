@@ -0,0 +1,54 @@
+"""
+Tests for pre-serialized product snapshots and the orjson response path
+"""
+import json
+
+import pytest
+from httpx import AsyncClient
+
+from models import ProductImageCreate, ProductRead, ProductUpdate
+from services.product_service import ProductService
+from services.product_snapshot_service import LIVE_STOCK_FIELDS, ProductSnapshotService
+from api.products import helpers
+
+
+@pytest.mark.asyncio
+async def test_snapshot_matches_product_read(async_session, sample_product):
+    product = await helpers.get_product_by_id(async_session, sample_product.id)
+
+    snapshot = ProductSnapshotService.snapshot(product)
+
+    expected = ProductRead.model_validate(product).model_dump(mode="json", exclude=LIVE_STOCK_FIELDS)
+    assert json.loads(snapshot) == expected
+    # Unchanged product: the cached bytes are reused
+    assert ProductSnapshotService.snapshot(product) is snapshot
+
+
+@pytest.mark.asyncio
+async def test_list_response_follows_writes(client: AsyncClient, async_session, sample_product, sample_shop):
+    params = {"shop_id": sample_shop.id}
+    first = (await client.get("/api/v1/products/", params=params)).json()
+    assert first[0]["images"] == []
+
+    await ProductService.update_product(
+        async_session, sample_product.id, ProductUpdate(name="Renamed"), sample_shop.id, commit=True
+    )
+    await ProductService.create_product_image(
+        async_session,
+        sample_product.id,
+        ProductImageCreate(product_id=sample_product.id, url="https://example.com/1.jpg", order=0),
+        sample_shop.id,
+        commit=True
+    )
+
+    response = await client.get("/api/v1/products/", params=params)
+    assert response.headers["content-type"] == "application/json"
+    assert "ETag" in response.headers
+    product = response.json()[0]
+    assert product["name"] == "Renamed"
+    assert [image["url"] for image in product["images"]] == ["https://example.com/1.jpg"]
+
+    # Listings add live stock on top of the same snapshot
+    assert (product["in_stock"], product["max_quantity"]) == (True, 9999)
+    single = (await client.get(f"/api/v1/products/{sample_product.id}")).json()
+    assert single == {key: value for key, value in product.items() if key not in LIVE_STOCK_FIELDS}
@@ -0,0 +1,106 @@
+"""
+Concurrency tests for oversell-safe reservations
+"""
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel, func, select
+
+from models import (
+    Order, OrderItemRequest, OrderReservation, Product, ProductRecipe, ProductType,
+    Shop, User, UserRole, WarehouseItem
+)
+from services.inventory_service import InsufficientStockError, InventoryService
+
+PARALLEL_ORDERS = 50
+STEMS_IN_STOCK = 20
+
+
+@pytest.fixture
+async def file_session_maker(tmp_path):
+    """File-backed SQLite with a connection per session, so transactions really overlap"""
+    import models  # noqa
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'reservations.db'}", connect_args={"timeout": 60})
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_parallel_reservations_never_oversell(file_session_maker):
+    async with file_session_maker() as session:
+        owner = User(name="Owner", phone="+77000000001", role=UserRole.DIRECTOR, password_hash="x")
+        session.add(owner)
+        await session.flush()
+        shop = Shop(name="Shop", owner_id=owner.id, phone="+77000000001", is_active=True)
+        session.add(shop)
+        await session.flush()
+        roses = WarehouseItem(name="Roses", quantity=STEMS_IN_STOCK, cost_price=1, retail_price=1, shop_id=shop.id)
+        bouquet = Product(name="Last roses", price=100, type=ProductType.FLOWERS, shop_id=shop.id)
+        session.add_all([roses, bouquet])
+        await session.flush()
+        session.add(ProductRecipe(product_id=bouquet.id, warehouse_item_id=roses.id, quantity=1))
+        orders = [
+            Order(
+                tracking_id=f"{100000000 + number}",
+                orderNumber=f"#{number:05d}",
+                customerName="Client",
+                phone="+77001234567",
+                subtotal=100,
+                total=100,
+                shop_id=shop.id
+            )
+            for number in range(PARALLEL_ORDERS)
+        ]
+        session.add_all(orders)
+        await session.commit()
+        order_ids, bouquet_id, roses_id = [order.id for order in orders], bouquet.id, roses.id
+
+    async def checkout(order_id: int) -> bool:
+        async with file_session_maker() as session:
+            try:
+                return await InventoryService.create_reservation(
+                    session, order_id, [OrderItemRequest(product_id=bouquet_id, quantity=1)]
+                )
+            except InsufficientStockError:
+                return False
+
+    results = await asyncio.gather(*(checkout(order_id) for order_id in order_ids))
+
+    assert results.count(True) == STEMS_IN_STOCK
+    async with file_session_maker() as session:
+        reserved = (await session.execute(
+            select(func.sum(OrderReservation.reserved_quantity))
+            .where(OrderReservation.warehouse_item_id == roses_id)
+        )).scalar()
+        assert reserved == STEMS_IN_STOCK
+        assert (await session.get(WarehouseItem, roses_id)).version == STEMS_IN_STOCK
+
+
+@pytest.mark.asyncio
+async def test_checkout_reserves_in_order_transaction(async_session, sample_shop, sample_product_with_recipe):
+    from fastapi import HTTPException
+    from models import OrderCreateWithItems
+    from services.order_service import OrderService
+
+    def order_data(quantity: int) -> OrderCreateWithItems:
+        return OrderCreateWithItems(
+            customerName="Client",
+            phone="+77001234567",
+            delivery_address="Abaya 1",
+            items=[OrderItemRequest(product_id=sample_product_with_recipe.id, quantity=quantity)]
+        )
+
+    # Roses 50 // 15: three bouquets, the order for two more is rejected whole
+    order = await OrderService.create_order_with_items(async_session, order_data(3), sample_shop.id)
+    reservations = await InventoryService.get_order_reservations(async_session, order.id)
+    assert sorted(r["reserved_quantity"] for r in reservations) == [15, 45]
+
+    orders_before = (await async_session.execute(select(func.count(Order.id)))).scalar()
+    with pytest.raises(HTTPException) as exc:
+        await OrderService.create_order_with_items(async_session, order_data(1), sample_shop.id)
+    assert exc.value.status_code == 400
+    assert (await async_session.execute(select(func.count(Order.id)))).scalar() == orders_before
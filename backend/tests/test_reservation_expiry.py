@@ -0,0 +1,68 @@
+"""
+Tests for TTL-based reservation expiry
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import select
+
+from core.metrics import reserved_units_released_total
+from models import Order, OrderItemRequest, OrderReservation, OrderStatus, WarehouseItem
+from services.inventory_service import RESERVATION_TTL_HOURS, InventoryService
+
+
+async def _reserved_order(session, shop_id, product_id, number: int) -> int:
+    order = Order(
+        tracking_id=f"90000030{number}",
+        orderNumber=f"#3030{number}",
+        customerName="Test Customer",
+        phone="+77001234567",
+        subtotal=0,
+        total=0,
+        shop_id=shop_id
+    )
+    session.add(order)
+    await session.commit()
+    await InventoryService.create_reservation(session, order.id, [OrderItemRequest(product_id=product_id, quantity=1)])
+    return order.id
+
+
+@pytest.mark.asyncio
+async def test_expired_reservations_of_unpaid_orders_are_released(
+    async_session, sample_shop, sample_product_with_recipe, sample_warehouse_items
+):
+    roses, leaves, _ = sample_warehouse_items
+    product_id = sample_product_with_recipe.id
+    abandoned = await _reserved_order(async_session, sample_shop.id, product_id, 1)
+    paid = await _reserved_order(async_session, sample_shop.id, product_id, 2)
+
+    expires = (await async_session.execute(
+        select(OrderReservation.expires_at).where(OrderReservation.order_id == abandoned)
+    )).scalars().all()
+    assert len(expires) == 2 and all(expires_at is not None for expires_at in expires)
+
+    # Moving past NEW pins the order's reservations
+    order = await async_session.get(Order, paid)
+    order.status = OrderStatus.PAID
+    await async_session.commit()
+
+    # Nothing is due yet
+    stats = await InventoryService.release_expired_reservations(async_session)
+    assert stats == {"reservations_released": 0, "units_released": 0}
+
+    units_before = reserved_units_released_total._value.get()
+    later = datetime.utcnow() + timedelta(hours=RESERVATION_TTL_HOURS, minutes=1)
+    stats = await InventoryService.release_expired_reservations(async_session, now=later, batch_size=1)
+    assert stats == {"reservations_released": 2, "units_released": 20}
+    assert reserved_units_released_total._value.get() - units_before == 20
+
+    remaining = (await async_session.execute(
+        select(OrderReservation.order_id, OrderReservation.expires_at)
+    )).all()
+    assert remaining == [(paid, None), (paid, None)]
+    counters = (await async_session.execute(
+        select(WarehouseItem.reserved_quantity)
+        .where(WarehouseItem.id.in_([roses.id, leaves.id]))
+        .order_by(WarehouseItem.id)
+    )).scalars().all()
+    assert counters == [15, 5]
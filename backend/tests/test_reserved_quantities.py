@@ -0,0 +1,91 @@
+"""
+Tests for maintained warehouse reserved_quantity counters and their audit
+"""
+import pytest
+from sqlalchemy import update
+from sqlmodel import select
+
+from models import Order, OrderItemRequest, OrderStatus, WarehouseItem
+from services.inventory_service import InventoryService
+
+
+async def _order(session, shop_id, number: int) -> Order:
+    order = Order(
+        tracking_id=f"90000020{number}",
+        orderNumber=f"#2020{number}",
+        customerName="Test Customer",
+        phone="+77001234567",
+        subtotal=0,
+        total=0,
+        shop_id=shop_id
+    )
+    session.add(order)
+    await session.commit()
+    return order
+
+
+async def _counters(session, items):
+    result = await session.execute(
+        select(WarehouseItem.id, WarehouseItem.quantity, WarehouseItem.reserved_quantity)
+        .where(WarehouseItem.id.in_([item.id for item in items]))
+        .order_by(WarehouseItem.id)
+    )
+    return [(quantity, reserved) for _, quantity, reserved in result.all()]
+
+
+@pytest.mark.asyncio
+async def test_counters_follow_reservation_lifecycle(
+    async_session, sample_shop, sample_product_with_recipe, sample_warehouse_items
+):
+    items = sample_warehouse_items
+    product_id = sample_product_with_recipe.id
+    first = await _order(async_session, sample_shop.id, 1)
+    second = await _order(async_session, sample_shop.id, 2)
+
+    await InventoryService.create_reservation(async_session, first.id, [OrderItemRequest(product_id=product_id, quantity=2)])
+    await InventoryService.create_reservation(async_session, second.id, [OrderItemRequest(product_id=product_id, quantity=1)])
+    # Roses 15 and leaves 5 per bouquet; the optional ribbon is never reserved
+    assert await _counters(async_session, items) == [(50, 45), (100, 15), (30, 0)]
+    assert await InventoryService.get_reserved_quantities(async_session, [i.id for i in items]) == {
+        items[0].id: 45, items[1].id: 15
+    }
+
+    # Assembly turns the reservation into a deduction
+    await InventoryService.convert_reservations_to_deductions(async_session, first.id)
+    assert await _counters(async_session, items) == [(20, 15), (90, 5), (30, 0)]
+
+    assert await InventoryService.release_reservations(async_session, second.id) == 2
+    assert await _counters(async_session, items) == [(20, 0), (90, 0), (30, 0)]
+
+    # Expiry cleanup of an abandoned order
+    third = await _order(async_session, sample_shop.id, 3)
+    await InventoryService.create_reservation(async_session, third.id, [OrderItemRequest(product_id=product_id, quantity=1)])
+    third.status = OrderStatus.CANCELLED
+    await async_session.commit()
+    stats = await InventoryService.cleanup_expired_reservations(async_session, max_age_hours=-1, dry_run=False)
+    assert stats["reservations_deleted"] == 2
+    assert await _counters(async_session, items) == [(20, 0), (90, 0), (30, 0)]
+
+
+@pytest.mark.asyncio
+async def test_audit_reports_and_repairs_drift(
+    async_session, sample_shop, sample_product_with_recipe, sample_warehouse_items
+):
+    roses, leaves, _ = sample_warehouse_items
+    order = await _order(async_session, sample_shop.id, 1)
+    await InventoryService.create_reservation(
+        async_session, order.id, [OrderItemRequest(product_id=sample_product_with_recipe.id, quantity=1)]
+    )
+    assert (await InventoryService.audit_reserved_quantities(async_session))["items_drifted"] == 0
+
+    await async_session.execute(update(WarehouseItem).where(WarehouseItem.id == roses.id).values(reserved_quantity=7))
+    await async_session.commit()
+
+    report = await InventoryService.audit_reserved_quantities(async_session)
+    assert report["drifted"] == [{"warehouse_item_id": roses.id, "counter": 7, "actual": 15}]
+    assert not report["repaired"]
+
+    report = await InventoryService.audit_reserved_quantities(async_session, repair=True)
+    assert report["repaired"]
+    assert await _counters(async_session, [roses, leaves]) == [(50, 15), (100, 5)]
+    assert (await InventoryService.audit_reserved_quantities(async_session))["items_drifted"] == 0
@@ -0,0 +1,74 @@
+"""
+Tests for the shop_rating_stats rollup and the public shop directory
+"""
+import pytest
+from httpx import AsyncClient
+from sqlmodel import select
+
+from models import Shop, ShopRatingStats, User, UserRole
+from services.shop_rating_service import ShopRatingService
+
+
+async def create_shop(async_session, name: str, phone: str) -> Shop:
+    owner = User(name=f"{name} Owner", phone=phone, role=UserRole.DIRECTOR, password_hash="x")
+    async_session.add(owner)
+    await async_session.commit()
+    shop = Shop(name=name, owner_id=owner.id, phone=phone, is_active=True)
+    async_session.add(shop)
+    await async_session.commit()
+    await async_session.refresh(shop)
+    return shop
+
+
+async def post_review(client: AsyncClient, shop_id: int, rating: int) -> None:
+    response = await client.post(
+        "/api/v1/reviews/company",
+        json={"author_name": "Client", "rating": rating, "text": "Flowers", "shop_id": shop_id}
+    )
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_reviews_maintain_rollup_and_rating_sort(client: AsyncClient, async_session, sample_shop):
+    good = await create_shop(async_session, "Good", "+77000000001")
+    unrated = await create_shop(async_session, "Unrated", "+77000000002")
+
+    await post_review(client, sample_shop.id, 5)
+    await post_review(client, sample_shop.id, 2)
+    await post_review(client, good.id, 4)
+    await post_review(client, good.id, 5)
+
+    stats = (await async_session.execute(
+        select(ShopRatingStats).where(ShopRatingStats.shop_id == good.id)
+    )).scalar_one()
+    assert (stats.review_count, stats.rating_sum, stats.rating_avg) == (2, 9, 4.5)
+
+    shops = (await client.get("/api/v1/shops/", params={"sort": "rating"})).json()
+    assert [s["id"] for s in shops] == [good.id, sample_shop.id, unrated.id]
+    assert (shops[0]["rating"], shops[0]["review_count"]) == (4.5, 2)
+    assert (shops[2]["rating"], shops[2]["review_count"]) == (None, 0)
+
+    # Paging across the rated/unrated boundary
+    page = (await client.get("/api/v1/shops/", params={"sort": "rating", "skip": 1, "limit": 1})).json()
+    assert [s["id"] for s in page] == [sample_shop.id]
+    page = (await client.get("/api/v1/shops/", params={"sort": "rating", "skip": 2, "limit": 5})).json()
+    assert [s["id"] for s in page] == [unrated.id]
+
+    newest = (await client.get("/api/v1/shops/")).json()
+    assert {s["id"]: s["review_count"] for s in newest} == {sample_shop.id: 2, good.id: 2, unrated.id: 0}
+
+    detail = (await client.get(f"/api/v1/shops/{sample_shop.id}")).json()
+    assert (detail["rating"], detail["review_count"]) == (3.5, 2)
+
+
+@pytest.mark.asyncio
+async def test_rebuild_matches_incremental_rollup(client: AsyncClient, async_session, sample_shop):
+    for rating in (5, 4, 4):
+        await post_review(client, sample_shop.id, rating)
+    incremental = await ShopRatingService.get_rating(async_session, sample_shop.id)
+
+    await ShopRatingService.rebuild_all(async_session)
+    await async_session.commit()
+
+    assert await ShopRatingService.get_rating(async_session, sample_shop.id) == incremental
+    assert incremental == (pytest.approx(13 / 3), 3)
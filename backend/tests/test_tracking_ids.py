@@ -0,0 +1,63 @@
+"""
+Tests for tracking IDs from a keyed permutation of a sequence
+"""
+import numpy as np
+import pytest
+
+from models import Order, TrackingIdSequence
+from services.tracking_id_service import TrackingIdPermutation, TrackingIdService
+
+KEY = bytes(range(32))
+
+
+@pytest.mark.parametrize("digits", [4, 5])
+def test_permutation_is_a_bijection(digits):
+    domain = 10 ** digits
+    permuted = TrackingIdPermutation(KEY, digits=digits).permute(np.arange(domain))
+    assert np.array_equal(np.sort(permuted), np.arange(domain, dtype=np.uint64))
+    # Not the identity
+    assert (permuted != np.arange(domain, dtype=np.uint64)).sum() > domain * 0.99
+
+
+def test_millions_of_sequence_values_give_unique_ids():
+    permutation = TrackingIdPermutation(KEY)
+    ids = permutation.permute(np.arange(1, 2_000_001))
+    assert len(np.unique(ids)) == len(ids)
+    assert ids.max() < 10 ** 9
+    # Consecutive IDs do not follow each other
+    increasing = (np.diff(ids.astype(np.int64)) > 0).mean()
+    assert 0.45 < increasing < 0.55
+    assert permutation.format(1) == f"{int(ids[0]):09d}"
+
+
+def test_keys_give_different_ids():
+    values = np.arange(1, 1001)
+    first = TrackingIdPermutation(KEY).permute(values)
+    second = TrackingIdPermutation(bytes(32)).permute(values)
+    assert (first == second).sum() < 5
+
+
+@pytest.mark.asyncio
+async def test_next_tracking_id_skips_existing_ids(async_session, sample_shop):
+    permutation = TrackingIdPermutation(KEY)
+    async_session.add(TrackingIdSequence(id=1, counter=0, key=KEY.hex()))
+    # Handed out by the old random generator before the sequence existed
+    async_session.add(Order(
+        tracking_id=permutation.format(2),
+        orderNumber="#00001",
+        customerName="Legacy",
+        phone="+77001234567",
+        subtotal=0,
+        total=0,
+        shop_id=sample_shop.id
+    ))
+    await async_session.commit()
+
+    ids = [await TrackingIdService.next_tracking_id(async_session) for _ in range(3)]
+    await async_session.commit()
+    assert ids == [permutation.format(1), permutation.format(3), permutation.format(4)]
+    assert all(len(tracking_id) == 9 and tracking_id.isdigit() for tracking_id in ids)
+
+    counter = await async_session.get(TrackingIdSequence, 1)
+    await async_session.refresh(counter)
+    assert counter.counter == 100
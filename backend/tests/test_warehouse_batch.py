@@ -0,0 +1,54 @@
+"""
+Tests for batch warehouse deliveries and write-offs
+"""
+import pytest
+from sqlmodel import select
+
+from models import WarehouseBatchLine, WarehouseItem, WarehouseOperation, WarehouseOperationType
+from services.availability_engine import AvailabilityEngine
+from services.inventory_service import InventoryService
+
+
+@pytest.mark.asyncio
+async def test_batch_applies_valid_lines_in_one_transaction(
+    async_session, sample_shop, sample_product_with_recipe, sample_warehouse_items
+):
+    roses, leaves, ribbon = sample_warehouse_items
+    bouquet_id = sample_product_with_recipe.id
+    assert (await AvailabilityEngine.get_shop_max_quantities(async_session, sample_shop.id))[bouquet_id] == 3
+
+    result = await InventoryService.apply_warehouse_batch(async_session, sample_shop.id, [
+        WarehouseBatchLine(warehouse_item_id=roses.id, quantity=25, cost_price_tenge=600, description="Supplier A"),
+        WarehouseBatchLine(warehouse_item_id=leaves.id, quantity=-5, description="Wilted"),
+        WarehouseBatchLine(warehouse_item_id=ribbon.id, quantity=-31),
+        WarehouseBatchLine(warehouse_item_id=999999, quantity=10),
+        # Checked against the balance after the delivery above
+        WarehouseBatchLine(warehouse_item_id=roses.id, quantity=-70),
+    ])
+
+    assert (result.applied, result.failed) == (3, 2)
+    assert [(r.applied, r.balance_after) for r in result.results] == [
+        (True, 75), (True, 95), (False, None), (False, None), (True, 5)
+    ]
+    assert result.results[2].error == "Cannot write off more than available quantity (30)"
+    assert result.results[3].error == "Warehouse item not found"
+
+    operations = (await async_session.execute(
+        select(WarehouseOperation).order_by(WarehouseOperation.id)
+    )).scalars().all()
+    assert [(o.warehouse_item_id, o.operation_type, o.quantity_change, o.balance_after) for o in operations] == [
+        (roses.id, WarehouseOperationType.DELIVERY, 25, 75),
+        (roses.id, WarehouseOperationType.PRICE_CHANGE, 0, 75),
+        (leaves.id, WarehouseOperationType.WRITEOFF, -5, 95),
+        (roses.id, WarehouseOperationType.WRITEOFF, -70, 5),
+    ]
+    assert [r.operation_id for r in result.results if r.applied] == [operations[0].id, operations[2].id, operations[3].id]
+    assert (operations[1].old_value, operations[1].new_value) == (50000, 60000)
+
+    stock = (await async_session.execute(
+        select(WarehouseItem.quantity, WarehouseItem.cost_price).order_by(WarehouseItem.id)
+    )).all()
+    assert stock == [(5, 60000), (95, 10000), (30, 5000)]
+    assert roses.quantity == 5 and roses.last_delivery_date is not None
+    # Availability follows the batch: 5 roses no longer cover a bouquet
+    assert (await AvailabilityEngine.get_shop_max_quantities(async_session, sample_shop.id))[bouquet_id] == 0
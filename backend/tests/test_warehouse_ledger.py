@@ -0,0 +1,85 @@
+"""
+Tests for warehouse ledger snapshots and stock reports
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import func, select
+
+from models import WarehouseOperation, WarehouseOperationType, WarehouseStockSnapshot
+from services.warehouse_ledger_service import WarehouseLedgerService
+
+DELIVERY = WarehouseOperationType.DELIVERY
+SALE = WarehouseOperationType.SALE
+WRITEOFF = WarehouseOperationType.WRITEOFF
+
+
+async def _ledger(session, item_id, start_balance, moves):
+    """Append (created_at, type, change) operations with running balances"""
+    balance = start_balance
+    for created_at, operation_type, change in moves:
+        balance += change
+        session.add(WarehouseOperation(
+            warehouse_item_id=item_id,
+            operation_type=operation_type,
+            quantity_change=change,
+            balance_after=balance,
+            description="test",
+            created_at=created_at
+        ))
+    await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_reports_match_with_and_without_snapshots(async_session, sample_warehouse_items):
+    roses = sample_warehouse_items[0]
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    day = lambda n, hour: today - timedelta(days=n) + timedelta(hours=hour)  # noqa: E731
+
+    # Roses start at 10 stems four days ago
+    await _ledger(async_session, roses.id, 10, [
+        (day(4, 9), DELIVERY, 40),
+        (day(4, 18), SALE, -5),
+        (day(2, 10), WRITEOFF, -3),
+        (day(2, 12), SALE, -10),
+        (day(1, 8), DELIVERY, 20),
+        (day(0, 0), SALE, -2),
+    ])
+
+    periods = [
+        (None, None),
+        (day(4, 12), day(1, 9)),
+        (day(3, 0), day(1, 0)),
+        (day(2, 11), day(0, 1)),
+        (None, day(2, 0)),
+    ]
+    before = [await WarehouseLedgerService.stock_report(async_session, roses.id, *p) for p in periods]
+
+    assert await WarehouseLedgerService.take_snapshots(async_session) == 3
+    # Nothing new to roll up on the next run
+    assert await WarehouseLedgerService.take_snapshots(async_session) == 0
+    snapshots = (await async_session.execute(
+        select(WarehouseStockSnapshot.closing_quantity, WarehouseStockSnapshot.delivery, WarehouseStockSnapshot.sale)
+        .order_by(WarehouseStockSnapshot.day)
+    )).all()
+    assert snapshots == [(45, 40, -5), (32, 0, -10), (52, 20, 0)]
+
+    after = [await WarehouseLedgerService.stock_report(async_session, roses.id, *p) for p in periods]
+    for old, new in zip(before, after):
+        assert (old.stock_at_start, old.movements) == (new.stock_at_start, new.movements)
+        if old.date_to != new.date_to:
+            continue  # date_to defaulted to now
+        assert old.stock_at_end == new.stock_at_end
+
+    full = after[0]
+    assert (full.stock_at_start, full.stock_at_end) == (None, 50)
+    assert full.movements == {"delivery": 60, "sale": -17, "writeoff": -3, "inventory": 0}
+
+    report = after[1]
+    assert (report.stock_at_start, report.stock_at_end) == (50, 52)
+    assert report.movements == {"delivery": 20, "sale": -15, "writeoff": -3, "inventory": 0}
+    assert report.stock_at_end - report.stock_at_start == report.net_change
+
+    # Before the first operation: the opening balance
+    assert await WarehouseLedgerService.stock_at(async_session, roses.id, day(5, 0)) == 10
+    assert (await async_session.execute(select(func.count(WarehouseStockSnapshot.id)))).scalar() == 3
@@ -53,6 +53,28 @@ def normalize_phone_number(phone: str) -> str:
     return '+' + cleaned
 
 
+def phone_search_key(phone: Optional[str]) -> Optional[str]:
+    """
+    Phone as indexed for order search (order.phone_normalized).
+
+    Valid Kazakhstan numbers are normalized to +7XXXXXXXXXX; anything else
+    (foreign or malformed numbers from imports) is kept with spaces stripped,
+    so exact matches still work.
+
+    Args:
+        phone: Phone number as entered
+
+    Returns:
+        Search key, or None for an empty phone
+    """
+    if not phone:
+        return None
+    try:
+        return normalize_phone_number(phone)
+    except ValueError:
+        return re.sub(r'\s', '', phone)[:20] or None
+
+
 def validate_phone_number(phone: str) -> bool:
     """
     Validate Kazakhstan phone number format.
@@ -44,6 +44,43 @@ async def add_warehouse_stock(
     )
 
 
+@ToolRegistry.register(domain="inventory", requires_auth=True)
+async def add_warehouse_stock_batch(
+    token: str,
+    lines: List[Dict[str, Any]],
+) -> Dict[str, Any]:
+    """
+    Apply a whole supplier delivery (or several write-offs) in one call (admin only).
+
+    Args:
+        token: Admin JWT token
+        lines: Batch lines, each with:
+            - warehouse_item_id: ID of warehouse item
+            - quantity: Positive for delivery, negative for write-off
+            - cost_price_tenge: Optional new cost price in tenge (deliveries)
+            - description: Optional supplier note or write-off reason
+
+    Returns:
+        Counts of applied/failed lines and a result per line
+        (applied, operation_id, balance_after, error)
+
+    Example:
+        await add_warehouse_stock_batch(
+            token=admin_token,
+            lines=[
+                {"warehouse_item_id": 5, "quantity": 100, "cost_price_tenge": 350},
+                {"warehouse_item_id": 8, "quantity": 40},
+                {"warehouse_item_id": 9, "quantity": -3, "description": "Damaged tulips"},
+            ]
+        )
+    """
+    return await api_client.post(
+        "/warehouse/batch",
+        json_data={"lines": lines},
+        token=token
+    )
+
+
 # ===== Warehouse Operations =====
 
 @ToolRegistry.register(domain="inventory", requires_auth=True)
@@ -183,6 +220,46 @@ async def get_warehouse_history(
     )
 
 
+@ToolRegistry.register(domain="inventory", requires_auth=True)
+async def get_warehouse_stock_report(
+    token: str,
+    warehouse_item_id: int,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Get stock at a date and movement totals over a period (admin only).
+
+    Answers "how many did we have on the 1st" and "how much was delivered /
+    sold / written off this month" without paging through the history.
+
+    Args:
+        token: Admin JWT token
+        warehouse_item_id: ID of warehouse item (required)
+        date_from: Period start, ISO datetime in UTC (optional, default: all history)
+        date_to: Period end, ISO datetime in UTC, exclusive (optional, default: now)
+
+    Returns:
+        stock_at_start, stock_at_end, movements per operation type and net_change
+
+    Example:
+        # Roses in March
+        await get_warehouse_stock_report(
+            token=admin_token,
+            warehouse_item_id=5,
+            date_from="2025-03-01T00:00:00",
+            date_to="2025-04-01T00:00:00"
+        )
+    """
+    params = merge_required_optional({}, {"date_from": date_from, "date_to": date_to})
+
+    return await api_client.get(
+        f"/warehouse/{warehouse_item_id}/stock-report",
+        token=token,
+        params=params
+    )
+
+
 # ===== Inventory Checks =====
 
 @ToolRegistry.register(domain="inventory", requires_auth=True)
@@ -36,7 +36,8 @@ async def list_products(
         limit: Number of products to return (max 100)
 
     Returns:
-        List of products with details
+        List of products with details, including live stock: in_stock and
+        max_quantity (how many can be assembled from the warehouse right now)
     """
     params = merge_required_optional(
         {"skip": skip, "limit": limit, "enabled_only": enabled_only},
@@ -114,7 +115,9 @@ async def check_product_availability(
 ) -> Dict[str, Any]:
     """
     Check if a product is available in the requested quantity.
-    Considers warehouse inventory and product recipes.
+    Considers warehouse inventory, reservations and product recipes, and lists
+    every ingredient. For a quick in-stock answer on many products, use the
+    in_stock / max_quantity fields returned by list_products.
     """
     return await api_client.get(
         f"/products/{product_id}/availability",
@@ -128,13 +131,14 @@ async def check_product_availability(
 @ToolRegistry.register(domain="products", requires_auth=False, is_public=True)
 async def get_bestsellers(
     shop_id: int = Config.DEFAULT_SHOP_ID,
-    limit: int = 10
+    limit: int = 10,
+    period: str = "all"
 ) -> List[Dict[str, Any]]:
-    """Get bestselling products sorted by order count."""
+    """Get bestselling products sorted by units sold (period: all, 30d or 7d)."""
     return await api_client.get(
         "/products/public/bestsellers",
         params=merge_required_optional(
-            {"limit": limit},
+            {"limit": limit, "period": period},
             {"shop_id": shop_id},
         ),
     )
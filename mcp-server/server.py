@@ -104,9 +104,9 @@ async def check_product_availability(product_id: int, quantity: int = 1, shop_id
 
 
 @mcp.tool()
-async def get_bestsellers(shop_id: int = Config.DEFAULT_SHOP_ID, limit: int = 10):
-    """Get bestselling products sorted by order count."""
-    return await product_tools.get_bestsellers(shop_id, limit)
+async def get_bestsellers(shop_id: int = Config.DEFAULT_SHOP_ID, limit: int = 10, period: str = "all"):
+    """Get bestselling products sorted by units sold (period: all, 30d or 7d)."""
+    return await product_tools.get_bestsellers(shop_id, limit, period)
 
 
 @mcp.tool()
@@ -210,6 +210,12 @@ async def add_warehouse_stock(token: str, warehouse_item_id: int, quantity: int,
     return await inventory_tools.add_warehouse_stock(token, warehouse_item_id, quantity, notes)
 
 
+@mcp.tool()
+async def add_warehouse_stock_batch(token: str, lines: list):
+    """Apply a whole supplier delivery or several write-offs in one call (admin only)."""
+    return await inventory_tools.add_warehouse_stock_batch(token, lines)
+
+
 @mcp.tool()
 async def record_warehouse_operation(
     token: str,
@@ -238,6 +244,12 @@ async def get_warehouse_history(
     )
 
 
+@mcp.tool()
+async def get_warehouse_stock_report(token: str, warehouse_item_id: int, date_from=None, date_to=None):
+    """Get stock at a date and movement totals over a period (admin only)."""
+    return await inventory_tools.get_warehouse_stock_report(token, warehouse_item_id, date_from, date_to)
+
+
 @mcp.tool()
 async def create_inventory_check(token: str, conducted_by: str, items: list, comment=None):
     """Create new inventory check with all items (admin only)."""